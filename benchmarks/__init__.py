@@ -0,0 +1 @@
+"""End-to-end benchmarks of the recommendation system on synthetic MPD-shaped data."""
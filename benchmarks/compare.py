@@ -0,0 +1,112 @@
+"""Compare two benchmark reports and flag regressions.
+
+    python -m benchmarks.compare baseline.json candidate.json --threshold 0.10
+
+Benchmarks are matched by name and compared on their median. A benchmark
+regresses when the candidate is slower by more than ``threshold`` (relative)
+and by more than ``min_delta`` seconds (absolute, to ignore noise on
+microsecond paths), or when it succeeded in the baseline and errors now. The
+exit status is 1 when anything regressed.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_THRESHOLD = 0.10
+DEFAULT_MIN_DELTA = 0.0005
+
+
+def load_report(path: Path) -> Dict[str, Any]:
+    return json.loads(Path(path).read_text())
+
+
+def compare(
+    baseline: Dict[str, Any],
+    candidate: Dict[str, Any],
+    threshold: float = DEFAULT_THRESHOLD,
+    min_delta: float = DEFAULT_MIN_DELTA,
+    stat: str = "median"
+) -> List[Dict[str, Any]]:
+    """Per-benchmark comparison rows, in candidate order.
+
+    Args:
+        baseline: Baseline report
+        candidate: Candidate report
+        threshold: Relative slowdown that counts as a regression
+        min_delta: Absolute slowdown in seconds below which changes are ignored
+        stat: Statistic to compare
+
+    Returns:
+        Rows with name, baseline, candidate, ratio and verdict
+    """
+    rows = []
+    base_results = baseline.get("benchmarks", {})
+    for name, result in candidate.get("benchmarks", {}).items():
+        before = base_results.get(name)
+        old = (before or {}).get("stats", {}).get(stat)
+        new = result.get("stats", {}).get(stat)
+        ratio: Optional[float] = None
+        if before is None:
+            verdict = "new"
+        elif result["status"] != "ok":
+            verdict = "regressed" if before["status"] == "ok" else result["status"]
+        elif old is None:
+            verdict = "fixed"
+        else:
+            ratio = new / old if old else None
+            delta = new - old
+            if delta > min_delta and (ratio is None or ratio > 1 + threshold):
+                verdict = "regressed"
+            elif -delta > min_delta and ratio is not None and ratio < 1 - threshold:
+                verdict = "improved"
+            else:
+                verdict = "same"
+        rows.append({"name": name, "baseline": old, "candidate": new, "ratio": ratio, "verdict": verdict})
+    return rows
+
+
+def _header(report: Dict[str, Any]) -> str:
+    git = report.get("git", {})
+    commit = (git.get("commit") or "unknown")[:10] + ("+dirty" if git.get("dirty") else "")
+    return f"{commit} scale={report.get('scale')} seed={report.get('seed')}"
+
+
+def _mismatch(baseline: Dict[str, Any], candidate: Dict[str, Any]) -> Optional[Tuple[str, Any, Any]]:
+    for key in ("scale", "seed", "latency", "dataset"):
+        if baseline.get(key) != candidate.get(key):
+            return key, baseline.get(key), candidate.get(key)
+    return None
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare two benchmark reports")
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("candidate", type=Path)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--min-delta", type=float, default=DEFAULT_MIN_DELTA)
+    parser.add_argument("--stat", default="median", choices=["min", "median", "mean", "p95"])
+    args = parser.parse_args(argv)
+
+    baseline, candidate = load_report(args.baseline), load_report(args.candidate)
+    mismatch = _mismatch(baseline, candidate)
+    if mismatch:
+        print(f"Reports are not comparable: {mismatch[0]} {mismatch[1]!r} != {mismatch[2]!r}", file=sys.stderr)
+        return 2
+
+    print(f"baseline:  {_header(baseline)}")
+    print(f"candidate: {_header(candidate)}")
+    rows = compare(baseline, candidate, args.threshold, args.min_delta, args.stat)
+    for row in rows:
+        old = f"{row['baseline'] * 1000:10.3f}" if row["baseline"] is not None else f"{'-':>10s}"
+        new = f"{row['candidate'] * 1000:10.3f}" if row["candidate"] is not None else f"{'-':>10s}"
+        ratio = f"{row['ratio']:6.2f}x" if row["ratio"] is not None else f"{'':7s}"
+        print(f"{row['name']:50s} {old} ms {new} ms {ratio}  {row['verdict']}")
+
+    return 1 if any(row["verdict"] == "regressed" for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,217 @@
+"""Minimal benchmark harness producing machine-readable results.
+
+Benchmarks are plain functions registered with ``@benchmark``. Each receives
+the shared ``BenchmarkContext`` and returns a zero-argument callable to time
+(setup stays out of the measurement), optionally with extra counters to
+record alongside the timings:
+
+    @benchmark("users.get_user", group="users", repeat=200)
+    def get_user(ctx):
+        manager = user_manager(ctx)
+        return lambda: manager.get_user("user00042")
+
+Results are keyed by benchmark name, so two runs of the same suite can be
+diffed with ``benchmarks.compare``.
+"""
+
+import inspect
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import traceback
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+SCHEMA_VERSION = 1
+
+Timed = Callable[[], Any]
+Setup = Callable[["BenchmarkContext"], Union[Timed, Tuple[Timed, Dict[str, Any]]]]
+
+
+class SkipBenchmark(Exception):
+    """Raised by a benchmark setup when it cannot run in this environment."""
+
+
+@dataclass
+class Benchmark:
+    """A registered benchmark."""
+    name: str
+    group: str
+    setup: Setup
+    repeat: Optional[int] = None
+    warmup: int = 1
+
+
+@dataclass
+class BenchmarkResult:
+    """Timings of one benchmark, in seconds."""
+    name: str
+    group: str
+    status: str
+    samples: List[float] = field(default_factory=list)
+    extra: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        if not self.samples:
+            return {}
+        samples = sorted(self.samples)
+        return {
+            "n": len(samples),
+            "min": samples[0],
+            "median": statistics.median(samples),
+            "mean": statistics.fmean(samples),
+            "p95": float(np.percentile(samples, 95)),
+            "max": samples[-1],
+            "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = asdict(self)
+        result["stats"] = self.stats
+        return result
+
+
+REGISTRY: Dict[str, Benchmark] = {}
+
+
+def benchmark(name: str, group: str, repeat: Optional[int] = None, warmup: int = 1):
+    """Register a benchmark setup function under ``name``."""
+    def decorator(setup: Setup) -> Setup:
+        if name in REGISTRY:
+            raise ValueError(f"Duplicate benchmark name: {name}")
+        REGISTRY[name] = Benchmark(name=name, group=group, setup=setup, repeat=repeat, warmup=warmup)
+        return setup
+    return decorator
+
+
+class BenchmarkContext:
+    """Shared, lazily built fixtures for one run; see ``benchmarks.suites``."""
+
+    def __init__(
+        self,
+        scale: str,
+        n_playlists: int,
+        seed: int,
+        data_dir: Path,
+        work_dir: Path,
+        latency: float = 0.0
+    ):
+        self.scale = scale
+        self.n_playlists = n_playlists
+        self.seed = seed
+        self.latency = latency
+        self.data_dir = Path(data_dir)
+        self.work_dir = Path(work_dir)
+        self._fixtures: Dict[str, Any] = {}
+
+    def fixture(self, name: str, factory: Callable[[], Any]) -> Any:
+        """Build ``name`` once per run."""
+        if name not in self._fixtures:
+            self._fixtures[name] = factory()
+        return self._fixtures[name]
+
+    def close(self) -> None:
+        for value in self._fixtures.values():
+            close = getattr(value, "close", None)
+            if callable(close) and not inspect.iscoroutinefunction(close):
+                try:
+                    close()
+                except Exception:
+                    pass
+        self._fixtures.clear()
+
+
+def run_benchmark(bench: Benchmark, ctx: BenchmarkContext, repeat: int) -> BenchmarkResult:
+    """Set up, warm up and time one benchmark."""
+    try:
+        prepared = bench.setup(ctx)
+        fn, extra = prepared if isinstance(prepared, tuple) else (prepared, {})
+        for _ in range(bench.warmup):
+            fn()
+        samples = []
+        for _ in range(bench.repeat or repeat):
+            start = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - start)
+    except SkipBenchmark as e:
+        return BenchmarkResult(bench.name, bench.group, "skipped", error=str(e))
+    except Exception as e:
+        detail = "".join(traceback.format_exception_only(type(e), e)).strip()
+        return BenchmarkResult(bench.name, bench.group, "error", error=detail)
+    return BenchmarkResult(bench.name, bench.group, "ok", samples=samples,
+                           extra={k: v() if callable(v) else v for k, v in extra.items()})
+
+
+def select(names: Optional[Sequence[str]] = None) -> List[Benchmark]:
+    """Registered benchmarks whose name or group starts with one of ``names``."""
+    if not names:
+        return list(REGISTRY.values())
+    return [b for b in REGISTRY.values()
+            if any(b.name.startswith(n) or b.group == n for n in names)]
+
+
+def git_revision(cwd: Optional[Path] = None) -> Dict[str, Any]:
+    """Current commit and whether the tree has local changes."""
+    def git(*args: str) -> Optional[str]:
+        try:
+            return subprocess.run(["git", *args], cwd=cwd, capture_output=True, text=True,
+                                  check=True, timeout=30).stdout.strip()
+        except (OSError, subprocess.SubprocessError):
+            return None
+
+    commit = git("rev-parse", "HEAD")
+    status = git("status", "--porcelain", "--untracked-files=no")
+    return {"commit": commit, "dirty": bool(status) if status is not None else None}
+
+
+def environment() -> Dict[str, Any]:
+    """Interpreter and library versions that affect timings."""
+    import pandas
+    import sklearn
+
+    return {
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "numpy": np.__version__,
+        "pandas": pandas.__version__,
+        "sklearn": sklearn.__version__,
+    }
+
+
+def write_report(
+    results: List[BenchmarkResult],
+    ctx: BenchmarkContext,
+    path: Optional[Path],
+    dataset: Dict[str, Any],
+    repo_root: Optional[Path] = None
+) -> Dict[str, Any]:
+    """Assemble the JSON report and write it to ``path`` (stdout when None)."""
+    report = {
+        "schema": SCHEMA_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "git": git_revision(repo_root),
+        "environment": environment(),
+        "scale": ctx.scale,
+        "seed": ctx.seed,
+        "latency": ctx.latency,
+        "dataset": dataset,
+        "benchmarks": {r.name: r.to_dict() for r in results},
+    }
+    text = json.dumps(report, indent=2, default=float)
+    if path is None:
+        print(text)
+    else:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        Path(path).write_text(text)
+    return report
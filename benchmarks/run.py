@@ -0,0 +1,86 @@
+"""Run the benchmark suite and write a JSON report.
+
+    python -m benchmarks.run --scale 20k --output benchmarks/results/20k.json
+    python -m benchmarks.run --scale 100k --only engine users
+    python -m benchmarks.compare baseline.json candidate.json
+
+Synthetic databases are generated once per (scale, seed) and cached under
+``--data-dir``; everything else (artifacts, user DB, Spotify cache) lives in a
+temporary work directory.
+"""
+
+import argparse
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from . import suites  # noqa: F401  (registers the benchmarks)
+from .harness import BenchmarkContext, run_benchmark, select, write_report
+from .synthetic import SCALES
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_DATA_DIR = REPO_ROOT / "data" / "benchmarks"
+
+
+def parse_scale(value: str) -> int:
+    """Named scale (20k, 100k, 1m) or an explicit playlist count."""
+    if value.lower() in SCALES:
+        return SCALES[value.lower()]
+    try:
+        return int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Unknown scale {value!r}, use one of {', '.join(SCALES)} or a number")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run the recommendation benchmark suite")
+    parser.add_argument("--scale", default="20k", help="20k, 100k, 1m or a playlist count")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", nargs="*", help="Benchmark names or groups (prefix match)")
+    parser.add_argument("--repeat", type=int, default=20, help="Samples per benchmark unless it sets its own")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds of stub Spotify latency per call")
+    parser.add_argument("--output", type=Path, help="JSON report path, stdout when omitted")
+    parser.add_argument("--data-dir", type=Path, default=DEFAULT_DATA_DIR)
+    parser.add_argument("--list", action="store_true", help="List benchmarks and exit")
+    args = parser.parse_args(argv)
+
+    benchmarks = select(args.only)
+    if args.list:
+        for bench in benchmarks:
+            print(f"{bench.group:10s} {bench.name}")
+        return 0
+
+    # Per-track warnings from the code under test would dominate the output
+    logging.basicConfig(level=logging.ERROR)
+    logging.getLogger("src").setLevel(logging.CRITICAL)
+
+    n_playlists = parse_scale(args.scale)
+    with tempfile.TemporaryDirectory(prefix="spr-bench-") as work_dir:
+        ctx = BenchmarkContext(args.scale, n_playlists, args.seed, args.data_dir, Path(work_dir), args.latency)
+        try:
+            start = time.perf_counter()
+            mpd = suites.mpd(ctx)
+            print(f"Dataset: {mpd.n_playlists} playlists, {mpd.n_tracks} tracks "
+                  f"({time.perf_counter() - start:.1f}s)", file=sys.stderr)
+
+            results = []
+            for bench in benchmarks:
+                start = time.perf_counter()
+                result = run_benchmark(bench, ctx, args.repeat)
+                results.append(result)
+                median = result.stats.get("median")
+                summary = f"{median * 1000:10.3f} ms" if median is not None else f"{result.status:>13s}"
+                print(f"{bench.name:50s} {summary}  ({time.perf_counter() - start:.1f}s)", file=sys.stderr)
+                if result.error:
+                    print(f"    {result.error}", file=sys.stderr)
+
+            write_report(results, ctx, args.output, mpd.summary(), repo_root=REPO_ROOT)
+        finally:
+            ctx.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,259 @@
+"""Offline Spotify backend serving a synthetic MPD database.
+
+``StubSpotify`` implements the subset of ``spotipy.Spotify`` the app calls,
+answering from the database written by ``benchmarks.synthetic``. Each call can
+sleep for a fixed latency to model the network, and calls are counted per
+endpoint so benchmarks can report how many round trips a code path makes.
+"""
+
+import sqlite3
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from src.core.spotify import SpotifyClient
+from src.mpd import load_or_build_index
+
+from .synthetic import SyntheticMPD
+
+FEATURE_COLUMNS = [
+    "danceability", "energy", "key", "loudness", "mode", "speechiness", "acousticness",
+    "instrumentalness", "liveness", "valence", "tempo", "duration_ms", "time_signature",
+]
+# features is keyed by track_id, so the join is a primary-key seek
+FEATURES_JOIN = "LEFT JOIN features f ON f.track_id = t.track_id"
+INTEGER_FEATURES = {"key", "mode", "duration_ms", "time_signature"}
+GENRES = [
+    "pop", "rock", "hip hop", "rap", "edm", "house", "indie", "folk", "country", "r&b",
+    "soul", "jazz", "metal", "punk", "latin", "k-pop", "classical", "ambient", "trap", "disco",
+]
+
+
+def _bare_id(uri: str) -> str:
+    return uri.rsplit(":", 1)[-1]
+
+
+class StubSpotify:
+    """Spotipy-shaped client answering from a synthetic MPD database.
+
+    Args:
+        mpd: Synthetic database to serve
+        latency: Seconds slept per call
+        library_playlists: Playlists whose tracks make up the user's saved tracks
+        seed: Random seed for the library and genres
+    """
+
+    def __init__(
+        self,
+        mpd: SyntheticMPD,
+        latency: float = 0.0,
+        library_playlists: int = 4,
+        seed: int = 0
+    ):
+        self.mpd = mpd
+        self.latency = latency
+        self.calls: Counter = Counter()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(f"file:{mpd.db_path}?mode=ro", uri=True, check_same_thread=False)
+        self._build_uri_index()
+        self.n_tracks = self._conn.execute("SELECT MAX(rowid) FROM tracks").fetchone()[0] or 0
+
+        rng = np.random.default_rng([seed, 4])
+        pids = rng.choice(mpd.n_playlists, size=library_playlists, replace=False)
+        self.library = list(dict.fromkeys(
+            uri for pid in pids for uri in self.playlist_track_ids(int(pid))))
+        self._genre_seed = seed
+        self._name_index = None
+
+    def _build_uri_index(self) -> None:
+        """Index track URIs and playlist row ranges; tracks and ratings have no indexes.
+
+        Ratings are written playlist by playlist, so each pid is one contiguous rowid range.
+        """
+        self._conn.execute(
+            "CREATE TEMP TABLE track_rowids (track_uri TEXT PRIMARY KEY, track_rowid INTEGER) WITHOUT ROWID")
+        self._conn.execute("INSERT OR IGNORE INTO track_rowids SELECT track_uri, rowid FROM tracks")
+        self._playlist_rows: Dict[int, Tuple[int, int]] = {
+            pid: (first, last)
+            for pid, first, last in self._conn.execute(
+                "SELECT pid, MIN(rowid), MAX(rowid) FROM ratings GROUP BY pid")
+        }
+
+    def playlist_track_ids(self, pid: int) -> List[str]:
+        """Track IDs of playlist ``pid`` in playlist order."""
+        if pid not in self._playlist_rows:
+            return []
+        first, last = self._playlist_rows[pid]
+        rows = self._rows(
+            "SELECT t.track_uri FROM ratings r JOIN tracks t ON t.rowid = r.track_id "
+            "WHERE r.rowid BETWEEN ? AND ? ORDER BY r.pos",
+            (first, last),
+        )
+        return [row[0] for row in rows]
+
+    def _call(self, endpoint: str) -> None:
+        self.calls[endpoint] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _rows(self, sql: str, params: Sequence[Any]) -> List[tuple]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _track_rows(self, track_ids: Iterable[str]) -> Dict[str, tuple]:
+        track_ids = list(track_ids)
+        if not track_ids:
+            return {}
+        placeholders = ", ".join("?" * len(track_ids))
+        rows = self._rows(
+            "SELECT t.track_uri, t.track_name, t.artist_name, t.artist_uri, t.album_name, t.album_uri, "
+            f"t.track_id, f.duration_ms FROM track_rowids i JOIN tracks t ON t.rowid = i.track_rowid {FEATURES_JOIN} "
+            f"WHERE i.track_uri IN ({placeholders})",
+            track_ids,
+        )
+        return {row[0]: row for row in rows}
+
+    @staticmethod
+    def _track_object(row: tuple) -> Dict[str, Any]:
+        track_id, name, artist_name, artist_id, album_name, album_id, dense_id, duration_ms = row
+        return {
+            "id": track_id,
+            "name": name,
+            "uri": f"spotify:track:{track_id}",
+            "duration_ms": int(duration_ms or 200_000),
+            "popularity": int(dense_id) % 101,
+            "artists": [{"id": artist_id, "name": artist_name, "uri": f"spotify:artist:{artist_id}"}],
+            "album": {"id": album_id, "name": album_name, "uri": f"spotify:album:{album_id}"},
+        }
+
+    def track(self, track_id: str) -> Optional[Dict[str, Any]]:
+        self._call("track")
+        rows = self._track_rows([_bare_id(track_id)])
+        return self._track_object(next(iter(rows.values()))) if rows else None
+
+    def tracks(self, tracks: Sequence[str]) -> Dict[str, Any]:
+        self._call("tracks")
+        ids = [_bare_id(t) for t in tracks]
+        rows = self._track_rows(ids)
+        return {"tracks": [self._track_object(rows[i]) if i in rows else None for i in ids]}
+
+    def audio_features(self, tracks: Sequence[str]) -> List[Optional[Dict[str, Any]]]:
+        self._call("audio_features")
+        ids = [_bare_id(t) for t in tracks]
+        found: Dict[str, Dict[str, Any]] = {}
+        if ids:
+            placeholders = ", ".join("?" * len(ids))
+            columns = ", ".join(f"f.{name}" for name in FEATURE_COLUMNS)
+            for row in self._rows(
+                f"SELECT t.track_uri, {columns} FROM track_rowids i JOIN tracks t ON t.rowid = i.track_rowid "
+                f"{FEATURES_JOIN} WHERE i.track_uri IN ({placeholders}) AND f.track_id IS NOT NULL",
+                ids,
+            ):
+                features = {
+                    name: int(value) if name in INTEGER_FEATURES else float(value)
+                    for name, value in zip(FEATURE_COLUMNS, row[1:])
+                }
+                features.update(id=row[0], uri=f"spotify:track:{row[0]}", type="audio_features")
+                found[row[0]] = features
+        return [found.get(tid) for tid in ids]
+
+    def _page(self, track_ids: List[str], limit: int, offset: int) -> Dict[str, Any]:
+        window = track_ids[offset:offset + limit]
+        rows = self._track_rows(window)
+        items = [
+            {"added_at": f"2020-01-01T00:{(offset + i) // 60 % 60:02d}:{(offset + i) % 60:02d}Z",
+             "track": self._track_object(rows[tid]) if tid in rows else None}
+            for i, tid in enumerate(window)
+        ]
+        has_next = offset + limit < len(track_ids)
+        return {
+            "items": items,
+            "total": len(track_ids),
+            "limit": limit,
+            "offset": offset,
+            "next": f"offset={offset + limit}" if has_next else None,
+        }
+
+    def playlist_items(self, playlist_id: str, limit: int = 100, offset: int = 0, **kwargs) -> Dict[str, Any]:
+        """Tracks of MPD playlist ``int(playlist_id)``, or the user's library for any other ID."""
+        self._call("playlist_items")
+        playlist = _bare_id(playlist_id)
+        if playlist.isdigit() and int(playlist) in self._playlist_rows:
+            return self._page(self.playlist_track_ids(int(playlist)), limit, offset)
+        return self._page(self.library, limit, offset)
+
+    def current_user_saved_tracks(self, limit: int = 20, offset: int = 0, **kwargs) -> Dict[str, Any]:
+        self._call("current_user_saved_tracks")
+        return self._page(self.library, limit, offset)
+
+    def artists(self, artists: Sequence[str]) -> Dict[str, Any]:
+        self._call("artists")
+        result = []
+        for artist in artists:
+            artist_id = _bare_id(artist)
+            rng = np.random.default_rng([self._genre_seed, sum(map(ord, artist_id))])
+            genres = list(rng.choice(GENRES, size=rng.integers(0, 4), replace=False))
+            result.append({"id": artist_id, "uri": f"spotify:artist:{artist_id}", "genres": genres})
+        return {"artists": result}
+
+    def recommendations(self, seed_tracks: Optional[Sequence[str]] = None, limit: int = 20,
+                        **kwargs) -> Dict[str, Any]:
+        """Tracks chosen deterministically from the seeds."""
+        self._call("recommendations")
+        seeds = sorted(_bare_id(t) for t in seed_tracks or [])
+        rng = np.random.default_rng([self._genre_seed] + [sum(map(ord, seed)) for seed in seeds])
+        rowids = rng.integers(1, self.n_tracks + 1, size=limit).tolist() if self.n_tracks else []
+        placeholders = ", ".join("?" * len(rowids))
+        rows = self._rows(
+            "SELECT t.track_uri, t.track_name, t.artist_name, t.artist_uri, t.album_name, t.album_uri, "
+            f"t.track_id, f.duration_ms FROM tracks t {FEATURES_JOIN} WHERE t.rowid IN ({placeholders})",
+            rowids,
+        ) if rowids else []
+        return {"tracks": [self._track_object(row) for row in rows],
+                "seeds": [{"id": seed, "type": "TRACK"} for seed in seeds]}
+
+    def search(self, q: str, limit: int = 10, offset: int = 0, type: str = "track", **kwargs) -> Dict[str, Any]:
+        """Track search through the persisted track-name index of the database."""
+        self._call("search")
+        if self._name_index is None:
+            with self._lock:
+                if self._name_index is None:
+                    self._name_index = load_or_build_index(self.mpd.db_path)
+        matches = self._name_index.search(q, limit=offset + limit)[offset:]
+        rowids = [match.track_id for match in matches]
+        rows = {}
+        if rowids:
+            placeholders = ", ".join("?" * len(rowids))
+            rows = {row[6]: row for row in self._rows(
+                "SELECT t.track_uri, t.track_name, t.artist_name, t.artist_uri, t.album_name, t.album_uri, "
+                f"t.track_id, f.duration_ms FROM tracks t {FEATURES_JOIN} WHERE t.rowid IN ({placeholders})",
+                rowids,
+            )}
+        return {"tracks": {"items": [self._track_object(rows[r]) for r in rowids if r in rows],
+                           "limit": limit, "offset": offset}}
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class _StubbedSpotifyClient(SpotifyClient):
+    """SpotifyClient that skips the spotipy/OAuth setup; ``_client`` is set by the caller."""
+
+    def _init_clients(self) -> None:
+        pass
+
+
+def make_spotify_client(stub: StubSpotify, cache_dir: Union[str, Path]) -> SpotifyClient:
+    """A ``SpotifyClient`` whose spotipy backend is ``stub``; no credentials or network needed."""
+    client = _StubbedSpotifyClient(
+        client_id="benchmark",
+        client_secret="benchmark",
+        redirect_uri="http://localhost:8888/callback",
+        cache_dir=Path(cache_dir),
+    )
+    client._client = stub
+    return client
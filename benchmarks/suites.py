@@ -0,0 +1,386 @@
+"""Benchmarks of the recommendation, user and ingest hot paths.
+
+Everything runs offline against a synthetic MPD database
+(``benchmarks.synthetic``) and the ``StubSpotify`` backend; fixtures are built
+once per run and shared across benchmarks through the ``BenchmarkContext``.
+"""
+
+import asyncio
+import contextlib
+import importlib.util
+import io
+import itertools
+import json
+import sqlite3
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, List
+
+import numpy as np
+import pandas as pd
+
+from src.core.spotify import SpotifyClient
+from src.data_models import User
+from src.ml import FEATURE_NAMES, ArtifactKMeans, ArtifactScaler, load_artifacts, train_from_database
+from src.mpd import TrackDictionary, TrackFeatureStore, build_playlist_features, load_or_build_index, load_playlist_features
+from src.mpd.track_index import TrackNameIndex
+from src.recommendation_engine import RecommendationEngine
+from src.user_manager import UserManager
+
+from .harness import BenchmarkContext, SkipBenchmark, benchmark
+from .stub_spotify import StubSpotify, make_spotify_client
+from .synthetic import cached_mpd, mpd_json_slice
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+N_CLUSTERS = 17
+N_CANDIDATES = 500
+N_RECOMMENDATIONS = 10
+N_USERS = 1000
+INGEST_SLICE_PLAYLISTS = 1000
+
+
+# Fixtures
+
+def mpd(ctx: BenchmarkContext):
+    return ctx.fixture("mpd", lambda: cached_mpd(ctx.data_dir, ctx.n_playlists, ctx.seed))
+
+
+def stub(ctx: BenchmarkContext) -> StubSpotify:
+    return ctx.fixture("stub", lambda: StubSpotify(mpd(ctx), latency=ctx.latency, seed=ctx.seed))
+
+
+def playlist_features(ctx: BenchmarkContext):
+    def build():
+        output = ctx.data_dir / f"{mpd(ctx).db_path.stem}.playlist_features"
+        if not output.exists():
+            build_playlist_features(mpd(ctx).db_path, output)
+        return load_playlist_features(output)
+    return ctx.fixture("playlist_features", build)
+
+
+def model_dir(ctx: BenchmarkContext) -> Path:
+    """Model directory holding a KMeans artifact trained on the synthetic playlists."""
+    def build():
+        path = ctx.work_dir / "model"
+        train_from_database(
+            mpd(ctx).db_path, path / "artifacts", n_clusters=N_CLUSTERS, make_current=True,
+            features_path=ctx.data_dir / f"{mpd(ctx).db_path.stem}.playlist_features",
+        )
+        return path
+    playlist_features(ctx)
+    return ctx.fixture("model_dir", build)
+
+
+def spotify_client(ctx: BenchmarkContext) -> SpotifyClient:
+    return ctx.fixture("spotify_client", lambda: make_spotify_client(stub(ctx), ctx.work_dir / "spotify_cache"))
+
+
+def engine(ctx: BenchmarkContext) -> RecommendationEngine:
+    return ctx.fixture("engine", lambda: RecommendationEngine(
+        spotify_client(ctx), model_dir=model_dir(ctx), cache_dir=ctx.work_dir / "recommendations"))
+
+
+def candidates(ctx: BenchmarkContext) -> List[str]:
+    """Candidate track URIs drawn from the tracks of random playlists, like the app's candidate pools."""
+    def build():
+        rng = np.random.default_rng([ctx.seed, 5])
+        conn = sqlite3.connect(str(mpd(ctx).db_path))
+        try:
+            uris: List[str] = []
+            while len(uris) < N_CANDIDATES:
+                pid = int(rng.integers(mpd(ctx).n_playlists))
+                rows = conn.execute(
+                    "SELECT t.track_uri FROM ratings r JOIN tracks t ON t.track_id = r.track_id WHERE r.pid = ?",
+                    (pid,)).fetchall()
+                uris.extend(f"spotify:track:{row[0]}" for row in rows)
+        finally:
+            conn.close()
+        return list(dict.fromkeys(uris))[:N_CANDIDATES]
+    return ctx.fixture("candidates", build)
+
+
+def user(ctx: BenchmarkContext) -> User:
+    """A user whose feedback comes from the stub's saved tracks."""
+    def build():
+        library = [f"spotify:track:{tid}" for tid in stub(ctx).library]
+        return User(
+            username="benchmark_user",
+            password_hash="",
+            email="benchmark@example.com",
+            loved_it=library[:10],
+            like_it=library[10:20],
+            okay=library[20:25],
+            hate_it=library[25:30],
+            recently_searched=library[30:33],
+        )
+    return ctx.fixture("user", build)
+
+
+def clear_spotify_caches(ctx: BenchmarkContext) -> None:
+    spotify_client(ctx).clear_cache()
+    engine(ctx).clear_feature_cache()
+
+
+def spotipy_client_module(ctx: BenchmarkContext):
+    """Import the Streamlit app's ``spotipy_client`` module from its file."""
+    def load():
+        path = REPO_ROOT / "streamlit" / "spotipy_client.py"
+        spec = importlib.util.spec_from_file_location("spotipy_client", path)
+        module = importlib.util.module_from_spec(spec)
+        try:
+            spec.loader.exec_module(module)
+        except ImportError as e:
+            raise SkipBenchmark(f"Streamlit app dependencies missing: {e}")
+        return module
+    return ctx.fixture("spotipy_client", load)
+
+
+def ml_model(ctx: BenchmarkContext) -> SimpleNamespace:
+    """The attributes ``SPR_ML_Model`` exposes, built from the synthetic data and artifact."""
+    def build():
+        artifacts = load_artifacts(model_dir(ctx) / "artifacts")
+        db_path = mpd(ctx).db_path
+        conn = sqlite3.connect(str(db_path))
+        try:
+            tracks_df = pd.read_sql('select * from tracks', conn)
+            playlists_df = pd.read_sql('select * from playlists', conn)
+            feature_store = TrackFeatureStore.from_frame(pd.read_sql('select * from features', conn))
+            ratings_df = pd.read_sql('select * from ratings', conn)
+        finally:
+            conn.close()
+
+        cluster_labels = (pd.Series(artifacts.labels, index=artifacts.pids)
+                          .reindex(playlists_df['pid']).astype('Int64').to_numpy())
+        playlists_df['cluster'] = pd.Categorical(cluster_labels)
+        features = playlist_features(ctx)
+        scale = np.where(artifacts.scaler_scale == 0.0, 1.0, artifacts.scaler_scale)
+        scaled = (np.asarray(features.means[playlists_df['pid']], dtype=np.float64) - artifacts.scaler_mean) / scale
+        train_data_scaled_feats_df = pd.DataFrame(scaled)
+        train_data_scaled_feats_df['cluster'] = pd.Categorical(cluster_labels)
+
+        return SimpleNamespace(
+            model=ArtifactKMeans.from_artifacts(artifacts),
+            scaler=ArtifactScaler.from_artifacts(artifacts),
+            tsne_transformer=None,
+            tsne_placer=None,
+            tracks_df=tracks_df,
+            track_index=load_or_build_index(db_path),
+            track_dictionary=TrackDictionary.from_tracks(tracks_df['track_uri'].values, tracks_df['track_id'].values),
+            playlists_df=playlists_df,
+            feature_store=feature_store,
+            ratings_df=ratings_df,
+            train_data_scaled_feats_df=train_data_scaled_feats_df,
+            openTSNE_df=None,
+        )
+    return ctx.fixture("ml_model", build)
+
+
+def spotify_recommendations(ctx: BenchmarkContext, **state: Any):
+    """A ``SpotifyRecommendations`` session for a user playlist, served by the stub."""
+    module = spotipy_client_module(ctx)
+    recommender = module.SpotifyRecommendations.__new__(module.SpotifyRecommendations)
+    recommender.feat_cols_user = list(FEATURE_NAMES)
+    recommender.playlist_uri = "spotify:playlist:benchmark"
+    recommender.song_name = None
+    recommender.len_of_favs = 'all_time'
+    recommender.log_output = lambda *args, **kwargs: None
+    recommender.sp = stub(ctx)
+    recommender.set_ml_model(ml_model(ctx))
+    for name, value in state.items():
+        setattr(recommender, name, value)
+    return recommender
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+# RecommendationEngine
+
+def _generate(ctx: BenchmarkContext, algorithm: str, cold: bool):
+    eng, target, pool = engine(ctx), user(ctx), candidates(ctx)
+    client = stub(ctx)
+
+    def call():
+        if cold:
+            clear_spotify_caches(ctx)
+        return run(eng.generate_recommendations(target, pool, N_RECOMMENDATIONS, algorithm=algorithm))
+
+    call()
+    before = sum(client.calls.values())
+    result = call()
+    return call, {
+        "recommendations": len(result.recommended_tracks),
+        "spotify_calls_per_run": sum(client.calls.values()) - before,
+    }
+
+
+@benchmark("engine.generate_recommendations.clustering", group="engine", repeat=5)
+def generate_clustering(ctx):
+    return _generate(ctx, "clustering", cold=False)
+
+
+@benchmark("engine.generate_recommendations.clustering.cold", group="engine", repeat=3, warmup=0)
+def generate_clustering_cold(ctx):
+    return _generate(ctx, "clustering", cold=True)
+
+
+@benchmark("engine.generate_recommendations.similarity", group="engine", repeat=5)
+def generate_similarity(ctx):
+    return _generate(ctx, "similarity", cold=False)
+
+
+@benchmark("engine.generate_recommendations.hybrid", group="engine", repeat=5)
+def generate_hybrid(ctx):
+    return _generate(ctx, "hybrid", cold=False)
+
+
+@benchmark("engine.find_similar_tracks", group="engine")
+def find_similar_tracks(ctx):
+    eng, pool = engine(ctx), candidates(ctx)
+    seed = user(ctx).recently_searched[-1]
+    return lambda: eng.find_similar_tracks(seed, pool, N_RECOMMENDATIONS)
+
+
+@benchmark("engine.find_similar_tracks.cold", group="engine", repeat=3, warmup=0)
+def find_similar_tracks_cold(ctx):
+    eng, pool = engine(ctx), candidates(ctx)
+    seed = user(ctx).recently_searched[-1]
+
+    def call():
+        clear_spotify_caches(ctx)
+        return eng.find_similar_tracks(seed, pool, N_RECOMMENDATIONS)
+    return call
+
+
+@benchmark("engine.cluster_based_recommendations", group="engine")
+def cluster_based(ctx):
+    eng, pool = engine(ctx), candidates(ctx)
+    vector = run(eng.get_user_preference_vector(user(ctx)))
+    return lambda: eng.cluster_based_recommendations(vector, pool, N_RECOMMENDATIONS)
+
+
+@benchmark("engine.cluster_based_recommendations.cold", group="engine", repeat=3, warmup=0)
+def cluster_based_cold(ctx):
+    eng, pool = engine(ctx), candidates(ctx)
+    vector = run(eng.get_user_preference_vector(user(ctx)))
+
+    def call():
+        clear_spotify_caches(ctx)
+        return eng.cluster_based_recommendations(vector, pool, N_RECOMMENDATIONS)
+    return call
+
+
+# Streamlit SpotifyRecommendations
+
+@benchmark("streamlit.get_top_n_playlists", group="streamlit", repeat=5)
+def get_top_n_playlists(ctx):
+    """From the user's playlist to the top playlists: paging, features, scaling, cluster slice."""
+    spotify_recommendations(ctx).get_top_n_playlists()
+    return lambda: spotify_recommendations(ctx).get_top_n_playlists()
+
+
+@benchmark("streamlit.get_songs_recommendations", group="streamlit", repeat=5)
+def get_songs_recommendations(ctx):
+    """Song ranking over the top playlists' tracks, with the user vector precomputed."""
+    session = spotify_recommendations(ctx)
+    top_playlists = session.get_top_n_playlists()
+    state = {"raw_y": session.raw_y, "scaled_y": session.scaled_y, "top_playlists": top_playlists}
+    return lambda: spotify_recommendations(ctx, **state).get_songs_recommendations()
+
+
+# UserManager
+
+def user_manager(ctx: BenchmarkContext) -> UserManager:
+    def build():
+        manager = UserManager(ctx.work_dir / "users.db")
+        for i in range(N_USERS):
+            manager.create_user(f"user{i:05d}", "Benchmark1!", f"user{i:05d}@example.com")
+        return manager
+    return ctx.fixture("user_manager", build)
+
+
+@benchmark("users.create_user", group="users", repeat=200)
+def create_user(ctx):
+    manager, counter = user_manager(ctx), itertools.count()
+
+    def call():
+        i = next(counter)
+        manager.create_user(f"new{i:06d}", "Benchmark1!", f"new{i:06d}@example.com")
+    return call
+
+
+@benchmark("users.authenticate_user", group="users", repeat=200)
+def authenticate_user(ctx):
+    manager = user_manager(ctx)
+    return lambda: manager.authenticate_user("user00042", "Benchmark1!")
+
+
+@benchmark("users.get_user", group="users", repeat=200)
+def get_user(ctx):
+    manager = user_manager(ctx)
+    return lambda: manager.get_user("user00042")
+
+
+@benchmark("users.update_user_preferences", group="users", repeat=200)
+def update_user_preferences(ctx):
+    manager, loved = user_manager(ctx), user(ctx).loved_it
+    return lambda: manager.update_user_preferences("user00042", loved_it=loved, recently_searched=loved[:3])
+
+
+@benchmark("users.decrement_user_count", group="users", repeat=200)
+def decrement_user_count(ctx):
+    manager = user_manager(ctx)
+    return lambda: manager.decrement_user_count("user00043")
+
+
+@benchmark("users.get_all_users", group="users", repeat=10)
+def get_all_users(ctx):
+    manager = user_manager(ctx)
+    return lambda: manager.get_all_users()
+
+
+# MPD ingest
+
+def reader_module(ctx: BenchmarkContext):
+    """Import the MPD reader script with its log file redirected to the work directory."""
+    def load():
+        path = REPO_ROOT / "code" / "read_spotify_million_playlists.py"
+        spec = importlib.util.spec_from_file_location("read_spotify_million_playlists", path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        module.LOG_FILE = ctx.work_dir / "read_spotify_mpd_log.txt"
+        return module
+    return ctx.fixture("reader", load)
+
+
+@benchmark("ingest.process_json_data", group="ingest", repeat=3)
+def ingest_slice(ctx):
+    """One ``mpd.slice`` JSON file into an empty database."""
+    reader = reader_module(ctx)
+    slice_json = json.loads(json.dumps(mpd_json_slice(INGEST_SLICE_PLAYLISTS, seed=ctx.seed)))
+    counter = itertools.count()
+
+    def call():
+        db_file = ctx.work_dir / f"ingest_{next(counter)}.db"
+        # The reader reports progress with print()
+        with contextlib.redirect_stdout(io.StringIO()):
+            reader.create_all_tables(db_file)
+            reader.process_json_data(slice_json, 0, db_file)
+        db_file.unlink()
+    return call, {"playlists": INGEST_SLICE_PLAYLISTS,
+                  "ratings": sum(len(p["tracks"]) for p in slice_json["playlists"])}
+
+
+@benchmark("ingest.build_playlist_features", group="ingest", repeat=3)
+def ingest_playlist_features(ctx):
+    db_path, feature_store = mpd(ctx).db_path, ctx.fixture(
+        "feature_store", lambda: TrackFeatureStore.from_database(mpd(ctx).db_path))
+    return lambda: build_playlist_features(db_path, ctx.work_dir / "playlist_features", feature_store=feature_store)
+
+
+@benchmark("ingest.track_name_index", group="ingest", repeat=3)
+def ingest_track_index(ctx):
+    db_path = mpd(ctx).db_path
+    return lambda: TrackNameIndex.from_database(db_path)
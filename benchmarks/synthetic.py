@@ -0,0 +1,317 @@
+"""Deterministic synthetic data shaped like the Spotify Million Playlist Dataset.
+
+The generator reproduces the properties that drive the cost of the
+recommendation paths rather than the exact data:
+
+* catalogue size grows sub-linearly with the number of playlists (Heaps' law
+  fitted to the MPD's 2.26M unique tracks in 1M playlists);
+* track popularity is Zipfian, so a few tracks appear in many playlists;
+* playlist lengths are log-normal clipped to the MPD's 5..250 range
+  (median ~49, mean ~66);
+* audio features follow per-feature distributions close to Spotify's.
+
+The same ``(n_playlists, seed)`` always produces the same database, so
+results can be compared across commits.
+"""
+
+import json
+import sqlite3
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+import numpy as np
+
+from src.mpd import FEATURES_TABLE_SQL
+
+SCALES = {
+    "20k": 20_000,
+    "100k": 100_000,
+    "1m": 1_000_000,
+}
+
+MPD_PLAYLISTS = 1_000_000
+MPD_UNIQUE_TRACKS = 2_262_292
+HEAPS_EXPONENT = 0.6
+TRACKS_PER_ARTIST = 7.6
+TRACKS_PER_ALBUM = 3.1
+ZIPF_EXPONENT = 1.05
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS tracks (
+        artist_name text,
+        track_uri text NOT NULL,
+        artist_uri text,
+        track_name text NOT NULL,
+        album_uri text,
+        album_name text,
+        track_id integer NOT NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS playlists (
+        name text NOT NULL,
+        collaborative text,
+        pid integer NOT NULL,
+        modified_at integer,
+        num_tracks integer,
+        num_albums integer,
+        num_followers integer,
+        num_edits integer,
+        duration_ms integer,
+        num_artists integer
+    )""",
+    """CREATE TABLE IF NOT EXISTS ratings (
+        pid integer NOT NULL,
+        track_id integer NOT NULL,
+        pos integer,
+        num_followers integer
+    )""",
+    FEATURES_TABLE_SQL,
+]
+
+_SYLLABLES = [
+    "la", "mo", "ri", "ta", "ne", "so", "ka", "lu", "vi", "da", "ze", "po",
+    "mi", "ra", "no", "be", "shi", "ko", "fa", "gu", "ye", "wo", "chi", "ma",
+]
+_ALPHABET = np.array(list("0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"))
+
+
+@dataclass
+class SyntheticMPD:
+    """A generated database and the parameters that produced it."""
+    db_path: Path
+    n_playlists: int
+    n_tracks: int
+    seed: int
+
+    def summary(self) -> Dict[str, Any]:
+        return {"n_playlists": self.n_playlists, "n_tracks": self.n_tracks, "seed": self.seed}
+
+
+def catalogue_size(n_playlists: int) -> int:
+    """Number of unique tracks expected in ``n_playlists`` MPD playlists."""
+    return max(1000, int(MPD_UNIQUE_TRACKS * (n_playlists / MPD_PLAYLISTS) ** HEAPS_EXPONENT))
+
+
+def spotify_ids(rng: np.random.Generator, n: int) -> np.ndarray:
+    """Random 22-character base62 IDs."""
+    chars = _ALPHABET[rng.integers(0, len(_ALPHABET), size=(n, 22))]
+    return chars.view("<U22").ravel()
+
+
+def _names(rng: np.random.Generator, n: int, max_words: int = 3) -> list:
+    words = np.array([a + b for a in _SYLLABLES for b in _SYLLABLES])
+    n_words = rng.integers(1, max_words + 1, size=n)
+    picks = rng.zipf(1.3, size=(n, max_words)) % len(words)
+    return [" ".join(words[picks[i, :n_words[i]]]).title() for i in range(n)]
+
+
+def zipf_sampler(rng: np.random.Generator, n_items: int, exponent: float = ZIPF_EXPONENT):
+    """Return a function drawing item indices with Zipfian popularity."""
+    weights = 1.0 / np.arange(1, n_items + 1) ** exponent
+    cdf = np.cumsum(weights)
+    cdf /= cdf[-1]
+    # Popularity rank is unrelated to track_id order
+    permutation = rng.permutation(n_items)
+
+    def sample(size: int) -> np.ndarray:
+        return permutation[np.searchsorted(cdf, rng.random(size), side="right")]
+
+    return sample
+
+
+def playlist_lengths(rng: np.random.Generator, n: int) -> np.ndarray:
+    """Playlist lengths with the MPD's median, mean and 5..250 range."""
+    return np.clip(rng.lognormal(mean=3.9, sigma=0.75, size=n), 5, 250).astype(np.int64)
+
+
+def audio_features(rng: np.random.Generator, n: int) -> Dict[str, np.ndarray]:
+    """Audio features with Spotify-like marginal distributions."""
+    instrumental = rng.random(n) < 0.15
+    return {
+        "danceability": rng.beta(5.0, 3.5, n),
+        "energy": rng.beta(4.0, 2.5, n),
+        "key": rng.integers(0, 12, n).astype(np.float64),
+        "loudness": np.clip(rng.normal(-7.5, 3.5, n), -40.0, 0.0),
+        "mode": (rng.random(n) < 0.65).astype(np.float64),
+        "speechiness": rng.beta(1.2, 12.0, n),
+        "acousticness": rng.beta(0.6, 2.0, n),
+        "instrumentalness": np.where(instrumental, rng.beta(3.0, 1.5, n), rng.beta(0.3, 20.0, n)),
+        "liveness": rng.beta(1.8, 8.0, n),
+        "valence": rng.beta(2.5, 2.5, n),
+        "tempo": np.clip(rng.normal(121.0, 28.0, n), 50.0, 220.0),
+        "duration_ms": np.clip(rng.lognormal(12.35, 0.3, n), 30_000, 900_000).astype(np.int64),
+        "time_signature": rng.choice([3, 4, 5], p=[0.08, 0.9, 0.02], size=n),
+    }
+
+
+def generate_catalogue(n_tracks: int, seed: int = 0) -> Dict[str, Any]:
+    """Track, artist and album columns plus audio features for ``n_tracks`` tracks."""
+    rng = np.random.default_rng([seed, 1])
+    n_artists = max(1, int(n_tracks / TRACKS_PER_ARTIST))
+    n_albums = max(1, int(n_tracks / TRACKS_PER_ALBUM))
+    artist_names = np.array(_names(rng, n_artists, max_words=2), dtype=object)
+    album_names = np.array(_names(rng, n_albums), dtype=object)
+    artist_uris = spotify_ids(rng, n_artists)
+    album_uris = spotify_ids(rng, n_albums)
+
+    artist_of = zipf_sampler(rng, n_artists, exponent=0.9)(n_tracks)
+    album_of = rng.integers(0, n_albums, n_tracks)
+    return {
+        "track_uri": spotify_ids(rng, n_tracks),
+        "track_name": np.array(_names(rng, n_tracks), dtype=object),
+        "artist_uri": artist_uris[artist_of],
+        "artist_name": artist_names[artist_of],
+        "album_uri": album_uris[album_of],
+        "album_name": album_names[album_of],
+        "features": audio_features(rng, n_tracks),
+    }
+
+
+def generate_mpd(
+    db_path: Union[str, Path],
+    n_playlists: int,
+    seed: int = 0,
+    chunk_playlists: int = 10_000,
+    feature_coverage: float = 0.98
+) -> SyntheticMPD:
+    """Write a synthetic MPD database with the repo's tracks/playlists/ratings/features schema.
+
+    Args:
+        db_path: Database file to create (replaced if it exists)
+        n_playlists: Number of playlists
+        seed: Random seed
+        chunk_playlists: Playlists generated and inserted per transaction
+        feature_coverage: Fraction of tracks with audio features
+
+    Returns:
+        SyntheticMPD description
+    """
+    db_path = Path(db_path)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    if db_path.exists():
+        db_path.unlink()
+
+    n_tracks = catalogue_size(n_playlists)
+    catalogue = generate_catalogue(n_tracks, seed)
+    rng = np.random.default_rng([seed, 2])
+    sample_tracks = zipf_sampler(rng, n_tracks)
+    playlist_names = _names(rng, 2000, max_words=2)
+
+    conn = sqlite3.connect(str(db_path))
+    try:
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        for ddl in SCHEMA:
+            conn.execute(ddl)
+
+        track_ids = np.arange(1, n_tracks + 1)
+        conn.executemany(
+            "INSERT INTO tracks VALUES (?, ?, ?, ?, ?, ?, ?)",
+            zip(catalogue["artist_name"], catalogue["track_uri"], catalogue["artist_uri"],
+                catalogue["track_name"], catalogue["album_uri"], catalogue["album_name"],
+                track_ids.tolist()),
+        )
+        features = catalogue["features"]
+        has_features = rng.random(n_tracks) < feature_coverage
+        columns = [track_ids] + [features[name] for name in features]
+        rows = np.column_stack(columns)[has_features].tolist()
+        conn.executemany(f"INSERT INTO features VALUES ({', '.join('?' * len(columns))})", rows)
+        conn.commit()
+
+        for start in range(0, n_playlists, chunk_playlists):
+            pids = np.arange(start, min(start + chunk_playlists, n_playlists))
+            lengths = playlist_lengths(rng, len(pids))
+            followers = np.maximum(1, rng.zipf(2.2, len(pids)))
+            tracks = sample_tracks(int(lengths.sum()))
+            playlist_of = np.repeat(pids, lengths)
+            positions = np.arange(len(tracks)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+
+            durations = np.add.reduceat(features["duration_ms"][tracks], np.cumsum(lengths) - lengths)
+            conn.executemany(
+                "INSERT INTO playlists VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (playlist_names[rng.integers(len(playlist_names))], "false", int(pid),
+                     int(1_300_000_000 + rng.integers(0, 210_000_000)), int(length),
+                     int(max(1, length // 3)), int(follower), int(rng.integers(1, 30)),
+                     int(duration), int(max(1, length // 2)))
+                    for pid, length, follower, duration in zip(pids, lengths, followers, durations)
+                ],
+            )
+            conn.executemany(
+                "INSERT INTO ratings VALUES (?, ?, ?, ?)",
+                zip(playlist_of.tolist(), (tracks + 1).tolist(), positions.tolist(),
+                    np.repeat(followers, lengths).tolist()),
+            )
+            conn.commit()
+    finally:
+        conn.close()
+
+    return SyntheticMPD(db_path=db_path, n_playlists=n_playlists, n_tracks=n_tracks, seed=seed)
+
+
+def cached_mpd(cache_dir: Union[str, Path], n_playlists: int, seed: int = 0) -> SyntheticMPD:
+    """Generate the database for ``n_playlists`` once and reuse it afterwards."""
+    cache_dir = Path(cache_dir)
+    db_path = cache_dir / f"mpd_{n_playlists}_seed{seed}.db"
+    meta_path = db_path.with_suffix(".json")
+    if db_path.exists() and meta_path.exists():
+        meta = json.loads(meta_path.read_text())
+        return SyntheticMPD(db_path=db_path, n_playlists=meta["n_playlists"],
+                            n_tracks=meta["n_tracks"], seed=meta["seed"])
+
+    mpd = generate_mpd(db_path, n_playlists, seed=seed)
+    meta_path.write_text(json.dumps(mpd.summary()))
+    return mpd
+
+
+def mpd_json_slice(
+    n_playlists: int,
+    first_pid: int = 0,
+    seed: int = 0,
+    catalogue: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """One ``mpd.slice.*.json`` file worth of playlists, as read by the MPD ingest script."""
+    catalogue = catalogue or generate_catalogue(catalogue_size(MPD_PLAYLISTS // 1000), seed)
+    n_tracks = len(catalogue["track_uri"])
+    rng = np.random.default_rng([seed, 3, first_pid])
+    sample_tracks = zipf_sampler(rng, n_tracks)
+    durations = catalogue["features"]["duration_ms"]
+
+    playlists = []
+    for pid in range(first_pid, first_pid + n_playlists):
+        length = int(playlist_lengths(rng, 1)[0])
+        tracks = sample_tracks(length)
+        playlist = {
+            "name": f"playlist {pid}",
+            "collaborative": "false",
+            "pid": pid,
+            "modified_at": int(1_300_000_000 + rng.integers(0, 210_000_000)),
+            "num_tracks": length,
+            "num_albums": len(set(catalogue["album_uri"][tracks])),
+            "num_followers": int(max(1, rng.zipf(2.2))),
+            "num_edits": int(rng.integers(1, 30)),
+            "duration_ms": int(durations[tracks].sum()),
+            "num_artists": len(set(catalogue["artist_uri"][tracks])),
+            "tracks": [
+                {
+                    "pos": pos,
+                    "artist_name": catalogue["artist_name"][track],
+                    "track_uri": f"spotify:track:{catalogue['track_uri'][track]}",
+                    "artist_uri": f"spotify:artist:{catalogue['artist_uri'][track]}",
+                    "track_name": catalogue["track_name"][track],
+                    "album_uri": f"spotify:album:{catalogue['album_uri'][track]}",
+                    "duration_ms": int(durations[track]),
+                    "album_name": catalogue["album_name"][track],
+                }
+                for pos, track in enumerate(tracks)
+            ],
+        }
+        # About 2% of MPD playlists carry a description
+        if pid % 50 == 0:
+            playlist["description"] = "synthetic"
+        playlists.append(playlist)
+
+    return {
+        "info": {"generated_on": "synthetic", "slice": f"{first_pid}-{first_pid + n_playlists - 1}"},
+        "playlists": playlists,
+    }
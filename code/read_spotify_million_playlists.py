@@ -25,11 +25,17 @@ DB_FILE = Path('data/spotify_million_playlists.db')
 LOG_FILE = Path('data/read_spotify_mpd_log.txt')
 
 sys.path.insert(1, os.getcwd())
-import config
-# Spotify credentials
-os.environ["SPOTIPY_CLIENT_ID"] = config.SPOTIPY_CLIENT_ID
-os.environ["SPOTIPY_CLIENT_SECRET"] = config.SPOTIPY_CLIENT_SECRET
-os.environ['SPOTIPY_REDIRECT_URI'] = config.SPOTIPY_REDIRECT_URI
+from src.mpd import (normalize_name, ensure_features_table, write_features, TrackDictionary,
+                     start_track_dictionary_owner, connect_track_dictionary)
+# Spotify credentials, from config.py when present, otherwise the SPOTIPY_* environment variables
+try:
+    import config
+except ImportError:
+    config = None
+if config is not None:
+    os.environ["SPOTIPY_CLIENT_ID"] = config.SPOTIPY_CLIENT_ID
+    os.environ["SPOTIPY_CLIENT_SECRET"] = config.SPOTIPY_CLIENT_SECRET
+    os.environ['SPOTIPY_REDIRECT_URI'] = config.SPOTIPY_REDIRECT_URI
 
 def write_log(text: Any) -> None:
     """Write log entry to file with timestamp."""
@@ -48,7 +54,8 @@ def create_connection(db_file: Path) -> Optional[sqlite3.Connection]:
     """
     conn = None
     try:
-        conn = sqlite3.connect(str(db_file))
+        # Parallel ingest workers write to the same database
+        conn = sqlite3.connect(str(db_file), timeout=30)
         write_log(f'Connection to {db_file}')
     except Error as e:
         write_log(f"Database connection error: {e}")
@@ -76,7 +83,7 @@ def create_table(conn: sqlite3.Connection, create_table_sql: str, table_name: st
         print(f"Error creating table {table_name}: {e}")
         return False
     
-def create_all_tables():
+def create_all_tables(db_file: Path = DB_FILE):
     sql_create_tracks_table = """ CREATE TABLE IF NOT EXISTS tracks (
                                     artist_name text,
                                     track_uri text NOT NULL,
@@ -109,23 +116,6 @@ def create_all_tables():
                                     FOREIGN KEY (track_id) REFERENCES tracks (track_id)
                                 );"""
 
-    sql_create_features_table = """ CREATE TABLE IF NOT EXISTS features (
-                                    track_id integer,
-                                    danceability real,
-                                    energy real,
-                                    key real,
-                                    loudness real,
-                                    mode real,
-                                    speechiness real,
-                                    acousticness real,
-                                    instrumentalness real,
-                                    liveness real,
-                                    valence real,
-                                    tempo real,
-                                    duration_ms integer,
-                                    time_signature integer
-                                    ); """
-
     # create a database connection
     conn = create_connection(db_file)
 
@@ -140,8 +130,8 @@ def create_all_tables():
         # create ratings table
         create_table(conn, sql_create_ratings_table, 'ratings')
 
-        # create features table
-        create_table(conn, sql_create_features_table, 'features')
+        # create features table (keyed by track_id), migrating a pre-existing unkeyed one
+        ensure_features_table(conn)
 
     else:
         print("Error! cannot create the database connection.")
@@ -221,15 +211,16 @@ def get_table_df(conn, table_name):
     return table_df
 
 def get_average_audio_features(conn, pid):
-    track_ids_df = pd.read_sql('select track_id from ratings where pid=' + str(pid), conn)
-    features_df = get_table_df(conn, 'features')
-    features_df = features_df.merge(track_ids_df, on='track_id')
+    # Join in SQLite for just this playlist instead of reading the whole features table;
+    # use src.mpd.build_playlist_features to compute every playlist at once
+    features_df = pd.read_sql('select f.* from ratings r join features f on f.track_id = r.track_id '
+                              'where r.pid = ?', conn, params=(int(pid),))
     print('Playlist ', pid, 'has', len(features_df), 'tracks')
     average_df = features_df.drop(columns='track_id').mean()
     print(average_df)
     return average_df
 
-def create_audio_features(cnt_uris=100):
+def create_audio_features(cnt_uris=100, db_file: Path = DB_FILE):
     conn = create_connection(db_file)
     sp = spotipy.Spotify(client_credentials_manager=SpotifyClientCredentials())
     max_track_id = get_max_track_id(conn, 'tracks')
@@ -266,16 +257,10 @@ def create_audio_features(cnt_uris=100):
         feats_df.insert(loc=0, column='track_id', value=track_id_list)
         write_log('Adding audio features for track_ids: ' + str(track_id_list[0]) + '-' + str(track_id_list[-1]))
         #print(feats_df.head())
-        feats_df.to_sql(name='features', con=conn, if_exists='append', index=False)
+        write_features(conn, feats_df)
     if conn:
         conn.close()
 
-def normalize_name(name):
-    name = name.lower()
-    name = re.sub(r"[.,\/#!$%\^\*;:{}=\_`~()@]", " ", name)
-    name = re.sub(r"\s+", " ", name).strip()
-    return name
-
 def to_date(epoch):
     return datetime.fromtimestamp(epoch).strftime("%Y-%m-%d")
 
@@ -289,9 +274,9 @@ def print_most_common(txt, df, col, num, is_date=False):
         else:
             print("%7d %s" % (count, name))
 
-def show_summary():
+def show_summary(db_file: Path = DB_FILE):
     write_log('Printing Summary Statistics')
-    playlists_df, tracks_df, features_df = read_all_tables()
+    playlists_df, tracks_df, features_df = read_all_tables(db_file)
     total_playlists = len(playlists_df)
     #total_tracks = len(tracks_df)
     total_tracks = playlists_df['num_tracks'].sum()
@@ -325,11 +310,15 @@ def show_summary():
     print_most_common("playlist length histogram", playlists_df, "num_tracks", 20)
     print_most_common("num followers histogram", playlists_df, "num_followers", 20)
 
-def process_json_data(json_data, num_playlists):
+def process_json_data(json_data, num_playlists, db_file: Path = DB_FILE, track_dictionary=None):
+    """
+    Add the playlists, ratings and new tracks of one MPD slice to the database
+    :param json_data: parsed mpd.slice JSON
+    :param num_playlists: only the first num_playlists new playlists when > 0
+    :param db_file: playlists database
+    :param track_dictionary: TrackDictionary (or owner proxy) assigning track_ids; opened on db_file when None
+    """
     conn = create_connection(db_file)
-
-    # Get Max track_id in tracks table
-    max_track_id = get_max_track_id(conn, 'tracks')
     existing_pids = get_all_playlist_ids(conn)
     
     # Get all playlists in the file
@@ -354,27 +343,30 @@ def process_json_data(json_data, num_playlists):
     # Get all the tracks in the file
     tracks_df = pd.json_normalize(json_data['playlists'], record_path=['tracks'], meta=['pid', 'num_followers'])
     #print(tracks_df.head())
-    tracks_df = tracks_df[tracks_df['pid'].isin(playlists_df['pid'].values)]
+    tracks_df = tracks_df[tracks_df['pid'].isin(playlists_df['pid'].values)].copy()
     tracks_df['track_uri'] = tracks_df['track_uri'].apply(lambda uri: uri.split(':')[2])
     tracks_df['album_uri'] = tracks_df['album_uri'].apply(lambda uri: uri.split(':')[2])
     tracks_df['artist_uri'] = tracks_df['artist_uri'].apply(lambda uri: uri.split(':')[2])
     print('Total tracks/ratings in this file: ', len(tracks_df))
     write_log('Total tracks/ratings in this file: ' + str(len(tracks_df)))
 
-    print('Get track_id for existing tracks from database, create one for new tracks')
-    write_log('Get track_id for existing tracks from database, create one for new tracks')
-    all_tracks_df = pd.read_sql('select track_id, track_uri from tracks', conn)
-    tracks_df = tracks_df.merge(all_tracks_df, how='left', on='track_uri').fillna(0)
-    #print('Total tracks after merge: ', len(tracks_df))
-    #print(tracks_df.head(100))
-    print('Tracks already exist', len(tracks_df[tracks_df['track_id'] != 0]['track_uri'].unique()))
-    write_log('Tracks already exist: ' + str(len(tracks_df[tracks_df['track_id'] != 0]['track_uri'].unique())))
-    tracks_df['track_id1'] = tracks_df[tracks_df["track_id"] == 0][['track_uri']].groupby('track_uri').ngroup()+max_track_id+1
-    tracks_df['track_id'] = tracks_df['track_id'] + tracks_df['track_id1'].fillna(0)
-    tracks_df['track_id'] = tracks_df['track_id'].astype('int64')
-    #print('Total tracks with new track_id: ', len(tracks_df))
-    print('Created new track_ids', len(tracks_df[tracks_df['track_id1'].notna()]['track_uri'].unique()))
-    write_log('Created new track_ids: ' + str(len(tracks_df[tracks_df['track_id1'].notna()]['track_uri'].unique())))
+    # One bulk get-or-create against the track dictionary; new tracks get the next dense ids
+    print('Get track_id for existing tracks from the track dictionary, create one for new tracks')
+    write_log('Get track_id for existing tracks from the track dictionary, create one for new tracks')
+    own_dictionary = track_dictionary is None
+    if own_dictionary:
+        track_dictionary = TrackDictionary(db_file)
+    try:
+        track_ids, created = track_dictionary.get_or_create(tracks_df['track_uri'].tolist())
+    finally:
+        if own_dictionary:
+            track_dictionary.close()
+    tracks_df['track_id'] = track_ids
+    n_created = int(created.sum())
+    print('Tracks already exist', tracks_df['track_uri'].nunique() - n_created)
+    write_log('Tracks already exist: ' + str(tracks_df['track_uri'].nunique() - n_created))
+    print('Created new track_ids', n_created)
+    write_log('Created new track_ids: ' + str(n_created))
 
     # Save ratings to the database
     ratings_df = tracks_df[['pid', 'track_id', 'pos', 'num_followers']]
@@ -383,48 +375,73 @@ def process_json_data(json_data, num_playlists):
     write_log('Adding all ratings to database from file: ' + ' ' + str(len(ratings_df)))
     ratings_df.to_sql(name='ratings', con=conn, if_exists='append', index=False)
 
-    # Save unique tracks to the database
-    tracks_df = tracks_df[tracks_df['track_id1'].notna()]
-    tracks_df.drop(['pos', 'duration_ms', 'pid', 'num_followers', 'track_id1'], axis=1, inplace=True)
-    tracks_df = tracks_df.drop_duplicates(subset='track_uri', keep="first")
+    # Save new tracks to the database, one row per newly assigned track_id
+    tracks_df = tracks_df[created]
+    tracks_df = tracks_df.drop(['pos', 'duration_ms', 'pid', 'num_followers'], axis=1)
     print('Total unique tracks: ', len(tracks_df))
-    print('Adding tracks to database:', max_track_id+1, tracks_df['track_id'].max())
-    write_log('Adding tracks to database: ' + str(max_track_id+1) + '-' + str(tracks_df['track_id'].max()))
+    if len(tracks_df):
+        print('Adding tracks to database:', tracks_df['track_id'].min(), tracks_df['track_id'].max())
+        write_log('Adding tracks to database: ' + str(tracks_df['track_id'].min()) + '-' + str(tracks_df['track_id'].max()))
     #print(tracks_df.tail())
     tracks_df.to_sql(name='tracks', con=conn, if_exists='append', index=False)
 
     if conn:
         conn.close()
 
-def extract_mpd_dataset(zip_file, num_files=0, num_playlists=0):
+def process_mpd_file(zip_file, filename, num_playlists, db_file: Path = DB_FILE, track_dictionary=None):
+    """
+    Process one JSON file of the MPD zip
+    :param track_dictionary: shared TrackDictionary; the worker's owner proxy in parallel ingest
+    """
+    print('\nFile: ' + filename)
+    write_log('\nFile: ' + filename)
+    if track_dictionary is None:
+        track_dictionary = _worker_track_dictionary
+    with ZipFile(zip_file) as zipfiles, zipfiles.open(filename) as json_file:
+        json_data = json.loads(json_file.read())
+    process_json_data(json_data, num_playlists, db_file, track_dictionary)
+
+# Proxy to the track dictionary owner, set in each parallel ingest worker
+_worker_track_dictionary = None
+
+def _connect_ingest_worker(address):
+    global _worker_track_dictionary
+    _worker_track_dictionary = connect_track_dictionary(address)
+
+def extract_mpd_dataset(zip_file, num_files=0, num_playlists=0, db_file: Path = DB_FILE, workers=1):
+    """
+    Ingest the MPD zip into the database
+    :param num_files: only the first num_files JSON files when > 0
+    :param num_playlists: only the first num_playlists new playlists of each file when > 0
+    :param workers: files processed in parallel; track_ids then come from one track dictionary owner process
+    """
     with ZipFile(zip_file) as zipfiles:
         file_list = zipfiles.namelist()
 
-        #get only the csv files
-        json_files = fnmatch.filter(file_list, "*.json")
-        json_files = [f for i,f in sorted([(int(filename.split('.')[2].split('-')[0]), filename) for filename in json_files])]
-
-        cnt = 0
-        # Init multiprocessing.Pool()
-        #print("Number of processors: ", mp.cpu_count())
-        #pool = mp.Pool(mp.cpu_count())
-
-        for filename in json_files:
-            cnt += 1
-            print('\nFile: ' + filename)
-            write_log('\nFile: ' + filename)
-
-            with zipfiles.open(filename) as json_file:
-                json_data = json.loads(json_file.read())
-                process_json_data(json_data, num_playlists)
-                #pool.apply(process_json_data, args=(filename, num_playlists))
+    #get only the json files
+    json_files = fnmatch.filter(file_list, "*.json")
+    json_files = [f for i,f in sorted([(int(filename.split('.')[2].split('-')[0]), filename) for filename in json_files])]
+    if num_files > 0:
+        json_files = json_files[:num_files]
+
+    if workers <= 1:
+        # Load the track dictionary once for every file
+        track_dictionary = TrackDictionary(db_file)
+        try:
+            for filename in json_files:
+                process_mpd_file(zip_file, filename, num_playlists, db_file, track_dictionary)
+        finally:
+            track_dictionary.close()
+        return
 
-            if (cnt == num_files) and (num_files > 0):
-                break
-        # Close muliprocessing poolS
-        #pool.close()
+    owner = start_track_dictionary_owner(db_file)
+    try:
+        with mp.Pool(workers, initializer=_connect_ingest_worker, initargs=(owner.address,)) as pool:
+            pool.starmap(process_mpd_file, [(zip_file, filename, num_playlists, db_file) for filename in json_files])
+    finally:
+        owner.shutdown()
 
-def read_all_tables():
+def read_all_tables(db_file: Path = DB_FILE):
     conn = create_connection(db_file)
     print()
     playlists_df = get_table_df(conn, 'playlists')
@@ -450,7 +467,7 @@ if __name__ == '__main__':
     create_all_tables()
     
     # add tracks and playlists for each json file in zipfile
-    extract_mpd_dataset(zip_file, 0, 0)
+    extract_mpd_dataset(ZIP_FILE, 0, 0)
     
     # get audio features for all tracks
     create_audio_features()
@@ -31,6 +31,8 @@ from .validators import (
 
 from .logging_config import setup_logging, get_logger
 
+from .metrics import MetricsRegistry, Trace, metrics
+
 __all__ = [
     # Exceptions
     "SongRecommendationError",
@@ -61,4 +63,9 @@ __all__ = [
     # Logging
     "setup_logging",
     "get_logger",
+    
+    # Metrics
+    "MetricsRegistry",
+    "Trace",
+    "metrics",
 ]
@@ -1,13 +1,20 @@
 """FastAPI application for song recommendation system."""
 
+import os
+import time
+from pathlib import Path
+
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 import uvicorn
 
-from ..web import api_router
+from ..web import api_router, jobs_router, ResponseCacheMiddleware, response_cache_from_env
+from ..jobs import JobWorkerPool, default_queue
+from .state import ensure_serving_state
 from ..logging_config import setup_logging, get_logger
+from ..metrics import metrics
 
 # Setup logging
 setup_logging(log_level="INFO")
@@ -27,6 +34,13 @@ def create_app() -> FastAPI:
         openapi_url="/openapi.json"
     )
     
+    # Serve cacheable GET routes from the response cache, inside CORS so
+    # cached responses still get CORS headers
+    response_cache = response_cache_from_env()
+    app.state.response_cache = response_cache
+    if response_cache is not None:
+        app.add_middleware(ResponseCacheMiddleware, cache=response_cache)
+    
     # Add CORS middleware
     app.add_middleware(
         CORSMiddleware,
@@ -36,11 +50,30 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
     
+    @app.middleware("http")
+    async def record_request_metrics(request: Request, call_next):
+        if not metrics.enabled:
+            return await call_next(request)
+        start = time.perf_counter()
+        response = await call_next(request)
+        # Label by route template, not raw path, to keep series cardinality bounded
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        metrics.observe(
+            "http_request_seconds",
+            time.perf_counter() - start,
+            method=request.method,
+            route=route,
+            status=str(response.status_code)
+        )
+        return response
+    
     # Include API routes
     app.include_router(api_router)
+    app.include_router(jobs_router)
     
     # Add static files
-    app.mount("/static", StaticFiles(directory="static"), name="static")
+    if Path("static").is_dir():
+        app.mount("/static", StaticFiles(directory="static"), name="static")
     
     # Exception handlers
     @app.exception_handler(404)
@@ -62,10 +95,23 @@ def create_app() -> FastAPI:
     @app.on_event("startup")
     async def startup_event():
         logger.info("Song Recommendation API starting up...")
+        # Already loaded when forked from the src.api.serve master; loaded here otherwise
+        app.state.serving_state = ensure_serving_state()
+        # Watcher threads don't survive a fork, so each worker starts its own
+        if app.state.serving_state is not None:
+            app.state.serving_state.model_registry.start()
+        app.state.job_queue = default_queue()
+        # Set SPR_JOB_WORKERS=0 when jobs are run by separate `python -m src.jobs.worker` processes
+        workers = int(os.getenv("SPR_JOB_WORKERS", "2"))
+        app.state.job_pool = JobWorkerPool(app.state.job_queue, workers=workers).start() if workers > 0 else None
     
     @app.on_event("shutdown")
     async def shutdown_event():
         logger.info("Song Recommendation API shutting down...")
+        if app.state.job_pool is not None:
+            app.state.job_pool.stop(timeout=5)
+        if app.state.serving_state is not None:
+            app.state.serving_state.model_registry.stop(timeout=5)
     
     return app
 
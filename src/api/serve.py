@@ -0,0 +1,177 @@
+"""Production serving: pre-forked Uvicorn workers under Gunicorn.
+
+The master process imports the app and loads the serving state (model
+artifacts and feature data, see :mod:`src.api.state`) before forking, so
+every worker shares those pages copy-on-write instead of holding its own
+copy. ``gc.freeze()`` keeps the garbage collector from touching (and so
+un-sharing) the objects loaded before the fork.
+
+Each worker watches ``model/artifacts/CURRENT`` and hot-swaps a new model
+version on its own (see :class:`~src.ml.ModelRegistry`). The arrays are
+memory-mapped, so the workers still share the new version's pages.
+Sending ``SIGHUP`` to the master also reloads the feature data. The master
+loads the serving state again, forks fresh workers from it, and then stops
+the old workers once their in-flight requests finish. The listening socket
+stays open throughout, so no connection is refused. ``SIGTTIN``/``SIGTTOU``
+add or remove a worker.
+
+    python -m src.api.serve --workers 4 --bind 0.0.0.0:8000
+
+Requires the ``prod`` extra (gunicorn). Settings default to the
+``SPR_*`` environment variables read by :meth:`ServeConfig.from_env`.
+"""
+
+import gc
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from gunicorn.app.base import BaseApplication
+from uvicorn.workers import UvicornWorker
+
+from ..logging_config import get_logger
+from .state import load_serving_state
+
+logger = get_logger(__name__)
+
+
+def _env_int(name: str, default: Optional[int]) -> Optional[int]:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+@dataclass
+class ServeConfig:
+    """Serving settings.
+
+    Attributes:
+        bind: Address to listen on
+        workers: Number of worker processes
+        limit_concurrency: Maximum concurrent connections per worker before answering 503
+        backlog: Maximum number of pending connections
+        timeout: Seconds a silent worker is given before it is killed and replaced
+        graceful_timeout: Seconds a stopping worker gets to finish in-flight requests
+        keepalive: Seconds to hold idle keep-alive connections
+        max_requests: Recycle a worker after this many requests (0 disables)
+        model_dir: Directory containing ``artifacts/``
+        features_path: Feature matrix (``.npy``) or MPD database to preload
+    """
+    bind: str = "0.0.0.0:8000"
+    workers: int = os.cpu_count() or 1
+    limit_concurrency: Optional[int] = None
+    backlog: int = 2048
+    timeout: int = 60
+    graceful_timeout: int = 30
+    keepalive: int = 5
+    max_requests: int = 0
+    model_dir: Path = Path("model")
+    features_path: Optional[Path] = None
+
+    @classmethod
+    def from_env(cls) -> "ServeConfig":
+        """Read settings from ``SPR_BIND``, ``SPR_WORKERS``, ``SPR_WORKER_CONCURRENCY``,
+        ``SPR_BACKLOG``, ``SPR_WORKER_TIMEOUT``, ``SPR_GRACEFUL_TIMEOUT``, ``SPR_KEEPALIVE``,
+        ``SPR_MAX_REQUESTS``, ``SPR_MODEL_DIR`` and ``SPR_FEATURES_PATH``."""
+        defaults = cls()
+        features_path = os.getenv("SPR_FEATURES_PATH")
+        return cls(
+            bind=os.getenv("SPR_BIND", defaults.bind),
+            workers=_env_int("SPR_WORKERS", defaults.workers),
+            limit_concurrency=_env_int("SPR_WORKER_CONCURRENCY", None),
+            backlog=_env_int("SPR_BACKLOG", defaults.backlog),
+            timeout=_env_int("SPR_WORKER_TIMEOUT", defaults.timeout),
+            graceful_timeout=_env_int("SPR_GRACEFUL_TIMEOUT", defaults.graceful_timeout),
+            keepalive=_env_int("SPR_KEEPALIVE", defaults.keepalive),
+            max_requests=_env_int("SPR_MAX_REQUESTS", defaults.max_requests),
+            model_dir=Path(os.getenv("SPR_MODEL_DIR", str(defaults.model_dir))),
+            features_path=Path(features_path) if features_path else None,
+        )
+
+
+def _worker_class(limit_concurrency: Optional[int]) -> type:
+    """Uvicorn worker class applying the per-worker concurrency limit."""
+    class Worker(UvicornWorker):
+        CONFIG_KWARGS = {**UvicornWorker.CONFIG_KWARGS, "limit_concurrency": limit_concurrency}
+
+    return Worker
+
+
+class Server(BaseApplication):
+    """Gunicorn application serving ``src.api:app`` from a preloaded master."""
+
+    def __init__(self, config: ServeConfig):
+        self.config = config
+        super().__init__()
+
+    def _load_state(self) -> None:
+        load_serving_state(self.config.model_dir, self.config.features_path)
+
+    def load_config(self) -> None:
+        config = self.config
+        settings: Dict[str, Any] = {
+            "bind": config.bind,
+            "workers": config.workers,
+            "worker_class": _worker_class(config.limit_concurrency),
+            "backlog": config.backlog,
+            "timeout": config.timeout,
+            "graceful_timeout": config.graceful_timeout,
+            "keepalive": config.keepalive,
+            "max_requests": config.max_requests,
+            "max_requests_jitter": config.max_requests // 10,
+            "preload_app": True,
+            "on_reload": lambda arbiter: self._on_reload(),
+        }
+        for key, value in settings.items():
+            self.cfg.set(key, value)
+
+    def _on_reload(self) -> None:
+        # Runs in the master on SIGHUP, before the replacement workers are forked
+        logger.info("Reloading serving state for new workers")
+        try:
+            gc.unfreeze()
+            self._load_state()
+        except Exception as e:
+            logger.error(f"Reload failed, new workers keep the previous state: {e}")
+        finally:
+            gc.collect()
+            gc.freeze()
+
+    def load(self):
+        self._load_state()
+        from . import app
+
+        gc.collect()
+        gc.freeze()
+        return app
+
+
+if __name__ == "__main__":
+    import argparse
+
+    defaults = ServeConfig.from_env()
+    parser = argparse.ArgumentParser(description="Serve the API with pre-forked workers")
+    parser.add_argument("--bind", default=defaults.bind)
+    parser.add_argument("--workers", type=int, default=defaults.workers)
+    parser.add_argument("--limit-concurrency", type=int, default=defaults.limit_concurrency)
+    parser.add_argument("--backlog", type=int, default=defaults.backlog)
+    parser.add_argument("--timeout", type=int, default=defaults.timeout)
+    parser.add_argument("--graceful-timeout", type=int, default=defaults.graceful_timeout)
+    parser.add_argument("--keepalive", type=int, default=defaults.keepalive)
+    parser.add_argument("--max-requests", type=int, default=defaults.max_requests)
+    parser.add_argument("--model-dir", type=Path, default=defaults.model_dir)
+    parser.add_argument("--features", type=Path, default=defaults.features_path)
+    args = parser.parse_args()
+
+    Server(ServeConfig(
+        bind=args.bind,
+        workers=args.workers,
+        limit_concurrency=args.limit_concurrency,
+        backlog=args.backlog,
+        timeout=args.timeout,
+        graceful_timeout=args.graceful_timeout,
+        keepalive=args.keepalive,
+        max_requests=args.max_requests,
+        model_dir=args.model_dir,
+        features_path=args.features,
+    )).run()
@@ -0,0 +1,131 @@
+"""Read-only model and feature data shared by the API workers.
+
+The state is loaded once per process into a module-level slot. Under
+``src.api.serve`` that process is the pre-fork master: workers inherit the
+already-loaded arrays, and their pages stay shared copy-on-write because
+nothing writes to them. Model artifacts and ``.npy`` feature matrices are
+memory-mapped as well, so their pages also come from the shared page cache.
+
+The model is held by a :class:`~src.ml.ModelRegistry`. Once started in a
+worker it hot-swaps new ``model/artifacts/CURRENT`` versions in the
+background, so model updates need neither a restart nor a reload signal.
+"""
+
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from ..exceptions import SongRecommendationError
+from ..logging_config import get_logger
+from ..ml import ModelArtifacts, ModelRegistry
+from ..mpd import TrackFeatureStore
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class ServingState:
+    """Model registry and feature data loaded for serving."""
+    model_registry: ModelRegistry
+    feature_store: Optional[TrackFeatureStore] = None
+    loaded_at: float = field(default_factory=time.time)
+    pid: int = field(default_factory=os.getpid)
+
+    @property
+    def artifacts(self) -> Optional[ModelArtifacts]:
+        """Artifacts of the active model version."""
+        current = self.model_registry.current
+        return current.artifacts if current is not None else None
+
+    @property
+    def model_version(self) -> Optional[str]:
+        return self.model_registry.version
+
+    def describe(self) -> Dict[str, Any]:
+        """Summary for health and stats endpoints."""
+        return {
+            **self.model_registry.describe(),
+            "feature_tracks": len(self.feature_store) if self.feature_store is not None else 0,
+            "loaded_at": self.loaded_at,
+            "loaded_by_pid": self.pid,
+        }
+
+
+_state: Optional[ServingState] = None
+
+
+def _warm(array: np.ndarray) -> None:
+    """Fault a memory-mapped array into the page cache so the first requests don't."""
+    if isinstance(array, np.memmap):
+        np.add.reduce(array.reshape(-1), dtype=np.float64)
+
+
+def load_serving_state(
+    model_dir: Path = Path("model"),
+    features_path: Optional[Path] = None,
+    poll_interval: float = 5.0
+) -> ServingState:
+    """Load the serving state and make it the current one for this process.
+
+    Args:
+        model_dir: Directory containing ``artifacts/``
+        features_path: Dense feature matrix (``.npy``) or MPD database with a ``features`` table
+        poll_interval: Seconds between checks for a new model version once watching; 0 disables it
+
+    Returns:
+        The new state
+    """
+    global _state
+    model_registry = ModelRegistry(Path(model_dir) / "artifacts", poll_interval=poll_interval)
+    model_registry.refresh()
+    if model_registry.current is None:
+        logger.warning(f"No model artifacts in {model_registry.artifact_root}; serving without a model")
+
+    feature_store = None
+    if features_path is not None:
+        features_path = Path(features_path)
+        if features_path.suffix == ".npy":
+            feature_store = TrackFeatureStore.load(features_path)
+            _warm(feature_store.matrix)
+        else:
+            feature_store = TrackFeatureStore.from_database(features_path)
+        # Shared between forked workers; writing would silently un-share the pages
+        feature_store.matrix.setflags(write=False)
+
+    _state = ServingState(model_registry=model_registry, feature_store=feature_store)
+    logger.info(f"Serving state loaded: {_state.describe()}")
+    return _state
+
+
+def serving_state_from_env() -> ServingState:
+    """Load the serving state from ``SPR_MODEL_DIR`` (``model``), ``SPR_FEATURES_PATH``
+    and ``SPR_MODEL_POLL_SECONDS`` (5)."""
+    features_path = os.getenv("SPR_FEATURES_PATH")
+    return load_serving_state(
+        Path(os.getenv("SPR_MODEL_DIR", "model")),
+        Path(features_path) if features_path else None,
+        float(os.getenv("SPR_MODEL_POLL_SECONDS", "5"))
+    )
+
+
+def get_serving_state() -> Optional[ServingState]:
+    """The current serving state of this process, if loaded."""
+    return _state
+
+
+def ensure_serving_state() -> Optional[ServingState]:
+    """The current serving state, loading it from the environment on first use.
+
+    Load failures are logged rather than raised so the API can still serve
+    the endpoints that don't need a model.
+    """
+    if _state is None:
+        try:
+            serving_state_from_env()
+        except (SongRecommendationError, OSError) as e:
+            logger.error(f"Failed to load serving state: {e}")
+    return _state
@@ -8,6 +8,8 @@ from .spotify import (
     SpotifyConfig
 )
 
+from .pagination import iter_pages, iter_items, iter_pages_threaded
+
 from ..recommendation_engine import RecommendationEngine
 
 __all__ = [
@@ -16,5 +18,8 @@ __all__ = [
     "AudioFeatures",
     "PlaylistInfo",
     "SpotifyConfig",
+    "iter_pages",
+    "iter_items",
+    "iter_pages_threaded",
     "RecommendationEngine",
 ]
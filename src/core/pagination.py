@@ -0,0 +1,104 @@
+"""Concurrent fetching of Spotify's offset-paginated endpoints.
+
+Spotify paging objects carry ``total``, so after the first page every
+remaining offset is known up front. Instead of following ``next`` links one
+round-trip at a time, the remaining pages are requested concurrently under a
+bounded limit and yielded back in offset order as soon as each one (and all
+pages before it) has arrived.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, List
+
+DEFAULT_MAX_CONCURRENCY = 8
+
+Page = Dict[str, Any]
+
+
+def _remaining_offsets(first_page: Page, page_size: int) -> List[int]:
+    """Offsets still to fetch after the first page."""
+    total = first_page.get("total") or 0
+    start = first_page.get("offset", 0) + page_size
+    return list(range(start, total, page_size))
+
+
+async def iter_pages(
+    fetch_page: Callable[[int], Awaitable[Page]],
+    page_size: int,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY
+) -> AsyncIterator[Page]:
+    """Yield every page of an offset-paginated endpoint, in order.
+
+    Args:
+        fetch_page: Coroutine function returning the page at a given offset
+        page_size: Items per page, as passed to the endpoint's ``limit``
+        max_concurrency: Maximum number of page requests in flight
+
+    Yields:
+        Paging objects in offset order
+    """
+    first_page = await fetch_page(0)
+    yield first_page
+
+    offsets = _remaining_offsets(first_page, page_size)
+    if not offsets:
+        return
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def _bounded_fetch(offset: int) -> Page:
+        async with semaphore:
+            return await fetch_page(offset)
+
+    tasks = [asyncio.ensure_future(_bounded_fetch(offset)) for offset in offsets]
+    try:
+        # Awaiting in order still lets later pages complete in the background
+        for task in tasks:
+            yield await task
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def iter_items(
+    fetch_page: Callable[[int], Awaitable[Page]],
+    page_size: int,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY
+) -> AsyncIterator[List[Any]]:
+    """Yield the ``items`` of every page, one list per page, in order."""
+    async for page in iter_pages(fetch_page, page_size, max_concurrency):
+        yield page.get("items", [])
+
+
+def iter_pages_threaded(
+    fetch_page: Callable[[int], Page],
+    page_size: int,
+    max_workers: int = DEFAULT_MAX_CONCURRENCY
+) -> Iterator[Page]:
+    """Blocking counterpart of ``iter_pages`` for synchronous clients such as spotipy.
+
+    Args:
+        fetch_page: Function returning the page at a given offset
+        page_size: Items per page, as passed to the endpoint's ``limit``
+        max_workers: Maximum number of page requests in flight
+
+    Yields:
+        Paging objects in offset order
+    """
+    first_page = fetch_page(0)
+    yield first_page
+
+    offsets = _remaining_offsets(first_page, page_size)
+    if not offsets:
+        return
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    futures = [executor.submit(fetch_page, offset) for offset in offsets]
+    try:
+        for future in futures:
+            yield future.result()
+    finally:
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=False)
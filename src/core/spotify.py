@@ -7,7 +7,7 @@ import time
 from dataclasses import dataclass
 from functools import lru_cache
 from pathlib import Path
-from typing import Optional, List, Dict, Any, Union, Tuple
+from typing import Optional, List, Dict, Any, Union, Tuple, AsyncIterator
 import base64
 
 import httpx
@@ -24,6 +24,17 @@ from tqdm import tqdm
 from ..exceptions import SpotifyAPIError, DataValidationError
 from ..validators import validate_spotify_uri
 from ..logging_config import get_logger
+from ..metrics import metrics
+from .pagination import iter_items, DEFAULT_MAX_CONCURRENCY
+
+# Maximum page size of the playlist items endpoint
+PLAYLIST_PAGE_SIZE = 100
+
+# Maximum number of IDs the several-tracks endpoint accepts per call
+TRACKS_BATCH_SIZE = 50
+
+# Maximum number of IDs the several-audio-features endpoint accepts per call
+AUDIO_FEATURES_BATCH_SIZE = 100
 
 
 class SpotifyTrack(BaseModel):
@@ -36,6 +47,8 @@ class SpotifyTrack(BaseModel):
     uri: str = Field(..., description="Spotify URI")
     duration_ms: int = Field(..., ge=0, description="Duration in milliseconds")
     popularity: int = Field(..., ge=0, le=100, description="Popularity score 0-100")
+    artist_uri: Optional[str] = Field(None, description="Primary artist Spotify URI")
+    album_uri: Optional[str] = Field(None, description="Album Spotify URI")
     
     @validator('uri')
     def validate_spotify_uri_format(cls, v):
@@ -97,6 +110,10 @@ class SpotifyConfig:
     cache_path: Optional[Path] = None
     requests_timeout: int = 30
     retries: int = 3
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY
+    # Alternative Web API and accounts service base URLs, e.g. a local stand-in for load tests
+    api_url: Optional[str] = None
+    accounts_url: Optional[str] = None
 
 
 class SpotifyClient:
@@ -124,9 +141,14 @@ class SpotifyClient:
         self.client_id = client_id
         self.client_secret = client_secret
         self.redirect_uri = redirect_uri
-        self.config = config or SpotifyConfig()
+        self.config = config or SpotifyConfig(
+            client_id=client_id,
+            client_secret=client_secret,
+            redirect_uri=redirect_uri
+        )
         self.cache_dir = Path(cache_dir)
         self.cache_ttl = cache_ttl
+        self.logger = get_logger(__name__)
         
         # Create cache directory
         self.cache_dir.mkdir(parents=True, exist_ok=True)
@@ -137,6 +159,8 @@ class SpotifyClient:
         # In-memory caches
         self._track_cache: Dict[str, SpotifyTrack] = {}
         self._features_cache: Dict[str, AudioFeatures] = {}
+        # Tracks Spotify has no audio features for, so batches don't re-request them
+        self._no_features: set = set()
         
         # File-based cache for audio features (from legacy)
         self._audio_features_cache: Dict[str, Tuple[AudioFeatures, float]] = {}
@@ -195,8 +219,15 @@ class SpotifyClient:
                 client_secret=self.config.client_secret
             )
             
+            if self.config.accounts_url:
+                token_url = f"{self.config.accounts_url.rstrip('/')}/api/token"
+                self.oauth_manager.OAUTH_TOKEN_URL = token_url
+                self.client_credentials_manager.OAUTH_TOKEN_URL = token_url
+            
             # Initialize Spotify client
             self._client = Spotify(auth_manager=self.client_credentials_manager)
+            if self.config.api_url:
+                self._client.prefix = f"{self.config.api_url.rstrip('/')}/v1/"
             
             self.logger.info("Spotify client initialized successfully")
             
@@ -204,6 +235,83 @@ class SpotifyClient:
             self.logger.error(f"Failed to initialize Spotify client: {e}")
             raise SpotifyAPIError(f"Failed to initialize Spotify client: {e}")
     
+    def _timed_call(self, endpoint: str, func, *args, **kwargs) -> Any:
+        """Call a blocking spotipy method, recording upstream count and latency.
+        
+        Args:
+            endpoint: Metric label for the Web API endpoint
+            func: Bound spotipy method
+            *args: Positional arguments for ``func``
+            **kwargs: Keyword arguments for ``func``
+            
+        Returns:
+            The spotipy response
+        """
+        if not metrics.enabled:
+            return func(*args, **kwargs)
+        
+        start = time.perf_counter()
+        outcome = "ok"
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            outcome = "error"
+            raise
+        finally:
+            metrics.observe("upstream_request_seconds", time.perf_counter() - start, endpoint=endpoint)
+            metrics.inc("upstream_requests_total", endpoint=endpoint, outcome=outcome)
+    
+    async def _call(self, endpoint: str, func, *args, **kwargs) -> Any:
+        """Run a blocking spotipy method in the thread pool via :meth:`_timed_call`."""
+        return await asyncio.to_thread(self._timed_call, endpoint, func, *args, **kwargs)
+    
+    async def _call_batched(
+        self, endpoint: str, func, ids: List[str], batch_size: int
+    ) -> List[Tuple[List[str], Any]]:
+        """Call a several-IDs endpoint for ``ids`` in concurrent batches.
+        
+        Args:
+            endpoint: Metric label for the Web API endpoint
+            func: Bound spotipy method taking a list of IDs
+            ids: IDs to request
+            batch_size: Maximum IDs per call
+            
+        Returns:
+            (batch, response) pairs in request order
+        """
+        semaphore = asyncio.Semaphore(self.config.max_concurrency)
+        batches = [ids[i:i + batch_size] for i in range(0, len(ids), batch_size)]
+        
+        async def fetch_batch(batch: List[str]) -> Any:
+            async with semaphore:
+                return await self._call(endpoint, func, batch)
+        
+        responses = await asyncio.gather(*(fetch_batch(batch) for batch in batches))
+        return list(zip(batches, responses))
+    
+    @staticmethod
+    def _parse_track(track_data: Dict[str, Any]) -> SpotifyTrack:
+        """Convert a Web API track object to a SpotifyTrack.
+        
+        Args:
+            track_data: Web API track object (tracks, playlist items, recommendations, search)
+            
+        Returns:
+            SpotifyTrack object
+        """
+        artist = track_data["artists"][0]
+        return SpotifyTrack(
+            id=track_data["id"],
+            name=track_data["name"],
+            artist=artist["name"],
+            album=track_data["album"]["name"],
+            uri=track_data["uri"],
+            duration_ms=track_data["duration_ms"],
+            popularity=track_data["popularity"],
+            artist_uri=artist.get("uri"),
+            album_uri=track_data["album"].get("uri")
+        )
+    
     async def get_track(self, track_id: str) -> Optional[SpotifyTrack]:
         """Get track details by ID with caching.
         
@@ -215,27 +323,21 @@ class SpotifyClient:
         """
         # Check cache first
         if track_id in self._track_cache:
+            metrics.inc("cache_requests_total", cache="spotify_track", result="hit")
             self.logger.debug(f"Track {track_id} found in cache")
             return self._track_cache[track_id]
+        metrics.inc("cache_requests_total", cache="spotify_track", result="miss")
         
         try:
             # Run synchronous Spotify API call in thread pool
-            track_data = await asyncio.to_thread(self._client.track, track_id)
+            track_data = await self._call("track", self._client.track, track_id)
             
             if not track_data:
                 self.logger.warning(f"Track {track_id} not found")
                 return None
             
             # Create SpotifyTrack object
-            track = SpotifyTrack(
-                id=track_data["id"],
-                name=track_data["name"],
-                artist=track_data["artists"][0]["name"],
-                album=track_data["album"]["name"],
-                uri=track_data["uri"],
-                duration_ms=track_data["duration_ms"],
-                popularity=track_data["popularity"]
-            )
+            track = self._parse_track(track_data)
             
             # Cache the result
             self._track_cache[track_id] = track
@@ -247,6 +349,47 @@ class SpotifyClient:
             self.logger.error(f"Error fetching track {track_id}: {e}")
             raise SpotifyAPIError(f"Failed to fetch track {track_id}: {e}")
     
+    async def get_tracks(self, track_ids: List[str]) -> List[Optional[SpotifyTrack]]:
+        """Get many tracks, batching cache misses through the several-tracks endpoint.
+        
+        Uncached IDs are deduplicated and requested ``TRACKS_BATCH_SIZE`` at a
+        time, with the batches in flight concurrently (bounded by
+        ``config.max_concurrency``). Results share the cache used by
+        :meth:`get_track`.
+        
+        Args:
+            track_ids: Spotify track IDs or URIs
+            
+        Returns:
+            SpotifyTrack objects aligned with ``track_ids``, None where not found
+        """
+        ids = [track_id.split(':')[-1] for track_id in track_ids]
+        missing = list(dict.fromkeys(i for i in ids if i not in self._track_cache))
+        metrics.inc("cache_requests_total", len(ids) - len(missing), cache="spotify_track", result="hit")
+        metrics.inc("cache_requests_total", len(missing), cache="spotify_track", result="miss")
+        
+        if missing:
+            try:
+                responses = await self._call_batched(
+                    "tracks", self._client.tracks, missing, TRACKS_BATCH_SIZE
+                )
+            except Exception as e:
+                self.logger.error(f"Error fetching {len(missing)} tracks: {e}")
+                raise SpotifyAPIError(f"Failed to fetch tracks: {e}")
+            
+            for batch, response in responses:
+                for track_id, track_data in zip(batch, (response or {}).get("tracks", [])):
+                    if not track_data:
+                        continue
+                    try:
+                        self._track_cache[track_id] = self._parse_track(track_data)
+                    except Exception as e:
+                        self.logger.warning(f"Error processing track {track_id}: {e}")
+            
+            self.logger.debug(f"Fetched {len(missing)} tracks in {len(responses)} batches")
+        
+        return [self._track_cache.get(i) for i in ids]
+    
     async def get_audio_features(self, track_id: str) -> Optional[AudioFeatures]:
         """Get audio features for a track with caching.
         
@@ -258,13 +401,15 @@ class SpotifyClient:
         """
         # Check cache first
         if track_id in self._features_cache:
+            metrics.inc("cache_requests_total", cache="spotify_features", result="hit")
             self.logger.debug(f"Audio features for {track_id} found in cache")
             return self._features_cache[track_id]
+        metrics.inc("cache_requests_total", cache="spotify_features", result="miss")
         
         try:
             # Get audio features
-            features_data = await asyncio.to_thread(
-                self._client.audio_features, [track_id]
+            features_data = await self._call(
+                "audio_features", self._client.audio_features, [track_id]
             )
             
             if not features_data or not features_data[0]:
@@ -300,6 +445,52 @@ class SpotifyClient:
             self.logger.error(f"Error fetching audio features for {track_id}: {e}")
             raise SpotifyAPIError(f"Failed to fetch audio features for {track_id}: {e}")
     
+    async def get_audio_features_batch(
+        self, track_ids: List[str]
+    ) -> List[Optional[AudioFeatures]]:
+        """Get audio features for many tracks, batching cache misses.
+        
+        Uncached IDs are deduplicated and requested
+        ``AUDIO_FEATURES_BATCH_SIZE`` at a time, with the batches in flight
+        concurrently (bounded by ``config.max_concurrency``). Results share
+        the cache used by :meth:`get_audio_features`.
+        
+        Args:
+            track_ids: Spotify track IDs or URIs
+            
+        Returns:
+            AudioFeatures objects aligned with ``track_ids``, None where not found
+        """
+        ids = [track_id.split(':')[-1] for track_id in track_ids]
+        missing = list(dict.fromkeys(
+            i for i in ids if i not in self._features_cache and i not in self._no_features
+        ))
+        metrics.inc("cache_requests_total", len(ids) - len(missing), cache="spotify_features", result="hit")
+        metrics.inc("cache_requests_total", len(missing), cache="spotify_features", result="miss")
+        
+        if missing:
+            try:
+                responses = await self._call_batched(
+                    "audio_features", self._client.audio_features, missing, AUDIO_FEATURES_BATCH_SIZE
+                )
+            except Exception as e:
+                self.logger.error(f"Error fetching audio features for {len(missing)} tracks: {e}")
+                raise SpotifyAPIError(f"Failed to fetch audio features: {e}")
+            
+            for batch, response in responses:
+                for track_id, features in zip(batch, response or []):
+                    if not features:
+                        self._no_features.add(track_id)
+                        continue
+                    try:
+                        self._features_cache[track_id] = AudioFeatures(**features)
+                    except Exception as e:
+                        self.logger.warning(f"Error processing audio features for {track_id}: {e}")
+            
+            self.logger.debug(f"Fetched audio features for {len(missing)} tracks in {len(responses)} batches")
+        
+        return [self._features_cache.get(i) for i in ids]
+    
     async def get_recommendations(
         self,
         seed_tracks: List[str],
@@ -334,21 +525,13 @@ class SpotifyClient:
                 params.update(target_features)
             
             # Get recommendations
-            results = await asyncio.to_thread(self._client.recommendations, **params)
+            results = await self._call("recommendations", self._client.recommendations, **params)
             
             # Convert to SpotifyTrack objects
             tracks = []
             for track_data in results.get("tracks", []):
                 try:
-                    track = SpotifyTrack(
-                        id=track_data["id"],
-                        name=track_data["name"],
-                        artist=track_data["artists"][0]["name"],
-                        album=track_data["album"]["name"],
-                        uri=track_data["uri"],
-                        duration_ms=track_data["duration_ms"],
-                        popularity=track_data["popularity"]
-                    )
+                    track = self._parse_track(track_data)
                     tracks.append(track)
                 except Exception as e:
                     self.logger.warning(f"Error processing track recommendation: {e}")
@@ -361,70 +544,73 @@ class SpotifyClient:
             self.logger.error(f"Error getting recommendations: {e}")
             raise SpotifyAPIError(f"Failed to get recommendations: {e}")
     
-    async def get_playlist_tracks(self, playlist_id: str) -> List[SpotifyTrack]:
-        """Get all tracks from a playlist with pagination.
+    def _parse_playlist_items(self, items: List[Dict[str, Any]]) -> List[SpotifyTrack]:
+        """Convert playlist items to SpotifyTrack objects, skipping invalid entries.
         
         Args:
-            playlist_id: Spotify playlist ID
+            items: Items of a playlist paging object
             
         Returns:
             List of SpotifyTrack objects
         """
-        try:
-            # Get initial playlist tracks
-            results = await asyncio.to_thread(
-                self._client.playlist_tracks, playlist_id
-            )
-            
-            tracks = []
-            items = results.get("items", [])
-            
-            # Process initial batch
-            for item in items:
-                if item.get("track"):
-                    try:
-                        track = SpotifyTrack(
-                            id=item["track"]["id"],
-                            name=item["track"]["name"],
-                            artist=item["track"]["artists"][0]["name"],
-                            album=item["track"]["album"]["name"],
-                            uri=item["track"]["uri"],
-                            duration_ms=item["track"]["duration_ms"],
-                            popularity=item["track"]["popularity"]
-                        )
-                        tracks.append(track)
-                    except Exception as e:
-                        self.logger.warning(f"Error processing playlist track: {e}")
-                        continue
-            
-            # Handle pagination
-            while results.get("next"):
-                results = await asyncio.to_thread(self._client.next, results)
-                
-                for item in results.get("items", []):
-                    if item.get("track"):
-                        try:
-                            track = SpotifyTrack(
-                                id=item["track"]["id"],
-                                name=item["track"]["name"],
-                                artist=item["track"]["artists"][0]["name"],
-                                album=item["track"]["album"]["name"],
-                                uri=item["track"]["uri"],
-                                duration_ms=item["track"]["duration_ms"],
-                                popularity=item["track"]["popularity"]
-                            )
-                            tracks.append(track)
-                        except Exception as e:
-                            self.logger.warning(f"Error processing playlist track: {e}")
-                            continue
-            
-            self.logger.info(f"Fetched {len(tracks)} tracks from playlist {playlist_id}")
-            return tracks
+        tracks = []
+        for item in items:
+            if item.get("track"):
+                try:
+                    track = self._parse_track(item["track"])
+                    tracks.append(track)
+                except Exception as e:
+                    self.logger.warning(f"Error processing playlist track: {e}")
+                    continue
+        return tracks
+    
+    async def iter_playlist_tracks(self, playlist_id: str) -> AsyncIterator[List[SpotifyTrack]]:
+        """Stream a playlist's tracks page by page.
+        
+        The first page gives the playlist size; the remaining pages are then
+        requested concurrently (bounded by ``config.max_concurrency``) and
+        yielded in playlist order as they arrive.
+        
+        Args:
+            playlist_id: Spotify playlist ID
             
+        Yields:
+            Lists of SpotifyTrack objects, one per page
+        """
+        async def fetch_page(offset: int) -> Dict[str, Any]:
+            return await self._call(
+                "playlist_items",
+                self._client.playlist_items,
+                playlist_id,
+                limit=PLAYLIST_PAGE_SIZE,
+                offset=offset
+            )
+        
+        try:
+            async for items in iter_items(
+                fetch_page, PLAYLIST_PAGE_SIZE, self.config.max_concurrency
+            ):
+                yield self._parse_playlist_items(items)
         except Exception as e:
             self.logger.error(f"Error fetching playlist {playlist_id}: {e}")
             raise SpotifyAPIError(f"Failed to fetch playlist {playlist_id}: {e}")
     
+    async def get_playlist_tracks(self, playlist_id: str) -> List[SpotifyTrack]:
+        """Get all tracks from a playlist with concurrent pagination.
+        
+        Args:
+            playlist_id: Spotify playlist ID
+            
+        Returns:
+            List of SpotifyTrack objects
+        """
+        tracks = []
+        async for page_tracks in self.iter_playlist_tracks(playlist_id):
+            tracks.extend(page_tracks)
+        
+        self.logger.info(f"Fetched {len(tracks)} tracks from playlist {playlist_id}")
+        return tracks
+    
     async def search_tracks(
         self,
         query: str,
@@ -442,7 +628,8 @@ class SpotifyClient:
             List of SpotifyTrack objects
         """
         try:
-            results = await asyncio.to_thread(
+            results = await self._call(
+                "search",
                 self._client.search,
                 q=query,
                 type="track",
@@ -453,15 +640,7 @@ class SpotifyClient:
             tracks = []
             for track_data in results.get("tracks", {}).get("items", []):
                 try:
-                    track = SpotifyTrack(
-                        id=track_data["id"],
-                        name=track_data["name"],
-                        artist=track_data["artists"][0]["name"],
-                        album=track_data["album"]["name"],
-                        uri=track_data["uri"],
-                        duration_ms=track_data["duration_ms"],
-                        popularity=track_data["popularity"]
-                    )
+                    track = self._parse_track(track_data)
                     tracks.append(track)
                 except Exception as e:
                     self.logger.warning(f"Error processing search result: {e}")
@@ -484,8 +663,8 @@ class SpotifyClient:
             List of PlaylistInfo objects
         """
         try:
-            results = await asyncio.to_thread(
-                self._client.current_user_playlists, limit=limit
+            results = await self._call(
+                "current_user_playlists", self._client.current_user_playlists, limit=limit
             )
             
             playlists = []
@@ -529,16 +708,19 @@ class SpotifyClient:
             
             # Check in-memory cache first
             if track_id in self._features_cache:
+                metrics.inc("cache_requests_total", cache="spotify_features", result="hit")
                 return self._features_cache[track_id]
             
             # Check file cache
             cached_features = self._load_from_cache(f"features_{track_id}")
             if cached_features:
+                metrics.inc("cache_requests_total", cache="spotify_features_file", result="hit")
                 self._features_cache[track_id] = cached_features
                 return cached_features
+            metrics.inc("cache_requests_total", cache="spotify_features_file", result="miss")
             
             # Fetch from Spotify
-            features = self._client.audio_features([track_id])
+            features = self._timed_call("audio_features", self._client.audio_features, [track_id])
             if not features or not features[0]:
                 raise SpotifyAPIError(f"No audio features found for track {track_id}")
             
@@ -568,29 +750,9 @@ class SpotifyClient:
             if not track_uris:
                 return []
             
-            # Create tasks for concurrent fetching
-            tasks = []
-            for uri in track_uris:
-                # Check cache first
-                track_id = uri.split(':')[-1]
-                if track_id in self._features_cache:
-                    tasks.append(asyncio.create_task(asyncio.sleep(0, self._features_cache[track_id])))
-                else:
-                    task = asyncio.create_task(self.get_audio_features(track_id))
-                    tasks.append(task)
-            
-            # Wait for all tasks to complete
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-            
-            # Filter out exceptions and return valid results
-            features_list = []
-            for result in results:
-                if isinstance(result, Exception):
-                    self.logger.warning(f"Failed to get features for a track: {result}")
-                elif result is not None:
-                    features_list.append(result)
-            
-            return features_list
+            # Batched and cache-backed; tracks without features are dropped
+            results = await self.get_audio_features_batch(track_uris)
+            return [features for features in results if features is not None]
             
         except Exception as e:
             self.logger.error(f"Failed to get multiple track features: {e}")
@@ -671,6 +833,7 @@ class SpotifyClient:
             # Clear in-memory caches
             self._track_cache.clear()
             self._features_cache.clear()
+            self._no_features.clear()
             self._audio_features_cache.clear()
             
             # Clear file cache
@@ -707,6 +870,8 @@ class SpotifyClient:
         client_id = os.getenv("SPOTIPY_CLIENT_ID", "")
         client_secret = os.getenv("SPOTIPY_CLIENT_SECRET", "")
         redirect_uri = os.getenv("SPOTIPY_REDIRECT_URI", "http://localhost:8888/callback")
+        api_url = os.getenv("SPOTIFY_API_URL") or None
+        accounts_url = os.getenv("SPOTIFY_ACCOUNTS_URL") or api_url
         
         if not client_id or not client_secret:
             raise SpotifyAPIError(
@@ -717,7 +882,9 @@ class SpotifyClient:
             client_id=client_id,
             client_secret=client_secret,
             redirect_uri=redirect_uri,
-            cache_path=cache_path
+            cache_path=cache_path,
+            api_url=api_url,
+            accounts_url=accounts_url
         )
         
         return cls(
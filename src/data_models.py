@@ -1,6 +1,6 @@
 """Data models for the song recommendation system."""
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 
@@ -14,7 +14,8 @@ class Track:
     artist_uri: str
     album_uri: str
     album_name: str
-    track_id: int
+    # Dense ID in the local MPD database; None for tracks hydrated from Spotify
+    track_id: Optional[int] = None
     
     def __post_init__(self) -> None:
         """Validate track data after initialization."""
@@ -80,6 +81,10 @@ class RecommendationResult:
     algorithm_used: str
     processing_time: float
     user_feedback: Optional[Dict[str, Any]] = None
+    # Seconds per pipeline stage (features, scale_predict, rank, hydrate, ...)
+    stage_timings: Dict[str, float] = field(default_factory=dict)
+    # Model artifact version that scored the candidates
+    model_version: Optional[str] = None
     
     def __post_init__(self) -> None:
         """Validate recommendation result."""
@@ -0,0 +1,32 @@
+"""Weekly recommendation digest emails."""
+
+from .checkpoint import SentLog, weekly_digest_id
+from .mailer import RateLimiter, SMTPPool, SMTPSettings
+from .pipeline import (
+    DigestPipeline,
+    DigestRenderer,
+    DigestReport,
+    DigestTrack,
+    Recipient,
+    recipients_from_csv,
+    recipients_from_materialized,
+    recipients_from_results,
+    recommend_recipients,
+)
+
+__all__ = [
+    "SentLog",
+    "weekly_digest_id",
+    "RateLimiter",
+    "SMTPPool",
+    "SMTPSettings",
+    "DigestPipeline",
+    "DigestRenderer",
+    "DigestReport",
+    "DigestTrack",
+    "Recipient",
+    "recipients_from_csv",
+    "recipients_from_materialized",
+    "recipients_from_results",
+    "recommend_recipients",
+]
@@ -0,0 +1,73 @@
+"""Per-recipient sent checkpoint for digest runs.
+
+Each delivered digest is recorded under its digest id (by default the ISO
+week, e.g. ``2026-W42``) right after the server accepts it, so rerunning a
+failed or interrupted run only sends to the recipients still missing.
+"""
+
+import sqlite3
+import threading
+import time
+from datetime import date
+from pathlib import Path
+from typing import Optional, Set, Union
+
+from ..exceptions import DatabaseError
+
+
+def weekly_digest_id(day: Optional[date] = None) -> str:
+    """Digest id of the ISO week containing ``day`` (today by default)."""
+    year, week, _ = (day or date.today()).isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+class SentLog:
+    """Record of which recipients each digest was delivered to, in SQLite."""
+
+    def __init__(self, db_path: Union[str, Path]):
+        """Open (or create) the sent log.
+
+        Args:
+            db_path: Database file path
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        try:
+            self._conn = sqlite3.connect(
+                str(self.db_path), check_same_thread=False, isolation_level=None, timeout=30
+            )
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS digest_sent (
+                    digest_id TEXT NOT NULL,
+                    username TEXT NOT NULL,
+                    email TEXT NOT NULL,
+                    message_id TEXT,
+                    sent_at REAL NOT NULL,
+                    PRIMARY KEY (digest_id, username)
+                )
+            """)
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Failed to open digest sent log {self.db_path}: {e}")
+
+    def sent_usernames(self, digest_id: str) -> Set[str]:
+        """Recipients the digest was already delivered to."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT username FROM digest_sent WHERE digest_id = ?", (digest_id,)
+            ).fetchall()
+        return {username for (username,) in rows}
+
+    def mark_sent(self, digest_id: str, username: str, email: str, message_id: Optional[str] = None) -> None:
+        """Record a delivered digest."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO digest_sent (digest_id, username, email, message_id, sent_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (digest_id, username, email, message_id, time.time())
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,201 @@
+"""Pooled SMTP delivery with rate limiting.
+
+:class:`SMTPPool` keeps logged-in connections open and hands them out to
+sender threads, so a digest run costs one TLS handshake and login per pooled
+connection instead of one per message. Connections that the server dropped
+are replaced transparently; connections are also recycled after
+``max_messages_per_connection`` messages because many providers cap that.
+"""
+
+import os
+import queue
+import smtplib
+import ssl
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from email.message import EmailMessage
+from typing import Iterator, List, Optional
+
+from ..logging_config import get_logger
+from ..metrics import metrics
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class SMTPSettings:
+    """SMTP server and credentials.
+
+    Attributes:
+        host: Server host name
+        port: Server port
+        username: Login user, or None to send without logging in
+        password: Login password
+        security: "ssl" (implicit TLS), "starttls" or "none"
+        timeout: Socket timeout in seconds
+    """
+    host: str = "smtp.gmail.com"
+    port: int = 465
+    username: Optional[str] = None
+    password: Optional[str] = None
+    security: str = "ssl"
+    timeout: float = 30.0
+
+    @classmethod
+    def from_env(cls) -> "SMTPSettings":
+        """Read ``SMTP_HOST``, ``SMTP_PORT``, ``SMTP_SECURITY``, ``EMAIL_ADDRESS`` and ``EMAIL_PASSWORD``."""
+        defaults = cls()
+        return cls(
+            host=os.getenv("SMTP_HOST", defaults.host),
+            port=int(os.getenv("SMTP_PORT", str(defaults.port))),
+            username=os.getenv("EMAIL_ADDRESS"),
+            password=os.getenv("EMAIL_PASSWORD"),
+            security=os.getenv("SMTP_SECURITY", defaults.security),
+        )
+
+
+class RateLimiter:
+    """Thread-safe token bucket pacing sends to ``rate`` per second."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        """Initialize a full bucket.
+
+        Args:
+            rate: Sustained permits per second
+            burst: Permits that may be taken back to back
+        """
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a permit is available and take it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class _Connection:
+    """A pooled SMTP connection and the number of messages sent over it."""
+
+    def __init__(self, smtp: smtplib.SMTP):
+        self.smtp = smtp
+        self.sent = 0
+
+
+class SMTPPool:
+    """Bounded pool of reusable, logged-in SMTP connections."""
+
+    def __init__(self, settings: SMTPSettings, size: int = 4, max_messages_per_connection: int = 100):
+        """Initialize an empty pool; connections are opened on demand.
+
+        Args:
+            settings: Server and credentials
+            size: Maximum open connections
+            max_messages_per_connection: Messages after which a connection is closed and replaced
+        """
+        self.settings = settings
+        self.size = size
+        self.max_messages_per_connection = max_messages_per_connection
+        self.connections_opened = 0
+        self._idle: "queue.LifoQueue[_Connection]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+
+    def _connect(self) -> _Connection:
+        settings = self.settings
+        if settings.security == "ssl":
+            smtp = smtplib.SMTP_SSL(
+                settings.host, settings.port, timeout=settings.timeout,
+                context=ssl.create_default_context()
+            )
+        else:
+            smtp = smtplib.SMTP(settings.host, settings.port, timeout=settings.timeout)
+            if settings.security == "starttls":
+                smtp.starttls(context=ssl.create_default_context())
+        try:
+            if settings.username:
+                smtp.login(settings.username, settings.password or "")
+        except smtplib.SMTPException:
+            smtp.close()
+            raise
+        with self._lock:
+            self.connections_opened += 1
+        metrics.inc("smtp_connections_total")
+        return _Connection(smtp)
+
+    @staticmethod
+    def _close(connection: _Connection) -> None:
+        try:
+            connection.smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            connection.smtp.close()
+
+    @contextmanager
+    def connection(self) -> Iterator[_Connection]:
+        """Borrow a connection, opening one if none is idle.
+
+        A connection whose use raised is closed instead of returned to the pool.
+        """
+        with self._slots:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                connection = self._connect()
+            try:
+                yield connection
+            except BaseException:
+                self._close(connection)
+                raise
+            if connection.sent >= self.max_messages_per_connection:
+                self._close(connection)
+            else:
+                self._idle.put(connection)
+
+    def send(self, message: EmailMessage) -> None:
+        """Send a message over a pooled connection.
+
+        A connection the server closed while idle is replaced and the send
+        retried once.
+
+        Raises:
+            smtplib.SMTPException: The server rejected the message
+        """
+        for attempt in range(2):
+            try:
+                with self.connection() as connection:
+                    connection.smtp.send_message(message)
+                    connection.sent += 1
+                return
+            except smtplib.SMTPServerDisconnected:
+                if attempt:
+                    raise
+                logger.info("SMTP connection was closed by the server, reconnecting")
+
+    def close(self) -> None:
+        """Close every idle connection."""
+        closing: List[_Connection] = []
+        while True:
+            try:
+                closing.append(self._idle.get_nowait())
+            except queue.Empty:
+                break
+        for connection in closing:
+            self._close(connection)
+
+    def __enter__(self) -> "SMTPPool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,370 @@
+"""Weekly recommendation digest: recommend, render and deliver in one run.
+
+Recommendations for every user are computed in one batch pass through the
+:class:`~src.recommendation_engine.RecommendationEngine` (or taken from the
+legacy Streamlit CSV), rendered from the ``templates/email`` templates and
+sent by a bounded set of threads sharing an :class:`~.mailer.SMTPPool`.
+Delivered digests are checkpointed in a :class:`~.checkpoint.SentLog`, so a
+rerun of the same week skips everyone already served.
+
+    python -m src.digest.pipeline --csv streamlit/new.csv
+    python -m src.digest.pipeline --users-db data/users.db --candidates-playlist <id>
+
+Point ``--smtp-host``/``--smtp-port`` at a local sink (e.g.
+``python -m aiosmtpd -n -l localhost:1025``) with ``--smtp-security none``
+to try a run without sending real mail.
+"""
+
+import smtplib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from email.message import EmailMessage
+from email.utils import make_msgid
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+import pandas as pd
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+from ..data_models import RecommendationResult, User
+from ..logging_config import get_logger
+from ..metrics import metrics
+from ..recommendation_store import Materializer, MaterializedRecommendations, RecommendationStore
+from .checkpoint import SentLog, weekly_digest_id
+from .mailer import RateLimiter, SMTPPool
+
+logger = get_logger(__name__)
+
+TEMPLATE_DIR = Path(__file__).resolve().parent.parent.parent / "templates" / "email"
+DEFAULT_SUBJECT = "Your Spotify Weekly Recommendations are here"
+TRACK_URL = "https://open.spotify.com/track/{}"
+
+
+@dataclass
+class DigestTrack:
+    """A recommended track as shown in the digest."""
+    id: str
+    name: Optional[str] = None
+    artist: Optional[str] = None
+
+    @property
+    def url(self) -> str:
+        return TRACK_URL.format(self.id)
+
+
+@dataclass
+class Recipient:
+    """A user and the tracks to send them."""
+    username: str
+    email: str
+    tracks: List[DigestTrack] = field(default_factory=list)
+    # What the recommendations are based on, shown in the greeting
+    seed: Optional[str] = None
+
+
+@dataclass
+class DigestReport:
+    """Outcome of a digest run."""
+    digest_id: str
+    sent: int = 0
+    already_sent: int = 0
+    without_tracks: int = 0
+    failed: Dict[str, str] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Union[str, int, Dict[str, str]]]:
+        return {
+            "digest_id": self.digest_id,
+            "sent": self.sent,
+            "already_sent": self.already_sent,
+            "without_tracks": self.without_tracks,
+            "failed": self.failed,
+        }
+
+
+def _track_id(uri: str) -> str:
+    return uri.rsplit(":", 1)[-1]
+
+
+def recipients_from_csv(path: Union[str, Path]) -> List[Recipient]:
+    """Read recipients from the Streamlit user CSV (``Username``, ``email_id``, ``rec_song_uri``).
+
+    Users may have any number of stored recommendations, including none.
+    """
+    frame = pd.read_csv(path, dtype=str).fillna("")
+    recipients = []
+    for row in frame.itertuples(index=False):
+        track_ids = [uri.strip() for uri in row.rec_song_uri.split(",") if uri.strip()]
+        recipients.append(Recipient(
+            username=row.Username,
+            email=row.email_id,
+            tracks=[DigestTrack(_track_id(uri)) for uri in track_ids],
+            seed=getattr(row, "recently_searched_song", "") or None,
+        ))
+    return recipients
+
+
+def recipients_from_results(
+    users: Iterable[User],
+    results: Dict[str, RecommendationResult]
+) -> List[Recipient]:
+    """Build recipients from engine results; users without a result get no tracks."""
+    recipients = []
+    for user in users:
+        result = results.get(user.username)
+        tracks = [] if result is None else [
+            DigestTrack(_track_id(track.track_uri), track.track_name, track.artist_name)
+            for track in result.recommended_tracks
+        ]
+        recipients.append(Recipient(username=user.username, email=user.email, tracks=tracks))
+    return recipients
+
+
+def recipients_from_materialized(
+    users: Iterable[User],
+    entries: Dict[str, MaterializedRecommendations]
+) -> List[Recipient]:
+    """Build recipients from stored recommendations; users without an entry get no tracks."""
+    recipients = []
+    for user in users:
+        entry = entries.get(user.username)
+        tracks = [] if entry is None else [
+            DigestTrack(_track_id(track["uri"]), track.get("name"), track.get("artist"))
+            for track in entry.tracks
+        ]
+        recipients.append(Recipient(username=user.username, email=user.email, tracks=tracks))
+    return recipients
+
+
+async def recommend_recipients(
+    engine,
+    users: List[User],
+    candidate_tracks: List[str],
+    n_recommendations: int = 10,
+    concurrency: int = 8,
+    store: Optional[RecommendationStore] = None
+) -> List[Recipient]:
+    """Recommend for every user in one engine batch and build their recipients.
+
+    Args:
+        engine: RecommendationEngine
+        users: Users to recommend for
+        candidate_tracks: Candidate track URIs shared by every user
+        n_recommendations: Tracks per user
+        concurrency: Maximum users scored concurrently
+        store: Materialized recommendations; fresh entries are reused and only
+            the stale users go through the engine
+
+    Returns:
+        One recipient per user
+    """
+    with metrics.stage("digest_recommend"):
+        if store is not None:
+            materializer = Materializer(
+                engine, store, candidate_tracks, top_k=n_recommendations, concurrency=concurrency
+            )
+            return recipients_from_materialized(users, await materializer.recommend_many(users))
+        results = await engine.generate_recommendations_batch(
+            users, candidate_tracks, n_recommendations, concurrency=concurrency
+        )
+    return recipients_from_results(users, results)
+
+
+class DigestRenderer:
+    """Renders a recipient's digest from the HTML and text templates."""
+
+    def __init__(
+        self,
+        sender: str,
+        subject: str = DEFAULT_SUBJECT,
+        template_dir: Path = TEMPLATE_DIR,
+        max_tracks: int = 10
+    ):
+        """Load the templates.
+
+        Args:
+            sender: From address
+            subject: Subject line
+            template_dir: Directory containing ``weekly_digest.html`` and ``weekly_digest.txt``
+            max_tracks: Maximum tracks listed per digest
+        """
+        self.sender = sender
+        self.subject = subject
+        self.max_tracks = max_tracks
+        environment = Environment(
+            loader=FileSystemLoader(str(template_dir)),
+            autoescape=select_autoescape(["html"])
+        )
+        self._html = environment.get_template("weekly_digest.html")
+        self._text = environment.get_template("weekly_digest.txt")
+
+    def render(self, recipient: Recipient) -> EmailMessage:
+        """Build the multipart (text and HTML) message for a recipient."""
+        context = {
+            "username": recipient.username,
+            "seed": recipient.seed,
+            "tracks": recipient.tracks[:self.max_tracks],
+        }
+        message = EmailMessage()
+        message["From"] = self.sender
+        message["To"] = recipient.email
+        message["Subject"] = self.subject
+        message["Message-ID"] = make_msgid(domain=self.sender.rpartition("@")[2] or None)
+        message.set_content(self._text.render(context))
+        message.add_alternative(self._html.render(context), subtype="html")
+        return message
+
+
+class DigestPipeline:
+    """Delivers rendered digests over pooled SMTP connections, skipping recipients already sent."""
+
+    def __init__(
+        self,
+        pool: SMTPPool,
+        sent_log: SentLog,
+        renderer: DigestRenderer,
+        digest_id: Optional[str] = None,
+        concurrency: Optional[int] = None,
+        rate_limiter: Optional[RateLimiter] = None
+    ):
+        """Initialize the pipeline.
+
+        Args:
+            pool: SMTP connection pool
+            sent_log: Sent checkpoint
+            renderer: Message renderer
+            digest_id: Checkpoint key of this digest; the current ISO week by default
+            concurrency: Sender threads; the pool size by default
+            rate_limiter: Paces sends across all threads
+        """
+        self.pool = pool
+        self.sent_log = sent_log
+        self.renderer = renderer
+        self.digest_id = digest_id or weekly_digest_id()
+        self.concurrency = concurrency or pool.size
+        self.rate_limiter = rate_limiter
+
+    def _deliver(self, recipient: Recipient) -> None:
+        message = self.renderer.render(recipient)
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        self.pool.send(message)
+        self.sent_log.mark_sent(self.digest_id, recipient.username, recipient.email, message["Message-ID"])
+
+    def run(self, recipients: Iterable[Recipient]) -> DigestReport:
+        """Send the digest to every recipient not yet checkpointed.
+
+        Args:
+            recipients: Recipients; repeated usernames are sent once
+
+        Returns:
+            Counts of sent, skipped and failed recipients
+        """
+        report = DigestReport(self.digest_id)
+        already_sent = self.sent_log.sent_usernames(self.digest_id)
+        pending: Dict[str, Recipient] = {}
+        for recipient in recipients:
+            if recipient.username in already_sent:
+                report.already_sent += 1
+            elif not recipient.tracks:
+                report.without_tracks += 1
+                logger.warning(f"No recommendations for {recipient.username}, skipping")
+            else:
+                pending.setdefault(recipient.username, recipient)
+
+        logger.info(
+            f"Sending digest {self.digest_id} to {len(pending)} recipients "
+            f"({report.already_sent} already sent)"
+        )
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="digest") as executor:
+            futures = {executor.submit(self._deliver, recipient): recipient for recipient in pending.values()}
+            for future in as_completed(futures):
+                recipient = futures[future]
+                try:
+                    future.result()
+                    report.sent += 1
+                    metrics.inc("digest_emails_total", outcome="sent")
+                except (smtplib.SMTPException, OSError) as e:
+                    report.failed[recipient.username] = str(e)
+                    metrics.inc("digest_emails_total", outcome="failed")
+                    logger.error(f"Failed to send digest to {recipient.username}: {e}")
+
+        logger.info(f"Digest {self.digest_id} finished: {report.to_dict()}")
+        return report
+
+
+if __name__ == "__main__":
+    import argparse
+    import asyncio
+    import json
+    import os
+
+    from dotenv import load_dotenv
+
+    from .mailer import SMTPSettings
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Send the weekly recommendation digest")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--csv", type=Path, default=Path("streamlit/new.csv"),
+                        help="Streamlit user CSV with stored recommendations")
+    source.add_argument("--users-db", type=Path, help="UserManager database to recommend for")
+    parser.add_argument("--candidates-playlist", help="Playlist whose tracks are the candidate pool (with --users-db)")
+    parser.add_argument("--recommendations-db", type=Path,
+                        help="Materialized recommendation store to reuse and refresh (with --users-db)")
+    parser.add_argument("--tracks", type=int, default=10, help="Tracks per digest")
+    parser.add_argument("--digest-id", help="Checkpoint key (default: current ISO week)")
+    parser.add_argument("--sent-log", type=Path, default=Path(".spr/digest_sent.db"))
+    parser.add_argument("--connections", type=int, default=4, help="Pooled SMTP connections and sender threads")
+    parser.add_argument("--rate", type=float, default=5.0, help="Messages per second across all connections")
+    parser.add_argument("--smtp-host")
+    parser.add_argument("--smtp-port", type=int)
+    parser.add_argument("--smtp-security", choices=["ssl", "starttls", "none"])
+    parser.add_argument("--sender", default=os.getenv("EMAIL_ADDRESS"))
+    parser.add_argument("--dry-run", action="store_true", help="Render and count without sending")
+    args = parser.parse_args()
+
+    if args.users_db is not None:
+        if not args.candidates_playlist:
+            parser.error("--users-db requires --candidates-playlist")
+        from ..core.spotify import SpotifyClient
+        from ..recommendation_engine import RecommendationEngine
+        from ..user_manager import UserManager
+
+        async def recommend() -> List[Recipient]:
+            spotify = SpotifyClient.from_env()
+            candidates = [track.uri for track in await spotify.get_playlist_tracks(args.candidates_playlist)]
+            engine = RecommendationEngine(spotify)
+            store = RecommendationStore(args.recommendations_db) if args.recommendations_db else None
+            return await recommend_recipients(
+                engine, UserManager(args.users_db).get_all_users(), candidates, args.tracks, store=store
+            )
+
+        recipients = asyncio.run(recommend())
+    else:
+        recipients = recipients_from_csv(args.csv)
+
+    if not args.sender:
+        parser.error("--sender or EMAIL_ADDRESS is required")
+    renderer = DigestRenderer(args.sender, max_tracks=args.tracks)
+    if args.dry_run:
+        for recipient in recipients:
+            message = renderer.render(recipient)
+            print(f"{recipient.username} <{message['To']}>: {len(recipient.tracks[:args.tracks])} tracks")
+    else:
+        settings = SMTPSettings.from_env()
+        settings.host = args.smtp_host or settings.host
+        settings.port = args.smtp_port or settings.port
+        settings.security = args.smtp_security or settings.security
+        sent_log = SentLog(args.sent_log)
+        try:
+            with SMTPPool(settings, size=args.connections) as pool:
+                pipeline = DigestPipeline(
+                    pool, sent_log, renderer,
+                    digest_id=args.digest_id,
+                    rate_limiter=RateLimiter(args.rate, burst=args.connections)
+                )
+                report = pipeline.run(recipients)
+        finally:
+            # Closing checkpoints the WAL into the database file, which CI caches between runs
+            sent_log.close()
+        print(json.dumps(report.to_dict(), indent=2))
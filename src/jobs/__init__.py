@@ -0,0 +1,26 @@
+"""Persistent background job queue and worker pool."""
+
+from .queue import Job, JobQueue, JobStatus, dedupe_key
+from .worker import (
+    JOB_HANDLERS,
+    JobContext,
+    JobWorkerPool,
+    default_queue,
+    job_handler,
+)
+from .handlers import backfill_features, import_playlist, render_wordcloud
+
+__all__ = [
+    "Job",
+    "JobQueue",
+    "JobStatus",
+    "dedupe_key",
+    "JOB_HANDLERS",
+    "JobContext",
+    "JobWorkerPool",
+    "default_queue",
+    "job_handler",
+    "backfill_features",
+    "import_playlist",
+    "render_wordcloud",
+]
@@ -0,0 +1,103 @@
+"""Built-in background jobs.
+
+* ``playlist_import``: every track of a playlist (``playlist_id``)
+* ``feature_backfill``: audio features of many tracks (``track_ids``)
+* ``wordcloud``: a word cloud PNG, base64-encoded, rendered from ``text``
+"""
+
+import asyncio
+import base64
+import io
+import threading
+from typing import Any, Dict, Optional
+
+from ..core.spotify import SpotifyClient
+from ..exceptions import DataValidationError
+from .worker import JOB_HANDLERS, JobContext, job_handler
+
+__all__ = ["JOB_HANDLERS", "import_playlist", "backfill_features", "render_wordcloud"]
+
+# Tracks per feature_backfill step; each step is a few concurrent 100-track requests
+BACKFILL_CHUNK_SIZE = 500
+MAX_WORDCLOUD_SIZE = 2000
+
+_spotify_client: Optional[SpotifyClient] = None
+_spotify_lock = threading.Lock()
+
+
+def _get_spotify_client() -> SpotifyClient:
+    """Process-wide Spotify client for job handlers, so caches are shared between jobs."""
+    global _spotify_client
+    with _spotify_lock:
+        if _spotify_client is None:
+            _spotify_client = SpotifyClient.from_env()
+        return _spotify_client
+
+
+@job_handler("playlist_import")
+def import_playlist(params: Dict[str, Any], context: JobContext) -> Dict[str, Any]:
+    """Fetch every track of ``params["playlist_id"]``."""
+    playlist_id = params["playlist_id"]
+    spotify = _get_spotify_client()
+
+    async def fetch():
+        tracks = []
+        async for page_tracks in spotify.iter_playlist_tracks(playlist_id):
+            tracks.extend(page_tracks)
+            context.progress(message=f"Fetched {len(tracks)} tracks")
+        return tracks
+
+    tracks = asyncio.run(fetch())
+    return {
+        "playlist_id": playlist_id,
+        "track_count": len(tracks),
+        "tracks": [track.model_dump() for track in tracks],
+    }
+
+
+@job_handler("feature_backfill")
+def backfill_features(params: Dict[str, Any], context: JobContext) -> Dict[str, Any]:
+    """Fetch audio features for ``params["track_ids"]``; tracks without features map to None."""
+    track_ids = list(dict.fromkeys(params["track_ids"]))
+    spotify = _get_spotify_client()
+
+    async def fetch():
+        features = {}
+        for start in range(0, len(track_ids), BACKFILL_CHUNK_SIZE):
+            chunk = track_ids[start:start + BACKFILL_CHUNK_SIZE]
+            for track_id, track_features in zip(chunk, await spotify.get_audio_features_batch(chunk)):
+                features[track_id] = track_features.model_dump() if track_features else None
+            context.progress(len(features) / len(track_ids), f"Fetched {len(features)}/{len(track_ids)}")
+        return features
+
+    features = asyncio.run(fetch())
+    found = sum(value is not None for value in features.values())
+    return {"features": features, "found": found, "missing": len(features) - found}
+
+
+@job_handler("wordcloud")
+def render_wordcloud(params: Dict[str, Any], context: JobContext) -> Dict[str, Any]:
+    """Render ``params["text"]`` as a word cloud PNG."""
+    from wordcloud import WordCloud
+
+    text = params.get("text", "")
+    width = int(params.get("width", 500))
+    height = int(params.get("height", 500))
+    if not 0 < width <= MAX_WORDCLOUD_SIZE or not 0 < height <= MAX_WORDCLOUD_SIZE:
+        raise DataValidationError(f"Word cloud size must be within {MAX_WORDCLOUD_SIZE}px")
+    if not text.strip():
+        return {"image_png": None, "words": 0}
+
+    cloud = WordCloud(
+        background_color="white",
+        relative_scaling=0,
+        width=width,
+        height=height,
+        colormap=params.get("colormap", "viridis")
+    ).generate(text)
+    buffer = io.BytesIO()
+    cloud.to_image().save(buffer, format="PNG")
+    return {
+        "image_png": base64.b64encode(buffer.getvalue()).decode("ascii"),
+        "words": len(cloud.words_),
+    }
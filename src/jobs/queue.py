@@ -0,0 +1,343 @@
+"""Persistent SQLite-backed job queue.
+
+Jobs are rows in a ``jobs`` table shared by every process that opens the
+same database file, so API servers, Streamlit sessions and dedicated worker
+processes can submit and run work independently. Identical jobs (same kind
+and parameters) are deduplicated: while one is queued or running, or its
+result has not expired, submitting it again returns the existing job.
+
+Workers claim jobs under a lease that they extend while reporting progress;
+a job whose lease runs out (its worker died) is put back in the queue.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+from ..exceptions import DatabaseError
+from ..logging_config import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_RESULT_TTL = 3600.0
+DEFAULT_LEASE_SECONDS = 300.0
+DEFAULT_MAX_ATTEMPTS = 3
+
+
+class JobStatus:
+    """Job lifecycle states."""
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+    ACTIVE = (QUEUED, RUNNING)
+    FINISHED = (SUCCEEDED, FAILED)
+
+
+@dataclass
+class Job:
+    """A unit of background work and its current state."""
+    id: str
+    kind: str
+    params: Dict[str, Any]
+    status: str
+    progress: Optional[float] = None
+    message: Optional[str] = None
+    result: Any = None
+    error: Optional[str] = None
+    attempts: int = 0
+    created_at: float = 0.0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    expires_at: Optional[float] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in JobStatus.FINISHED
+
+    def to_dict(self, include_result: bool = False) -> Dict[str, Any]:
+        """Convert to a JSON-compatible dict, leaving out the result unless asked."""
+        data = asdict(self)
+        if not include_result:
+            data.pop("result")
+        return data
+
+
+_COLUMNS = (
+    "id, kind, params, status, progress, message, result, error, attempts, "
+    "created_at, started_at, finished_at, expires_at"
+)
+
+
+def dedupe_key(kind: str, params: Dict[str, Any]) -> str:
+    """Identity of a job for deduplication: its kind and canonicalized parameters."""
+    canonical = json.dumps([kind, params], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class JobQueue:
+    """Job queue stored in a SQLite database file."""
+
+    def __init__(
+        self,
+        db_path: Union[str, Path],
+        result_ttl: float = DEFAULT_RESULT_TTL,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS
+    ):
+        """Open (or create) the queue database.
+
+        Args:
+            db_path: Database file path
+            result_ttl: Default seconds a finished job and its result are kept
+            lease_seconds: Seconds a claimed job may go without a heartbeat before it is requeued
+            max_attempts: Claims after which a job whose worker keeps dying is failed
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.result_ttl = result_ttl
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        try:
+            self._conn = sqlite3.connect(
+                str(self.db_path), check_same_thread=False, isolation_level=None, timeout=30
+            )
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    params TEXT NOT NULL,
+                    dedupe_key TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    progress REAL,
+                    message TEXT,
+                    result TEXT,
+                    error TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    result_ttl REAL NOT NULL,
+                    worker TEXT,
+                    lease_until REAL,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    expires_at REAL
+                );
+                CREATE UNIQUE INDEX IF NOT EXISTS jobs_active_dedupe
+                    ON jobs (dedupe_key) WHERE status IN ('queued', 'running');
+                CREATE INDEX IF NOT EXISTS jobs_queued ON jobs (status, created_at);
+                CREATE INDEX IF NOT EXISTS jobs_dedupe ON jobs (dedupe_key, status);
+            """)
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Failed to open job queue {self.db_path}: {e}")
+
+    def _transaction(self, fn):
+        """Run ``fn(conn)`` in an immediate (write-locked) transaction."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(self._conn)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return result
+
+    @staticmethod
+    def _row_to_job(row: Sequence[Any]) -> Job:
+        (job_id, kind, params, status, progress, message, result, error, attempts,
+         created_at, started_at, finished_at, expires_at) = row
+        return Job(
+            id=job_id,
+            kind=kind,
+            params=json.loads(params),
+            status=status,
+            progress=progress,
+            message=message,
+            result=json.loads(result) if result is not None else None,
+            error=error,
+            attempts=attempts,
+            created_at=created_at,
+            started_at=started_at,
+            finished_at=finished_at,
+            expires_at=expires_at,
+        )
+
+    def submit(self, kind: str, params: Optional[Dict[str, Any]] = None, ttl: Optional[float] = None) -> Job:
+        """Queue a job, or return the identical job already queued, running or finished.
+
+        Failed jobs are not reused, so resubmitting one retries it.
+
+        Args:
+            kind: Handler name
+            params: JSON-compatible handler parameters
+            ttl: Seconds to keep the result after the job finishes
+
+        Returns:
+            The new or existing job
+        """
+        params = params or {}
+        key = dedupe_key(kind, params)
+        now = time.time()
+
+        def submit_or_reuse(conn: sqlite3.Connection) -> Job:
+            row = conn.execute(
+                f"SELECT {_COLUMNS} FROM jobs WHERE dedupe_key = ? AND ("
+                "status IN ('queued', 'running') OR (status = 'succeeded' AND expires_at > ?)) "
+                "ORDER BY created_at DESC LIMIT 1",
+                (key, now)
+            ).fetchone()
+            if row is not None:
+                return self._row_to_job(row)
+            job_id = uuid.uuid4().hex
+            conn.execute(
+                "INSERT INTO jobs (id, kind, params, dedupe_key, status, result_ttl, created_at) "
+                "VALUES (?, ?, ?, ?, 'queued', ?, ?)",
+                (job_id, kind, json.dumps(params), key, self.result_ttl if ttl is None else ttl, now)
+            )
+            logger.info(f"Queued {kind} job {job_id}")
+            return Job(id=job_id, kind=kind, params=params, status=JobStatus.QUEUED, created_at=now)
+
+        return self._transaction(submit_or_reuse)
+
+    def claim(self, worker_id: str, kinds: Optional[Sequence[str]] = None) -> Optional[Job]:
+        """Take the oldest queued job for this worker.
+
+        Args:
+            worker_id: Name of the claiming worker
+            kinds: Only claim jobs of these kinds (any kind by default)
+
+        Returns:
+            The claimed job, now running, or None when the queue is empty
+        """
+        now = time.time()
+
+        def claim_next(conn: sqlite3.Connection) -> Optional[Job]:
+            self._recover_expired_leases(conn, now)
+            query = f"SELECT {_COLUMNS} FROM jobs WHERE status = 'queued'"
+            args: List[Any] = []
+            if kinds is not None:
+                query += f" AND kind IN ({', '.join('?' * len(kinds))})"
+                args.extend(kinds)
+            row = conn.execute(query + " ORDER BY created_at LIMIT 1", args).fetchone()
+            if row is None:
+                return None
+            job = self._row_to_job(row)
+            job.status = JobStatus.RUNNING
+            job.started_at = now
+            job.attempts += 1
+            conn.execute(
+                "UPDATE jobs SET status = 'running', worker = ?, started_at = ?, "
+                "lease_until = ?, attempts = ? WHERE id = ?",
+                (worker_id, now, now + self.lease_seconds, job.attempts, job.id)
+            )
+            return job
+
+        return self._transaction(claim_next)
+
+    def _recover_expired_leases(self, conn: sqlite3.Connection, now: float) -> None:
+        """Requeue running jobs whose worker stopped heartbeating, failing those out of attempts."""
+        conn.execute(
+            "UPDATE jobs SET status = 'failed', error = 'Worker lost too many times', "
+            "finished_at = ?, expires_at = ? + result_ttl "
+            "WHERE status = 'running' AND lease_until < ? AND attempts >= ?",
+            (now, now, now, self.max_attempts)
+        )
+        requeued = conn.execute(
+            "UPDATE jobs SET status = 'queued', worker = NULL, lease_until = NULL "
+            "WHERE status = 'running' AND lease_until < ?",
+            (now,)
+        ).rowcount
+        if requeued:
+            logger.warning(f"Requeued {requeued} jobs whose worker stopped responding")
+
+    def heartbeat(self, job_id: str, progress: Optional[float] = None, message: Optional[str] = None) -> None:
+        """Extend a running job's lease and record its progress.
+
+        Args:
+            job_id: Job ID
+            progress: Completed fraction in [0, 1], if known
+            message: Short human-readable status
+        """
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET lease_until = ?, progress = COALESCE(?, progress), "
+                "message = COALESCE(?, message) WHERE id = ? AND status = 'running'",
+                (time.time() + self.lease_seconds, progress, message, job_id)
+            )
+
+    def complete(self, job_id: str, result: Any) -> None:
+        """Mark a job succeeded and store its JSON-compatible result."""
+        self._finish(job_id, JobStatus.SUCCEEDED, result=json.dumps(result))
+
+    def fail(self, job_id: str, error: str) -> None:
+        """Mark a job failed with an error message."""
+        self._finish(job_id, JobStatus.FAILED, error=error)
+
+    def _finish(self, job_id: str, status: str, result: Optional[str] = None, error: Optional[str] = None) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, "
+                "expires_at = ? + result_ttl, lease_until = NULL, "
+                "progress = CASE WHEN ? = 'succeeded' THEN 1.0 ELSE progress END "
+                "WHERE id = ?",
+                (status, result, error, now, now, status, job_id)
+            )
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Get a job by ID; expired jobs are not returned."""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM jobs WHERE id = ? AND (expires_at IS NULL OR expires_at > ?)",
+                (job_id, time.time())
+            ).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def wait(self, job_id: str, timeout: Optional[float] = None, poll_interval: float = 0.2) -> Optional[Job]:
+        """Block until a job finishes or ``timeout`` elapses.
+
+        Returns:
+            The job in its latest state, or None if it does not exist
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            if job is None or job.finished or (deadline is not None and time.monotonic() >= deadline):
+                return job
+            time.sleep(poll_interval)
+
+    def purge_expired(self) -> int:
+        """Delete finished jobs whose result TTL has passed.
+
+        Returns:
+            Number of jobs deleted
+        """
+        with self._lock:
+            return self._conn.execute(
+                "DELETE FROM jobs WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),)
+            ).rowcount
+
+    def stats(self) -> Dict[str, int]:
+        """Number of unexpired jobs in each status."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) FROM jobs WHERE expires_at IS NULL OR expires_at > ? GROUP BY status",
+                (time.time(),)
+            ).fetchall()
+        counts = {status: 0 for status in (*JobStatus.ACTIVE, *JobStatus.FINISHED)}
+        counts.update(dict(rows))
+        return counts
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,180 @@
+"""Worker pool executing jobs from a :class:`JobQueue`.
+
+Handlers are plain functions registered per job kind with
+:func:`job_handler`; each receives the job's parameters and a
+:class:`JobContext` for reporting progress, and returns a JSON-compatible
+result. A :class:`JobWorkerPool` runs them on background threads. It can be
+embedded in the API or Streamlit process, or run standalone to scale
+workers independently of the web front ends::
+
+    python -m src.jobs.worker --workers 4
+"""
+
+import os
+import socket
+import threading
+import time
+import traceback
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from ..logging_config import get_logger
+from ..metrics import metrics
+from .queue import Job, JobQueue
+
+logger = get_logger(__name__)
+
+DEFAULT_QUEUE_PATH = Path(".spr/jobs.db")
+DEFAULT_POLL_INTERVAL = 0.5
+# Minimum seconds between progress writes, so chatty handlers don't hammer the database
+PROGRESS_INTERVAL = 0.25
+
+
+class JobContext:
+    """Handle passed to a running job's handler."""
+
+    def __init__(self, job: Job, queue: JobQueue):
+        self.job = job
+        self.queue = queue
+        self._last_report = 0.0
+
+    def progress(self, fraction: Optional[float] = None, message: Optional[str] = None) -> None:
+        """Report progress and extend the job's lease.
+
+        Args:
+            fraction: Completed fraction in [0, 1], if known
+            message: Short human-readable status
+        """
+        now = time.monotonic()
+        if fraction is not None and fraction < 1.0 and now - self._last_report < PROGRESS_INTERVAL:
+            return
+        self._last_report = now
+        if fraction is not None:
+            fraction = min(max(fraction, 0.0), 1.0)
+        self.queue.heartbeat(self.job.id, progress=fraction, message=message)
+
+
+JobHandler = Callable[[Dict[str, Any], JobContext], Any]
+
+# Handlers by job kind; populated by ``job_handler``
+JOB_HANDLERS: Dict[str, JobHandler] = {}
+
+
+def job_handler(kind: str) -> Callable[[JobHandler], JobHandler]:
+    """Register a function as the handler for jobs of ``kind``."""
+    def register(fn: JobHandler) -> JobHandler:
+        JOB_HANDLERS[kind] = fn
+        return fn
+    return register
+
+
+def default_queue() -> JobQueue:
+    """Open the queue at ``SPR_JOBS_DB`` (``.spr/jobs.db`` by default)."""
+    return JobQueue(Path(os.getenv("SPR_JOBS_DB", str(DEFAULT_QUEUE_PATH))))
+
+
+class JobWorkerPool:
+    """Threads claiming and running jobs until stopped."""
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        workers: int = 2,
+        handlers: Optional[Dict[str, JobHandler]] = None,
+        poll_interval: float = DEFAULT_POLL_INTERVAL
+    ):
+        """Create a stopped pool.
+
+        Args:
+            queue: Queue to take jobs from
+            workers: Number of worker threads
+            handlers: Handlers by job kind (the registered ``JOB_HANDLERS`` by default)
+            poll_interval: Seconds an idle worker waits before checking the queue again
+        """
+        self.queue = queue
+        self.workers = workers
+        self.handlers = JOB_HANDLERS if handlers is None else handlers
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._name = f"{socket.gethostname()}:{os.getpid()}"
+
+    def run_once(self, worker_id: str = "inline") -> bool:
+        """Claim and run a single job.
+
+        Returns:
+            False when there was nothing to run
+        """
+        job = self.queue.claim(worker_id, kinds=list(self.handlers))
+        if job is None:
+            return False
+
+        logger.info(f"Worker {worker_id} running {job.kind} job {job.id}")
+        start = time.perf_counter()
+        try:
+            result = self.handlers[job.kind](job.params, JobContext(job, self.queue))
+        except Exception as e:
+            logger.error(f"{job.kind} job {job.id} failed: {e}")
+            logger.debug(traceback.format_exc())
+            self.queue.fail(job.id, f"{type(e).__name__}: {e}")
+            outcome = "failed"
+        else:
+            self.queue.complete(job.id, result)
+            outcome = "succeeded"
+        metrics.observe("job_seconds", time.perf_counter() - start, kind=job.kind, outcome=outcome)
+        return True
+
+    def _run(self, worker_id: str) -> None:
+        while not self._stop.is_set():
+            try:
+                if not self.run_once(worker_id):
+                    self._stop.wait(self.poll_interval)
+            except Exception as e:
+                # Queue errors (e.g. a locked database) must not kill the worker
+                logger.error(f"Worker {worker_id} error: {e}")
+                self._stop.wait(self.poll_interval)
+
+    def start(self) -> "JobWorkerPool":
+        """Start the worker threads."""
+        self._stop.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(
+                target=self._run, args=(f"{self._name}/{i}",), name=f"job-worker-{i}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"Started {self.workers} job workers for {', '.join(sorted(self.handlers))}")
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop taking jobs and wait for running ones to finish."""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+
+if __name__ == "__main__":
+    import argparse
+
+    # Handlers register in the package's worker module, not this __main__ copy
+    from .handlers import JOB_HANDLERS as registered_handlers
+
+    parser = argparse.ArgumentParser(description="Run background job workers")
+    parser.add_argument("--db", type=Path, default=Path(os.getenv("SPR_JOBS_DB", str(DEFAULT_QUEUE_PATH))))
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--poll-interval", type=float, default=DEFAULT_POLL_INTERVAL)
+    args = parser.parse_args()
+
+    pool = JobWorkerPool(
+        JobQueue(args.db),
+        workers=args.workers,
+        handlers=registered_handlers,
+        poll_interval=args.poll_interval
+    ).start()
+    try:
+        while True:
+            time.sleep(60)
+            pool.queue.purge_expired()
+    except KeyboardInterrupt:
+        pool.stop()
@@ -0,0 +1,270 @@
+"""Lightweight metrics and per-request stage tracing.
+
+Counters and histograms are kept in a process-wide :class:`MetricsRegistry`
+and rendered in the Prometheus text exposition format. Code under
+measurement opens stages with :meth:`MetricsRegistry.stage`; each stage is
+observed into the ``stage_seconds`` histogram and, when a :class:`Trace` is
+active in the current context, recorded on the trace so it can be attached
+to a single result. Traces propagate through ``asyncio`` tasks and
+``asyncio.to_thread`` calls because they live in a context variable.
+
+Metrics are enabled unless ``SPR_METRICS`` is set to ``0``; when disabled,
+every recording call returns after a single attribute check.
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Upper bounds in seconds, from cache hits to slow upstream calls
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+_current_trace: ContextVar[Optional["Trace"]] = ContextVar("spr_trace", default=None)
+
+
+class _NullContext:
+    """Reusable no-op context manager returned while metrics are disabled."""
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc_info) -> bool:
+        return False
+
+
+_NULL_CONTEXT = _NullContext()
+
+
+class Histogram:
+    """Cumulative-bucket histogram of observed values."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        """Initialize an empty histogram.
+
+        Args:
+            buckets: Sorted bucket upper bounds; ``+Inf`` is implicit
+        """
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """Record one value."""
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile as the upper bound of the bucket containing it."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class Trace:
+    """Per-request record of stage durations and total wall-clock time."""
+
+    def __init__(self):
+        """Start the trace clock."""
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        # Stages of one request may run in parallel threads
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float) -> None:
+        """Accumulate time spent in a stage (stages may be entered repeatedly)."""
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the trace started."""
+        return time.perf_counter() - self.started
+
+    def stage_timings_ms(self) -> Dict[str, float]:
+        """Stage durations in milliseconds."""
+        with self._lock:
+            return {stage: seconds * 1000 for stage, seconds in self.stages.items()}
+
+
+class MetricsRegistry:
+    """Thread-safe registry of labelled counters and histograms."""
+
+    def __init__(self, enabled: bool = True, namespace: str = "spr"):
+        """Initialize an empty registry.
+
+        Args:
+            enabled: Record metrics; when False all recording calls are no-ops
+            namespace: Prefix of every exported metric name
+        """
+        self.enabled = enabled
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self._help: Dict[str, str] = {}
+
+    @staticmethod
+    def _key(labels: Dict[str, str]) -> LabelKey:
+        return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+    def describe(self, name: str, help_text: str) -> None:
+        """Set the HELP text exported for a metric."""
+        self._help[name] = help_text
+
+    def inc(self, name: str, value: float = 1.0, **labels: str) -> None:
+        """Increment a counter.
+
+        Args:
+            name: Counter name without namespace, conventionally ending in ``_total``
+            value: Amount to add
+            **labels: Label values
+        """
+        if not self.enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        """Record a value (usually seconds) into a histogram."""
+        if not self.enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def _timed(self, name: str, labels: Dict[str, str]) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def timer(self, name: str, **labels: str):
+        """Context manager observing the duration of its block into a histogram."""
+        if not self.enabled:
+            return _NULL_CONTEXT
+        return self._timed(name, labels)
+
+    @contextmanager
+    def _stage(self, stage: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.observe("stage_seconds", elapsed, stage=stage)
+            trace = _current_trace.get()
+            if trace is not None:
+                trace.add(stage, elapsed)
+
+    def stage(self, stage: str):
+        """Context manager timing a pipeline stage into ``stage_seconds`` and the active trace."""
+        if not self.enabled:
+            return _NULL_CONTEXT
+        return self._stage(stage)
+
+    @contextmanager
+    def trace(self) -> Iterator[Trace]:
+        """Open a :class:`Trace` collecting the stages run in the current context.
+
+        Nested traces are independent; the outer trace is restored on exit.
+        """
+        trace = Trace()
+        token = _current_trace.set(trace)
+        try:
+            yield trace
+        finally:
+            _current_trace.reset(token)
+
+    def counter_value(self, name: str, **labels: str) -> float:
+        """Current value of a counter series (0 when never incremented)."""
+        with self._lock:
+            return self._counters.get(name, {}).get(self._key(labels), 0.0)
+
+    def histogram(self, name: str, **labels: str) -> Optional[Histogram]:
+        """Histogram of a series, or None when nothing was observed."""
+        with self._lock:
+            return self._histograms.get(name, {}).get(self._key(labels))
+
+    def reset(self) -> None:
+        """Drop every recorded series."""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    @staticmethod
+    def _format_labels(key: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+        pairs = key + extra
+        if not pairs:
+            return ""
+        escaped = (
+            name + '="' + value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') + '"'
+            for name, value in pairs
+        )
+        return "{" + ",".join(escaped) + "}"
+
+    def render_prometheus(self) -> str:
+        """Render all series in the Prometheus text exposition format (version 0.0.4)."""
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                full_name = f"{self.namespace}_{name}"
+                if name in self._help:
+                    lines.append(f"# HELP {full_name} {self._help[name]}")
+                lines.append(f"# TYPE {full_name} counter")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{full_name}{self._format_labels(key)} {value:g}")
+
+            for name, series in sorted(self._histograms.items()):
+                full_name = f"{self.namespace}_{name}"
+                if name in self._help:
+                    lines.append(f"# HELP {full_name} {self._help[name]}")
+                lines.append(f"# TYPE {full_name} histogram")
+                for key, histogram in sorted(series.items()):
+                    cumulative = 0
+                    for bound, n in zip(histogram.buckets, histogram.counts):
+                        cumulative += n
+                        labels = self._format_labels(key, (("le", f"{bound:g}"),))
+                        lines.append(f"{full_name}_bucket{labels} {cumulative}")
+                    labels = self._format_labels(key, (("le", "+Inf"),))
+                    lines.append(f"{full_name}_bucket{labels} {histogram.count}")
+                    lines.append(f"{full_name}_sum{self._format_labels(key)} {histogram.sum:.6f}")
+                    lines.append(f"{full_name}_count{self._format_labels(key)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry(enabled=os.getenv("SPR_METRICS", "1") != "0")
+
+metrics.describe("stage_seconds", "Time spent in each recommendation pipeline stage")
+metrics.describe("cache_requests_total", "Cache lookups by cache and result (hit/miss)")
+metrics.describe("upstream_requests_total", "Spotify Web API calls by endpoint and outcome")
+metrics.describe("upstream_request_seconds", "Spotify Web API call latency by endpoint")
+metrics.describe("http_request_seconds", "API request latency by method, route and status")
+metrics.describe("job_seconds", "Background job run time by kind and outcome")
+metrics.describe("model_reloads_total", "Model version loads by outcome (success/failure)")
+metrics.describe("model_load_seconds", "Time to load and warm a new model version")
+metrics.describe("digest_emails_total", "Weekly digest emails by outcome (sent/failed)")
+metrics.describe("smtp_connections_total", "SMTP connections opened (each a TLS handshake and login)")
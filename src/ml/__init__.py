@@ -0,0 +1,46 @@
+"""Model artifacts and NumPy inference for the recommendation models."""
+
+from .artifacts import (
+    FEATURE_NAMES,
+    ModelArtifacts,
+    load_artifacts,
+    write_artifacts,
+    resolve_artifact_dir,
+    set_current_version,
+    arrays_from_estimators,
+    convert_legacy_models,
+)
+from .inference import InferenceKernel, ArtifactScaler, ArtifactKMeans
+from .registry import ModelHandle, ModelRegistry
+from .tsne import TSNEPlacer
+from .training import (
+    OnlineKMeans,
+    TrainingResult,
+    fit_scaler,
+    align_cluster_ids,
+    train_online_kmeans,
+    train_from_database,
+)
+
+__all__ = [
+    "FEATURE_NAMES",
+    "ModelArtifacts",
+    "load_artifacts",
+    "write_artifacts",
+    "resolve_artifact_dir",
+    "set_current_version",
+    "arrays_from_estimators",
+    "convert_legacy_models",
+    "InferenceKernel",
+    "ArtifactScaler",
+    "ArtifactKMeans",
+    "ModelHandle",
+    "ModelRegistry",
+    "TSNEPlacer",
+    "OnlineKMeans",
+    "TrainingResult",
+    "fit_scaler",
+    "align_cluster_ids",
+    "train_online_kmeans",
+    "train_from_database",
+]
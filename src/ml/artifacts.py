@@ -0,0 +1,397 @@
+"""Versioned, pickle-free model artifact format backed by memory-mapped arrays.
+
+An artifact directory contains one ``.npy`` file per array plus a
+``manifest.json`` describing the version, shapes and dtypes::
+
+    model/artifacts/
+        CURRENT                 # name of the active version directory
+        3f9c2a71b0de/
+            manifest.json
+            scaler_mean.npy
+            scaler_scale.npy
+            centroids.npy
+            labels.npy
+            tsne_embedding.npy  # optional
+            ...
+
+Arrays are opened with ``np.load(mmap_mode='r')`` so loading is close to free
+and every process mapping the same files shares the page cache.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from ..exceptions import ModelLoadError
+from ..logging_config import get_logger
+
+logger = get_logger(__name__)
+
+ARTIFACT_FORMAT_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+CURRENT_POINTER = "CURRENT"
+
+FEATURE_NAMES = [
+    'danceability', 'energy', 'key', 'loudness', 'mode', 'speechiness',
+    'acousticness', 'instrumentalness', 'liveness', 'valence', 'tempo',
+    'duration_ms', 'time_signature'
+]
+
+REQUIRED_ARRAYS = ("scaler_mean", "scaler_scale", "centroids")
+OPTIONAL_ARRAYS = (
+    "labels",
+    "pids",
+    "cluster_counts",
+    "tsne_embedding",
+    "tsne_reference",
+    "tsne_affinity_data",
+    "tsne_affinity_indices",
+    "tsne_affinity_indptr",
+)
+
+
+@dataclass
+class ModelArtifacts:
+    """Arrays needed for inference, loaded from one artifact version."""
+    version: str
+    path: Path
+    manifest: Dict[str, Any]
+    arrays: Dict[str, np.ndarray] = field(default_factory=dict)
+
+    @property
+    def scaler_mean(self) -> np.ndarray:
+        return self.arrays["scaler_mean"]
+
+    @property
+    def scaler_scale(self) -> np.ndarray:
+        return self.arrays["scaler_scale"]
+
+    @property
+    def centroids(self) -> np.ndarray:
+        return self.arrays["centroids"]
+
+    @property
+    def labels(self) -> Optional[np.ndarray]:
+        return self.arrays.get("labels")
+
+    @property
+    def pids(self) -> Optional[np.ndarray]:
+        """Playlist IDs aligned with ``labels``; absent for the positional legacy model."""
+        return self.arrays.get("pids")
+
+    @property
+    def tsne_embedding(self) -> Optional[np.ndarray]:
+        return self.arrays.get("tsne_embedding")
+
+    @property
+    def tsne_reference(self) -> Optional[np.ndarray]:
+        return self.arrays.get("tsne_reference")
+
+    @property
+    def feature_names(self) -> List[str]:
+        return list(self.manifest.get("feature_names", FEATURE_NAMES))
+
+    @property
+    def n_clusters(self) -> int:
+        return int(self.centroids.shape[0])
+
+    def has_tsne(self) -> bool:
+        """Whether the artifact carries the reference t-SNE embedding."""
+        return "tsne_embedding" in self.arrays and "tsne_reference" in self.arrays
+
+    def warm(self) -> None:
+        """Fault memory-mapped arrays into the page cache so the first requests don't."""
+        for array in self.arrays.values():
+            if isinstance(array, np.memmap):
+                np.add.reduce(array.reshape(-1), dtype=np.float64)
+
+
+def _content_version(arrays: Dict[str, np.ndarray]) -> str:
+    """Derive a stable version id from the array contents."""
+    digest = hashlib.sha256()
+    for name in sorted(arrays):
+        array = np.ascontiguousarray(arrays[name])
+        digest.update(name.encode())
+        digest.update(str(array.dtype).encode())
+        digest.update(str(array.shape).encode())
+        digest.update(array.tobytes())
+    return digest.hexdigest()[:12]
+
+
+def write_artifacts(
+    root: Path,
+    arrays: Dict[str, np.ndarray],
+    version: Optional[str] = None,
+    metadata: Optional[Dict[str, Any]] = None,
+    make_current: bool = True
+) -> Path:
+    """Write a new artifact version under ``root``.
+
+    The version directory is written to a temporary location and renamed into
+    place, so readers never observe a partially written artifact.
+
+    Args:
+        root: Artifact root directory (e.g. ``model/artifacts``)
+        arrays: Named arrays; must include scaler_mean, scaler_scale and centroids
+        version: Version id, derived from the array contents when omitted
+        metadata: Extra manifest fields
+        make_current: Point ``CURRENT`` at the new version
+
+    Returns:
+        Path to the written version directory
+    """
+    missing = [name for name in REQUIRED_ARRAYS if name not in arrays]
+    if missing:
+        raise ValueError(f"Missing required arrays: {', '.join(missing)}")
+
+    arrays = {name: np.asarray(value) for name, value in arrays.items() if value is not None}
+    version = version or _content_version(arrays)
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    target = root / version
+
+    if (target / MANIFEST_NAME).exists():
+        logger.info(f"Artifact version {version} already exists")
+    else:
+        staging = Path(tempfile.mkdtemp(prefix=f".{version}-", dir=root))
+        try:
+            staging.chmod(0o755)
+            manifest: Dict[str, Any] = {
+                "format_version": ARTIFACT_FORMAT_VERSION,
+                "version": version,
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "feature_names": FEATURE_NAMES,
+                "n_clusters": int(arrays["centroids"].shape[0]),
+                "arrays": {},
+            }
+            manifest.update(metadata or {})
+            for name, array in arrays.items():
+                file_name = f"{name}.npy"
+                np.save(staging / file_name, np.ascontiguousarray(array), allow_pickle=False)
+                manifest["arrays"][name] = {
+                    "file": file_name,
+                    "dtype": str(array.dtype),
+                    "shape": list(array.shape),
+                }
+            with open(staging / MANIFEST_NAME, 'w') as f:
+                json.dump(manifest, f, indent=2)
+            os.replace(staging, target)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        logger.info(f"Wrote model artifact version {version} to {target}")
+
+    if make_current:
+        set_current_version(root, version)
+    return target
+
+
+def set_current_version(root: Path, version: str) -> None:
+    """Atomically point ``root/CURRENT`` at ``version``."""
+    root = Path(root)
+    if not (root / version / MANIFEST_NAME).exists():
+        raise ModelLoadError(f"Artifact version {version} not found in {root}")
+    tmp_pointer = root / f".{CURRENT_POINTER}.tmp"
+    tmp_pointer.write_text(version + "\n")
+    os.replace(tmp_pointer, root / CURRENT_POINTER)
+
+
+def resolve_artifact_dir(path: Path) -> Optional[Path]:
+    """Find the artifact version directory to load.
+
+    ``path`` may be a version directory itself, or a root containing a
+    ``CURRENT`` pointer or version subdirectories (newest by manifest wins).
+
+    Args:
+        path: Version directory or artifact root
+
+    Returns:
+        Version directory or None if no artifact is present
+    """
+    path = Path(path)
+    if (path / MANIFEST_NAME).exists():
+        return path
+    if not path.is_dir():
+        return None
+
+    pointer = path / CURRENT_POINTER
+    if pointer.exists():
+        candidate = path / pointer.read_text().strip()
+        if (candidate / MANIFEST_NAME).exists():
+            return candidate
+        logger.warning(f"{pointer} points to a missing artifact version")
+
+    versions = [
+        child for child in path.iterdir()
+        if not child.name.startswith('.') and (child / MANIFEST_NAME).exists()
+    ]
+    if not versions:
+        return None
+    return max(versions, key=lambda child: (child / MANIFEST_NAME).stat().st_mtime)
+
+
+def read_manifest(version_dir: Path) -> Dict[str, Any]:
+    """Read and validate the manifest of an artifact version."""
+    manifest_path = Path(version_dir) / MANIFEST_NAME
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        raise ModelLoadError(f"Failed to read artifact manifest {manifest_path}: {e}")
+
+    format_version = manifest.get("format_version")
+    if format_version != ARTIFACT_FORMAT_VERSION:
+        raise ModelLoadError(
+            f"Unsupported artifact format {format_version} in {manifest_path}"
+        )
+    return manifest
+
+
+def load_artifacts(path: Path, mmap: bool = True) -> ModelArtifacts:
+    """Load a model artifact without unpickling anything.
+
+    Args:
+        path: Version directory or artifact root
+        mmap: Memory-map arrays read-only instead of reading them into memory
+
+    Returns:
+        ModelArtifacts instance
+    """
+    version_dir = resolve_artifact_dir(path)
+    if version_dir is None:
+        raise ModelLoadError(f"No model artifact found in {path}")
+
+    manifest = read_manifest(version_dir)
+    arrays: Dict[str, np.ndarray] = {}
+    for name, spec in manifest.get("arrays", {}).items():
+        array_path = version_dir / spec["file"]
+        try:
+            array = np.load(array_path, mmap_mode='r' if mmap else None, allow_pickle=False)
+        except (OSError, ValueError) as e:
+            raise ModelLoadError(f"Failed to load artifact array {array_path}: {e}")
+        if list(array.shape) != list(spec["shape"]) or str(array.dtype) != spec["dtype"]:
+            raise ModelLoadError(
+                f"Artifact array {name} does not match manifest: "
+                f"{array.dtype}{array.shape} != {spec['dtype']}{tuple(spec['shape'])}"
+            )
+        arrays[name] = array
+
+    missing = [name for name in REQUIRED_ARRAYS if name not in arrays]
+    if missing:
+        raise ModelLoadError(f"Artifact {version_dir} is missing arrays: {', '.join(missing)}")
+
+    logger.info(f"Loaded model artifact version {manifest['version']} from {version_dir}")
+    return ModelArtifacts(
+        version=manifest["version"],
+        path=version_dir,
+        manifest=manifest,
+        arrays=arrays,
+    )
+
+
+def arrays_from_estimators(
+    kmeans_model: Any,
+    scaler: Any,
+    tsne_embedding: Optional[Any] = None,
+    tsne_reference: Optional[np.ndarray] = None
+) -> Dict[str, np.ndarray]:
+    """Extract the inference arrays from fitted sklearn/openTSNE objects.
+
+    Args:
+        kmeans_model: Fitted KMeans (or MiniBatchKMeans)
+        scaler: Fitted StandardScaler
+        tsne_embedding: Optional openTSNE ``TSNEEmbedding`` or (n, 2) array
+        tsne_reference: Scaled training data the embedding was fitted on;
+            taken from the embedding's affinity index when omitted
+
+    Returns:
+        Dict of named arrays for ``write_artifacts``
+    """
+    arrays: Dict[str, np.ndarray] = {
+        "scaler_mean": np.asarray(scaler.mean_, dtype=np.float64),
+        "scaler_scale": np.asarray(scaler.scale_, dtype=np.float64),
+        "centroids": np.asarray(kmeans_model.cluster_centers_, dtype=np.float64),
+    }
+    labels = getattr(kmeans_model, "labels_", None)
+    if labels is not None:
+        arrays["labels"] = np.asarray(labels, dtype=np.int32)
+
+    if tsne_embedding is not None:
+        arrays["tsne_embedding"] = np.asarray(tsne_embedding, dtype=np.float32)
+        affinities = getattr(tsne_embedding, "affinities", None)
+        if tsne_reference is None and affinities is not None:
+            knn_index = getattr(affinities, "knn_index", None)
+            tsne_reference = getattr(knn_index, "data", None)
+        P = getattr(affinities, "P", None)
+        if P is not None:
+            P = P.tocsr()
+            arrays["tsne_affinity_data"] = np.asarray(P.data, dtype=np.float32)
+            arrays["tsne_affinity_indices"] = np.asarray(P.indices, dtype=np.int32)
+            arrays["tsne_affinity_indptr"] = np.asarray(P.indptr, dtype=np.int64)
+    if tsne_reference is not None:
+        arrays["tsne_reference"] = np.asarray(tsne_reference, dtype=np.float32)
+
+    return arrays
+
+
+def convert_legacy_models(
+    model_dir: Path,
+    output_root: Optional[Path] = None,
+    tsne_reference_path: Optional[Path] = None
+) -> Path:
+    """One-off migration of the pickled ``model/*.sav`` files to the artifact format.
+
+    This is the only place that still unpickles models; run it on trusted files.
+
+    Args:
+        model_dir: Directory with the legacy ``.sav`` pickles
+        output_root: Artifact root, defaults to ``model_dir / "artifacts"``
+        tsne_reference_path: Optional CSV of the scaled training data
+
+    Returns:
+        Path to the written version directory
+    """
+    model_dir = Path(model_dir)
+    output_root = Path(output_root) if output_root else model_dir / "artifacts"
+
+    def _unpickle(name: str) -> Any:
+        with open(model_dir / name, 'rb') as f:
+            return pickle.load(f)
+
+    kmeans_model = _unpickle("KMeans_K17_20000_sample_model.sav")
+    scaler = _unpickle("StdScaler.sav")
+    tsne_embedding = None
+    if (model_dir / "openTSNETransformer.sav").exists():
+        tsne_embedding = _unpickle("openTSNETransformer.sav")
+
+    tsne_reference = None
+    if tsne_reference_path is not None and Path(tsne_reference_path).exists():
+        tsne_reference = np.loadtxt(tsne_reference_path, delimiter=',')
+
+    arrays = arrays_from_estimators(kmeans_model, scaler, tsne_embedding, tsne_reference)
+    return write_artifacts(
+        output_root,
+        arrays,
+        metadata={"source": "legacy-pickle", "model_name": "KMeans_K17_20000_sample"}
+    )
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Convert pickled models to the artifact format")
+    parser.add_argument("model_dir", type=Path, nargs="?", default=Path("model"))
+    parser.add_argument("--output", type=Path, default=None)
+    parser.add_argument("--tsne-reference", type=Path, default=None)
+    args = parser.parse_args()
+
+    print(convert_legacy_models(args.model_dir, args.output, args.tsne_reference))
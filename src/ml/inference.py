@@ -0,0 +1,186 @@
+"""Pure NumPy inference over model artifacts.
+
+At serving time the models only standardize feature vectors and assign them
+to the nearest KMeans centroid. ``InferenceKernel`` does both without going
+through sklearn's validation and dispatch:
+
+* the scaler is folded into one fused affine transform ``X * coef + intercept``
+  with ``coef = 1 / scale`` and ``intercept = -mean / scale``;
+* clusters are assigned with one GEMM per batch, using
+  ``argmin_k ||x - c_k||^2 = argmin_k (||c_k||^2 - 2 x . c_k)``.
+
+Inputs may be a single vector or a batch, in float64 or float32.
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .artifacts import ModelArtifacts
+
+DEFAULT_BATCH_SIZE = 8192
+
+
+class InferenceKernel:
+    """Fused StandardScaler + KMeans assignment kernel."""
+
+    def __init__(
+        self,
+        mean: np.ndarray,
+        scale: np.ndarray,
+        centroids: np.ndarray,
+        dtype: np.dtype = np.float64,
+        batch_size: int = DEFAULT_BATCH_SIZE
+    ):
+        """Precompute the fused affine terms and centroid norms.
+
+        Args:
+            mean: Scaler mean, shape (n_features,)
+            scale: Scaler scale, shape (n_features,)
+            centroids: Cluster centroids in scaled space, shape (n_clusters, n_features)
+            dtype: Compute dtype, float64 or float32
+            batch_size: Rows per GEMM batch, bounds temporary memory
+        """
+        self.dtype = np.dtype(dtype)
+        if self.dtype not in (np.dtype(np.float64), np.dtype(np.float32)):
+            raise ValueError(f"Unsupported dtype: {self.dtype}")
+
+        mean = np.asarray(mean, dtype=np.float64)
+        scale = np.asarray(scale, dtype=np.float64)
+        # sklearn leaves zero-variance features unscaled
+        scale = np.where(scale == 0.0, 1.0, scale)
+
+        self.coef = (1.0 / scale).astype(self.dtype)
+        self.intercept = (-mean / scale).astype(self.dtype)
+        self.centroids = np.ascontiguousarray(centroids, dtype=self.dtype)
+        self.centroids_T = np.ascontiguousarray(self.centroids.T)
+        self.centroid_sq_norms = np.einsum('ij,ij->i', self.centroids, self.centroids)
+        self.batch_size = batch_size
+        self.n_features = self.centroids.shape[1]
+        self.n_clusters = self.centroids.shape[0]
+
+    @classmethod
+    def from_artifacts(
+        cls,
+        artifacts: ModelArtifacts,
+        dtype: np.dtype = np.float64
+    ) -> "InferenceKernel":
+        """Build a kernel from loaded model artifacts."""
+        return cls(artifacts.scaler_mean, artifacts.scaler_scale, artifacts.centroids, dtype=dtype)
+
+    def _as_batch(self, X: np.ndarray) -> np.ndarray:
+        X = np.asarray(X, dtype=self.dtype)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(
+                f"Expected input with {self.n_features} features, got shape {X.shape}"
+            )
+        return X
+
+    def transform(self, X: np.ndarray) -> np.ndarray:
+        """Standardize raw feature vectors.
+
+        Args:
+            X: Raw features, shape (n_features,) or (n_samples, n_features)
+
+        Returns:
+            Scaled features, shape (n_samples, n_features)
+        """
+        X = self._as_batch(X)
+        out = np.multiply(X, self.coef)
+        out += self.intercept
+        return out
+
+    def predict_scaled(
+        self,
+        Z: np.ndarray,
+        return_distances: bool = False
+    ) -> "np.ndarray | Tuple[np.ndarray, np.ndarray]":
+        """Assign already-scaled vectors to their nearest centroid.
+
+        Args:
+            Z: Scaled features, shape (n_features,) or (n_samples, n_features)
+            return_distances: Also return squared distances to the assigned centroid
+
+        Returns:
+            Cluster labels, and squared distances if requested
+        """
+        Z = self._as_batch(Z)
+        n_samples = Z.shape[0]
+        labels = np.empty(n_samples, dtype=np.int32)
+        distances = np.empty(n_samples, dtype=self.dtype) if return_distances else None
+
+        for start in range(0, n_samples, self.batch_size):
+            batch = Z[start:start + self.batch_size]
+            # ||c||^2 - 2 z.c; ||z||^2 is constant per row and does not change the argmin
+            scores = batch @ self.centroids_T
+            scores *= -2.0
+            scores += self.centroid_sq_norms
+            batch_labels = scores.argmin(axis=1)
+            labels[start:start + len(batch)] = batch_labels
+            if distances is not None:
+                row_sq_norms = np.einsum('ij,ij->i', batch, batch)
+                best = scores[np.arange(len(batch)), batch_labels] + row_sq_norms
+                distances[start:start + len(batch)] = np.maximum(best, 0.0)
+
+        if return_distances:
+            return labels, distances
+        return labels
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Scale raw feature vectors and assign them to clusters."""
+        return self.predict_scaled(self.transform(X))
+
+    def transform_predict(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Scale raw feature vectors once and return both scaled values and labels."""
+        Z = self.transform(X)
+        return Z, self.predict_scaled(Z)
+
+
+class ArtifactScaler:
+    """StandardScaler replacement backed by artifact arrays."""
+
+    def __init__(self, mean: np.ndarray, scale: np.ndarray, dtype: np.dtype = np.float64):
+        self.mean_ = np.asarray(mean)
+        self.scale_ = np.asarray(scale)
+        self.n_features_in_ = self.mean_.shape[0]
+        # Centroids are irrelevant for scaling; a single zero row keeps the kernel valid
+        self._kernel = InferenceKernel(
+            self.mean_, self.scale_, np.zeros((1, self.n_features_in_)), dtype=dtype
+        )
+
+    @classmethod
+    def from_artifacts(cls, artifacts: ModelArtifacts, dtype: np.dtype = np.float64) -> "ArtifactScaler":
+        return cls(artifacts.scaler_mean, artifacts.scaler_scale, dtype=dtype)
+
+    def transform(self, X: np.ndarray) -> np.ndarray:
+        """Standardize features with the fused affine transform."""
+        return self._kernel.transform(X)
+
+
+class ArtifactKMeans:
+    """KMeans replacement that assigns points to the nearest stored centroid."""
+
+    def __init__(
+        self,
+        centroids: np.ndarray,
+        labels: Optional[np.ndarray] = None,
+        dtype: np.dtype = np.float64
+    ):
+        self.cluster_centers_ = np.asarray(centroids)
+        self.labels_ = labels
+        self.n_clusters = self.cluster_centers_.shape[0]
+        self.n_features_in_ = self.cluster_centers_.shape[1]
+        self._kernel = InferenceKernel(
+            np.zeros(self.n_features_in_), np.ones(self.n_features_in_),
+            self.cluster_centers_, dtype=dtype
+        )
+
+    @classmethod
+    def from_artifacts(cls, artifacts: ModelArtifacts, dtype: np.dtype = np.float64) -> "ArtifactKMeans":
+        return cls(artifacts.centroids, artifacts.labels, dtype=dtype)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Return the index of the closest centroid for each row of ``X``."""
+        return self._kernel.predict_scaled(X)
@@ -0,0 +1,168 @@
+"""Versioned model handles with background hot reload.
+
+A :class:`ModelRegistry` watches an artifact root (``model/artifacts``) for
+``CURRENT`` to name a new version, loads that version off the request path
+and swaps it in with a single reference assignment. Callers read
+:attr:`ModelRegistry.current` once per request and keep using that
+:class:`ModelHandle`, so requests in flight during a swap finish on the
+version they started with; the old arrays are unmapped once the last of them
+drops its reference.
+
+New versions are published with :func:`write_artifacts` or
+:func:`set_current_version`, both of which replace ``CURRENT`` atomically.
+A version that fails to load is logged and skipped until its manifest
+changes, while the previous version keeps serving.
+"""
+
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from ..exceptions import ModelLoadError
+from ..logging_config import get_logger
+from ..metrics import metrics
+from .artifacts import MANIFEST_NAME, ModelArtifacts, load_artifacts, resolve_artifact_dir
+from .inference import ArtifactKMeans, ArtifactScaler, InferenceKernel
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class ModelHandle:
+    """One loaded model version; immutable so it can be shared across threads."""
+    version: str
+    inference_kernel: Optional[InferenceKernel]
+    kmeans_model: Any
+    scaler: Any
+    artifacts: Optional[ModelArtifacts] = None
+    tsne_transformer: Optional[Any] = None
+    loaded_at: float = field(default_factory=time.time)
+
+    @classmethod
+    def from_artifacts(cls, artifacts: ModelArtifacts) -> "ModelHandle":
+        return cls(
+            version=artifacts.version,
+            inference_kernel=InferenceKernel.from_artifacts(artifacts),
+            kmeans_model=ArtifactKMeans.from_artifacts(artifacts),
+            scaler=ArtifactScaler.from_artifacts(artifacts),
+            artifacts=artifacts,
+        )
+
+
+class ModelRegistry:
+    """Active model version of an artifact root, reloaded when ``CURRENT`` changes."""
+
+    def __init__(self, artifact_root: Path, poll_interval: float = 5.0, warm: bool = True):
+        """Initialize the registry without loading anything.
+
+        Args:
+            artifact_root: Artifact root directory (e.g. ``model/artifacts``)
+            poll_interval: Seconds between checks of ``CURRENT`` once started; 0 disables watching
+            warm: Fault a new version's arrays into the page cache before swapping it in
+        """
+        self.artifact_root = Path(artifact_root)
+        self.poll_interval = poll_interval
+        self.warm = warm
+        self.swaps = 0
+        self.last_error: Optional[str] = None
+        self._current: Optional[ModelHandle] = None
+        self._failed: Optional[Tuple[Path, float]] = None
+        self._load_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def current(self) -> Optional[ModelHandle]:
+        """The active model version, or None before one has been loaded."""
+        return self._current
+
+    @property
+    def version(self) -> Optional[str]:
+        current = self._current
+        return current.version if current is not None else None
+
+    def _pending_dir(self) -> Optional[Path]:
+        """Version directory to load, or None when it is already active."""
+        version_dir = resolve_artifact_dir(self.artifact_root)
+        if version_dir is None:
+            return None
+        current = self._current
+        if current is not None and current.artifacts is not None and current.artifacts.path == version_dir:
+            return None
+        return version_dir
+
+    def refresh(self) -> bool:
+        """Load the version ``CURRENT`` points at and swap it in if it is new.
+
+        Returns:
+            True when a new version became active
+        """
+        with self._load_lock:
+            version_dir = self._pending_dir()
+            if version_dir is None:
+                return False
+            try:
+                stamp = (version_dir, (version_dir / MANIFEST_NAME).stat().st_mtime)
+            except OSError:
+                return False
+            if stamp == self._failed:
+                return False
+
+            start = time.perf_counter()
+            try:
+                artifacts = load_artifacts(version_dir)
+                if self.warm:
+                    artifacts.warm()
+                handle = ModelHandle.from_artifacts(artifacts)
+            except (ModelLoadError, OSError, ValueError) as e:
+                self._failed = stamp
+                self.last_error = str(e)
+                metrics.inc("model_reloads_total", outcome="failure")
+                logger.error(f"Failed to load model from {version_dir}, keeping version {self.version}: {e}")
+                return False
+
+            previous = self.version
+            self._current = handle
+            self.swaps += 1
+            self._failed = None
+            self.last_error = None
+            metrics.inc("model_reloads_total", outcome="success")
+            metrics.observe("model_load_seconds", time.perf_counter() - start)
+            logger.info(f"Model version {handle.version} active (previous: {previous})")
+            return True
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Model registry check failed: {e}")
+
+    def start(self) -> "ModelRegistry":
+        """Check for new versions every ``poll_interval`` seconds in a daemon thread."""
+        if self.poll_interval > 0 and (self._thread is None or not self._thread.is_alive()):
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, name="model-registry", daemon=True)
+            self._thread.start()
+            logger.info(f"Watching {self.artifact_root} for new model versions")
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop watching for new versions."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def describe(self) -> Dict[str, Any]:
+        """Summary for health and stats endpoints."""
+        current = self._current
+        return {
+            "model_version": current.version if current is not None else None,
+            "model_loaded_at": current.loaded_at if current is not None else None,
+            "model_swaps": self.swaps,
+            "model_watching": self._thread is not None and self._thread.is_alive(),
+            "model_last_error": self.last_error,
+        }
@@ -0,0 +1,344 @@
+"""Mini-batch KMeans training over streamed playlist feature vectors.
+
+The original model was fitted once on a 20K-playlist sample. This module
+trains (or keeps training) the playlist clustering from chunks of mean
+feature vectors streamed out of the MPD database, so memory stays bounded by
+the chunk size rather than the number of playlists:
+
+* warm starts continue from the centroids and per-cluster counts of an
+  existing artifact, keeping its scaler and therefore its cluster IDs;
+* cold starts fit the scaler in a streaming pass, seed centroids with
+  k-means++ on the first chunk and, given a reference artifact, renumber the
+  new clusters to match the closest reference centroids;
+* centroids are updated with per-cluster running means (Sculley's mini-batch
+  update with a 1/count learning rate) using the fused inference kernel for
+  the assignment step.
+
+The result is written as a new artifact version with ``pids`` and ``labels``
+aligned, so playlists are mapped to clusters by pid instead of by position.
+"""
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple, Union
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+from ..logging_config import get_logger
+from .artifacts import ModelArtifacts, load_artifacts, resolve_artifact_dir, write_artifacts
+from .inference import InferenceKernel
+
+logger = get_logger(__name__)
+
+DEFAULT_BATCH_SIZE = 4096
+
+Chunks = Iterable[Tuple[np.ndarray, np.ndarray]]
+
+
+@dataclass
+class TrainingResult:
+    """Arrays and manifest metadata of a trained model."""
+    arrays: Dict[str, np.ndarray]
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def inertia(self) -> float:
+        return float(self.metadata.get("inertia", 0.0))
+
+
+def fit_scaler(chunks: Chunks) -> Tuple[np.ndarray, np.ndarray]:
+    """Streaming equivalent of ``StandardScaler().fit``.
+
+    Per-chunk moments are merged with Chan et al.'s parallel update, so the
+    result matches fitting on the concatenated data.
+
+    Args:
+        chunks: Iterable of (ids, features) chunks
+
+    Returns:
+        Tuple of (mean, scale), zero-variance features get a scale of 1
+    """
+    count = 0
+    mean = None
+    m2 = None
+    for _, X in chunks:
+        X = np.asarray(X, dtype=np.float64)
+        if len(X) == 0:
+            continue
+        chunk_mean = X.mean(axis=0)
+        chunk_m2 = ((X - chunk_mean) ** 2).sum(axis=0)
+        if mean is None:
+            count, mean, m2 = len(X), chunk_mean, chunk_m2
+            continue
+        total = count + len(X)
+        delta = chunk_mean - mean
+        mean = mean + delta * len(X) / total
+        m2 = m2 + chunk_m2 + delta ** 2 * count * len(X) / total
+        count = total
+
+    if mean is None:
+        raise ValueError("No data to fit the scaler on")
+    scale = np.sqrt(m2 / count)
+    scale[scale == 0.0] = 1.0
+    return mean, scale
+
+
+def align_cluster_ids(reference: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Order new centroids so each takes the ID of its closest reference centroid.
+
+    Clusters are matched one-to-one by minimum total squared distance. When
+    there are more new clusters than reference ones, the unmatched clusters
+    get the IDs after the matched ones.
+
+    Args:
+        reference: Previous centroids, shape (k_ref, n_features)
+        centroids: New centroids, shape (k, n_features)
+
+    Returns:
+        Permutation ``order`` such that ``centroids[order]`` is the aligned centroid array
+    """
+    cost = ((reference[:, np.newaxis, :] - centroids[np.newaxis, :, :]) ** 2).sum(axis=2)
+    rows, cols = linear_sum_assignment(cost)
+    matched = cols[np.argsort(rows)]
+    unmatched = np.setdiff1d(np.arange(len(centroids)), matched)
+    return np.concatenate([matched, unmatched]).astype(np.int64)
+
+
+class OnlineKMeans:
+    """KMeans centroids updated one mini-batch at a time."""
+
+    def __init__(self, centroids: np.ndarray, counts: Optional[np.ndarray] = None):
+        """Start from existing centroids.
+
+        Args:
+            centroids: Initial centroids in scaled space, shape (n_clusters, n_features)
+            counts: Number of points already summarized by each centroid
+        """
+        self.centroids = np.array(centroids, dtype=np.float64)
+        if counts is None:
+            counts = np.zeros(len(self.centroids))
+        self.counts = np.array(counts, dtype=np.float64)
+        self.n_clusters = len(self.centroids)
+
+    @classmethod
+    def from_sample(
+        cls,
+        Z: np.ndarray,
+        n_clusters: int,
+        random_state: Optional[int] = None
+    ) -> "OnlineKMeans":
+        """Seed centroids with k-means++ on a sample of scaled data."""
+        from sklearn.cluster import kmeans_plusplus
+
+        if len(Z) < n_clusters:
+            raise ValueError(f"Need at least {n_clusters} samples to seed, got {len(Z)}")
+        centroids, _ = kmeans_plusplus(np.asarray(Z, dtype=np.float64), n_clusters, random_state=random_state)
+        return cls(centroids)
+
+    def _kernel(self) -> InferenceKernel:
+        n_features = self.centroids.shape[1]
+        return InferenceKernel(np.zeros(n_features), np.ones(n_features), self.centroids)
+
+    def partial_fit(self, Z: np.ndarray) -> float:
+        """Assign a mini-batch and move each centroid to the running mean of its points.
+
+        Args:
+            Z: Scaled features, shape (n_samples, n_features)
+
+        Returns:
+            Sum of squared distances of the batch to its assigned centroids
+        """
+        labels, distances = self._kernel().predict_scaled(Z, return_distances=True)
+        batch_counts = np.bincount(labels, minlength=self.n_clusters).astype(np.float64)
+        sums = np.zeros_like(self.centroids)
+        np.add.at(sums, labels, Z)
+
+        updated = batch_counts > 0
+        new_counts = self.counts + batch_counts
+        self.centroids[updated] += (
+            sums[updated] - batch_counts[updated, np.newaxis] * self.centroids[updated]
+        ) / new_counts[updated, np.newaxis]
+        self.counts = new_counts
+        return float(distances.sum())
+
+    def predict(self, Z: np.ndarray, return_distances: bool = False):
+        """Assign scaled vectors to the nearest centroid."""
+        return self._kernel().predict_scaled(Z, return_distances=return_distances)
+
+
+def _batches(Z: np.ndarray, batch_size: int) -> Iterator[np.ndarray]:
+    for start in range(0, len(Z), batch_size):
+        yield Z[start:start + batch_size]
+
+
+def train_online_kmeans(
+    chunks_factory: Callable[[], Chunks],
+    n_clusters: Optional[int] = None,
+    warm_start: Optional[ModelArtifacts] = None,
+    reference: Optional[ModelArtifacts] = None,
+    n_epochs: int = 1,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    random_state: Optional[int] = 0
+) -> TrainingResult:
+    """Train playlist clusters from streamed chunks of raw feature vectors.
+
+    Args:
+        chunks_factory: Returns a fresh iterable of (pids, raw features) chunks;
+            called once per pass over the data
+        n_clusters: Number of clusters for a cold start, defaults to the reference's
+        warm_start: Artifact to continue training from
+        reference: Artifact whose cluster IDs a cold-started model should reuse
+        n_epochs: Passes over the data
+        batch_size: Playlists per mini-batch
+        random_state: Seed for k-means++ initialization
+
+    Returns:
+        Arrays and metadata for ``write_artifacts``
+    """
+    if warm_start is not None:
+        mean = np.asarray(warm_start.scaler_mean, dtype=np.float64)
+        scale = np.asarray(warm_start.scaler_scale, dtype=np.float64)
+        counts = warm_start.arrays.get("cluster_counts")
+        if counts is None and warm_start.labels is not None:
+            counts = np.bincount(warm_start.labels, minlength=warm_start.n_clusters)
+        model = OnlineKMeans(warm_start.centroids, counts)
+    else:
+        mean, scale = fit_scaler(chunks_factory())
+        model = None
+
+    scaler = InferenceKernel(mean, scale, np.zeros((1, len(mean))))
+    n_clusters = n_clusters or (reference.n_clusters if reference is not None else None)
+    if model is None and not n_clusters:
+        raise ValueError("n_clusters is required for a cold start without a reference model")
+
+    for epoch in range(n_epochs):
+        inertia = 0.0
+        n_samples = 0
+        for _, X in chunks_factory():
+            Z = scaler.transform(X)
+            if model is None:
+                model = OnlineKMeans.from_sample(Z, n_clusters, random_state=random_state)
+            for batch in _batches(Z, batch_size):
+                inertia += model.partial_fit(batch)
+            n_samples += len(Z)
+        logger.info(f"Epoch {epoch + 1}/{n_epochs}: {n_samples} playlists, batch inertia {inertia:.1f}")
+
+    if model is None:
+        raise ValueError("No data to train on")
+
+    if warm_start is None and reference is not None:
+        # Bring the reference centroids into this model's scaled space first
+        reference_raw = reference.centroids * reference.scaler_scale + reference.scaler_mean
+        order = align_cluster_ids(scaler.transform(reference_raw), model.centroids)
+        model = OnlineKMeans(model.centroids[order], model.counts[order])
+
+    # Final pass labels every playlist against the trained centroids
+    pids, labels, inertia = [], [], 0.0
+    for chunk_pids, X in chunks_factory():
+        chunk_labels, distances = model.predict(scaler.transform(X), return_distances=True)
+        pids.append(np.asarray(chunk_pids, dtype=np.int64))
+        labels.append(chunk_labels)
+        inertia += float(distances.sum())
+    pids = np.concatenate(pids)
+    labels = np.concatenate(labels).astype(np.int32)
+    order = np.argsort(pids, kind="stable")
+
+    parent = warm_start or reference
+    return TrainingResult(
+        arrays={
+            "scaler_mean": mean,
+            "scaler_scale": scale,
+            "centroids": model.centroids,
+            "cluster_counts": np.bincount(labels, minlength=model.n_clusters).astype(np.int64),
+            "pids": pids[order],
+            "labels": labels[order],
+        },
+        metadata={
+            "source": "online-kmeans",
+            "parent_version": parent.version if parent is not None else None,
+            "warm_start": warm_start is not None,
+            "n_samples": int(len(pids)),
+            "n_epochs": n_epochs,
+            "inertia": inertia,
+        },
+    )
+
+
+def train_from_database(
+    db_path: Union[str, Path],
+    output_root: Union[str, Path],
+    warm_start_path: Optional[Union[str, Path]] = None,
+    n_clusters: Optional[int] = None,
+    n_epochs: int = 1,
+    chunk_size: int = 20000,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    make_current: bool = False,
+    features_path: Optional[Union[str, Path]] = None
+) -> Path:
+    """Train on every playlist of an MPD database and write a new artifact version.
+
+    Cold starts reuse the cluster IDs of the current model under ``output_root``.
+
+    Args:
+        db_path: Path to the playlists SQLite database
+        output_root: Artifact root to write the new version under
+        warm_start_path: Artifact (root or version) to continue training from
+        n_clusters: Number of clusters for a cold start
+        n_epochs: Passes over the data
+        chunk_size: Playlists read from the database at a time
+        batch_size: Playlists per mini-batch
+        make_current: Point ``CURRENT`` at the new version
+        features_path: Precomputed playlist features (``build_playlist_features``)
+            to stream from instead of aggregating in SQLite
+
+    Returns:
+        Path to the written version directory
+    """
+    from ..mpd.playlist_features import iter_playlist_means, load_playlist_features
+
+    if features_path is not None:
+        features = load_playlist_features(features_path)
+        chunks_factory = lambda: features.iter_chunks(chunk_size)
+    else:
+        chunks_factory = lambda: iter_playlist_means(db_path, chunk_size=chunk_size)
+
+    warm_start = load_artifacts(warm_start_path) if warm_start_path else None
+    reference = None
+    if warm_start is None and resolve_artifact_dir(output_root) is not None:
+        reference = load_artifacts(output_root)
+    result = train_online_kmeans(
+        chunks_factory,
+        n_clusters=n_clusters,
+        warm_start=warm_start,
+        reference=reference,
+        n_epochs=n_epochs,
+        batch_size=batch_size,
+    )
+    return write_artifacts(output_root, result.arrays, metadata=result.metadata, make_current=make_current)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Train playlist clusters with mini-batch KMeans")
+    parser.add_argument("db_path", type=Path)
+    parser.add_argument("--output", type=Path, default=Path("model/artifacts"))
+    parser.add_argument("--warm-start", type=Path, default=None)
+    parser.add_argument("--n-clusters", type=int, default=None)
+    parser.add_argument("--epochs", type=int, default=1)
+    parser.add_argument("--chunk-size", type=int, default=20000)
+    parser.add_argument("--make-current", action="store_true")
+    parser.add_argument("--features", type=Path, default=None)
+    args = parser.parse_args()
+
+    print(train_from_database(
+        args.db_path,
+        args.output,
+        warm_start_path=args.warm_start,
+        n_clusters=args.n_clusters,
+        n_epochs=args.epochs,
+        chunk_size=args.chunk_size,
+        make_current=args.make_current,
+        features_path=args.features,
+    ))
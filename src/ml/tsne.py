@@ -0,0 +1,79 @@
+"""Fast placement of new points into a precomputed t-SNE embedding.
+
+``openTSNE``'s ``transform`` optimizes each new point against the whole
+reference embedding. For drawing a single user on the cluster plots a much
+cheaper approximation is enough: place the point at the distance-weighted
+average of the embeddings of its nearest reference neighbours, found with a
+KD-tree built once over the reference data.
+"""
+
+from typing import Optional
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from ..exceptions import ModelLoadError
+from .artifacts import ModelArtifacts
+
+DEFAULT_N_NEIGHBORS = 10
+
+
+class TSNEPlacer:
+    """kNN-weighted approximation of ``TSNEEmbedding.transform``."""
+
+    def __init__(
+        self,
+        reference: np.ndarray,
+        embedding: np.ndarray,
+        n_neighbors: int = DEFAULT_N_NEIGHBORS
+    ):
+        """Build the neighbour index over the reference data.
+
+        Args:
+            reference: Scaled data the embedding was fitted on, shape (n_samples, n_features)
+            embedding: 2-D t-SNE coordinates of the reference data, shape (n_samples, 2)
+            n_neighbors: Number of reference neighbours to average over
+        """
+        reference = np.asarray(reference, dtype=np.float64)
+        embedding = np.asarray(embedding, dtype=np.float64)
+        if len(reference) != len(embedding):
+            raise ValueError(
+                f"Reference data ({len(reference)} rows) and embedding "
+                f"({len(embedding)} rows) must be aligned"
+            )
+        self.embedding = embedding
+        self.n_neighbors = min(n_neighbors, len(reference))
+        self.index = cKDTree(reference)
+
+    @classmethod
+    def from_artifacts(
+        cls,
+        artifacts: ModelArtifacts,
+        n_neighbors: int = DEFAULT_N_NEIGHBORS
+    ) -> "TSNEPlacer":
+        """Build a placer from the t-SNE arrays of a model artifact."""
+        if not artifacts.has_tsne():
+            raise ModelLoadError(f"Artifact {artifacts.version} has no t-SNE embedding")
+        return cls(artifacts.tsne_reference, artifacts.tsne_embedding, n_neighbors=n_neighbors)
+
+    def transform(self, X: np.ndarray, n_neighbors: Optional[int] = None) -> np.ndarray:
+        """Approximate the 2-D embedding of new scaled points.
+
+        Args:
+            X: Scaled features, shape (n_features,) or (n_samples, n_features)
+            n_neighbors: Override the number of neighbours
+
+        Returns:
+            Embedded coordinates, shape (n_samples, 2)
+        """
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        k = min(n_neighbors or self.n_neighbors, len(self.embedding))
+        distances, indices = self.index.query(X, k=k)
+        if k == 1:
+            distances = distances[:, np.newaxis]
+            indices = indices[:, np.newaxis]
+
+        # Inverse-distance weights; an exact match takes the neighbour's position
+        weights = 1.0 / np.maximum(distances, 1e-12)
+        weights /= weights.sum(axis=1, keepdims=True)
+        return np.einsum('nk,nkd->nd', weights, self.embedding[indices])
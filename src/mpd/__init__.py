@@ -0,0 +1,57 @@
+"""Million Playlist Dataset storage and indexes."""
+
+from .text import normalize_name
+from .feature_store import TrackFeatureStore
+from .playlist_features import (
+    PlaylistFeatures,
+    iter_playlist_means,
+    build_playlist_features,
+    load_playlist_features,
+    export_scaled_training_data,
+)
+from .schema import (
+    FEATURES_TABLE_SQL,
+    ensure_features_table,
+    migrate_features_table,
+    write_features,
+    read_features,
+    read_feature_range,
+)
+from .track_dictionary import (
+    MISSING_ID,
+    TrackDictionary,
+    TrackDictionaryManager,
+    start_track_dictionary_owner,
+    connect_track_dictionary,
+)
+from .track_index import (
+    TrackMatch,
+    TrackNameIndex,
+    default_index_path,
+    load_or_build_index,
+)
+
+__all__ = [
+    "normalize_name",
+    "TrackFeatureStore",
+    "PlaylistFeatures",
+    "iter_playlist_means",
+    "build_playlist_features",
+    "load_playlist_features",
+    "export_scaled_training_data",
+    "FEATURES_TABLE_SQL",
+    "ensure_features_table",
+    "migrate_features_table",
+    "write_features",
+    "read_features",
+    "read_feature_range",
+    "MISSING_ID",
+    "TrackDictionary",
+    "TrackDictionaryManager",
+    "start_track_dictionary_owner",
+    "connect_track_dictionary",
+    "TrackMatch",
+    "TrackNameIndex",
+    "default_index_path",
+    "load_or_build_index",
+]
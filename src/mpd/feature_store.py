@@ -0,0 +1,167 @@
+"""Dense, track_id-indexed storage of MPD audio features.
+
+``track_id`` is a dense integer assigned at ingest, so the ``features`` table
+fits in a ``(max_track_id + 1, n_features)`` float32 array addressed directly
+by track ID. Rows without features hold NaN. Looking up any set of tracks is
+then a single fancy-index gather instead of ``isin`` filters and merges.
+"""
+
+import sqlite3
+from pathlib import Path
+from typing import Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from ..exceptions import DatabaseError
+from ..logging_config import get_logger
+from ..ml.artifacts import FEATURE_NAMES
+
+logger = get_logger(__name__)
+
+FEATURE_DTYPE = np.float32
+MISSING = np.nan
+
+
+class TrackFeatureStore:
+    """Audio features of every track, one row per track_id."""
+
+    def __init__(self, matrix: np.ndarray, feature_names: Sequence[str] = FEATURE_NAMES):
+        """Wrap a dense feature matrix.
+
+        Args:
+            matrix: Features, shape (max_track_id + 1, n_features), NaN rows for missing tracks
+            feature_names: Column names of ``matrix``
+        """
+        if matrix.ndim != 2 or matrix.shape[1] != len(feature_names):
+            raise ValueError(
+                f"Expected a matrix with {len(feature_names)} columns, got shape {matrix.shape}"
+            )
+        self.matrix = matrix
+        self.feature_names = list(feature_names)
+        # A track has features when its first column is set; rows are written whole
+        self.present = ~np.isnan(matrix[:, 0])
+
+    def __len__(self) -> int:
+        return int(self.present.sum())
+
+    @property
+    def max_track_id(self) -> int:
+        return self.matrix.shape[0] - 1
+
+    @classmethod
+    def from_frame(
+        cls,
+        features_df: pd.DataFrame,
+        feature_names: Sequence[str] = FEATURE_NAMES
+    ) -> "TrackFeatureStore":
+        """Build the store from a frame with a ``track_id`` column and one column per feature.
+
+        Args:
+            features_df: Rows of the ``features`` table
+            feature_names: Feature columns to keep, in order
+
+        Returns:
+            Feature store
+        """
+        track_ids = features_df['track_id'].to_numpy(dtype=np.int64)
+        size = int(track_ids.max()) + 1 if len(track_ids) else 1
+        matrix = np.full((size, len(feature_names)), MISSING, dtype=FEATURE_DTYPE)
+        matrix[track_ids] = features_df[list(feature_names)].to_numpy(dtype=FEATURE_DTYPE)
+        return cls(matrix, feature_names)
+
+    @classmethod
+    def from_database(
+        cls,
+        db_path: Union[str, Path],
+        feature_names: Sequence[str] = FEATURE_NAMES
+    ) -> "TrackFeatureStore":
+        """Build the store from the ``features`` table of an MPD database.
+
+        Args:
+            db_path: Path to the playlists SQLite database
+            feature_names: Feature columns to keep, in order
+
+        Returns:
+            Feature store
+        """
+        columns = ', '.join(['track_id', *feature_names])
+        conn = sqlite3.connect(str(db_path))
+        try:
+            features_df = pd.read_sql(f'select {columns} from features', conn)
+        except (sqlite3.Error, pd.errors.DatabaseError) as e:
+            raise DatabaseError(f"Failed to read features from {db_path}: {e}")
+        finally:
+            conn.close()
+
+        store = cls.from_frame(features_df, feature_names)
+        logger.info(f"Loaded features for {len(store)} tracks from {db_path}")
+        return store
+
+    def save(self, path: Union[str, Path]) -> None:
+        """Write the feature matrix to an ``.npy`` file for :meth:`load`."""
+        np.save(path, self.matrix, allow_pickle=False)
+
+    @classmethod
+    def load(
+        cls,
+        path: Union[str, Path],
+        feature_names: Sequence[str] = FEATURE_NAMES,
+        mmap: bool = True
+    ) -> "TrackFeatureStore":
+        """Open a matrix written by :meth:`save`.
+
+        Memory-mapped stores share their pages with every other process
+        mapping the same file.
+
+        Args:
+            path: ``.npy`` file
+            feature_names: Column names of the matrix
+            mmap: Map the file read-only instead of reading it into memory
+
+        Returns:
+            Feature store
+        """
+        try:
+            matrix = np.load(path, mmap_mode='r' if mmap else None, allow_pickle=False)
+        except (OSError, ValueError) as e:
+            raise DatabaseError(f"Failed to load feature matrix {path}: {e}")
+        return cls(matrix, feature_names)
+
+    def has(self, track_ids: np.ndarray) -> np.ndarray:
+        """Boolean mask of which track IDs have features."""
+        track_ids = np.asarray(track_ids, dtype=np.int64)
+        in_range = (track_ids >= 0) & (track_ids <= self.max_track_id)
+        mask = np.zeros(track_ids.shape, dtype=bool)
+        mask[in_range] = self.present[track_ids[in_range]]
+        return mask
+
+    def gather(self, track_ids: np.ndarray) -> np.ndarray:
+        """Feature rows for the given track IDs, NaN for unknown tracks.
+
+        Args:
+            track_ids: Track IDs, any shape
+
+        Returns:
+            Features, shape ``track_ids.shape + (n_features,)``
+        """
+        track_ids = np.asarray(track_ids, dtype=np.int64)
+        in_range = (track_ids >= 0) & (track_ids <= self.max_track_id)
+        if in_range.all():
+            return self.matrix[track_ids]
+        rows = np.full(track_ids.shape + (self.matrix.shape[1],), MISSING, dtype=self.matrix.dtype)
+        rows[in_range] = self.matrix[track_ids[in_range]]
+        return rows
+
+    def lookup(self, track_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Feature rows for the tracks that have features.
+
+        Args:
+            track_ids: Track IDs, shape (n,)
+
+        Returns:
+            Tuple of (mask of found tracks, shape (n,); their features, shape (n_found, n_features))
+        """
+        track_ids = np.asarray(track_ids, dtype=np.int64)
+        found = self.has(track_ids)
+        return found, self.matrix[track_ids[found]]
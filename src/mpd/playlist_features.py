@@ -0,0 +1,300 @@
+"""Per-playlist audio feature vectors computed from an MPD database.
+
+The clustering models work on one vector per playlist: the mean of its
+tracks' audio features. Two ways to get them:
+
+* ``iter_playlist_means`` streams them straight out of SQLite in ``pid``
+  order, ``chunk_size`` playlists at a time;
+* ``build_playlist_features`` is the offline pipeline stage. It makes one
+  streaming pass over ``ratings`` sorted by pid, gathers track features from
+  the dense ``TrackFeatureStore`` and reduces each pid group with
+  ``np.add.reduceat``, writing mean, variance and track count matrices with
+  row ``i`` holding playlist ``pid == i``. The files are plain ``.npy`` and
+  are memory-mapped on load.
+
+Memory is bounded by the feature store plus one ratings chunk; the output
+matrices are written through ``open_memmap`` and never held in RAM.
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from ..exceptions import DatabaseError
+from ..logging_config import get_logger
+from ..ml.artifacts import FEATURE_NAMES
+from .feature_store import TrackFeatureStore
+
+logger = get_logger(__name__)
+
+DEFAULT_CHUNK_SIZE = 10000
+DEFAULT_RATINGS_CHUNK_SIZE = 1_000_000
+
+MEANS_FILE = "playlist_means.npy"
+VARIANCES_FILE = "playlist_variances.npy"
+COUNTS_FILE = "playlist_counts.npy"
+
+
+def iter_playlist_means(
+    db_path: Union[str, Path],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    feature_names: Sequence[str] = FEATURE_NAMES
+) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """Stream mean feature vectors of every playlist with at least one featured track.
+
+    Args:
+        db_path: Path to the playlists SQLite database
+        chunk_size: Playlists per yielded chunk
+        feature_names: Feature columns to average, in order
+
+    Yields:
+        Tuples of (pids, shape (n,); mean features, shape (n, n_features)) in pid order
+    """
+    averages = ', '.join(f'AVG(f.{name})' for name in feature_names)
+    sql = (
+        f'SELECT r.pid, {averages} FROM ratings r '
+        'JOIN features f ON f.track_id = r.track_id '
+        'GROUP BY r.pid ORDER BY r.pid'
+    )
+    conn = sqlite3.connect(str(db_path))
+    try:
+        cursor = conn.execute(sql)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            chunk = np.array(rows, dtype=np.float64)
+            yield chunk[:, 0].astype(np.int64), chunk[:, 1:]
+    except sqlite3.Error as e:
+        raise DatabaseError(f"Failed to read playlist features from {db_path}: {e}")
+    finally:
+        conn.close()
+
+
+@dataclass
+class PlaylistFeatures:
+    """Per-playlist feature matrices, row ``i`` belongs to ``pid == i``."""
+    means: np.ndarray
+    counts: np.ndarray
+    variances: Optional[np.ndarray] = None
+
+    @property
+    def pids(self) -> np.ndarray:
+        """Playlists with at least one featured track."""
+        return np.flatnonzero(self.counts)
+
+    def iter_chunks(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """Stream (pids, means) chunks in the same shape as ``iter_playlist_means``."""
+        pids = self.pids
+        for start in range(0, len(pids), chunk_size):
+            chunk_pids = pids[start:start + chunk_size]
+            yield chunk_pids, np.asarray(self.means[chunk_pids], dtype=np.float64)
+
+
+def _reduce_groups(
+    pids: np.ndarray,
+    features: np.ndarray,
+    with_variance: bool
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, Optional[np.ndarray]]:
+    """Mean, count and variance of each run of equal pids in sorted input."""
+    starts = np.flatnonzero(np.r_[True, pids[1:] != pids[:-1]])
+    counts = np.diff(np.r_[starts, len(pids)])
+    X = features.astype(np.float64)
+    means = np.add.reduceat(X, starts, axis=0) / counts[:, np.newaxis]
+    variances = None
+    if with_variance:
+        # Two-pass within each group: squared deviations from the group mean
+        deviations = X - np.repeat(means, counts, axis=0)
+        variances = np.add.reduceat(deviations ** 2, starts, axis=0) / counts[:, np.newaxis]
+    return pids[starts], counts, means, variances
+
+
+def _swap_in(staging: Path, output_dir: Path) -> None:
+    """Move a finished staging directory to ``output_dir``.
+
+    The old directory is renamed aside first and deleted only after the new
+    one is in place, so a crash never loses both; it is restored if the
+    second rename fails. Readers holding memory maps of the old files keep
+    valid mappings. Between the two renames ``output_dir`` briefly does not
+    exist.
+    """
+    previous = None
+    if output_dir.exists():
+        # Staging names are unique, so this one is free
+        previous = staging.with_name(f"{staging.name}-old")
+        os.replace(output_dir, previous)
+    try:
+        os.replace(staging, output_dir)
+    except OSError:
+        if previous is not None:
+            os.replace(previous, output_dir)
+        raise
+    if previous is not None:
+        shutil.rmtree(previous, ignore_errors=True)
+
+
+def build_playlist_features(
+    db_path: Union[str, Path],
+    output_dir: Union[str, Path],
+    with_variance: bool = True,
+    chunk_size: int = DEFAULT_RATINGS_CHUNK_SIZE,
+    feature_store: Optional[TrackFeatureStore] = None
+) -> Path:
+    """Compute mean (and variance) feature vectors of every playlist in one pass.
+
+    Args:
+        db_path: Path to the playlists SQLite database
+        output_dir: Directory for the ``.npy`` matrices; the previous one is only removed
+            once the new one is in place (see ``_swap_in``)
+        with_variance: Also write per-playlist feature variances
+        chunk_size: Ratings rows fetched per chunk
+        feature_store: Dense track features, loaded from ``db_path`` when omitted
+
+    Returns:
+        Output directory
+    """
+    if feature_store is None:
+        feature_store = TrackFeatureStore.from_database(db_path)
+    n_features = len(feature_store.feature_names)
+    output_dir = Path(output_dir)
+    output_dir.parent.mkdir(parents=True, exist_ok=True)
+
+    conn = sqlite3.connect(str(db_path))
+    staging = Path(tempfile.mkdtemp(prefix=f".{output_dir.name}-", dir=output_dir.parent))
+    try:
+        max_pid = conn.execute('SELECT MAX(pid) FROM ratings').fetchone()[0]
+        n_rows = 0 if max_pid is None else int(max_pid) + 1
+
+        means = np.lib.format.open_memmap(
+            staging / MEANS_FILE, mode='w+', dtype=np.float32, shape=(n_rows, n_features))
+        counts = np.lib.format.open_memmap(
+            staging / COUNTS_FILE, mode='w+', dtype=np.int32, shape=(n_rows,))
+        variances = None
+        if with_variance:
+            variances = np.lib.format.open_memmap(
+                staging / VARIANCES_FILE, mode='w+', dtype=np.float32, shape=(n_rows, n_features))
+        means[:] = np.nan
+        counts[:] = 0
+        if variances is not None:
+            variances[:] = np.nan
+
+        cursor = conn.execute('SELECT pid, track_id FROM ratings ORDER BY pid')
+        carry = np.empty((0, 2), dtype=np.int64)
+        n_playlists = 0
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            done = not rows
+            chunk = np.concatenate([carry, np.array(rows, dtype=np.int64).reshape(-1, 2)])
+            if not done and len(chunk):
+                # The last pid may continue in the next chunk; hold it back
+                last = np.searchsorted(chunk[:, 0], chunk[-1, 0])
+                chunk, carry = chunk[:last], chunk[last:]
+            if len(chunk):
+                found, features = feature_store.lookup(chunk[:, 1])
+                if len(features):
+                    pids, group_counts, group_means, group_vars = _reduce_groups(
+                        chunk[found, 0], features, with_variance)
+                    means[pids] = group_means
+                    counts[pids] = group_counts
+                    if variances is not None:
+                        variances[pids] = group_vars
+                    n_playlists += len(pids)
+            if done:
+                break
+
+        for array in (means, counts, variances):
+            if array is not None:
+                array.flush()
+        del means, counts, variances
+
+        staging.chmod(0o755)
+        _swap_in(staging, output_dir)
+    except sqlite3.Error as e:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise DatabaseError(f"Failed to read ratings from {db_path}: {e}")
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    finally:
+        conn.close()
+
+    logger.info(f"Wrote features of {n_playlists} playlists to {output_dir}")
+    return output_dir
+
+
+def load_playlist_features(path: Union[str, Path], mmap: bool = True) -> PlaylistFeatures:
+    """Open matrices written by ``build_playlist_features``.
+
+    Args:
+        path: Output directory of ``build_playlist_features``
+        mmap: Memory-map read-only instead of reading into memory
+
+    Returns:
+        PlaylistFeatures
+    """
+    path = Path(path)
+    mode = 'r' if mmap else None
+    try:
+        means = np.load(path / MEANS_FILE, mmap_mode=mode, allow_pickle=False)
+        counts = np.load(path / COUNTS_FILE, mmap_mode=mode, allow_pickle=False)
+        variances = None
+        if (path / VARIANCES_FILE).exists():
+            variances = np.load(path / VARIANCES_FILE, mmap_mode=mode, allow_pickle=False)
+    except (OSError, ValueError) as e:
+        raise DatabaseError(f"Failed to load playlist features from {path}: {e}")
+    return PlaylistFeatures(means=means, counts=counts, variances=variances)
+
+
+def export_scaled_training_data(
+    features: PlaylistFeatures,
+    scaler_mean: np.ndarray,
+    scaler_scale: np.ndarray,
+    output_path: Union[str, Path],
+    pids: Optional[np.ndarray] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Path:
+    """Write the scaled training matrix (``scaled_data.csv``) chunk by chunk.
+
+    Args:
+        features: Per-playlist features
+        scaler_mean: Scaler mean of the model the data is for
+        scaler_scale: Scaler scale of the model the data is for
+        output_path: CSV file, one row per playlist in pid order
+        pids: Playlists to export, defaults to every playlist with features
+        chunk_size: Rows scaled and written at a time
+
+    Returns:
+        Path written
+    """
+    pids = features.pids if pids is None else np.asarray(pids, dtype=np.int64)
+    scale = np.where(np.asarray(scaler_scale) == 0.0, 1.0, scaler_scale)
+    output_path = Path(output_path)
+    with open(output_path, 'w') as f:
+        for start in range(0, len(pids), chunk_size):
+            X = np.asarray(features.means[pids[start:start + chunk_size]], dtype=np.float64)
+            np.savetxt(f, (X - scaler_mean) / scale, delimiter=',')
+    return output_path
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compute per-playlist feature matrices")
+    parser.add_argument("db_path", type=Path)
+    parser.add_argument("--output", type=Path, default=Path("data/playlist_features"))
+    parser.add_argument("--no-variance", action="store_true")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_RATINGS_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    print(build_playlist_features(
+        args.db_path,
+        args.output,
+        with_variance=not args.no_variance,
+        chunk_size=args.chunk_size,
+    ))
@@ -0,0 +1,222 @@
+"""Schema of the MPD ``features`` table and its migration.
+
+``features`` holds one row per track, keyed by ``track_id``, in a WITHOUT
+ROWID table: the primary-key b-tree stores every row in ``track_id`` order
+with all 13 feature columns in its leaves, so it is the covering index for
+feature reads. Looking up one track, a list of tracks or a ``track_id``
+range is an index seek, and joining ``ratings`` to ``features`` probes the
+key instead of scanning the table. A separate index over the feature
+columns would duplicate the table.
+
+``key``, ``mode``, ``duration_ms`` and ``time_signature`` are INTEGER
+columns; SQLite stores integers in 1 to 8 bytes by magnitude, so the two
+categorical columns take one byte each instead of an 8-byte REAL.
+
+Databases created before this layout (no key, REAL ``key``/``mode``, possible
+duplicate rows) are rebuilt in place by :func:`migrate_features_table`;
+:func:`ensure_features_table` creates or migrates as needed.
+"""
+
+import sqlite3
+from pathlib import Path
+from typing import Optional, Sequence
+
+import pandas as pd
+
+from ..exceptions import DatabaseError
+from ..logging_config import get_logger
+from ..ml.artifacts import FEATURE_NAMES
+
+logger = get_logger(__name__)
+
+FEATURES_TABLE = "features"
+INTEGER_FEATURES = ("key", "mode", "duration_ms", "time_signature")
+# Bound parameters per IN (...) query, below SQLite's default variable limit
+MAX_PARAMS = 900
+
+
+def features_table_sql(table: str = FEATURES_TABLE) -> str:
+    """``CREATE TABLE`` statement of the features table."""
+    columns = ",\n".join(
+        f"    {name} {'INTEGER' if name in INTEGER_FEATURES else 'REAL'}" for name in FEATURE_NAMES
+    )
+    return (
+        f"CREATE TABLE IF NOT EXISTS {table} (\n"
+        "    track_id INTEGER PRIMARY KEY NOT NULL,\n"
+        f"{columns}\n"
+        ") WITHOUT ROWID"
+    )
+
+
+FEATURES_TABLE_SQL = features_table_sql()
+
+
+def _table_sql(conn: sqlite3.Connection, table: str) -> Optional[str]:
+    row = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    ).fetchone()
+    return row[0] if row else None
+
+
+def is_current_schema(conn: sqlite3.Connection) -> bool:
+    """Whether ``features`` exists with the ``track_id``-keyed WITHOUT ROWID layout."""
+    sql = _table_sql(conn, FEATURES_TABLE)
+    if sql is None or "WITHOUT ROWID" not in sql.upper():
+        return False
+    key = [row[1] for row in conn.execute(f"PRAGMA table_info({FEATURES_TABLE})") if row[5]]
+    return key == ["track_id"]
+
+
+def migrate_features_table(conn: sqlite3.Connection) -> int:
+    """Rebuild a legacy ``features`` table in the current layout.
+
+    Rows are copied in insertion order, so when a track was appended more
+    than once its latest row wins. Rows without a ``track_id`` are dropped.
+    The copy, drop and rename run in one transaction.
+
+    Args:
+        conn: Connection to the playlists database
+
+    Returns:
+        Number of rows in the migrated table, 0 when nothing was migrated
+    """
+    if _table_sql(conn, FEATURES_TABLE) is None or is_current_schema(conn):
+        return 0
+
+    staging = f"{FEATURES_TABLE}_migrating"
+    columns = ", ".join(["track_id", *FEATURE_NAMES])
+    selected = ", ".join(
+        ["CAST(track_id AS INTEGER)"]
+        + [f"CAST(ROUND({name}) AS INTEGER)" if name in INTEGER_FEATURES else name for name in FEATURE_NAMES]
+    )
+    try:
+        # Explicit BEGIN so the DDL is part of the transaction too
+        conn.execute("BEGIN")
+        try:
+            conn.execute(f"DROP TABLE IF EXISTS {staging}")
+            conn.execute(features_table_sql(staging))
+            conn.execute(
+                f"INSERT OR REPLACE INTO {staging} ({columns}) "
+                f"SELECT {selected} FROM {FEATURES_TABLE} WHERE track_id IS NOT NULL ORDER BY rowid"
+            )
+            conn.execute(f"DROP TABLE {FEATURES_TABLE}")
+            conn.execute(f"ALTER TABLE {staging} RENAME TO {FEATURES_TABLE}")
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+        n_rows = conn.execute(f"SELECT COUNT(*) FROM {FEATURES_TABLE}").fetchone()[0]
+    except sqlite3.Error as e:
+        raise DatabaseError(f"Failed to migrate the features table: {e}")
+
+    logger.info(f"Migrated features table to the track_id-keyed layout ({n_rows} tracks)")
+    return n_rows
+
+
+def ensure_features_table(conn: sqlite3.Connection) -> None:
+    """Create the ``features`` table, or migrate a legacy one to the current layout."""
+    if _table_sql(conn, FEATURES_TABLE) is None:
+        try:
+            conn.execute(FEATURES_TABLE_SQL)
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Failed to create the features table: {e}")
+    else:
+        migrate_features_table(conn)
+
+
+def write_features(conn: sqlite3.Connection, features_df: pd.DataFrame) -> int:
+    """Insert or replace feature rows.
+
+    Args:
+        conn: Connection to the playlists database
+        features_df: Frame with a ``track_id`` column and one column per feature
+
+    Returns:
+        Number of rows written
+    """
+    columns = ["track_id", *FEATURE_NAMES]
+    placeholders = ", ".join("?" * len(columns))
+    try:
+        with conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO {FEATURES_TABLE} ({', '.join(columns)}) VALUES ({placeholders})",
+                features_df[columns].itertuples(index=False, name=None)
+            )
+    except sqlite3.Error as e:
+        raise DatabaseError(f"Failed to write features: {e}")
+    return len(features_df)
+
+
+def read_features(
+    conn: sqlite3.Connection,
+    track_ids: Sequence[int],
+    feature_names: Sequence[str] = FEATURE_NAMES
+) -> pd.DataFrame:
+    """Feature rows of the given tracks, one primary-key seek per track.
+
+    Args:
+        conn: Connection to the playlists database
+        track_ids: Track IDs; unknown IDs are skipped
+        feature_names: Feature columns to return
+
+    Returns:
+        Frame with ``track_id`` and the feature columns, in ``track_id`` order
+    """
+    columns = ", ".join(["track_id", *feature_names])
+    track_ids = sorted({int(track_id) for track_id in track_ids})
+    frames = []
+    try:
+        for start in range(0, len(track_ids), MAX_PARAMS):
+            chunk = track_ids[start:start + MAX_PARAMS]
+            frames.append(pd.read_sql(
+                f"SELECT {columns} FROM {FEATURES_TABLE} WHERE track_id IN ({', '.join('?' * len(chunk))}) "
+                "ORDER BY track_id",
+                conn, params=chunk
+            ))
+    except (sqlite3.Error, pd.errors.DatabaseError) as e:
+        raise DatabaseError(f"Failed to read features: {e}")
+    if not frames:
+        return pd.DataFrame(columns=["track_id", *feature_names])
+    return pd.concat(frames, ignore_index=True)
+
+
+def read_feature_range(
+    conn: sqlite3.Connection,
+    first_track_id: int,
+    last_track_id: int,
+    feature_names: Sequence[str] = FEATURE_NAMES
+) -> pd.DataFrame:
+    """Feature rows with ``first_track_id <= track_id <= last_track_id``, read as one key-range seek.
+
+    Args:
+        conn: Connection to the playlists database
+        first_track_id: First track ID, inclusive
+        last_track_id: Last track ID, inclusive
+        feature_names: Feature columns to return
+
+    Returns:
+        Frame with ``track_id`` and the feature columns, in ``track_id`` order
+    """
+    columns = ", ".join(["track_id", *feature_names])
+    try:
+        return pd.read_sql(
+            f"SELECT {columns} FROM {FEATURES_TABLE} WHERE track_id BETWEEN ? AND ? ORDER BY track_id",
+            conn, params=(int(first_track_id), int(last_track_id))
+        )
+    except (sqlite3.Error, pd.errors.DatabaseError) as e:
+        raise DatabaseError(f"Failed to read features: {e}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Migrate an MPD database's features table to the keyed layout")
+    parser.add_argument("--db", type=Path, default=Path("data/spotify_million_playlists.db"))
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(str(args.db))
+    try:
+        migrated = migrate_features_table(conn)
+    finally:
+        conn.close()
+    print(f"Migrated {migrated} tracks" if migrated else "features table already up to date")
@@ -0,0 +1,24 @@
+"""Text normalization shared by the MPD reader and the search indexes."""
+
+import re
+
+_PUNCTUATION = re.compile(r"[.,\/#!$%\^\*;:{}=\_`~()@]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_name(name: str) -> str:
+    """Normalize a playlist or track name for matching.
+
+    Lowercases, replaces punctuation with spaces and collapses whitespace,
+    the same normalization the MPD challenge uses for playlist titles.
+
+    Args:
+        name: Raw name
+
+    Returns:
+        Normalized name
+    """
+    name = name.lower()
+    name = _PUNCTUATION.sub(" ", name)
+    name = _WHITESPACE.sub(" ", name).strip()
+    return name
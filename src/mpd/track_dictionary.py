@@ -0,0 +1,247 @@
+"""Track URI <-> dense track ID dictionary.
+
+Every MPD track gets a dense integer ``track_id`` the first time its URI is
+ingested. ``TrackDictionary`` keeps the whole mapping in memory: a hash map
+from URI to ID and a list from ID to URI, loaded once from a keyed
+``track_dictionary`` table in the playlists database. Newly seen URIs are
+assigned in one bulk :meth:`~TrackDictionary.get_or_create` call, which
+commits them to the table before they are returned, so reprocessing a file
+maps every URI to the ID it got the first time.
+
+ID assignment has a single writer. Parallel ingest workers share the
+dictionary of one owner process started with :func:`start_track_dictionary_owner`
+and reach it through :func:`connect_track_dictionary`; calls are serialized
+in the owner, so two workers never assign the same ID or give one URI two IDs.
+
+Serving code builds a read-only dictionary from the tracks it already loaded
+with :meth:`TrackDictionary.from_tracks`.
+"""
+
+import sqlite3
+import threading
+from multiprocessing.managers import BaseManager
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from ..exceptions import DatabaseError
+from ..logging_config import get_logger
+
+logger = get_logger(__name__)
+
+DICTIONARY_TABLE = "track_dictionary"
+MISSING_ID = -1
+
+
+class TrackDictionary:
+    """In-memory URI <-> track ID mapping, optionally persisted in SQLite."""
+
+    def __init__(self, db_path: Optional[Union[str, Path]] = None):
+        """Open the dictionary of a playlists database.
+
+        The ``track_dictionary`` table is created when missing and, on first
+        use, filled from the existing ``tracks`` table.
+
+        Args:
+            db_path: Playlists SQLite database; None keeps the dictionary in memory only
+        """
+        self.db_path = Path(db_path) if db_path is not None else None
+        self._lock = threading.Lock()
+        self._ids: Dict[str, int] = {}
+        self._uris: List[Optional[str]] = [None]
+        self._conn = None
+        if self.db_path is not None:
+            self._open()
+
+    def _open(self) -> None:
+        try:
+            self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=30)
+            with self._conn:
+                # Keyed by ID so every ID a legacy tracks table gave a repeated URI stays reserved
+                self._conn.execute(f"""
+                    CREATE TABLE IF NOT EXISTS {DICTIONARY_TABLE} (
+                        track_id INTEGER PRIMARY KEY NOT NULL,
+                        track_uri TEXT NOT NULL
+                    )
+                """)
+                self._conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS {DICTIONARY_TABLE}_uri ON {DICTIONARY_TABLE} (track_uri)"
+                )
+                empty = self._conn.execute(f"SELECT 1 FROM {DICTIONARY_TABLE} LIMIT 1").fetchone() is None
+                has_tracks = self._conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tracks'"
+                ).fetchone() is not None
+                if empty and has_tracks:
+                    self._conn.execute(
+                        f"INSERT OR IGNORE INTO {DICTIONARY_TABLE} (track_id, track_uri) "
+                        "SELECT track_id, track_uri FROM tracks"
+                    )
+            rows = self._conn.execute(f"SELECT track_uri, track_id FROM {DICTIONARY_TABLE}").fetchall()
+            # Rows written to tracks outside the dictionary must not have their IDs reassigned either
+            max_tracks_id = 0
+            if has_tracks:
+                max_tracks_id = self._conn.execute("SELECT MAX(track_id) FROM tracks").fetchone()[0] or 0
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Failed to open track dictionary in {self.db_path}: {e}")
+
+        self._load(rows)
+        self._reserve(max_tracks_id)
+        logger.info(f"Loaded {len(self)} track IDs from {self.db_path}")
+
+    def _load(self, pairs: Iterable[Tuple[str, int]]) -> None:
+        pairs = list(pairs)
+        size = max((int(track_id) for _, track_id in pairs), default=0) + 1
+        self._uris = [None] * size
+        for uri, track_id in pairs:
+            track_id = int(track_id)
+            # Legacy tracks tables may repeat a URI under several IDs; the smallest is its ID,
+            # the others still translate back to it
+            if track_id < self._ids.get(uri, size):
+                self._ids[uri] = track_id
+            self._uris[track_id] = uri
+
+    def _reserve(self, max_track_id: int) -> None:
+        """Make sure new IDs are assigned above ``max_track_id``."""
+        if max_track_id > self.max_track_id:
+            self._uris.extend([None] * (max_track_id - self.max_track_id))
+
+    @classmethod
+    def from_tracks(cls, track_uris: Sequence[str], track_ids: Sequence[int]) -> "TrackDictionary":
+        """Build an in-memory dictionary from parallel URI and ID columns, e.g. of the tracks table."""
+        dictionary = cls()
+        dictionary._load(zip(track_uris, track_ids))
+        return dictionary
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, uri: str) -> bool:
+        return uri in self._ids
+
+    @property
+    def max_track_id(self) -> int:
+        return len(self._uris) - 1
+
+    def get(self, uri: str) -> Optional[int]:
+        """Track ID of a URI, None when unknown."""
+        return self._ids.get(uri)
+
+    def uri(self, track_id: Optional[int]) -> Optional[str]:
+        """URI of a track ID, None when unknown."""
+        if track_id is None or not 0 <= track_id < len(self._uris):
+            return None
+        return self._uris[track_id]
+
+    def ids(self, uris: Iterable[str]) -> np.ndarray:
+        """Track IDs of many URIs, ``MISSING_ID`` for unknown ones.
+
+        Returns:
+            Track IDs, shape (n,)
+        """
+        get = self._ids.get
+        return np.fromiter((get(uri, MISSING_ID) for uri in uris), dtype=np.int64)
+
+    def uris(self, track_ids: Iterable[int]) -> List[Optional[str]]:
+        """URIs of many track IDs, None for unknown ones."""
+        return [self.uri(int(track_id)) for track_id in track_ids]
+
+    def get_or_create(self, uris: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Track IDs of many URIs, assigning the next dense IDs to unseen ones.
+
+        New URIs get IDs in order of first appearance in ``uris``. They are
+        committed to the database before this returns; when the write fails
+        nothing is assigned.
+
+        Args:
+            uris: Track URIs, duplicates allowed
+
+        Returns:
+            Tuple of (track IDs, shape (n,); mask of the first row of each newly assigned URI, shape (n,))
+        """
+        with self._lock:
+            ids = np.empty(len(uris), dtype=np.int64)
+            created = np.zeros(len(uris), dtype=bool)
+            new: Dict[str, int] = {}
+            next_id = self.max_track_id + 1
+            for i, uri in enumerate(uris):
+                track_id = self._ids.get(uri)
+                if track_id is None:
+                    track_id = new.get(uri)
+                    if track_id is None:
+                        track_id = new[uri] = next_id
+                        next_id += 1
+                        created[i] = True
+                ids[i] = track_id
+
+            if new and self._conn is not None:
+                try:
+                    with self._conn:
+                        self._conn.executemany(
+                            f"INSERT INTO {DICTIONARY_TABLE} (track_uri, track_id) VALUES (?, ?)", new.items()
+                        )
+                except sqlite3.Error as e:
+                    raise DatabaseError(f"Failed to assign {len(new)} track IDs: {e}")
+            self._ids.update(new)
+            self._uris.extend(new)
+        return ids, created
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class TrackDictionaryManager(BaseManager):
+    """Owner process of a shared :class:`TrackDictionary`."""
+
+
+_shared_dictionary: Optional[TrackDictionary] = None
+
+
+def _open_shared_dictionary(db_path: str) -> None:
+    global _shared_dictionary
+    _shared_dictionary = TrackDictionary(db_path)
+
+
+def _shared() -> Optional[TrackDictionary]:
+    return _shared_dictionary
+
+
+TrackDictionaryManager.register(
+    "track_dictionary",
+    callable=_shared,
+    exposed=("get", "uri", "ids", "uris", "get_or_create", "__len__", "__contains__"),
+)
+
+
+def start_track_dictionary_owner(
+    db_path: Union[str, Path],
+    address: Tuple[str, int] = ("127.0.0.1", 0),
+    authkey: Optional[bytes] = None
+) -> TrackDictionaryManager:
+    """Start the process owning the dictionary of a playlists database.
+
+    Args:
+        db_path: Playlists SQLite database
+        address: Address to listen on; port 0 picks a free port
+        authkey: Key workers authenticate with, defaults to this process's authkey
+
+    Returns:
+        Started manager; pass ``manager.address`` to the workers and call ``shutdown()`` when done
+    """
+    manager = TrackDictionaryManager(address=address, authkey=authkey)
+    manager.start(_open_shared_dictionary, (str(db_path),))
+    logger.info(f"Track dictionary owner for {db_path} listening on {manager.address}")
+    return manager
+
+
+def connect_track_dictionary(address: Tuple[str, int], authkey: Optional[bytes] = None):
+    """Proxy to the dictionary of an owner process.
+
+    The proxy exposes ``get``, ``uri``, ``ids``, ``uris`` and ``get_or_create``.
+    """
+    manager = TrackDictionaryManager(address=address, authkey=authkey)
+    manager.connect()
+    return manager.track_dictionary()
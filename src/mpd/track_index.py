@@ -0,0 +1,364 @@
+"""Prebuilt search index over MPD track names.
+
+Song-name lookups used to lowercase the whole ``tracks.track_name`` column on
+every query. ``TrackNameIndex`` normalizes every name once with
+``normalize_name`` and keeps:
+
+* the normalized names sorted (ties broken by popularity), so exact and
+  prefix matches are a binary search plus a top-k over the matching range;
+* a trigram inverted index in CSR form for fuzzy matching, scored with the
+  Dice coefficient over trigram sets.
+
+Popularity is the number of playlists a track appears in. The index is saved
+as a single ``.npz`` file next to the playlists database and loads without
+pickle.
+"""
+
+import sqlite3
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+
+from ..exceptions import DatabaseError
+from ..logging_config import get_logger
+from .text import normalize_name
+
+logger = get_logger(__name__)
+
+INDEX_FORMAT_VERSION = 1
+INDEX_SUFFIX = ".track_names.npz"
+
+DEFAULT_LIMIT = 10
+DEFAULT_MIN_SIMILARITY = 0.4
+# Trigrams present in more names than this fraction are skipped when others remain
+MAX_GRAM_FREQUENCY = 0.05
+
+_SEPARATOR = "\n"
+_PREFIX_END = "\U0010ffff"
+
+
+@dataclass
+class TrackMatch:
+    """A track returned by a name lookup."""
+
+    track_id: int
+    name: str
+    popularity: int
+    score: float = 1.0
+
+
+def trigrams(normalized: str) -> List[str]:
+    """Distinct trigrams of a normalized name, padded so short names still match."""
+    padded = f"  {normalized} "
+    return sorted({padded[i:i + 3] for i in range(len(padded) - 2)})
+
+
+def default_index_path(db_path: Union[str, Path]) -> Path:
+    """Location of the index persisted alongside a playlists database."""
+    db_path = Path(db_path)
+    return db_path.with_name(db_path.stem + INDEX_SUFFIX)
+
+
+def _join(strings: Sequence[str]) -> np.ndarray:
+    return np.frombuffer(_SEPARATOR.join(strings).encode("utf-8"), dtype=np.uint8)
+
+
+def _split(blob: np.ndarray, count: int) -> List[str]:
+    if count == 0:
+        return []
+    return blob.tobytes().decode("utf-8").split(_SEPARATOR)
+
+
+class TrackNameIndex:
+    """Exact, prefix and fuzzy track-name lookup ranked by playlist popularity."""
+
+    def __init__(
+        self,
+        track_ids: Iterable[int],
+        names: Iterable[str],
+        popularity: Optional[Iterable[int]] = None
+    ):
+        """Normalize, sort and trigram-index the given tracks.
+
+        Args:
+            track_ids: Track IDs
+            names: Track names, aligned with ``track_ids``
+            popularity: Number of playlists containing each track, defaults to 0
+        """
+        track_ids = np.asarray(list(track_ids), dtype=np.int64)
+        names = [" ".join(str(name).split()) for name in names]
+        if popularity is None:
+            popularity = np.zeros(len(track_ids), dtype=np.int64)
+        popularity = np.asarray(list(popularity), dtype=np.int64)
+        if not len(track_ids) == len(names) == len(popularity):
+            raise ValueError("track_ids, names and popularity must be aligned")
+
+        normalized = [normalize_name(name) for name in names]
+        order = sorted(range(len(names)), key=lambda i: (normalized[i], -popularity[i]))
+
+        self.keys = [normalized[i] for i in order]
+        self.names = [names[i] for i in order]
+        self.track_ids = track_ids[order]
+        self.popularity = popularity[order]
+
+        postings: Dict[str, List[int]] = defaultdict(list)
+        gram_counts = np.empty(len(self.keys), dtype=np.int32)
+        for position, key in enumerate(self.keys):
+            grams = trigrams(key)
+            gram_counts[position] = len(grams)
+            for gram in grams:
+                postings[gram].append(position)
+
+        grams = sorted(postings)
+        offsets = np.zeros(len(grams) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(postings[gram]) for gram in grams])
+        flat = np.empty(offsets[-1], dtype=np.int32)
+        for i, gram in enumerate(grams):
+            flat[offsets[i]:offsets[i + 1]] = postings[gram]
+
+        self._set_grams(grams, offsets, flat, gram_counts)
+
+    def _set_grams(
+        self,
+        grams: List[str],
+        offsets: np.ndarray,
+        postings: np.ndarray,
+        gram_counts: np.ndarray
+    ) -> None:
+        self.grams = grams
+        self.gram_offsets = offsets
+        self.postings = postings
+        self.gram_counts = gram_counts
+        self._gram_slots = {gram: i for i, gram in enumerate(grams)}
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @classmethod
+    def from_database(cls, db_path: Union[str, Path]) -> "TrackNameIndex":
+        """Build the index from the ``tracks`` and ``ratings`` tables of an MPD database.
+
+        Args:
+            db_path: Path to the playlists SQLite database
+
+        Returns:
+            Built index
+        """
+        conn = sqlite3.connect(str(db_path))
+        try:
+            rows = conn.execute(
+                "SELECT t.track_id, t.track_name, COUNT(r.pid) "
+                "FROM tracks t LEFT JOIN ratings r ON r.track_id = t.track_id "
+                "GROUP BY t.track_id"
+            ).fetchall()
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Failed to read tracks from {db_path}: {e}")
+        finally:
+            conn.close()
+
+        track_ids, names, popularity = zip(*rows) if rows else ((), (), ())
+        logger.info(f"Indexing {len(track_ids)} track names from {db_path}")
+        return cls(track_ids, names, popularity)
+
+    def save(self, path: Union[str, Path]) -> Path:
+        """Write the index to a single ``.npz`` file.
+
+        Args:
+            path: Output file
+
+        Returns:
+            Path written
+        """
+        path = Path(path)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                format_version=np.array(INDEX_FORMAT_VERSION),
+                keys=_join(self.keys),
+                names=_join(self.names),
+                track_ids=self.track_ids,
+                popularity=self.popularity,
+                grams=_join(self.grams),
+                gram_offsets=self.gram_offsets,
+                postings=self.postings,
+                gram_counts=self.gram_counts,
+            )
+        tmp_path.replace(path)
+        logger.info(f"Saved track name index with {len(self)} tracks to {path}")
+        return path
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "TrackNameIndex":
+        """Load an index written by ``save``.
+
+        Args:
+            path: Index file
+
+        Returns:
+            Loaded index
+        """
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                version = int(data["format_version"])
+                if version != INDEX_FORMAT_VERSION:
+                    raise DatabaseError(
+                        f"Unsupported track name index version {version} in {path}"
+                    )
+                index = cls.__new__(cls)
+                index.track_ids = data["track_ids"]
+                index.keys = _split(data["keys"], len(index.track_ids))
+                index.names = _split(data["names"], len(index.track_ids))
+                index.popularity = data["popularity"]
+                index._set_grams(
+                    _split(data["grams"], len(data["gram_offsets"]) - 1),
+                    data["gram_offsets"],
+                    data["postings"],
+                    data["gram_counts"],
+                )
+        except (OSError, KeyError, ValueError) as e:
+            raise DatabaseError(f"Failed to load track name index {path}: {e}")
+        return index
+
+    def _matches(self, positions: np.ndarray, scores: Optional[np.ndarray] = None) -> List[TrackMatch]:
+        return [
+            TrackMatch(
+                track_id=int(self.track_ids[p]),
+                name=self.names[p],
+                popularity=int(self.popularity[p]),
+                score=1.0 if scores is None else float(scores[i]),
+            )
+            for i, p in enumerate(positions)
+        ]
+
+    def _top_by_popularity(self, lo: int, hi: int, limit: int) -> np.ndarray:
+        """Positions in ``[lo, hi)`` with the highest popularity, most popular first."""
+        popularity = self.popularity[lo:hi]
+        if len(popularity) > limit:
+            candidates = np.argpartition(-popularity, limit - 1)[:limit]
+        else:
+            candidates = np.arange(len(popularity))
+        # Stable sort keeps name order among equally popular tracks
+        candidates = candidates[np.argsort(-popularity[candidates], kind="stable")]
+        return candidates + lo
+
+    def exact(self, name: str, limit: int = DEFAULT_LIMIT) -> List[TrackMatch]:
+        """Tracks whose normalized name equals the normalized query."""
+        key = normalize_name(name)
+        lo = bisect_left(self.keys, key)
+        hi = bisect_right(self.keys, key, lo)
+        # Equal names are already sorted by descending popularity
+        return self._matches(np.arange(lo, min(hi, lo + limit)))
+
+    def prefix(self, prefix: str, limit: int = DEFAULT_LIMIT) -> List[TrackMatch]:
+        """Most popular tracks whose normalized name starts with the query, for autocomplete."""
+        key = normalize_name(prefix)
+        if not key:
+            return []
+        lo = bisect_left(self.keys, key)
+        hi = bisect_left(self.keys, key + _PREFIX_END, lo)
+        return self._matches(self._top_by_popularity(lo, hi, limit))
+
+    def fuzzy(
+        self,
+        query: str,
+        limit: int = DEFAULT_LIMIT,
+        min_similarity: float = DEFAULT_MIN_SIMILARITY
+    ) -> List[TrackMatch]:
+        """Tracks whose names share enough trigrams with the query.
+
+        Args:
+            query: Free-text track name
+            limit: Maximum number of matches
+            min_similarity: Minimum Dice similarity between trigram sets
+
+        Returns:
+            Matches ordered by similarity, then popularity
+        """
+        key = normalize_name(query)
+        if not key or not len(self):
+            return []
+        query_grams = trigrams(key)
+
+        lists = []
+        for gram in query_grams:
+            slot = self._gram_slots.get(gram)
+            if slot is not None:
+                lists.append(self.postings[self.gram_offsets[slot]:self.gram_offsets[slot + 1]])
+        if not lists:
+            return []
+        # Very common trigrams add little signal but dominate the work
+        max_postings = max(1, int(MAX_GRAM_FREQUENCY * len(self)))
+        selective = [postings for postings in lists if len(postings) <= max_postings]
+        if selective:
+            lists = selective
+
+        candidates, hits = np.unique(np.concatenate(lists), return_counts=True)
+        scores = 2.0 * hits / (len(query_grams) + self.gram_counts[candidates])
+        keep = scores >= min_similarity
+        candidates, scores = candidates[keep], scores[keep]
+
+        order = np.lexsort((-self.popularity[candidates], -scores))[:limit]
+        return self._matches(candidates[order], scores[order])
+
+    def search(self, query: str, limit: int = DEFAULT_LIMIT) -> List[TrackMatch]:
+        """Exact matches first, then prefix matches, falling back to fuzzy matching."""
+        matches = self.exact(query, limit)
+        if len(matches) < limit:
+            seen = {match.track_id for match in matches}
+            matches += [
+                match for match in self.prefix(query, limit)
+                if match.track_id not in seen
+            ][:limit - len(matches)]
+        if not matches:
+            matches = self.fuzzy(query, limit)
+        return matches
+
+    def lookup(self, name: str) -> Optional[int]:
+        """Track ID of the most popular track with exactly this (normalized) name."""
+        matches = self.exact(name, limit=1)
+        return matches[0].track_id if matches else None
+
+
+def load_or_build_index(
+    db_path: Union[str, Path],
+    index_path: Optional[Union[str, Path]] = None
+) -> TrackNameIndex:
+    """Load the persisted index for a database, rebuilding it when missing or stale.
+
+    Args:
+        db_path: Path to the playlists SQLite database
+        index_path: Index file, defaults to one next to the database
+
+    Returns:
+        Track name index
+    """
+    index_path = Path(index_path) if index_path else default_index_path(db_path)
+    if index_path.exists() and index_path.stat().st_mtime >= Path(db_path).stat().st_mtime:
+        try:
+            return TrackNameIndex.load(index_path)
+        except DatabaseError as e:
+            logger.warning(f"Rebuilding track name index: {e}")
+
+    index = TrackNameIndex.from_database(db_path)
+    try:
+        index.save(index_path)
+    except OSError as e:
+        logger.warning(f"Could not persist track name index to {index_path}: {e}")
+    return index
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build the track name search index")
+    parser.add_argument("db_path", type=Path)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+
+    index = TrackNameIndex.from_database(args.db_path)
+    print(index.save(args.output or default_index_path(args.db_path)))
@@ -3,8 +3,7 @@
 import asyncio
 import pickle
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Tuple
-import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
@@ -15,11 +14,26 @@ from sklearn.metrics.pairwise import cosine_similarity
 
 from .exceptions import ModelLoadError, PlaylistGenerationError
 from .data_models import Track, AudioFeatures, RecommendationResult, User
-from .core.spotify import SpotifyClient
+from .core.spotify import SpotifyClient, SpotifyTrack
+from .ml import (
+    FEATURE_NAMES,
+    ModelArtifacts,
+    InferenceKernel,
+    ModelHandle,
+    ModelRegistry,
+)
 from .logging_config import get_logger
+from .metrics import Trace, metrics
 
 logger = get_logger(__name__)
 
+# Feature spaces each algorithm scores in; hybrid needs both
+ALGORITHM_FEATURE_SPACES = {
+    "similarity": ("similarity",),
+    "clustering": ("model",),
+    "hybrid": ("similarity", "model"),
+}
+
 
 class RecommendationEngine:
     """Modernized recommendation engine with multiple algorithms."""
@@ -28,7 +42,8 @@ class RecommendationEngine:
         self,
         spotify_client: SpotifyClient,
         model_dir: Path = Path("model"),
-        cache_dir: Path = Path("cache/recommendations")
+        cache_dir: Path = Path("cache/recommendations"),
+        model_registry: Optional[ModelRegistry] = None
     ):
         """Initialize recommendation engine.
         
@@ -36,6 +51,9 @@ class RecommendationEngine:
             spotify_client: Spotify client instance
             model_dir: Directory containing ML models
             cache_dir: Directory for caching recommendations
+            model_registry: Registry serving the active model version; one over
+                ``model_dir/artifacts`` is created when omitted. Start it to
+                hot-reload new versions.
         """
         self.spotify_client = spotify_client
         self.model_dir = model_dir
@@ -44,14 +62,78 @@ class RecommendationEngine:
         # Create cache directory
         self.cache_dir.mkdir(parents=True, exist_ok=True)
         
-        # Load ML models
-        self.kmeans_model = self._load_kmeans_model()
-        self.scaler = self._load_scaler()
-        self.tsne_transformer = self._load_tsne_transformer()
-        
-        # Feature cache for performance
+        # Load ML models, preferring the memory-mapped artifact format over pickles
+        if model_registry is None:
+            model_registry = ModelRegistry(self.model_dir / "artifacts")
+            model_registry.refresh()
+        self.model_registry = model_registry
+        self._fallback_model: Optional[ModelHandle] = None
+        if self.model_registry.current is None:
+            logger.warning("Model artifacts not found, falling back to pickled models")
+            self._fallback_model = self._load_pickled_model()
+        
+        # Feature caches for performance
         self._feature_cache: Dict[str, np.ndarray] = {}
+        self._model_feature_cache: Dict[str, np.ndarray] = {}
+    
+    @property
+    def model(self) -> Optional[ModelHandle]:
+        """Active model version; read once per request so a hot swap can't mix versions."""
+        return self.model_registry.current or self._fallback_model
+    
+    @property
+    def model_version(self) -> Optional[str]:
+        model = self.model
+        return model.version if model is not None else None
+    
+    @property
+    def artifacts(self) -> Optional[ModelArtifacts]:
+        model = self.model
+        return model.artifacts if model is not None else None
+    
+    @property
+    def inference_kernel(self) -> Optional[InferenceKernel]:
+        model = self.model
+        return model.inference_kernel if model is not None else None
+    
+    @property
+    def kmeans_model(self) -> Any:
+        model = self.model
+        return model.kmeans_model if model is not None else None
+    
+    @property
+    def scaler(self) -> Any:
+        model = self.model
+        return model.scaler if model is not None else None
+    
+    @property
+    def tsne_transformer(self) -> Optional[Any]:
+        model = self.model
+        return model.tsne_transformer if model is not None else None
+    
+    def _load_pickled_model(self) -> Optional[ModelHandle]:
+        """Load the legacy pickled models as a fixed model version.
         
+        Returns:
+            ModelHandle or None if neither model is present
+        """
+        kmeans_model = self._load_kmeans_model()
+        scaler = self._load_scaler()
+        if kmeans_model is None and scaler is None:
+            return None
+        inference_kernel = None
+        if kmeans_model is not None and scaler is not None:
+            inference_kernel = InferenceKernel(
+                scaler.mean_, scaler.scale_, kmeans_model.cluster_centers_
+            )
+        return ModelHandle(
+            version="pickle",
+            inference_kernel=inference_kernel,
+            kmeans_model=kmeans_model,
+            scaler=scaler,
+            tsne_transformer=self._load_tsne_transformer()
+        )
+    
     def _load_kmeans_model(self) -> Optional[KMeans]:
         """Load K-means clustering model.
         
@@ -142,6 +224,38 @@ class RecommendationEngine:
         
         return features
     
+    def _extract_model_features(self, audio_features: AudioFeatures) -> np.ndarray:
+        """Extract raw feature vector in the column order the models were trained on.
+        
+        Args:
+            audio_features: AudioFeatures object
+            
+        Returns:
+            Unscaled feature vector of length ``len(FEATURE_NAMES)``
+        """
+        return np.array(
+            [getattr(audio_features, name) for name in FEATURE_NAMES], dtype=np.float64
+        )
+    
+    @staticmethod
+    def _to_track(spotify_track: SpotifyTrack) -> Track:
+        """Convert hydrated Spotify metadata to the domain Track model.
+        
+        Args:
+            spotify_track: Track returned by the Spotify client
+            
+        Returns:
+            Track object
+        """
+        return Track(
+            track_uri=spotify_track.uri,
+            track_name=spotify_track.name,
+            artist_name=spotify_track.artist,
+            artist_uri=spotify_track.artist_uri or "",
+            album_uri=spotify_track.album_uri or "",
+            album_name=spotify_track.album
+        )
+    
     def _get_cached_features(self, track_uri: str) -> Optional[np.ndarray]:
         """Get cached feature vector for a track.
         
@@ -162,6 +276,65 @@ class RecommendationEngine:
         """
         self._feature_cache[track_uri] = features
     
+    def _feature_space(self, space: str) -> Tuple[Dict[str, np.ndarray], Callable[[AudioFeatures], np.ndarray]]:
+        """Vector cache and extractor of a feature space.
+        
+        Args:
+            space: "similarity" (normalized vectors) or "model" (model column order)
+            
+        Returns:
+            (cache, extractor) pair
+        """
+        if space == "similarity":
+            return self._feature_cache, self._extract_feature_vector
+        return self._model_feature_cache, self._extract_model_features
+    
+    async def _get_candidate_vectors(
+        self,
+        candidate_tracks: List[str],
+        spaces: Tuple[str, ...]
+    ) -> Dict[str, Tuple[np.ndarray, List[str]]]:
+        """Get candidate feature matrices in one or more feature spaces.
+        
+        Candidates missing from any requested cache are fetched with a single
+        batched client call and cached in every requested space, so the hybrid
+        branches never fetch the same track twice.
+        
+        Args:
+            candidate_tracks: Candidate track URIs
+            spaces: Feature spaces to build (see :meth:`_feature_space`)
+            
+        Returns:
+            Mapping of space to (feature matrix, URIs of its rows); candidates
+            without audio features are left out
+        """
+        caches = {space: self._feature_space(space) for space in spaces}
+        unique_tracks = list(dict.fromkeys(candidate_tracks))
+        missing = [
+            uri for uri in unique_tracks
+            if any(uri not in cache for cache, _ in caches.values())
+        ]
+        metrics.inc("cache_requests_total", len(unique_tracks) - len(missing), cache="engine_features", result="hit")
+        metrics.inc("cache_requests_total", len(missing), cache="engine_features", result="miss")
+        
+        if missing:
+            features_list = await self.spotify_client.get_audio_features_batch(missing)
+            n_without_features = 0
+            for track_uri, features in zip(missing, features_list):
+                if features is None:
+                    n_without_features += 1
+                    continue
+                for cache, extract in caches.values():
+                    cache[track_uri] = extract(features)
+            if n_without_features:
+                logger.warning(f"No audio features for {n_without_features} of {len(missing)} candidate tracks")
+        
+        vectors = {}
+        for space, (cache, _) in caches.items():
+            valid_candidates = [uri for uri in candidate_tracks if uri in cache]
+            vectors[space] = (np.array([cache[uri] for uri in valid_candidates]), valid_candidates)
+        return vectors
+    
     async def get_user_preference_vector(self, user: User) -> np.ndarray:
         """Generate preference vector based on user's liked tracks.
         
@@ -171,47 +344,37 @@ class RecommendationEngine:
         Returns:
             User preference vector
         """
-        # Combine all positive feedback tracks
-        positive_tracks = (
-            user.loved_it + user.like_it + user.okay + user.recently_searched
+        # Combine all positive feedback tracks with their preference strength
+        weighted_tracks = (
+            [(track, 1.0) for track in user.loved_it]
+            + [(track, 0.7) for track in user.like_it]
+            + [(track, 0.4) for track in user.okay]
+            + [(track, 0.3) for track in user.recently_searched]
         )
         
-        if not positive_tracks:
+        if not weighted_tracks:
             # Return neutral vector if no preferences
-            return np.zeros(12)
+            return np.zeros(len(FEATURE_NAMES))
         
-        # Get audio features for all tracks
+        # Get audio features for all tracks in one batched call
         try:
-            audio_features_list = await self.spotify_client.get_multiple_track_features(
-                positive_tracks
+            audio_features_list = await self.spotify_client.get_audio_features_batch(
+                [track for track, _ in weighted_tracks]
             )
             
-            # Extract feature vectors
+            # Extract feature vectors, keeping each weight with its track
             feature_vectors = []
-            for features in audio_features_list:
-                vector = self._extract_feature_vector(features)
-                feature_vectors.append(vector)
+            weights = []
+            for (_, weight), features in zip(weighted_tracks, audio_features_list):
+                if features is not None:
+                    feature_vectors.append(self._extract_model_features(features))
+                    weights.append(weight)
             
             if not feature_vectors:
-                return np.zeros(12)
+                return np.zeros(len(FEATURE_NAMES))
             
             # Calculate weighted average based on preference strength
-            weights = []
-            for track in positive_tracks:
-                if track in user.loved_it:
-                    weights.append(1.0)
-                elif track in user.like_it:
-                    weights.append(0.7)
-                elif track in user.okay:
-                    weights.append(0.4)
-                else:  # recently_searched
-                    weights.append(0.3)
-            
-            # Calculate weighted average
-            feature_matrix = np.array(feature_vectors)
-            weight_array = np.array(weights).reshape(-1, 1)
-            
-            preference_vector = np.average(feature_matrix, axis=0, weights=weights.flatten())
+            preference_vector = np.average(np.array(feature_vectors), axis=0, weights=weights)
             
             logger.info(f"Generated preference vector for user {user.username}")
             return preference_vector
@@ -220,6 +383,96 @@ class RecommendationEngine:
             logger.error(f"Failed to generate preference vector: {e}")
             raise PlaylistGenerationError(f"Failed to generate preference vector: {e}")
     
+    def _rank_similar(
+        self,
+        seed_vector: np.ndarray,
+        candidate_matrix: np.ndarray,
+        valid_candidates: List[str],
+        n_recommendations: int
+    ) -> List[Tuple[str, float]]:
+        """Rank candidates by cosine similarity to a seed vector (CPU only).
+        
+        Args:
+            seed_vector: Seed track vector in the similarity space
+            candidate_matrix: Candidate vectors, one row per candidate
+            valid_candidates: URIs of the candidate rows
+            n_recommendations: Number of recommendations to return
+            
+        Returns:
+            List of (track_uri, similarity_score) tuples
+        """
+        with metrics.stage("similarity"):
+            # Use cosine similarity
+            similarities = cosine_similarity(seed_vector.reshape(1, -1), candidate_matrix)[0]
+        
+        with metrics.stage("rank_similarity"):
+            # Get top recommendations
+            top_indices = np.argsort(similarities)[::-1][:n_recommendations]
+            
+            recommendations = []
+            for idx in top_indices:
+                if similarities[idx] > 0.1:  # Minimum similarity threshold
+                    recommendations.append((valid_candidates[idx], similarities[idx]))
+        
+        return recommendations
+    
+    def _rank_by_cluster(
+        self,
+        kernel: InferenceKernel,
+        user_preference_vector: np.ndarray,
+        candidate_matrix: np.ndarray,
+        valid_candidates: List[str],
+        n_recommendations: int
+    ) -> List[Tuple[str, float]]:
+        """Rank candidates in the user's cluster by distance to the user (CPU only).
+        
+        Args:
+            kernel: Inference kernel of the model version serving the request
+            user_preference_vector: User's preference vector in model space
+            candidate_matrix: Unscaled candidate vectors, one row per candidate
+            valid_candidates: URIs of the candidate rows
+            n_recommendations: Number of recommendations to return
+            
+        Returns:
+            List of (track_uri, confidence_score) tuples
+        """
+        with metrics.stage("scale_predict"):
+            # Scale features and predict clusters in one batched kernel call
+            candidate_scaled, candidate_clusters = kernel.transform_predict(
+                candidate_matrix
+            )
+            user_vector_scaled, user_clusters = kernel.transform_predict(
+                user_preference_vector
+            )
+            user_cluster = user_clusters[0]
+        
+        with metrics.stage("rank_cluster"):
+            # Find tracks in same cluster
+            same_cluster_indices = np.where(candidate_clusters == user_cluster)[0]
+            
+            if len(same_cluster_indices) == 0:
+                return []
+            
+            # Calculate distances within cluster
+            cluster_candidates = candidate_scaled[same_cluster_indices]
+            cluster_uris = [valid_candidates[i] for i in same_cluster_indices]
+            
+            distances = cdist(user_vector_scaled, cluster_candidates, metric='euclidean')[0]
+            
+            # Convert distances to confidence scores
+            max_distance = np.max(distances) if np.max(distances) > 0 else 1
+            confidence_scores = 1 - (distances / max_distance)
+            
+            # Get top recommendations
+            top_indices = np.argsort(confidence_scores)[::-1][:n_recommendations]
+            
+            recommendations = []
+            for idx in top_indices:
+                if confidence_scores[idx] > 0.2:  # Minimum confidence threshold
+                    recommendations.append((cluster_uris[idx], confidence_scores[idx]))
+        
+        return recommendations
+    
     def find_similar_tracks(
         self,
         seed_track_uri: str,
@@ -228,6 +481,9 @@ class RecommendationEngine:
     ) -> List[Tuple[str, float]]:
         """Find tracks similar to seed track using vectorized operations.
         
+        Blocking variant for callers without an event loop; async code should
+        use :meth:`find_similar_tracks_async`.
+        
         Args:
             seed_track_uri: Seed track URI
             candidate_tracks: List of candidate track URIs
@@ -240,50 +496,91 @@ class RecommendationEngine:
             return []
         
         try:
-            # Get seed track features
-            seed_features = self.spotify_client.get_track_features(seed_track_uri)
-            seed_vector = self._extract_feature_vector(seed_features)
-            
-            # Get candidate track features (vectorized)
-            candidate_vectors = []
-            valid_candidates = []
-            
-            for track_uri in candidate_tracks:
-                # Check cache first
-                cached_vector = self._get_cached_features(track_uri)
-                if cached_vector is not None:
-                    candidate_vectors.append(cached_vector)
-                    valid_candidates.append(track_uri)
-                else:
-                    try:
-                        features = self.spotify_client.get_track_features(track_uri)
-                        vector = self._extract_feature_vector(features)
-                        candidate_vectors.append(vector)
+            with metrics.stage("features"):
+                # Get seed track features
+                seed_features = self.spotify_client.get_track_features(seed_track_uri)
+                seed_vector = self._extract_feature_vector(seed_features)
+                
+                # Get candidate track features (vectorized)
+                candidate_vectors = []
+                valid_candidates = []
+                hits = 0
+                
+                for track_uri in candidate_tracks:
+                    # Check cache first
+                    cached_vector = self._get_cached_features(track_uri)
+                    if cached_vector is not None:
+                        hits += 1
+                        candidate_vectors.append(cached_vector)
                         valid_candidates.append(track_uri)
-                        self._cache_features(track_uri, vector)
-                    except Exception as e:
-                        logger.warning(f"Failed to get features for {track_uri}: {e}")
-                        continue
+                    else:
+                        try:
+                            features = self.spotify_client.get_track_features(track_uri)
+                            vector = self._extract_feature_vector(features)
+                            candidate_vectors.append(vector)
+                            valid_candidates.append(track_uri)
+                            self._cache_features(track_uri, vector)
+                        except Exception as e:
+                            logger.warning(f"Failed to get features for {track_uri}: {e}")
+                            continue
+                
+                metrics.inc("cache_requests_total", hits, cache="engine_features", result="hit")
+                metrics.inc("cache_requests_total", len(candidate_tracks) - hits, cache="engine_features", result="miss")
             
             if not candidate_vectors:
                 return []
             
-            # Calculate similarities using vectorized operations
-            candidate_matrix = np.array(candidate_vectors)
-            seed_matrix = np.array([seed_vector])
+            return self._rank_similar(
+                seed_vector, np.array(candidate_vectors), valid_candidates, n_recommendations
+            )
             
-            # Use cosine similarity
-            similarities = cosine_similarity(seed_matrix, candidate_matrix)[0]
+        except Exception as e:
+            logger.error(f"Failed to find similar tracks: {e}")
+            raise PlaylistGenerationError(f"Failed to find similar tracks: {e}")
+    
+    async def find_similar_tracks_async(
+        self,
+        seed_track_uri: str,
+        candidate_tracks: List[str],
+        n_recommendations: int = 10
+    ) -> List[Tuple[str, float]]:
+        """Find tracks similar to seed track without blocking the event loop.
+        
+        Seed and candidate features are fetched concurrently in batches and
+        the scoring runs in a worker thread.
+        
+        Args:
+            seed_track_uri: Seed track URI
+            candidate_tracks: List of candidate track URIs
+            n_recommendations: Number of recommendations to return
             
-            # Get top recommendations
-            top_indices = np.argsort(similarities)[::-1][:n_recommendations]
+        Returns:
+            List of (track_uri, similarity_score) tuples
+        """
+        if not candidate_tracks:
+            return []
+        
+        try:
+            with metrics.stage("features"):
+                (seed_features,), vectors = await asyncio.gather(
+                    self.spotify_client.get_audio_features_batch([seed_track_uri]),
+                    self._get_candidate_vectors(candidate_tracks, ("similarity",))
+                )
             
-            recommendations = []
-            for idx in top_indices:
-                if similarities[idx] > 0.1:  # Minimum similarity threshold
-                    recommendations.append((valid_candidates[idx], similarities[idx]))
+            if seed_features is None:
+                raise PlaylistGenerationError(f"No audio features for seed track {seed_track_uri}")
             
-            return recommendations
+            candidate_matrix, valid_candidates = vectors["similarity"]
+            if not valid_candidates:
+                return []
+            
+            return await asyncio.to_thread(
+                self._rank_similar,
+                self._extract_feature_vector(seed_features),
+                candidate_matrix,
+                valid_candidates,
+                n_recommendations
+            )
             
         except Exception as e:
             logger.error(f"Failed to find similar tracks: {e}")
@@ -297,6 +594,9 @@ class RecommendationEngine:
     ) -> List[Tuple[str, float]]:
         """Generate recommendations using clustering model.
         
+        Blocking variant for callers without an event loop; async code should
+        use :meth:`cluster_based_recommendations_async`.
+        
         Args:
             user_preference_vector: User's preference vector
             candidate_tracks: List of candidate track URIs
@@ -305,7 +605,8 @@ class RecommendationEngine:
         Returns:
             List of (track_uri, confidence_score) tuples
         """
-        if self.kmeans_model is None or self.scaler is None:
+        kernel = self.inference_kernel
+        if kernel is None:
             logger.warning("Clustering models not available")
             return []
         
@@ -313,62 +614,74 @@ class RecommendationEngine:
             return []
         
         try:
-            # Get candidate track features
-            candidate_vectors = []
-            valid_candidates = []
-            
-            for track_uri in candidate_tracks:
-                cached_vector = self._get_cached_features(track_uri)
-                if cached_vector is not None:
-                    candidate_vectors.append(cached_vector)
-                    valid_candidates.append(track_uri)
-                else:
-                    try:
-                        features = self.spotify_client.get_track_features(track_uri)
-                        vector = self._extract_feature_vector(features)
-                        candidate_vectors.append(vector)
+            with metrics.stage("features"):
+                # Get candidate track features in model space
+                candidate_vectors = []
+                valid_candidates = []
+                hits = 0
+                
+                for track_uri in candidate_tracks:
+                    cached_vector = self._model_feature_cache.get(track_uri)
+                    if cached_vector is not None:
+                        hits += 1
+                        candidate_vectors.append(cached_vector)
                         valid_candidates.append(track_uri)
-                        self._cache_features(track_uri, vector)
-                    except Exception as e:
-                        logger.warning(f"Failed to get features for {track_uri}: {e}")
-                        continue
+                    else:
+                        try:
+                            features = self.spotify_client.get_track_features(track_uri)
+                            vector = self._extract_model_features(features)
+                            candidate_vectors.append(vector)
+                            valid_candidates.append(track_uri)
+                            self._model_feature_cache[track_uri] = vector
+                        except Exception as e:
+                            logger.warning(f"Failed to get features for {track_uri}: {e}")
+                            continue
+                
+                metrics.inc("cache_requests_total", hits, cache="engine_model_features", result="hit")
+                metrics.inc(
+                    "cache_requests_total", len(candidate_tracks) - hits,
+                    cache="engine_model_features", result="miss"
+                )
             
             if not candidate_vectors:
                 return []
             
-            # Scale features
-            candidate_matrix = self.scaler.transform(np.array(candidate_vectors))
-            user_vector_scaled = self.scaler.transform(user_preference_vector.reshape(1, -1))
-            
-            # Predict clusters
-            candidate_clusters = self.kmeans_model.predict(candidate_matrix)
-            user_cluster = self.kmeans_model.predict(user_vector_scaled)[0]
-            
-            # Find tracks in same cluster
-            same_cluster_indices = np.where(candidate_clusters == user_cluster)[0]
-            
-            if len(same_cluster_indices) == 0:
-                return []
-            
-            # Calculate distances within cluster
-            cluster_candidates = candidate_matrix[same_cluster_indices]
-            cluster_uris = [valid_candidates[i] for i in same_cluster_indices]
-            
-            distances = cdist(user_vector_scaled, cluster_candidates, metric='euclidean')[0]
-            
-            # Convert distances to confidence scores
-            max_distance = np.max(distances) if np.max(distances) > 0 else 1
-            confidence_scores = 1 - (distances / max_distance)
-            
-            # Get top recommendations
-            top_indices = np.argsort(confidence_scores)[::-1][:n_recommendations]
+            return self._rank_by_cluster(
+                kernel, user_preference_vector, np.array(candidate_vectors), valid_candidates, n_recommendations
+            )
             
-            recommendations = []
-            for idx in top_indices:
-                if confidence_scores[idx] > 0.2:  # Minimum confidence threshold
-                    recommendations.append((cluster_uris[idx], confidence_scores[idx]))
+        except Exception as e:
+            logger.error(f"Failed to generate cluster-based recommendations: {e}")
+            raise PlaylistGenerationError(f"Failed to generate cluster-based recommendations: {e}")
+    
+    async def cluster_based_recommendations_async(
+        self,
+        user_preference_vector: np.ndarray,
+        candidate_tracks: List[str],
+        n_recommendations: int = 10
+    ) -> List[Tuple[str, float]]:
+        """Generate clustering recommendations without blocking the event loop.
+        
+        Candidate features are fetched in batches and the scaling, prediction
+        and ranking run in a worker thread.
+        
+        Args:
+            user_preference_vector: User's preference vector
+            candidate_tracks: List of candidate track URIs
+            n_recommendations: Number of recommendations to return
             
-            return recommendations
+        Returns:
+            List of (track_uri, confidence_score) tuples
+        """
+        if not candidate_tracks:
+            return []
+        
+        try:
+            with metrics.stage("features"):
+                vectors = await self._get_candidate_vectors(candidate_tracks, ("model",))
+            return await self._clustering_recommendations(
+                self.model, user_preference_vector, vectors, n_recommendations
+            )
             
         except Exception as e:
             logger.error(f"Failed to generate cluster-based recommendations: {e}")
@@ -392,54 +705,125 @@ class RecommendationEngine:
         Returns:
             RecommendationResult object
         """
-        start_time = time.time()
+        with metrics.trace() as trace:
+            return await self._generate_recommendations(
+                trace, user, candidate_tracks, n_recommendations, algorithm
+            )
+    
+    async def generate_recommendations_batch(
+        self,
+        users: List[User],
+        candidate_tracks: List[str],
+        n_recommendations: int = 10,
+        algorithm: str = "hybrid",
+        concurrency: int = 8
+    ) -> Dict[str, RecommendationResult]:
+        """Generate recommendations for many users over one shared candidate pool.
         
-        try:
-            # Get user preference vector
-            user_preference_vector = await self.get_user_preference_vector(user)
+        Candidate features are fetched once for the whole batch, then users
+        are scored at most ``concurrency`` at a time. Users whose
+        recommendations fail are logged and left out.
+        
+        Args:
+            users: Users to recommend for
+            candidate_tracks: Candidate track URIs shared by every user
+            n_recommendations: Number of recommendations per user
+            algorithm: Recommendation algorithm ("similarity", "clustering", "hybrid")
+            concurrency: Maximum users scored concurrently
             
-            # Filter out tracks user already knows
-            known_tracks = set(
-                user.loved_it + user.like_it + user.okay + user.hate_it + user.recently_searched
+        Returns:
+            Mapping of username to RecommendationResult
+        """
+        with metrics.stage("features"):
+            await self._get_candidate_vectors(
+                candidate_tracks,
+                ALGORITHM_FEATURE_SPACES.get(algorithm, ALGORITHM_FEATURE_SPACES["hybrid"])
             )
-            filtered_candidates = [track for track in candidate_tracks if track not in known_tracks]
+        
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def recommend(user: User) -> Tuple[str, Optional[RecommendationResult]]:
+            async with semaphore:
+                try:
+                    return user.username, await self.generate_recommendations(
+                        user, candidate_tracks, n_recommendations, algorithm
+                    )
+                except PlaylistGenerationError as e:
+                    logger.warning(f"No recommendations for {user.username}: {e}")
+                    return user.username, None
+        
+        results = await asyncio.gather(*(recommend(user) for user in users))
+        return {username: result for username, result in results if result is not None}
+    
+    async def _generate_recommendations(
+        self,
+        trace: Trace,
+        user: User,
+        candidate_tracks: List[str],
+        n_recommendations: int,
+        algorithm: str
+    ) -> RecommendationResult:
+        """Run :meth:`generate_recommendations` inside an open metrics trace."""
+        # Pinned for the whole request; a hot swap only affects later requests
+        model = self.model
+        try:
+            with metrics.stage("filter"):
+                # Filter out tracks user already knows
+                known_tracks = set(
+                    user.loved_it + user.like_it + user.okay + user.hate_it + user.recently_searched
+                )
+                filtered_candidates = [track for track in candidate_tracks if track not in known_tracks]
             
             if not filtered_candidates:
                 raise PlaylistGenerationError("No new tracks available for recommendation")
             
+            with metrics.stage("features"):
+                # Preference and candidate features are fetched concurrently
+                user_preference_vector, vectors = await asyncio.gather(
+                    self.get_user_preference_vector(user),
+                    self._get_candidate_vectors(
+                        filtered_candidates,
+                        ALGORITHM_FEATURE_SPACES.get(algorithm, ALGORITHM_FEATURE_SPACES["hybrid"])
+                    )
+                )
+            
             # Generate recommendations based on algorithm
             if algorithm == "similarity":
-                recommendations = self._similarity_based_recommendations(
-                    user_preference_vector, filtered_candidates, n_recommendations
+                recommendations = await self._similarity_based_recommendations(
+                    user, vectors, n_recommendations
                 )
             elif algorithm == "clustering":
-                recommendations = self.cluster_based_recommendations(
-                    user_preference_vector, filtered_candidates, n_recommendations
+                recommendations = await self._clustering_recommendations(
+                    model, user_preference_vector, vectors, n_recommendations
                 )
             else:  # hybrid
                 recommendations = await self._hybrid_recommendations(
-                    user_preference_vector, filtered_candidates, n_recommendations
+                    model, user, user_preference_vector, vectors, n_recommendations
                 )
             
-            # Create RecommendationResult
-            processing_time = time.time() - start_time
-            
             recommended_tracks = []
             confidence_scores = []
             
-            for track_uri, confidence in recommendations:
-                try:
-                    track = self.spotify_client.get_track_info(track_uri)
-                    recommended_tracks.append(track)
-                    confidence_scores.append(confidence)
-                except Exception as e:
-                    logger.warning(f"Failed to get track info for {track_uri}: {e}")
+            with metrics.stage("hydrate"):
+                # One batched, cache-backed lookup instead of a call per track
+                tracks = await self.spotify_client.get_tracks(
+                    [track_uri for track_uri, _ in recommendations]
+                )
+                for (track_uri, confidence), track in zip(recommendations, tracks):
+                    if track is None:
+                        logger.warning(f"Failed to get track info for {track_uri}")
+                        continue
+                    recommended_tracks.append(self._to_track(track))
+                    confidence_scores.append(float(confidence))
             
+            # Create RecommendationResult
             result = RecommendationResult(
                 recommended_tracks=recommended_tracks,
                 confidence_scores=confidence_scores,
                 algorithm_used=algorithm,
-                processing_time=processing_time
+                processing_time=trace.elapsed,
+                stage_timings=dict(trace.stages),
+                model_version=model.version if model is not None else None
             )
             
             logger.info(f"Generated {len(recommended_tracks)} recommendations for {user.username}")
@@ -449,34 +833,75 @@ class RecommendationEngine:
             logger.error(f"Failed to generate recommendations: {e}")
             raise PlaylistGenerationError(f"Failed to generate recommendations: {e}")
     
-    def _similarity_based_recommendations(
+    async def _similarity_based_recommendations(
         self,
-        user_preference_vector: np.ndarray,
-        candidate_tracks: List[str],
+        user: User,
+        vectors: Dict[str, Tuple[np.ndarray, List[str]]],
         n_recommendations: int
     ) -> List[Tuple[str, float]]:
-        """Generate recommendations based on user preference similarity."""
+        """Rank candidates by similarity to the user's most recent search."""
         if not user.recently_searched:
             return []
         
-        # Use most recent search as seed
+        candidate_matrix, valid_candidates = vectors["similarity"]
+        if not valid_candidates:
+            return []
+        
+        # Use most recent search as seed; its features were fetched with the preference vector
         seed_track = user.recently_searched[-1]
-        return self.find_similar_tracks(seed_track, candidate_tracks, n_recommendations)
+        seed_features = (await self.spotify_client.get_audio_features_batch([seed_track]))[0]
+        if seed_features is None:
+            logger.warning(f"No audio features for seed track {seed_track}")
+            return []
+        
+        return await asyncio.to_thread(
+            self._rank_similar,
+            self._extract_feature_vector(seed_features),
+            candidate_matrix,
+            valid_candidates,
+            n_recommendations
+        )
+    
+    async def _clustering_recommendations(
+        self,
+        model: Optional[ModelHandle],
+        user_preference_vector: np.ndarray,
+        vectors: Dict[str, Tuple[np.ndarray, List[str]]],
+        n_recommendations: int
+    ) -> List[Tuple[str, float]]:
+        """Rank candidates in the user's cluster in a worker thread."""
+        if model is None or model.inference_kernel is None:
+            logger.warning("Clustering models not available")
+            return []
+        
+        candidate_matrix, valid_candidates = vectors["model"]
+        if not valid_candidates:
+            return []
+        
+        return await asyncio.to_thread(
+            self._rank_by_cluster,
+            model.inference_kernel,
+            user_preference_vector,
+            candidate_matrix,
+            valid_candidates,
+            n_recommendations
+        )
     
     async def _hybrid_recommendations(
         self,
+        model: Optional[ModelHandle],
+        user: User,
         user_preference_vector: np.ndarray,
-        candidate_tracks: List[str],
+        vectors: Dict[str, Tuple[np.ndarray, List[str]]],
         n_recommendations: int
     ) -> List[Tuple[str, float]]:
         """Generate hybrid recommendations combining multiple algorithms."""
-        # Get recommendations from different algorithms
-        similarity_recs = self._similarity_based_recommendations(
-            user_preference_vector, candidate_tracks, n_recommendations * 2
-        )
-        
-        clustering_recs = self.cluster_based_recommendations(
-            user_preference_vector, candidate_tracks, n_recommendations * 2
+        # Score both algorithms in parallel
+        similarity_recs, clustering_recs = await asyncio.gather(
+            self._similarity_based_recommendations(user, vectors, n_recommendations * 2),
+            self._clustering_recommendations(
+                model, user_preference_vector, vectors, n_recommendations * 2
+            )
         )
         
         # Combine and weight recommendations
@@ -500,4 +925,5 @@ class RecommendationEngine:
     def clear_feature_cache(self) -> None:
         """Clear the feature cache."""
         self._feature_cache.clear()
+        self._model_feature_cache.clear()
         logger.info("Feature cache cleared")
@@ -0,0 +1,366 @@
+"""Materialized per-user top-K recommendations.
+
+A :class:`Materializer` precomputes recommendations for active users and
+stores them one row per user in a SQLite table keyed by username, so serving
+a returning user is a single primary-key lookup instead of an engine run.
+Each row records the model version that produced it and when it was computed.
+
+A row stops being served when:
+
+* the user's feedback changes (:meth:`RecommendationStore.invalidate`,
+  called by :class:`~src.user_manager.UserManager` on preference writes),
+* the active model version differs from the row's, or
+* it is older than the reader's ``max_age``.
+
+Stale rows are recomputed by the next refresh, or on the next read through
+:meth:`Materializer.recommend`. Model changes are detected on read by
+comparing versions, so a model swap costs no bulk rewrite.
+
+    python -m src.recommendation_store --users-db data/users.db --candidates-playlist <id> --interval 3600
+"""
+
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+from .data_models import RecommendationResult, User
+from .exceptions import DatabaseError
+from .logging_config import get_logger
+from .metrics import metrics
+
+logger = get_logger(__name__)
+
+# Shared by the materializer CLI, the digest and the Streamlit app whatever their working directory
+DEFAULT_STORE_PATH = Path(__file__).resolve().parent.parent / ".spr" / "recommendations.db"
+DEFAULT_MAX_AGE = 7 * 24 * 3600.0
+DEFAULT_ACTIVE_DAYS = 30
+
+
+@dataclass
+class MaterializedRecommendations:
+    """A user's stored top-K recommendations."""
+    username: str
+    # One dict per track: uri, plus name, artist and score when known
+    tracks: List[Dict[str, Any]]
+    algorithm: str
+    model_version: Optional[str]
+    computed_at: float
+    invalidated_at: Optional[float] = None
+
+    @property
+    def track_uris(self) -> List[str]:
+        return [track["uri"] for track in self.tracks]
+
+    @property
+    def age(self) -> float:
+        """Seconds since the recommendations were computed."""
+        return time.time() - self.computed_at
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "username": self.username,
+            "tracks": self.tracks,
+            "algorithm": self.algorithm,
+            "model_version": self.model_version,
+            "computed_at": self.computed_at,
+            "age_seconds": self.age,
+        }
+
+
+def tracks_from_result(result: RecommendationResult) -> List[Dict[str, Any]]:
+    """Stored track entries of an engine result."""
+    return [
+        {"uri": track.track_uri, "name": track.track_name, "artist": track.artist_name, "score": score}
+        for track, score in zip(result.recommended_tracks, result.confidence_scores)
+    ]
+
+
+class RecommendationStore:
+    """Per-user recommendation rows in a SQLite database."""
+
+    def __init__(self, db_path: Union[str, Path]):
+        """Open (or create) the store.
+
+        Args:
+            db_path: Database file path
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        try:
+            self._conn = sqlite3.connect(
+                str(self.db_path), check_same_thread=False, isolation_level=None, timeout=30
+            )
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS user_recommendations (
+                    username TEXT PRIMARY KEY,
+                    tracks TEXT NOT NULL,
+                    algorithm TEXT NOT NULL,
+                    model_version TEXT,
+                    computed_at REAL NOT NULL,
+                    invalidated_at REAL
+                ) WITHOUT ROWID
+            """)
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Failed to open recommendation store {self.db_path}: {e}")
+
+    @staticmethod
+    def _from_row(row: Sequence[Any]) -> MaterializedRecommendations:
+        username, tracks, algorithm, model_version, computed_at, invalidated_at = row
+        return MaterializedRecommendations(
+            username=username,
+            tracks=json.loads(tracks),
+            algorithm=algorithm,
+            model_version=model_version,
+            computed_at=computed_at,
+            invalidated_at=invalidated_at,
+        )
+
+    def _load(self, username: str) -> Optional[MaterializedRecommendations]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT username, tracks, algorithm, model_version, computed_at, invalidated_at "
+                "FROM user_recommendations WHERE username = ?",
+                (username,)
+            ).fetchone()
+        return self._from_row(row) if row is not None else None
+
+    @staticmethod
+    def is_fresh(
+        entry: MaterializedRecommendations,
+        model_version: Optional[str] = None,
+        max_age: Optional[float] = None
+    ) -> bool:
+        """Whether a stored entry may still be served."""
+        if entry.invalidated_at is not None:
+            return False
+        if model_version is not None and entry.model_version != model_version:
+            return False
+        return max_age is None or entry.age <= max_age
+
+    def get(
+        self,
+        username: str,
+        model_version: Optional[str] = None,
+        max_age: Optional[float] = None
+    ) -> Optional[MaterializedRecommendations]:
+        """Get a user's recommendations if they are still fresh.
+
+        Args:
+            username: Username
+            model_version: Active model version; rows from other versions are stale
+            max_age: Maximum age in seconds
+
+        Returns:
+            The stored recommendations, or None when missing or stale
+        """
+        entry = self._load(username)
+        if entry is None:
+            result = "miss"
+        elif not self.is_fresh(entry, model_version, max_age):
+            result, entry = "stale", None
+        else:
+            result = "hit"
+        metrics.inc("cache_requests_total", cache="materialized_recommendations", result=result)
+        return entry
+
+    def put(
+        self,
+        username: str,
+        tracks: List[Dict[str, Any]],
+        algorithm: str,
+        model_version: Optional[str]
+    ) -> MaterializedRecommendations:
+        """Store (replace) a user's recommendations.
+
+        Args:
+            username: Username
+            tracks: Track entries, each with at least a ``uri``
+            algorithm: Algorithm that produced them
+            model_version: Model version that produced them
+        """
+        entry = MaterializedRecommendations(username, tracks, algorithm, model_version, time.time())
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO user_recommendations "
+                "(username, tracks, algorithm, model_version, computed_at, invalidated_at) "
+                "VALUES (?, ?, ?, ?, ?, NULL)",
+                (username, json.dumps(tracks), algorithm, model_version, entry.computed_at)
+            )
+        return entry
+
+    def put_result(self, username: str, result: RecommendationResult) -> MaterializedRecommendations:
+        """Store an engine result."""
+        return self.put(username, tracks_from_result(result), result.algorithm_used, result.model_version)
+
+    def invalidate(self, username: str) -> None:
+        """Stop serving a user's recommendations until they are recomputed."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE user_recommendations SET invalidated_at = ? "
+                "WHERE username = ? AND invalidated_at IS NULL",
+                (time.time(), username)
+            )
+
+    def stale_usernames(
+        self,
+        usernames: Sequence[str],
+        model_version: Optional[str] = None,
+        max_age: Optional[float] = None
+    ) -> List[str]:
+        """Usernames among ``usernames`` without fresh recommendations, in input order."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT username, model_version, computed_at, invalidated_at FROM user_recommendations"
+            ).fetchall()
+        now = time.time()
+        fresh = {
+            username for username, row_version, computed_at, invalidated_at in rows
+            if invalidated_at is None
+            and (model_version is None or row_version == model_version)
+            and (max_age is None or now - computed_at <= max_age)
+        }
+        return [username for username in usernames if username not in fresh]
+
+    def stats(self) -> Dict[str, int]:
+        """Row counts: total and invalidated."""
+        with self._lock:
+            total, invalidated = self._conn.execute(
+                "SELECT COUNT(*), COUNT(invalidated_at) FROM user_recommendations"
+            ).fetchone()
+        return {"users": total, "invalidated": invalidated}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class Materializer:
+    """Keeps the recommendation store filled for active users."""
+
+    def __init__(
+        self,
+        engine,
+        store: RecommendationStore,
+        candidate_tracks: Union[List[str], Callable[[], List[str]]],
+        top_k: int = 10,
+        max_age: Optional[float] = DEFAULT_MAX_AGE,
+        algorithm: str = "hybrid",
+        concurrency: int = 8
+    ):
+        """Initialize the materializer.
+
+        Args:
+            engine: RecommendationEngine computing missing or stale entries
+            store: Recommendation store
+            candidate_tracks: Candidate track URIs, or a callable returning them per refresh
+            top_k: Recommendations stored per user
+            max_age: Seconds after which an entry is recomputed; None keeps entries until invalidated
+            algorithm: Engine algorithm
+            concurrency: Maximum users scored concurrently
+        """
+        self.engine = engine
+        self.store = store
+        self.candidate_tracks = candidate_tracks
+        self.top_k = top_k
+        self.max_age = max_age
+        self.algorithm = algorithm
+        self.concurrency = concurrency
+
+    def _candidates(self) -> List[str]:
+        if callable(self.candidate_tracks):
+            return self.candidate_tracks()
+        return self.candidate_tracks
+
+    async def _compute(self, users: List[User]) -> Dict[str, MaterializedRecommendations]:
+        if not users:
+            return {}
+        with metrics.stage("materialize"):
+            results = await self.engine.generate_recommendations_batch(
+                users, self._candidates(), self.top_k, self.algorithm, self.concurrency
+            )
+            return {username: self.store.put_result(username, result) for username, result in results.items()}
+
+    async def recommend(self, user: User) -> Optional[MaterializedRecommendations]:
+        """Serve a user's stored recommendations, computing and storing them when stale.
+
+        Returns:
+            The recommendations, or None when the engine could not produce any
+        """
+        return (await self.recommend_many([user])).get(user.username)
+
+    async def recommend_many(self, users: List[User]) -> Dict[str, MaterializedRecommendations]:
+        """Serve stored recommendations for many users; the stale ones are computed in one batch."""
+        model_version = self.engine.model_version
+        entries: Dict[str, MaterializedRecommendations] = {}
+        stale = []
+        for user in users:
+            entry = self.store.get(user.username, model_version, self.max_age)
+            if entry is not None:
+                entries[user.username] = entry
+            else:
+                stale.append(user)
+        entries.update(await self._compute(stale))
+        return entries
+
+    async def refresh(self, users: List[User], active_days: Optional[int] = DEFAULT_ACTIVE_DAYS) -> Dict[str, int]:
+        """Recompute the missing and stale entries of active users.
+
+        Args:
+            users: All users
+            active_days: Only users seen (logged in, or created) within this many days; None for all
+
+        Returns:
+            Counts of active, refreshed and still-fresh users
+        """
+        if active_days is not None:
+            cutoff = datetime.now() - timedelta(days=active_days)
+            users = [user for user in users if (user.last_login or user.created_at or cutoff) >= cutoff]
+        by_name = {user.username: user for user in users}
+        stale = self.store.stale_usernames(list(by_name), self.engine.model_version, self.max_age)
+        refreshed = await self._compute([by_name[username] for username in stale])
+        summary = {"active": len(by_name), "refreshed": len(refreshed), "fresh": len(by_name) - len(stale)}
+        logger.info(f"Materialized recommendations: {summary}")
+        return summary
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from .core.spotify import SpotifyClient
+    from .recommendation_engine import RecommendationEngine
+    from .user_manager import UserManager
+
+    parser = argparse.ArgumentParser(description="Precompute per-user recommendations")
+    parser.add_argument("--users-db", type=Path, default=Path("data/users.db"))
+    parser.add_argument("--store", type=Path, default=DEFAULT_STORE_PATH)
+    parser.add_argument("--candidates-playlist", required=True, help="Playlist whose tracks are the candidate pool")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--max-age", type=float, default=DEFAULT_MAX_AGE, help="Seconds before an entry is recomputed")
+    parser.add_argument("--active-days", type=int, default=DEFAULT_ACTIVE_DAYS)
+    parser.add_argument("--interval", type=float, default=0, help="Refresh every N seconds (0 runs once)")
+    args = parser.parse_args()
+
+    store = RecommendationStore(args.store)
+    user_manager = UserManager(args.users_db, recommendation_store=store)
+
+    async def run() -> None:
+        spotify = SpotifyClient.from_env()
+        engine = RecommendationEngine(spotify)
+        engine.model_registry.start()
+        while True:
+            candidates = [track.uri for track in await spotify.get_playlist_tracks(args.candidates_playlist)]
+            materializer = Materializer(engine, store, candidates, top_k=args.top_k, max_age=args.max_age)
+            await materializer.refresh(user_manager.get_all_users(), args.active_days)
+            if args.interval <= 0:
+                return
+            await asyncio.sleep(args.interval)
+
+    asyncio.run(run())
@@ -11,6 +11,7 @@ import pandas as pd
 
 from .exceptions import DatabaseError, AuthenticationError, DataValidationError
 from .data_models import User
+from .recommendation_store import RecommendationStore
 from .validators import validate_username, validate_email, validate_password_strength, sanitize_string
 from .logging_config import get_logger
 
@@ -20,13 +21,19 @@ logger = get_logger(__name__)
 class UserManager:
     """Modernized user management system."""
     
-    def __init__(self, db_path: Path = Path("data/users.db")):
+    def __init__(
+        self,
+        db_path: Path = Path("data/users.db"),
+        recommendation_store: Optional[RecommendationStore] = None
+    ):
         """Initialize user manager.
         
         Args:
             db_path: Path to SQLite database
+            recommendation_store: Materialized recommendations to invalidate when preferences change
         """
         self.db_path = db_path
+        self.recommendation_store = recommendation_store
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
         
         # Initialize database
@@ -359,6 +366,10 @@ class UserManager:
                     cursor.execute(query, params)
                     conn.commit()
                     
+                    # Stored recommendations were computed from the old preferences
+                    if self.recommendation_store is not None:
+                        self.recommendation_store.invalidate(username)
+                    
                     logger.info(f"User preferences updated: {username}")
                     return True
                 
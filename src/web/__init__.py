@@ -1,6 +1,19 @@
 """Web interface components for song recommendation system."""
 
 from .routes import router as api_router
+from .jobs import router as jobs_router
+from .cache import (
+    CacheRule,
+    CachedResponse,
+    MemoryBackend,
+    RedisBackend,
+    ResponseCache,
+    ResponseCacheMiddleware,
+    SQLiteBackend,
+    response_cache_from_env
+)
+from .serialization import FastJSONResponse, dumps as json_dumps, encode_models, to_columns
+from .streaming import encode_record, negotiate_stream_format, stream_records
 from .auth import (
     Token,
     User,
@@ -15,6 +28,7 @@ from .auth import (
 
 __all__ = [
     "api_router",
+    "jobs_router",
     "Token",
     "User", 
     "UserCreate",
@@ -24,4 +38,19 @@ __all__ = [
     "get_current_active_user_info",
     "rate_limit_check",
     "require_scope",
+    "CacheRule",
+    "CachedResponse",
+    "MemoryBackend",
+    "RedisBackend",
+    "ResponseCache",
+    "ResponseCacheMiddleware",
+    "SQLiteBackend",
+    "response_cache_from_env",
+    "FastJSONResponse",
+    "json_dumps",
+    "encode_models",
+    "to_columns",
+    "encode_record",
+    "negotiate_stream_format",
+    "stream_records",
 ]
@@ -0,0 +1,521 @@
+"""HTTP response cache for the read-only API endpoints.
+
+:class:`ResponseCacheMiddleware` is a pure ASGI middleware that answers
+``GET`` requests for configured routes from a :class:`ResponseCache`,
+keyed by route path and normalized query string. Cached responses carry a
+strong ``ETag`` and are revalidated with ``If-None-Match`` (304), and
+expired entries are served stale while one background request refreshes
+them. Concurrent misses for the same key are coalesced into a single
+downstream call.
+
+Entries live in an in-process LRU bounded by a byte budget, optionally
+backed by a second tier that survives restarts or is shared between
+workers: a local SQLite file (:class:`SQLiteBackend`) or Redis
+(:class:`RedisBackend`, requires the ``redis`` package).
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Pattern, Sequence, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+from ..logging_config import get_logger
+from ..metrics import metrics
+
+logger = get_logger(__name__)
+
+# Responses larger than this are never cached
+DEFAULT_MAX_ENTRY_BYTES = 1024 * 1024
+
+Scope = Dict[str, Any]
+Message = Dict[str, Any]
+Receive = Callable[[], Awaitable[Message]]
+Send = Callable[[Message], Awaitable[None]]
+
+
+@dataclass
+class CachedResponse:
+    """A stored response body with the metadata needed to replay it."""
+    status: int
+    body: bytes
+    content_type: str
+    etag: str
+    stored_at: float
+
+    @property
+    def size(self) -> int:
+        """Approximate memory footprint in bytes."""
+        return len(self.body) + len(self.content_type) + len(self.etag) + 64
+
+    def to_bytes(self) -> bytes:
+        """Serialize for the disk and Redis backends."""
+        header = json.dumps({
+            "status": self.status,
+            "content_type": self.content_type,
+            "etag": self.etag,
+            "stored_at": self.stored_at,
+        }).encode()
+        return header + b"\n" + self.body
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "CachedResponse":
+        """Inverse of :meth:`to_bytes`."""
+        header, body = data.split(b"\n", 1)
+        return cls(body=body, **json.loads(header))
+
+
+class MemoryBackend:
+    """In-process LRU cache bounded by total entry size."""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        """Initialize an empty cache.
+
+        Args:
+            max_bytes: Memory budget; least recently used entries are evicted beyond it
+        """
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """Get an entry and mark it recently used."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key: str, entry: CachedResponse) -> None:
+        """Store an entry, evicting least recently used ones to stay within budget."""
+        if entry.size > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.bytes -= previous.size
+        self._entries[key] = entry
+        self.bytes += entry.size
+        while self.bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.bytes -= evicted.size
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        self._entries.clear()
+        self.bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteBackend:
+    """Local on-disk cache tier in a SQLite file, shared by processes on one host."""
+
+    def __init__(self, path: Path, max_bytes: int = 512 * 1024 * 1024):
+        """Open (or create) the cache database.
+
+        Args:
+            path: Database file path
+            max_bytes: Disk budget; oldest entries are evicted beyond it
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, data BLOB NOT NULL, size INTEGER NOT NULL, "
+            "stored_at REAL NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_stored_at ON responses (stored_at)")
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """Get an unexpired entry."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM responses WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return CachedResponse.from_bytes(row[0]) if row else None
+
+    def set(self, key: str, entry: CachedResponse, expire_seconds: float) -> None:
+        """Store an entry until ``expire_seconds`` from now, then enforce the budget."""
+        data = entry.to_bytes()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                (key, data, len(data), entry.stored_at, time.time() + expire_seconds)
+            )
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > self.max_bytes:
+                self._conn.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+                # Trim to 90% of the budget so eviction doesn't run on every write
+                self._conn.execute(
+                    "DELETE FROM responses WHERE key IN ("
+                    "SELECT key FROM (SELECT key, SUM(size) OVER (ORDER BY stored_at DESC) AS kept "
+                    "FROM responses) WHERE kept > ?)",
+                    (int(self.max_bytes * 0.9),)
+                )
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+
+
+class RedisBackend:
+    """Shared cache tier in Redis; the server's maxmemory policy bounds its size."""
+
+    def __init__(self, url: str, prefix: str = "spr:http:"):
+        """Connect to Redis.
+
+        Args:
+            url: Redis URL, e.g. ``redis://localhost:6379/0``
+            prefix: Key prefix for cache entries
+        """
+        import redis
+
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """Get an entry."""
+        data = self._client.get(self.prefix + key)
+        return CachedResponse.from_bytes(data) if data else None
+
+    def set(self, key: str, entry: CachedResponse, expire_seconds: float) -> None:
+        """Store an entry with a Redis TTL."""
+        self._client.set(self.prefix + key, entry.to_bytes(), ex=max(1, int(expire_seconds)))
+
+    def clear(self) -> None:
+        """Drop every entry under the prefix."""
+        for key in self._client.scan_iter(self.prefix + "*"):
+            self._client.delete(key)
+
+
+class ResponseCache:
+    """Two-tier response store: in-memory LRU in front of an optional shared backend."""
+
+    def __init__(self, memory: Optional[MemoryBackend] = None, shared: Optional[Any] = None):
+        """Initialize the cache.
+
+        Args:
+            memory: In-process tier (a 64 MiB LRU by default)
+            shared: Optional :class:`SQLiteBackend` or :class:`RedisBackend`
+        """
+        self.memory = memory or MemoryBackend()
+        self.shared = shared
+        self.counts: Counter = Counter()
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        """Get an entry, promoting shared-tier hits into memory."""
+        entry = self.memory.get(key)
+        if entry is None and self.shared is not None:
+            try:
+                entry = await asyncio.to_thread(self.shared.get, key)
+            except Exception as e:
+                logger.warning(f"Shared response cache read failed: {e}")
+                return None
+            if entry is not None:
+                self.memory.set(key, entry)
+        return entry
+
+    async def set(self, key: str, entry: CachedResponse, expire_seconds: float) -> None:
+        """Store an entry in every tier."""
+        self.memory.set(key, entry)
+        if self.shared is not None:
+            try:
+                await asyncio.to_thread(self.shared.set, key, entry, expire_seconds)
+            except Exception as e:
+                logger.warning(f"Shared response cache write failed: {e}")
+
+    def clear(self) -> None:
+        """Drop every entry in every tier."""
+        self.memory.clear()
+        if self.shared is not None:
+            self.shared.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Entry counts, memory use and hit/stale/miss counters."""
+        return {
+            "entries": len(self.memory),
+            "bytes": self.memory.bytes,
+            "max_bytes": self.memory.max_bytes,
+            "shared_backend": type(self.shared).__name__ if self.shared is not None else None,
+            **{result: self.counts[result] for result in ("hit", "stale", "miss", "not_modified")},
+        }
+
+
+@dataclass
+class CacheRule:
+    """Caching policy for one route template.
+
+    Attributes:
+        path: Route template, e.g. ``/api/v1/track/{track_id}``
+        ttl: Seconds a response is served as fresh
+        stale_while_revalidate: Further seconds it may be served stale while refreshing
+        case_insensitive_params: Query parameters whose values are lowercased in the key
+    """
+    path: str
+    ttl: float
+    stale_while_revalidate: float = 0.0
+    case_insensitive_params: Tuple[str, ...] = ()
+    pattern: Pattern = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.pattern = re.compile(
+            "^" + re.sub(r"\\\{[^/]+?\\\}", "[^/]+", re.escape(self.path.rstrip("/"))) + "/?$"
+        )
+
+    def cache_key(self, path: str, query_string: bytes) -> str:
+        """Key for a request: path plus sorted, whitespace-normalized query parameters."""
+        params = []
+        for name, value in parse_qsl(query_string.decode("latin-1"), keep_blank_values=False):
+            value = " ".join(value.split())
+            if name in self.case_insensitive_params:
+                value = value.lower()
+            params.append((name, value))
+        query = urlencode(sorted(params))
+        return path.rstrip("/") + ("?" + query if query else "")
+
+
+DAY = 24 * 3600
+
+DEFAULT_RULES: Tuple[CacheRule, ...] = (
+    CacheRule("/api/v1/search", ttl=300, stale_while_revalidate=3600, case_insensitive_params=("query",)),
+    CacheRule("/api/v1/track/{track_id}", ttl=DAY, stale_while_revalidate=7 * DAY),
+    CacheRule("/api/v1/track/{track_id}/features", ttl=DAY, stale_while_revalidate=7 * DAY),
+    CacheRule("/api/v1/playlist/{playlist_id}", ttl=600, stale_while_revalidate=3600),
+)
+
+
+@dataclass
+class _Captured:
+    """A downstream response buffered in full."""
+    status: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+
+
+class ResponseCacheMiddleware:
+    """ASGI middleware serving configured ``GET`` routes from a :class:`ResponseCache`."""
+
+    def __init__(
+        self,
+        app,
+        cache: ResponseCache,
+        rules: Sequence[CacheRule] = DEFAULT_RULES,
+        max_entry_bytes: int = DEFAULT_MAX_ENTRY_BYTES
+    ):
+        """Wrap an ASGI app.
+
+        Args:
+            app: Downstream ASGI application
+            cache: Response store
+            rules: Cached routes and their policies
+            max_entry_bytes: Larger responses are passed through uncached
+        """
+        self.app = app
+        self.cache = cache
+        self.rules = list(rules)
+        self.max_entry_bytes = max_entry_bytes
+        self._inflight: Dict[str, "asyncio.Future[_Captured]"] = {}
+        self._background: set = set()
+
+    def _match(self, path: str) -> Optional[CacheRule]:
+        for rule in self.rules:
+            if rule.pattern.match(path):
+                return rule
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+        rule = self._match(scope["path"])
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+
+        headers = {name.lower(): value for name, value in scope.get("headers", [])}
+        key = rule.cache_key(scope["path"], scope.get("query_string", b""))
+        # Hits skip routing; expose the template so request metrics keep their route label
+        scope["route"] = rule
+
+        bypass = b"no-cache" in headers.get(b"cache-control", b"")
+        entry = None if bypass else await self.cache.get(key)
+        age = time.time() - entry.stored_at if entry is not None else 0.0
+
+        if entry is not None and age < rule.ttl:
+            result = "hit"
+        elif entry is not None and age < rule.ttl + rule.stale_while_revalidate:
+            result = "stale"
+            self._revalidate(key, scope, rule)
+        else:
+            result = "miss"
+            captured = await self._fetch(key, scope, rule)
+            entry = await self.cache.get(key) if captured.status == 200 else None
+            if entry is None or entry.body != captured.body:
+                self._count("miss")
+                await self._send_captured(captured, send)
+                return
+            age = 0.0
+
+        if_none_match = headers.get(b"if-none-match")
+        if if_none_match is not None and entry.etag.encode() in (
+            tag.strip() for tag in if_none_match.split(b",")
+        ):
+            self._count("not_modified")
+            await self._send_entry(entry, rule, age, result, send, not_modified=True)
+            return
+
+        self._count(result)
+        await self._send_entry(entry, rule, age, result, send)
+
+    def _count(self, result: str) -> None:
+        self.cache.counts[result] += 1
+        metrics.inc("cache_requests_total", cache="http_response", result=result)
+
+    async def _fetch(self, key: str, scope: Scope, rule: CacheRule) -> _Captured:
+        """Run the downstream app once per key, sharing the response with concurrent callers."""
+        future = self._inflight.get(key)
+        if future is not None:
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            captured = await self._run_app(scope)
+            await self._store(key, captured, rule)
+            future.set_result(captured)
+            return captured
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so an unawaited failure doesn't log a warning
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+
+    def _revalidate(self, key: str, scope: Scope, rule: CacheRule) -> None:
+        """Refresh a stale entry in the background, at most once per key at a time."""
+        if key in self._inflight:
+            return
+
+        revalidate_scope = dict(scope)
+        revalidate_scope["headers"] = [
+            (name, value) for name, value in scope.get("headers", [])
+            if name.lower() not in (b"if-none-match", b"cache-control")
+        ]
+
+        async def refresh() -> None:
+            try:
+                await self._fetch(key, revalidate_scope, rule)
+            except Exception as e:
+                logger.warning(f"Background revalidation of {key} failed: {e}")
+
+        task = asyncio.create_task(refresh())
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _run_app(self, scope: Scope) -> _Captured:
+        """Call the downstream app with an empty body and buffer its response."""
+        status = 500
+        response_headers: List[Tuple[bytes, bytes]] = []
+        chunks: List[bytes] = []
+
+        async def receive() -> Message:
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def capture(message: Message) -> None:
+            nonlocal status, response_headers
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                response_headers = list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self.app(scope, receive, capture)
+        return _Captured(status, response_headers, b"".join(chunks))
+
+    async def _store(self, key: str, captured: _Captured, rule: CacheRule) -> None:
+        """Cache a successful response unless it opts out or is too large."""
+        if captured.status != 200 or len(captured.body) > self.max_entry_bytes:
+            return
+        headers = {name.lower(): value for name, value in captured.headers}
+        if b"set-cookie" in headers or b"no-store" in headers.get(b"cache-control", b""):
+            return
+        entry = CachedResponse(
+            status=captured.status,
+            body=captured.body,
+            content_type=headers.get(b"content-type", b"application/json").decode("latin-1"),
+            etag='"' + hashlib.blake2b(captured.body, digest_size=16).hexdigest() + '"',
+            stored_at=time.time()
+        )
+        await self.cache.set(key, entry, rule.ttl + rule.stale_while_revalidate)
+
+    @staticmethod
+    async def _send_captured(captured: _Captured, send: Send) -> None:
+        await send({"type": "http.response.start", "status": captured.status, "headers": captured.headers})
+        await send({"type": "http.response.body", "body": captured.body})
+
+    @staticmethod
+    async def _send_entry(
+        entry: CachedResponse,
+        rule: CacheRule,
+        age: float,
+        result: str,
+        send: Send,
+        not_modified: bool = False
+    ) -> None:
+        max_age = max(0, int(rule.ttl - age))
+        headers = [
+            (b"etag", entry.etag.encode()),
+            (b"cache-control", (
+                f"public, max-age={max_age}, stale-while-revalidate={int(rule.stale_while_revalidate)}"
+            ).encode()),
+            (b"age", str(int(age)).encode()),
+            (b"x-cache", result.upper().encode()),
+        ]
+        if not_modified:
+            await send({"type": "http.response.start", "status": 304, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        headers += [
+            (b"content-type", entry.content_type.encode()),
+            (b"content-length", str(len(entry.body)).encode()),
+        ]
+        await send({"type": "http.response.start", "status": entry.status, "headers": headers})
+        await send({"type": "http.response.body", "body": entry.body})
+
+
+def response_cache_from_env() -> Optional[ResponseCache]:
+    """Build the response cache from environment settings.
+
+    ``SPR_RESPONSE_CACHE=0`` disables it, ``SPR_RESPONSE_CACHE_MB`` sets the
+    memory budget (64), and either ``SPR_RESPONSE_CACHE_REDIS_URL`` or
+    ``SPR_RESPONSE_CACHE_DIR`` adds a shared Redis or local SQLite tier.
+
+    Returns:
+        ResponseCache or None when disabled
+    """
+    if os.getenv("SPR_RESPONSE_CACHE", "1") == "0":
+        return None
+
+    memory = MemoryBackend(int(float(os.getenv("SPR_RESPONSE_CACHE_MB", "64")) * 1024 * 1024))
+    shared = None
+    redis_url = os.getenv("SPR_RESPONSE_CACHE_REDIS_URL")
+    cache_dir = os.getenv("SPR_RESPONSE_CACHE_DIR")
+    if redis_url:
+        shared = RedisBackend(redis_url)
+    elif cache_dir:
+        shared = SQLiteBackend(Path(cache_dir) / "responses.db")
+    return ResponseCache(memory, shared)
@@ -0,0 +1,125 @@
+"""Background job endpoints: submit, poll, fetch results and stream progress."""
+
+import asyncio
+from typing import Any, AsyncIterator, Dict, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from pydantic import BaseModel, Field
+from starlette.responses import StreamingResponse
+
+from ..jobs import JOB_HANDLERS, Job, JobQueue, JobStatus
+from ..logging_config import get_logger
+from .serialization import FastJSONResponse
+from .streaming import Record, negotiate_stream_format, stream_records
+
+router = APIRouter(prefix="/api/v1/jobs", tags=["jobs"])
+logger = get_logger(__name__)
+
+# Seconds between queue polls while streaming a job's progress
+EVENTS_POLL_INTERVAL = 0.5
+MAX_RESULT_TTL = 7 * 24 * 3600
+
+
+class JobRequest(BaseModel):
+    """Request model for submitting a job."""
+    kind: str = Field(..., description="Job kind, e.g. playlist_import or feature_backfill")
+    params: Dict[str, Any] = Field(default_factory=dict, description="Handler parameters")
+    ttl_seconds: Optional[float] = Field(
+        None, gt=0, le=MAX_RESULT_TTL, description="Seconds to keep the result"
+    )
+
+
+def get_job_queue(request: Request) -> JobQueue:
+    """Get the application's job queue."""
+    queue = getattr(request.app.state, "job_queue", None)
+    if queue is None:
+        raise HTTPException(status_code=503, detail="Job queue not available")
+    return queue
+
+
+def _job_response(job: Job) -> Dict[str, Any]:
+    base = f"{router.prefix}/{job.id}"
+    return {
+        **job.to_dict(),
+        "links": {"status": base, "result": f"{base}/result", "events": f"{base}/events"},
+    }
+
+
+async def _get_job(queue: JobQueue, job_id: str) -> Job:
+    job = await asyncio.to_thread(queue.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.post("", status_code=202)
+async def submit_job(
+    request: JobRequest,
+    queue: JobQueue = Depends(get_job_queue)
+) -> Dict[str, Any]:
+    """Queue a job; an identical queued, running or finished job is returned instead."""
+    if request.kind not in JOB_HANDLERS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown job kind '{request.kind}'; expected one of {sorted(JOB_HANDLERS)}"
+        )
+    job = await asyncio.to_thread(queue.submit, request.kind, request.params, request.ttl_seconds)
+    return _job_response(job)
+
+
+@router.get("")
+async def get_job_stats(queue: JobQueue = Depends(get_job_queue)) -> Dict[str, Any]:
+    """Get job counts by status and the available job kinds."""
+    return {
+        "jobs": await asyncio.to_thread(queue.stats),
+        "kinds": sorted(JOB_HANDLERS),
+    }
+
+
+@router.get("/{job_id}")
+async def get_job(job_id: str, queue: JobQueue = Depends(get_job_queue)) -> Dict[str, Any]:
+    """Get a job's status and progress."""
+    return _job_response(await _get_job(queue, job_id))
+
+
+@router.get("/{job_id}/result", response_class=FastJSONResponse)
+async def get_job_result(job_id: str, queue: JobQueue = Depends(get_job_queue)) -> FastJSONResponse:
+    """Get a finished job's result; 409 while it is queued or running, or when it failed."""
+    job = await _get_job(queue, job_id)
+    if job.status != JobStatus.SUCCEEDED:
+        detail = f"Job is {job.status}"
+        if job.error:
+            detail += f": {job.error}"
+        raise HTTPException(status_code=409, detail=detail)
+    return FastJSONResponse({"id": job.id, "kind": job.kind, "result": job.result})
+
+
+@router.get("/{job_id}/events")
+async def stream_job_events(
+    job_id: str,
+    http_request: Request,
+    stream_format: Optional[str] = Query(default=None, alias="format", pattern="^(ndjson|sse)$"),
+    queue: JobQueue = Depends(get_job_queue)
+) -> StreamingResponse:
+    """Stream a job's progress as NDJSON or SSE.
+
+    A ``progress`` record is sent whenever the status, progress or message
+    changes, and a final ``done`` record when the job finishes.
+    """
+    job = await _get_job(queue, job_id)
+
+    async def records() -> AsyncIterator[Record]:
+        current: Optional[Job] = job
+        last_state = None
+        while current is not None:
+            state = (current.status, current.progress, current.message)
+            if state != last_state:
+                last_state = state
+                yield ("done" if current.finished else "progress"), current.to_dict()
+            if current.finished:
+                return
+            await asyncio.sleep(EVENTS_POLL_INTERVAL)
+            current = await asyncio.to_thread(queue.get, job_id)
+        yield "error", {"detail": "Job expired"}
+
+    return stream_records(records(), negotiate_stream_format(http_request, stream_format))
@@ -1,22 +1,45 @@
 """Modern FastAPI routes for song recommendation system."""
 
-from typing import List, Dict, Any, Optional
+import time
+from typing import List, Dict, Any, AsyncIterator, Optional, Union
 from pathlib import Path
 
 from fastapi import APIRouter, Depends, HTTPException, Request, Query
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel, Field, validator
 
 from ..core.spotify import SpotifyClient, SpotifyTrack
 from ..exceptions import SpotifyAPIError, DataValidationError
 from ..logging_config import get_logger
+from ..metrics import Trace, metrics
+from .serialization import FastJSONResponse, encode_models
+from .streaming import Record, negotiate_stream_format, stream_records
 
 # Initialize router and templates
 router = APIRouter(prefix="/api/v1", tags=["recommendations"])
 templates = Jinja2Templates(directory="templates")
 logger = get_logger(__name__)
 
+# Query parameter selecting row (list of objects) or columnar track lists
+FORMAT_QUERY = Query(
+    default="rows",
+    alias="format",
+    pattern="^(rows|columnar)$",
+    description="Track list layout: 'rows' or compact 'columnar'"
+)
+
+# Query parameter selecting the framing of streaming endpoints
+STREAM_FORMAT_QUERY = Query(
+    default=None,
+    alias="format",
+    pattern="^(ndjson|sse)$",
+    description="Stream framing: 'ndjson' or 'sse' (default from the Accept header)"
+)
+
+# Tracks per record when streaming recommendations
+STREAM_BATCH_SIZE = 20
+
 
 class RecommendationRequest(BaseModel):
     """Request model for track recommendations."""
@@ -69,10 +92,11 @@ class SearchRequest(BaseModel):
 
 class RecommendationResponse(BaseModel):
     """Response model for recommendations."""
-    recommendations: List[Dict[str, Any]]
+    recommendations: Union[List[Dict[str, Any]], Dict[str, List[Any]]]
     count: int
     processing_time_ms: float
     algorithm_used: str = "spotify_recommendations"
+    stage_timings_ms: Dict[str, float] = Field(default_factory=dict)
 
 
 class PlaylistResponse(BaseModel):
@@ -80,21 +104,28 @@ class PlaylistResponse(BaseModel):
     playlist_id: str
     name: str
     description: Optional[str]
-    tracks: List[Dict[str, Any]]
+    tracks: Union[List[Dict[str, Any]], Dict[str, List[Any]]]
     track_count: int
 
 
+# Process-wide Spotify client, shared so its caches survive across requests
+_spotify_client: Optional[SpotifyClient] = None
+
+
 # Dependency to get Spotify client
 async def get_spotify_client() -> SpotifyClient:
-    """Get Spotify client instance."""
-    try:
-        return await SpotifyClient.from_env()
-    except Exception as e:
-        logger.error(f"Failed to create Spotify client: {e}")
-        raise HTTPException(
-            status_code=500,
-            detail="Failed to initialize Spotify client"
-        )
+    """Get the shared Spotify client instance, creating it on first use."""
+    global _spotify_client
+    if _spotify_client is None:
+        try:
+            _spotify_client = SpotifyClient.from_env()
+        except Exception as e:
+            logger.error(f"Failed to create Spotify client: {e}")
+            raise HTTPException(
+                status_code=500,
+                detail="Failed to initialize Spotify client"
+            )
+    return _spotify_client
 
 
 @router.get("/", response_class=HTMLResponse)
@@ -117,55 +148,71 @@ async def home(request: Request) -> HTMLResponse:
 
 
 @router.get("/health")
-async def health_check() -> Dict[str, str]:
+async def health_check(request: Request) -> Dict[str, Any]:
     """Health check endpoint."""
+    serving_state = getattr(request.app.state, "serving_state", None)
     return {
         "status": "healthy",
         "service": "song-recommendation-api",
-        "version": "2.0.0"
+        "version": "2.0.0",
+        "model_version": serving_state.model_version if serving_state is not None else None
     }
 
 
-@router.post("/recommendations", response_model=RecommendationResponse)
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics() -> PlainTextResponse:
+    """Expose counters and latency histograms in the Prometheus text format."""
+    return PlainTextResponse(
+        metrics.render_prometheus(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+@router.post(
+    "/recommendations",
+    response_model=RecommendationResponse,
+    response_class=FastJSONResponse
+)
 async def get_recommendations(
     request: RecommendationRequest,
+    response_format: str = FORMAT_QUERY,
     spotify: SpotifyClient = Depends(get_spotify_client)
-) -> RecommendationResponse:
+) -> FastJSONResponse:
     """Get song recommendations based on track IDs."""
-    import time
-    start_time = time.time()
-    
+    with metrics.trace() as trace:
+        return await _get_recommendations(request, spotify, trace, response_format)
+
+
+async def _get_recommendations(
+    request: RecommendationRequest,
+    spotify: SpotifyClient,
+    trace: Trace,
+    response_format: str = "rows"
+) -> FastJSONResponse:
+    """Serve :func:`get_recommendations` inside an open metrics trace."""
     try:
-        # Prepare target features
-        target_features = {}
-        if request.target_energy is not None:
-            target_features["target_energy"] = request.target_energy
-        if request.target_danceability is not None:
-            target_features["target_danceability"] = request.target_danceability
-        if request.target_valence is not None:
-            target_features["target_valence"] = request.target_valence
-        
         # Get recommendations
-        tracks = await spotify.get_recommendations(
-            seed_tracks=request.track_ids,
-            limit=request.limit,
-            target_features=target_features if target_features else None
-        )
+        with metrics.stage("upstream_recommendations"):
+            tracks = await spotify.get_recommendations(
+                seed_tracks=request.track_ids,
+                limit=request.limit,
+                target_features=_target_features(request)
+            )
         
         # Calculate processing time
-        processing_time = (time.time() - start_time) * 1000
-        
-        # Convert to response format
-        recommendations = [track.dict() for track in tracks]
+        processing_time = trace.elapsed * 1000
         
-        logger.info(f"Generated {len(recommendations)} recommendations in {processing_time:.2f}ms")
+        logger.info(f"Generated {len(tracks)} recommendations in {processing_time:.2f}ms")
         
-        return RecommendationResponse(
-            recommendations=recommendations,
-            count=len(recommendations),
-            processing_time_ms=processing_time,
-            algorithm_used="spotify_recommendations"
-        )
+        # Tracks are validated models already; encode them directly, bypassing response_model
+        with metrics.stage("serialize"):
+            return FastJSONResponse({
+                "recommendations": encode_models(tracks, response_format),
+                "count": len(tracks),
+                "processing_time_ms": processing_time,
+                "algorithm_used": "spotify_recommendations",
+                "stage_timings_ms": trace.stage_timings_ms()
+            })
         
     except SpotifyAPIError as e:
         logger.error(f"Spotify API error in recommendations: {e}")
@@ -187,11 +234,61 @@ async def get_recommendations(
         )
 
 
-@router.get("/playlist/{playlist_id}", response_model=PlaylistResponse)
+def _target_features(request: RecommendationRequest) -> Optional[Dict[str, float]]:
+    """Collect the target audio features set on a recommendation request."""
+    target_features = {}
+    if request.target_energy is not None:
+        target_features["target_energy"] = request.target_energy
+    if request.target_danceability is not None:
+        target_features["target_danceability"] = request.target_danceability
+    if request.target_valence is not None:
+        target_features["target_valence"] = request.target_valence
+    return target_features or None
+
+
+@router.post("/recommendations/stream")
+async def stream_recommendations(
+    request: RecommendationRequest,
+    http_request: Request,
+    stream_format: Optional[str] = STREAM_FORMAT_QUERY,
+    spotify: SpotifyClient = Depends(get_spotify_client)
+) -> StreamingResponse:
+    """Stream recommendations as NDJSON or SSE.
+    
+    A ``start`` record is sent immediately, then ``tracks`` records of up to
+    20 tracks each, then a ``summary`` with the count and stage timings.
+    """
+    async def records() -> AsyncIterator[Record]:
+        with metrics.trace() as trace:
+            yield "start", {"seed_tracks": request.track_ids, "limit": request.limit}
+            with metrics.stage("upstream_recommendations"):
+                tracks = await spotify.get_recommendations(
+                    seed_tracks=request.track_ids,
+                    limit=request.limit,
+                    target_features=_target_features(request)
+                )
+            for start in range(0, len(tracks), STREAM_BATCH_SIZE):
+                yield "tracks", tracks[start:start + STREAM_BATCH_SIZE]
+            yield "summary", {
+                "count": len(tracks),
+                "processing_time_ms": trace.elapsed * 1000,
+                "algorithm_used": "spotify_recommendations",
+                "stage_timings_ms": trace.stage_timings_ms()
+            }
+    
+    return stream_records(records(), negotiate_stream_format(http_request, stream_format))
+
+
+@router.get(
+    "/playlist/{playlist_id}",
+    response_model=PlaylistResponse,
+    response_class=FastJSONResponse
+)
 async def get_playlist(
     playlist_id: str,
+    response_format: str = FORMAT_QUERY,
     spotify: SpotifyClient = Depends(get_spotify_client)
-) -> PlaylistResponse:
+) -> FastJSONResponse:
     """Get tracks from a playlist."""
     try:
         # Get playlist tracks
@@ -204,18 +301,15 @@ async def get_playlist(
             "description": "Generated playlist",
         }
         
-        # Convert to response format
-        track_dicts = [track.dict() for track in tracks]
-        
-        logger.info(f"Fetched {len(track_dicts)} tracks from playlist {playlist_id}")
+        logger.info(f"Fetched {len(tracks)} tracks from playlist {playlist_id}")
         
-        return PlaylistResponse(
-            playlist_id=playlist_id,
-            name=playlist_info["name"],
-            description=playlist_info["description"],
-            tracks=track_dicts,
-            track_count=len(track_dicts)
-        )
+        return FastJSONResponse({
+            "playlist_id": playlist_id,
+            "name": playlist_info["name"],
+            "description": playlist_info["description"],
+            "tracks": encode_models(tracks, response_format),
+            "track_count": len(tracks)
+        })
         
     except SpotifyAPIError as e:
         logger.error(f"Spotify API error getting playlist: {e}")
@@ -231,14 +325,46 @@ async def get_playlist(
         )
 
 
-@router.get("/search")
+@router.get("/playlist/{playlist_id}/stream")
+async def stream_playlist(
+    playlist_id: str,
+    http_request: Request,
+    stream_format: Optional[str] = STREAM_FORMAT_QUERY,
+    spotify: SpotifyClient = Depends(get_spotify_client)
+) -> StreamingResponse:
+    """Stream a playlist's tracks as NDJSON or SSE.
+    
+    Each page of the playlist is sent as a ``tracks`` record as soon as it
+    and every page before it has arrived, followed by a ``summary``.
+    """
+    async def records() -> AsyncIterator[Record]:
+        start = time.perf_counter()
+        track_count = 0
+        pages = 0
+        async for page_tracks in spotify.iter_playlist_tracks(playlist_id):
+            track_count += len(page_tracks)
+            pages += 1
+            yield "tracks", page_tracks
+        logger.info(f"Streamed {track_count} tracks from playlist {playlist_id}")
+        yield "summary", {
+            "playlist_id": playlist_id,
+            "track_count": track_count,
+            "pages": pages,
+            "processing_time_ms": (time.perf_counter() - start) * 1000
+        }
+    
+    return stream_records(records(), negotiate_stream_format(http_request, stream_format))
+
+
+@router.get("/search", response_class=FastJSONResponse)
 async def search_tracks(
     query: str = Query(..., min_length=1, max_length=100),
     limit: int = Query(default=20, ge=1, le=50),
     market: str = Query(default="US", regex="^[A-Z]{2}$"),
+    response_format: str = FORMAT_QUERY,
     spotify: SpotifyClient = Depends(get_spotify_client)
-) -> List[Dict[str, Any]]:
-    """Search for tracks."""
+) -> FastJSONResponse:
+    """Search for tracks; ``format=columnar`` returns one list per field instead of a list of tracks."""
     try:
         tracks = await spotify.search_tracks(
             query=query,
@@ -246,12 +372,9 @@ async def search_tracks(
             market=market
         )
         
-        # Convert to response format
-        track_dicts = [track.dict() for track in tracks]
-        
-        logger.info(f"Found {len(track_dicts)} tracks for query: {query}")
+        logger.info(f"Found {len(tracks)} tracks for query: {query}")
         
-        return track_dicts
+        return FastJSONResponse(encode_models(tracks, response_format))
         
     except SpotifyAPIError as e:
         logger.error(f"Spotify API error in search: {e}")
@@ -267,11 +390,11 @@ async def search_tracks(
         )
 
 
-@router.get("/track/{track_id}")
+@router.get("/track/{track_id}", response_class=FastJSONResponse)
 async def get_track_details(
     track_id: str,
     spotify: SpotifyClient = Depends(get_spotify_client)
-) -> Dict[str, Any]:
+) -> FastJSONResponse:
     """Get detailed track information."""
     try:
         track = await spotify.get_track(track_id)
@@ -284,7 +407,7 @@ async def get_track_details(
         
         logger.debug(f"Fetched track details for: {track_id}")
         
-        return track.dict()
+        return FastJSONResponse(track)
         
     except SpotifyAPIError as e:
         logger.error(f"Spotify API error getting track: {e}")
@@ -302,11 +425,11 @@ async def get_track_details(
         )
 
 
-@router.get("/track/{track_id}/features")
+@router.get("/track/{track_id}/features", response_class=FastJSONResponse)
 async def get_track_features(
     track_id: str,
     spotify: SpotifyClient = Depends(get_spotify_client)
-) -> Dict[str, Any]:
+) -> FastJSONResponse:
     """Get audio features for a track."""
     try:
         features = await spotify.get_audio_features(track_id)
@@ -319,7 +442,7 @@ async def get_track_features(
         
         logger.debug(f"Fetched audio features for: {track_id}")
         
-        return features.dict()
+        return FastJSONResponse(features)
         
     except SpotifyAPIError as e:
         logger.error(f"Spotify API error getting features: {e}")
@@ -339,6 +462,7 @@ async def get_track_features(
 
 @router.get("/stats")
 async def get_api_stats(
+    http_request: Request,
     spotify: SpotifyClient = Depends(get_spotify_client)
 ) -> Dict[str, Any]:
     """Get API statistics and cache information."""
@@ -348,11 +472,17 @@ async def get_api_stats(
             "track_cache_size": len(spotify._track_cache),
             "features_cache_size": len(spotify._features_cache),
         }
+        response_cache = getattr(http_request.app.state, "response_cache", None)
+        if response_cache is not None:
+            cache_stats["response_cache"] = response_cache.stats()
+        
+        serving_state = getattr(http_request.app.state, "serving_state", None)
         
         return {
             "api_version": "2.0.0",
             "cache_stats": cache_stats,
             "spotify_client_initialized": True,
+            "serving": serving_state.describe() if serving_state is not None else None,
         }
         
     except Exception as e:
@@ -0,0 +1,94 @@
+"""Fast JSON encoding for API responses.
+
+Routes hand trusted Pydantic models (``SpotifyTrack``, ``AudioFeatures``)
+straight to :class:`FastJSONResponse`, which encodes them to bytes in one
+pass instead of converting each to a dict and then having FastAPI
+re-validate and re-encode the result against the route's
+``response_model``. ``orjson`` is used when installed (``prod`` extra),
+with the standard library encoder as a fallback.
+
+Large track lists can also be returned column-oriented (see
+:func:`to_columns`), which drops the repeated field names from every row.
+"""
+
+import json
+from typing import Any, Dict, List, Sequence
+
+from pydantic import BaseModel
+from starlette.responses import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the install
+    orjson = None
+
+RESPONSE_FORMATS = ("rows", "columnar")
+
+
+def _encode_default(obj: Any) -> Any:
+    """Encode objects the JSON encoder doesn't know natively."""
+    if isinstance(obj, BaseModel):
+        # Field values of models built from validated data; no need to re-validate
+        return obj.__dict__
+    if hasattr(obj, "tolist"):  # numpy scalars and arrays
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Encode ``content`` as compact UTF-8 JSON.
+
+    Args:
+        content: JSON-compatible data, which may contain Pydantic models
+
+    Returns:
+        Encoded JSON bytes
+    """
+    if orjson is not None:
+        return orjson.dumps(content, default=_encode_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content,
+        default=_encode_default,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":")
+    ).encode("utf-8")
+
+
+def to_columns(models: Sequence[BaseModel]) -> Dict[str, List[Any]]:
+    """Transpose models into one list of values per field.
+
+    Args:
+        models: Models of a single type
+
+    Returns:
+        Mapping of field name to the values of that field, in model order
+    """
+    if not models:
+        return {}
+    fields = type(models[0]).model_fields
+    return {name: [model.__dict__[name] for model in models] for name in fields}
+
+
+def encode_models(models: Sequence[BaseModel], response_format: str = "rows") -> Any:
+    """Shape a list of models for :func:`dumps` in the requested format.
+
+    Args:
+        models: Models to return
+        response_format: ``rows`` for a list of objects, ``columnar`` for :func:`to_columns`
+
+    Returns:
+        The models themselves, or their columns
+    """
+    if response_format == "columnar":
+        return to_columns(models)
+    return models
+
+
+class FastJSONResponse(Response):
+    """JSON response encoded with :func:`dumps`."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
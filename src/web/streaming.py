@@ -0,0 +1,86 @@
+"""Incremental NDJSON and Server-Sent Events responses.
+
+Streaming routes produce ``(event, data)`` records: usually one or more
+``tracks`` records carrying a batch of tracks each, then a final
+``summary``. :func:`stream_records` frames them as newline-delimited JSON
+(``{"event": ..., "data": ...}`` per line) or as SSE events, and writes
+each one as soon as it is produced. Headers are sent before the first
+record, so an upstream failure mid-stream is reported as a final
+``error`` record instead of an HTTP status.
+"""
+
+from typing import Any, AsyncIterator, Optional, Tuple
+
+from fastapi import Request
+from starlette.responses import StreamingResponse
+
+from ..logging_config import get_logger
+from .serialization import dumps
+
+logger = get_logger(__name__)
+
+STREAM_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+}
+
+Record = Tuple[str, Any]
+
+
+def negotiate_stream_format(request: Request, requested: Optional[str]) -> str:
+    """Pick the stream framing from the ``format`` parameter, else the Accept header.
+
+    Args:
+        request: Incoming request
+        requested: Explicit ``ndjson`` or ``sse``, if given
+
+    Returns:
+        ``ndjson`` or ``sse``
+    """
+    if requested:
+        return requested
+    if "text/event-stream" in request.headers.get("accept", ""):
+        return "sse"
+    return "ndjson"
+
+
+def encode_record(event: str, data: Any, stream_format: str) -> bytes:
+    """Frame one record.
+
+    Args:
+        event: Record type, e.g. ``tracks`` or ``summary``
+        data: JSON-compatible payload, which may contain Pydantic models
+        stream_format: ``ndjson`` or ``sse``
+
+    Returns:
+        Encoded record including its trailing delimiter
+    """
+    if stream_format == "sse":
+        return b"event: " + event.encode() + b"\ndata: " + dumps(data) + b"\n\n"
+    return dumps({"event": event, "data": data}) + b"\n"
+
+
+async def _encode_records(records: AsyncIterator[Record], stream_format: str) -> AsyncIterator[bytes]:
+    try:
+        async for event, data in records:
+            yield encode_record(event, data, stream_format)
+    except Exception as e:
+        logger.error(f"Error while streaming response: {e}")
+        yield encode_record("error", {"detail": "Stream aborted: upstream request failed"}, stream_format)
+
+
+def stream_records(records: AsyncIterator[Record], stream_format: str) -> StreamingResponse:
+    """Stream ``records`` to the client as they are produced.
+
+    Args:
+        records: Async iterator of ``(event, data)`` pairs
+        stream_format: ``ndjson`` or ``sse``
+
+    Returns:
+        StreamingResponse with buffering disabled along the way
+    """
+    return StreamingResponse(
+        _encode_records(records, stream_format),
+        media_type=STREAM_MEDIA_TYPES[stream_format],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
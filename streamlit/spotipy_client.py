@@ -1,7 +1,12 @@
 import os
 import re
+import sys
 import base64
+import io
+import hashlib
+import json
 import datetime
+import threading
 import platform
 from numpy.core.arrayprint import format_float_positional
 import requests
@@ -22,7 +27,14 @@ import seaborn as sns
 from dotenv import load_dotenv
 
 from wordcloud import WordCloud
-import matplotlib.pyplot as plt
+import matplotlib.image as mpimg
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+sys.path.insert(1, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.core.pagination import iter_pages_threaded
+from src.mpd import MISSING_ID, TrackDictionary, TrackFeatureStore, iter_playlist_means, load_or_build_index
+from src.ml import FEATURE_NAMES, ArtifactKMeans, ArtifactScaler, TSNEPlacer, load_artifacts, resolve_artifact_dir
 
 
 cwd = os.getcwd()
@@ -56,8 +68,19 @@ cwd = os.getcwd()
 
 log_filename = os.path.join(cwd, 'data', 'read_spotify_mpd_log.txt')
 feedback_db_file = os.path.join(cwd, 'data', 'user_feedback.db')
-
-# Pickled models
+artist_genres_db_file = os.path.join(cwd, 'data', 'artist_genres.db')
+
+# Artist genres rarely change, keep them for a week
+ARTIST_GENRES_TTL = 7 * 24 * 3600
+# Maximum number of IDs accepted by Spotify's several-artists endpoint
+ARTISTS_BATCH_SIZE = 50
+# Maximum page sizes of the playlist items and saved tracks endpoints
+PLAYLIST_PAGE_SIZE = 100
+SAVED_TRACKS_PAGE_SIZE = 50
+PAGE_FETCH_WORKERS = 8
+
+# Versioned model artifacts, with the pickled models as fallback
+artifacts_path = '../model/artifacts'
 model_path = '../model/KMeans_K17_20000_sample_model.sav'
 tsne_path = '../model/openTSNETransformer.sav'
 scaler_path = '../model/StdScaler.sav'
@@ -65,6 +88,22 @@ playlists_db_path = '../data/spotify_20K_playlists.db'
 train_data_scaled_path = '../data/scaled_data.csv'
 openTSNE_path = '../data/openTSNE_20000.csv'
 
+def get_model_version():
+    """
+    Version key for the model artifacts and data backing SPR_ML_Model.
+    Changes whenever one of the files is replaced, so cached model handles keyed by it are reloaded.
+    :return: version string
+    """
+    artifact_dir = resolve_artifact_dir(artifacts_path)
+    stamps = [artifact_dir.name if artifact_dir is not None else 'pickle']
+    for path in (model_path, tsne_path, scaler_path, playlists_db_path, train_data_scaled_path, openTSNE_path):
+        try:
+            stat = os.stat(path)
+            stamps.append('{}:{}'.format(int(stat.st_mtime), stat.st_size))
+        except OSError:
+            stamps.append('missing')
+    return hashlib.sha1('|'.join(stamps).encode()).hexdigest()[:12]
+
 def get_public_ip():
     try:
         data = str(urlopen('http://checkip.dyndns.com/').read())
@@ -201,33 +240,292 @@ class User_FeedbackDB():
     def add_feedback_df(self, feedback_df):
         feedback_df.to_sql(name='feedback', con=self.conn, if_exists='replace', index=False)
 
+class ArtistGenresDB():
+    """
+    Artist -> genres lookup with a TTL, shared by all sessions of the server process.
+    Lookups go to an in-memory cache first, then a persisted SQLite table, and only the
+    remaining artists are fetched from Spotify, deduplicated and 50 per request.
+    """
+    _memory_cache = {}
+    _lock = threading.Lock()
+
+    def __init__(self, db_file=None, ttl=ARTIST_GENRES_TTL):
+        self.db_file = db_file or artist_genres_db_file
+        self.ttl = ttl
+        self.create_table()
+
+    def create_connection(self):
+        """ create a database connection to the SQLite database specified by db_file
+        :return: Connection object or None
+        """
+        try:
+            os.makedirs(os.path.dirname(self.db_file), exist_ok=True)
+            return sqlite3.connect(self.db_file)
+        except (Error, OSError) as e:
+            print(e)
+            return None
+
+    def create_table(self):
+        """ create an artist_genres table
+        :return: None
+        """
+        conn = self.create_connection()
+        if conn is None:
+            return
+        try:
+            conn.execute(""" CREATE TABLE IF NOT EXISTS artist_genres (
+                                artist_uri text PRIMARY KEY,
+                                genres text NOT NULL,
+                                fetched_at real NOT NULL
+                            ); """)
+            conn.commit()
+        except Error as e:
+            print(e)
+            print('Failed to create artist_genres table')
+        finally:
+            conn.close()
+
+    def _read_db(self, artist_uris, min_fetched_at):
+        conn = self.create_connection()
+        if conn is None:
+            return {}
+        found = {}
+        try:
+            for i in range(0, len(artist_uris), 500):
+                chunk = artist_uris[i:i + 500]
+                rows = conn.execute(
+                    'SELECT artist_uri, genres, fetched_at FROM artist_genres WHERE fetched_at >= ? AND artist_uri IN ({})'.format(','.join('?' * len(chunk))),
+                    [min_fetched_at] + chunk).fetchall()
+                for artist_uri, genres, fetched_at in rows:
+                    found[artist_uri] = (json.loads(genres), fetched_at)
+        except Error as e:
+            print(e)
+        finally:
+            conn.close()
+        return found
+
+    def _write_db(self, entries):
+        conn = self.create_connection()
+        if conn is None:
+            return
+        try:
+            conn.executemany('INSERT OR REPLACE INTO artist_genres(artist_uri, genres, fetched_at) VALUES(?,?,?)',
+                             [(artist_uri, json.dumps(genres), fetched_at) for artist_uri, (genres, fetched_at) in entries.items()])
+            conn.commit()
+        except Error as e:
+            print(e)
+            print('Failed to save artist genres')
+        finally:
+            conn.close()
+
+    def get_artists_genres(self, sp, artist_uris):
+        """
+        Get genres for the given artists
+        :param sp: spotipy client used for artists missing from the cache
+        :param artist_uris: artist ids or uris, duplicates allowed
+        :return: dict artist_uri -> list of genres
+        """
+        now = time.time()
+        min_fetched_at = now - self.ttl
+        unique_uris = list(dict.fromkeys(artist_uris))
+
+        genres = {}
+        with self._lock:
+            for artist_uri in unique_uris:
+                cached = self._memory_cache.get(artist_uri)
+                if cached is not None and cached[1] >= min_fetched_at:
+                    genres[artist_uri] = cached[0]
+
+        missing = [artist_uri for artist_uri in unique_uris if artist_uri not in genres]
+        if missing:
+            from_db = self._read_db(missing, min_fetched_at)
+            with self._lock:
+                self._memory_cache.update(from_db)
+            genres.update({artist_uri: entry[0] for artist_uri, entry in from_db.items()})
+            missing = [artist_uri for artist_uri in missing if artist_uri not in from_db]
+
+        fetched = {}
+        for i in range(0, len(missing), ARTISTS_BATCH_SIZE):
+            chunk = missing[i:i + ARTISTS_BATCH_SIZE]
+            try:
+                artists = sp.artists(chunk)['artists']
+            except Exception as e:
+                print(e)
+                print('Failed to get artists: {}'.format(chunk))
+                continue
+            for artist_uri, artist in zip(chunk, artists):
+                fetched[artist_uri] = (artist['genres'] if artist else [], now)
+
+        if fetched:
+            with self._lock:
+                self._memory_cache.update(fetched)
+            self._write_db(fetched)
+            genres.update({artist_uri: entry[0] for artist_uri, entry in fetched.items()})
+        return genres
+
+def load_scaled_training_data(db_path, scaler, labels_by_pid):
+    """
+    Scaled mean audio features of every labelled playlist, recomputed from the database
+    :param db_path: playlists database
+    :param scaler: scaler of the model the data is for
+    :param labels_by_pid: cluster labels indexed by pid
+    :return: dataframe indexed by pid with one column per scaled feature and a cluster column
+    """
+    frames = []
+    for pids, means in iter_playlist_means(db_path):
+        keep = np.isin(pids, labels_by_pid.index)
+        frames.append(pd.DataFrame(scaler.transform(means[keep]), index=pids[keep]))
+    scaled_df = pd.concat(frames) if frames else pd.DataFrame(columns=range(len(FEATURE_NAMES)))
+    scaled_df['cluster'] = pd.Categorical(labels_by_pid.reindex(scaled_df.index).to_numpy())
+    return scaled_df
+
 class SPR_ML_Model():
+    """
+    Models and data used to serve recommendations. One instance is shared by every session of the
+    Streamlit server, so it must be treated as read-only: callers copy before mutating.
+    """
     def __init__(self):
         """
         Inits class with hard coded values for the Spotify instance and gets the paths for all the models and data
         """
+        self.version = get_model_version()
+
         # Model loading
-        self.model = pickle.load(open(model_path, 'rb'))
-        self.tsne_transformer = pickle.load(open(tsne_path, 'rb'))
-        self.scaler = pickle.load(open(scaler_path, 'rb'))
+        self.artifacts = None
+        if resolve_artifact_dir(artifacts_path) is not None:
+            self.artifacts = load_artifacts(artifacts_path)
+            self.model = ArtifactKMeans.from_artifacts(self.artifacts)
+            self.scaler = ArtifactScaler.from_artifacts(self.artifacts)
+        else:
+            self.model = pickle.load(open(model_path, 'rb'))
+            self.scaler = pickle.load(open(scaler_path, 'rb'))
+        # Model version as RecommendationEngine reports it, which stored recommendations are compared against
+        self.artifact_version = self.artifacts.version if self.artifacts is not None else 'pickle'
+        self.tsne_transformer = None
+        if os.path.exists(tsne_path):
+            self.tsne_transformer = pickle.load(open(tsne_path, 'rb'))
 
         # Data loading
         self.playlists_db = playlists_db_path
         conn = sqlite3.connect(playlists_db_path)
         self.tracks_df = pd.read_sql('select * from tracks', conn)
         self.playlists_df = pd.read_sql('select * from playlists', conn)
-        self.playlists_df['cluster'] = pd.Categorical(self.model.labels_)
-        self.features_df = pd.read_sql('select * from features', conn)
+        self.cluster_labels = self.model.labels_
+        # Retrained models label playlists by pid instead of by row position
+        self.labels_by_pid = None
+        if self.artifacts is not None and self.artifacts.pids is not None:
+            self.labels_by_pid = pd.Series(self.artifacts.labels, index=self.artifacts.pids)
+            self.cluster_labels = self.labels_by_pid.reindex(self.playlists_df['pid']).astype('Int64').to_numpy()
+        self.playlists_df['cluster'] = pd.Categorical(self.cluster_labels)
+        # Dense (max_track_id + 1, 13) float32 features addressed by track_id
+        self.feature_store = TrackFeatureStore.from_frame(pd.read_sql('select * from features', conn))
         self.ratings_df = pd.read_sql('select * from ratings', conn)
         if conn:
             conn.close()
+
+        # Normalized track-name index, persisted next to the playlists database
+        self.track_index = load_or_build_index(playlists_db_path)
+        # track_uri <-> track_id translation, one hash lookup per track
+        self.track_dictionary = TrackDictionary.from_tracks(self.tracks_df['track_uri'].values, self.tracks_df['track_id'].values)
         
-        self.train_scaled_data = np.loadtxt(train_data_scaled_path, delimiter=',')
-        self.train_data_scaled_feats_df = pd.DataFrame(self.train_scaled_data)
-        self.train_data_scaled_feats_df['cluster'] = pd.Categorical(self.model.labels_)
+        # Rows of the scaled training data and of the t-SNE reference are indexed by pid
         self.openTSNE_df = pd.read_csv(openTSNE_path)
-        self.openTSNE_df['cluster'] = pd.Categorical(self.model.labels_)
+        if self.labels_by_pid is None:
+            # Legacy model: the CSVs hold the training playlists in label order, in the pickled scaler's space
+            self.train_scaled_data = np.loadtxt(train_data_scaled_path, delimiter=',')
+            self.train_data_scaled_feats_df = pd.DataFrame(self.train_scaled_data)
+            self.train_data_scaled_feats_df['cluster'] = pd.Categorical(self.cluster_labels)
+            self.openTSNE_df['cluster'] = pd.Categorical(self.cluster_labels)
+            tsne_reference = self.train_scaled_data
+        else:
+            # Retrained model: scaled_data.csv is in the old scaler's space, so rebuild the matrix from the
+            # database with this artifact's scaler, and relabel the t-SNE layout by pid
+            self.train_data_scaled_feats_df = load_scaled_training_data(playlists_db_path, self.scaler, self.labels_by_pid)
+            self.train_scaled_data = self.train_data_scaled_feats_df.drop(columns='cluster').to_numpy()
+            self.openTSNE_df = self.openTSNE_df[self.openTSNE_df.index.isin(self.train_data_scaled_feats_df.index)].copy()
+            self.openTSNE_df['cluster'] = pd.Categorical(self.labels_by_pid.reindex(self.openTSNE_df.index).to_numpy())
+            tsne_reference = self.train_scaled_data[self.train_data_scaled_feats_df.index.get_indexer(self.openTSNE_df.index)]
+        self.train_scaled_data.setflags(write=False)
+
+        # Fast t-SNE placement over the reference embedding, built once per model
+        if self.artifacts is not None and self.artifacts.has_tsne():
+            self.tsne_placer = TSNEPlacer.from_artifacts(self.artifacts)
+        else:
+            self.tsne_placer = TSNEPlacer(tsne_reference, self.openTSNE_df[['X', 'Y']].to_numpy())
+        # Filled lazily by concurrent sessions sharing this model
+        self._cluster_layers = {}
+        self._cluster_layers_lock = threading.Lock()
+
+    def get_cluster_layer(self, user_cluster=None):
+        """
+        Pre-rendered scatter of all reference playlists in t-SNE space, cached per highlighted cluster
+        :param user_cluster: cluster to highlight in purple, None to color every cluster
+        :return: (RGBA image, extent) to draw with imshow
+        """
+        key = 'all' if user_cluster is None else int(user_cluster)
+        layer = self._cluster_layers.get(key)
+        if layer is None:
+            with self._cluster_layers_lock:
+                layer = self._cluster_layers.get(key)
+                if layer is None:
+                    layer = self._cluster_layers[key] = render_cluster_layer(self.openTSNE_df, user_cluster)
+        return layer
+
+def render_cluster_layer(openTSNE_df, user_cluster=None):
+    """
+    Render the t-SNE scatter of all clusters once into an image
+    :param openTSNE_df: dataframe with X, Y and cluster columns
+    :param user_cluster: cluster to highlight in purple, None to color every cluster
+    :return: (RGBA image, extent)
+    """
+    palette = None
+    if user_cluster is not None:
+        palette = {c: 'purple' if c == user_cluster else 'darkgrey' for c in openTSNE_df.cluster.unique()}
+    # Figure API instead of pyplot: sessions render from their own threads and must not share pyplot state
+    fig = Figure(figsize=(5, 5))
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_axes([0, 0, 1, 1])
+    sns.scatterplot(ax=ax, x='X', y='Y', hue='cluster', style='cluster', data=openTSNE_df, legend=None, palette=palette)
+    ax.axis('off')
+    x0, x1 = ax.get_xlim()
+    y0, y1 = ax.get_ylim()
+    canvas.draw()
+    image = np.asarray(canvas.buffer_rgba()).copy()
+    return image, (x0, x1, y0, y1)
+
+def draw_user_on_cluster_layer(layer, user_tsne, title):
+    """
+    Draw the user star on top of a pre-rendered cluster layer
+    :param layer: (RGBA image, extent) from render_cluster_layer
+    :param user_tsne: user position in t-SNE space
+    :param title: figure title
+    :return: figure
+    """
+    image, extent = layer
+    fig = Figure(figsize=(5, 5))
+    ax = fig.subplots(1, 1)
+    ax.imshow(image, extent=extent, aspect='auto', interpolation='nearest')
+    ax.set_xlim(extent[0], extent[1])
+    ax.set_ylim(extent[2], extent[3])
+    ax.set_xlabel('X')
+    ax.set_ylabel('Y')
+    ax.scatter(x=user_tsne[0], y=user_tsne[1], color='yellow', marker='*', s=500)
+    ax.title.set_text(title)
+    return fig
         
+def wordcloud_fig(image, title):
+    "Figure showing a word cloud, given as a WordCloud, an image array or a base64 PNG from a wordcloud job"
+    if isinstance(image, str):
+        image = mpimg.imread(io.BytesIO(base64.b64decode(image)), format='png')
+    fig = Figure(figsize=(5, 5))
+    ax = fig.subplots(1, 1)
+    if image is not None:
+        ax.imshow(image, interpolation='bilinear')
+    ax.axis("off")
+    ax.title.set_text(title)
+    return fig
+
+
 class SpotifyRecommendations():
     """
     This Class will provide music recommendations in a form of Playlists
@@ -263,6 +561,8 @@ class SpotifyRecommendations():
         self.playlist_uri = playlist_uri
         self.song_name = song_name
         self.len_of_favs = 'all_time'
+        # 'fast' places the user with the kNN approximation, 'exact' runs openTSNE's transform
+        self.tsne_mode = 'fast'
         self.log_output = None
         sequential =['Greys', 'Purples', 'Blues', 'Greens', 'Oranges', 'Reds','YlOrBr', 'YlOrRd', 'OrRd', 'PuRd', 
                     'RdPu', 'BuPu', 'GnBu', 'PuBu', 'YlGnBu', 'PuBuGn', 'BuGn', 'YlGn']
@@ -322,15 +622,20 @@ class SpotifyRecommendations():
         return auth_url
 
     def set_ml_model(self, ml_model):
+        self.ml_model = ml_model
+
         # Model loading
         self.model = ml_model.model
         self.tsne_transformer = ml_model.tsne_transformer
+        self.tsne_placer = ml_model.tsne_placer
         self.scaler = ml_model.scaler
 
         # Data loading
         self.tracks_df = ml_model.tracks_df
+        self.track_index = ml_model.track_index
+        self.track_dictionary = ml_model.track_dictionary
         self.playlists_df = ml_model.playlists_df
-        self.features_df = ml_model.features_df
+        self.feature_store = ml_model.feature_store
         self.ratings_df = ml_model.ratings_df
         self.train_data_scaled_feats_df = ml_model.train_data_scaled_feats_df
         self.openTSNE_df = ml_model.openTSNE_df
@@ -345,18 +650,23 @@ class SpotifyRecommendations():
             track_uris_list = tracks_df['track_uri'].values
             self.log_output('Tracks in this list: ' + str(len(track_uris_list)))
         
-        self.log_output('Unique tracks in this list: ' + str(len(set(track_uris_list))))
-        # Find audio features if track_uri is already in the database:
-        tracks_df = self.tracks_df[self.tracks_df['track_uri'].isin(set(track_uris_list))][['track_id', 'track_uri']].copy()
-        exist_audio_feats_df = self.features_df[self.features_df['track_id'].isin(tracks_df['track_id'].values)].copy()
-        exist_audio_feats_df = exist_audio_feats_df.merge(tracks_df, on='track_id')
-        exist_audio_feats_df.drop(columns='track_id', inplace=True)
-        exist_audio_feats_df.rename(columns={'track_uri':'uri'}, inplace=True)
-        if len(exist_audio_feats_df) == len(set(track_uris_list)):
+        unique_uris = pd.unique(np.asarray(track_uris_list, dtype=object))
+        self.log_output('Unique tracks in this list: ' + str(len(unique_uris)))
+        # Find audio features if track_uri is already in the database: one gather by track_id
+        track_ids = self.track_dictionary.ids(unique_uris)
+        in_db = track_ids != MISSING_ID
+        found, feats = self.feature_store.lookup(track_ids[in_db])
+        exist_audio_feats_df = pd.DataFrame(feats, columns=self.feat_cols_user)
+        exist_audio_feats_df['uri'] = unique_uris[in_db][found]
+        if len(exist_audio_feats_df) == len(unique_uris):
             self.log_output('Got all audio features from database for tracks: ' + str(len(exist_audio_feats_df)))
             return exist_audio_feats_df
         
-        track_uris_list = list(set(track_uris_list) - set(tracks_df['track_uri'].tolist()))
+        track_uris_list = list(unique_uris[~in_db])
+        if not track_uris_list:
+            # Every track is in the database, some just have no features
+            self.log_output('Got audio features from database for tracks: ' + str(len(exist_audio_feats_df)))
+            return exist_audio_feats_df
 
         # Extract audio features from Spotify
         audio_feats = []
@@ -388,20 +698,20 @@ class SpotifyRecommendations():
     def get_tracks_from_playlist_or_user_favorites(self):
         if self.playlist_uri:
             self.log_output('---\nGetting all tracks for Playlist')
-            # Get all tracks in the playlist
-            results = self.sp.playlist(self.playlist_uri)['tracks']
-            tracks = results['items']
-            while results['next']:
-                results = self.sp.next(results)
-                tracks.extend(results['items'])
+            # Get all tracks in the playlist, remaining pages fetched concurrently
+            fetch_page = lambda offset: self.sp.playlist_items(
+                self.playlist_uri, limit=PLAYLIST_PAGE_SIZE, offset=offset)
+            page_size = PLAYLIST_PAGE_SIZE
         else:
             self.log_output('Getting all tracks for User Favorites')
             "Get all favorite tracks from current user and return them in a dataframe"
-            results = self.sp.current_user_saved_tracks()
-            tracks = results['items']
-            while results['next']:
-                results = self.sp.next(results)
-                tracks.extend(results['items'])
+            fetch_page = lambda offset: self.sp.current_user_saved_tracks(
+                limit=SAVED_TRACKS_PAGE_SIZE, offset=offset)
+            page_size = SAVED_TRACKS_PAGE_SIZE
+
+        tracks = []
+        for page in iter_pages_threaded(fetch_page, page_size, max_workers=PAGE_FETCH_WORKERS):
+            tracks.extend(item for item in page['items'] if item.get('track'))
 
         songs_df = pd.json_normalize(tracks, record_path=['track', 'artists'], meta=[['added_at'], ['track', 'id'], ['track', 'name']])
         songs_df = songs_df.drop_duplicates(subset='track.id', keep="first")
@@ -418,16 +728,15 @@ class SpotifyRecommendations():
     # drop the track id from  this new filtered dataframe
     def get_track_uri_from_track_name(self):
         #self.log_output('Getting track uri from track name: ' + track_name)
-        #df = self.tracks_df[self.tracks_df['track_name'].str.lower() == self.song_name.lower()]['track_uri'].values[0]
-        return self.tracks_df[self.tracks_df['track_name'].str.lower() == self.song_name.lower()]['track_uri'].values[0]
+        return self.track_dictionary.uri(self.track_index.lookup(self.song_name))
         
     def get_audio_features_from_track_name(self, track_name):
         
-        track_id = self.tracks_df[self.tracks_df['track_name'].str.lower() == track_name.lower()]['track_id'].values[0]
+        track_id = self.track_index.lookup(track_name)
         # get audio features from track id
-        audio_feats_df = self.features_df[self.features_df['track_id'] == track_id].copy()
-        audio_feats_df.drop(columns='track_id', inplace=True)
-        self.new = np.array(audio_feats_df).reshape(1, -1)
+        if track_id is None or not self.feature_store.has([track_id])[0]:
+            raise ValueError('No audio features for track: ' + track_name)
+        self.new = self.feature_store.gather([track_id])
         return self.new
 
         # Get labels from model and predict user cluster
@@ -618,16 +927,17 @@ class SpotifyRecommendations():
         return items
 
 
-    def get_genre_wordcloud_fig(self):
-        "Get Spotify Wrapped for current user"
+    def get_genre_wordcloud_text(self):
+        "Get Spotify Wrapped for current user and the genres of the tracks' artists as one string"
         try:
             self.artist_uri
         except:
             self.get_tracks_from_playlist_or_user_favorites()
 
         if self.playlist_uri is None:
-            user = self.sp.current_user()['display_name']
-            followers = self.sp.current_user()['followers']['total']
+            current_user = self.sp.current_user()
+            user = current_user['display_name']
+            followers = current_user['followers']['total']
             self.log_output("Hello {}!".format(user))
             self.log_output("We are happy that you are using our product. Let's see some of your personal Spotify stats.\n")
 
@@ -656,28 +966,40 @@ class SpotifyRecommendations():
             except:
                 self.log_output("Ooops, it seems that you don't have top tracks at the moment.\n")
 
-        genres = []
-        for artist in self.artist_uri:
-            genres.append(self.sp.artist(artist)['genres'])
+        artist_genres = ArtistGenresDB().get_artists_genres(self.sp, self.artist_uri)
+        genres = [artist_genres.get(artist, []) for artist in self.artist_uri]
 
         text = [item for sublist in genres for item in sublist]
-        text = ' '.join(text)
+        return ' '.join(text)
+
+    def get_genre_wordcloud_fig(self):
+        text = self.get_genre_wordcloud_text()
         wc = WordCloud(background_color ='white',relative_scaling=0, width=500, height=500, colormap=self.color).generate(text)
-        fig, ax = plt.subplots(1, 1, figsize=(5, 5))
-        ax.imshow(wc, interpolation='bilinear')
-        ax.axis("off")
-        ax.title.set_text('Genres you listen to the most\n')
-        return fig
+        return wordcloud_fig(wc, 'Genres you listen to the most\n')
 
-    def get_playlist_wordcloud_fig(self):        
+    def get_playlist_wordcloud_text(self):
         # User Playlist Cluster
-        text = ' '.join(self.playlists_df[self.playlists_df['cluster']==self.user_cluster[0]]["name"])
+        return ' '.join(self.playlists_df[self.playlists_df['cluster']==self.user_cluster[0]]["name"])
+
+    def get_playlist_wordcloud_title(self):
+        return 'Playlist names in your cluster {}\n'.format(self.user_cluster)
+
+    def get_playlist_wordcloud_fig(self):        
+        text = self.get_playlist_wordcloud_text()
         wc = WordCloud(background_color ='white',relative_scaling=0, width=500, height=500, colormap=self.color).generate(text)
-        fig, ax = plt.subplots(1, 1, figsize=(5, 5))
-        ax.imshow(wc, interpolation='bilinear')
-        ax.axis("off")
-        ax.title.set_text('Playlist names in your cluster {}\n'.format(self.user_cluster))
-        return fig
+        return wordcloud_fig(wc, self.get_playlist_wordcloud_title())
+
+    def get_user_tsne(self):
+        "Get the user position in t-SNE space, computed once per recommendation"
+        try:
+            return self.user_tsne
+        except AttributeError:
+            pass
+        if self.tsne_mode == 'exact' and self.tsne_transformer is not None:
+            self.user_tsne = self.tsne_transformer.transform(self.scaled_y)[0]
+        else:
+            self.user_tsne = self.tsne_placer.transform(self.scaled_y)[0]
+        return self.user_tsne
 
     def get_user_cluster_all_fig(self):
         # Transform user fav songs to TSNE to plot in vector space
@@ -690,14 +1012,11 @@ class SpotifyRecommendations():
         except:
             self.user_cluster = self.model.predict(self.scaled_y)
             
-        user_tsne = self.tsne_transformer.transform(self.scaled_y)[0]
+        user_tsne = self.get_user_tsne()
 
         # Blob all clusters
-        fig, ax = plt.subplots(1, 1, figsize=(5, 5))
-        sns.scatterplot(ax=ax, x='X', y='Y', hue='cluster', style='cluster', data=self.openTSNE_df, legend=None)
-        ax.scatter(x=user_tsne[0], y=user_tsne[1], color='yellow', marker='*', s=500)
-        ax.title.set_text('You (Star) are here in the 17 Clusters')
-        return fig
+        layer = self.ml_model.get_cluster_layer()
+        return draw_user_on_cluster_layer(layer, user_tsne, 'You (Star) are here in the 17 Clusters')
         #plt.show()
 
     def get_user_cluster_single_fig(self):
@@ -710,15 +1029,11 @@ class SpotifyRecommendations():
         except:
             self.user_cluster = self.model.predict(self.scaled_y)
             
-        user_tsne = self.tsne_transformer.transform(self.scaled_y)[0]
+        user_tsne = self.get_user_tsne()
 
         # Blob user cluster
-        palette = {c:'purple' if c==self.user_cluster else 'darkgrey' for c in self.openTSNE_df.cluster.unique()}
-        fig, ax = plt.subplots(1, 1, figsize=(5, 5))
-        sns.scatterplot(ax=ax, x='X', y='Y', hue='cluster', style='cluster', data=self.openTSNE_df, legend=None, palette=palette)
-        ax.scatter(x=user_tsne[0], y=user_tsne[1], color='yellow', marker='*', s=500)
-        ax.title.set_text('You are in cluster {}'.format(self.user_cluster))
-        return fig
+        layer = self.ml_model.get_cluster_layer(self.user_cluster[0])
+        return draw_user_on_cluster_layer(layer, user_tsne, 'You are in cluster {}'.format(self.user_cluster))
         #plt.show()
 
     def __str__(self):
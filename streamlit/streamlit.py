@@ -2,6 +2,7 @@ import os
 import base64
 import hashlib
 import sqlite3
+import time
 from typing import List, Optional, Tuple, Any
 
 import numpy as np
@@ -14,6 +15,8 @@ from streamlit_option_menu import option_menu
 import streamlit.components.v1 as components
 
 from spotipy_client import *
+from src.jobs import JobWorkerPool, default_queue
+from src.recommendation_store import DEFAULT_STORE_PATH, RecommendationStore
 
 
 
@@ -156,6 +159,9 @@ if 'user_cluster_all_fig' not in st.session_state:
     st.session_state.user_cluster_all_fig = None
 if 'user_cluster_single_fig' not in st.session_state:
     st.session_state.user_cluster_single_fig = None
+# Figure key -> (job id, title, deadline) of word clouds still rendering on the job workers
+if 'wordcloud_jobs' not in st.session_state:
+    st.session_state.wordcloud_jobs = {}
 
 # feeback buttons count increment
 if 'loved_it_count' not in st.session_state:
@@ -210,7 +216,26 @@ def increment_usage_count():
     a.loc[cond,'Count'] = a['Count'] + 1
     a.to_csv("new.csv", index = False)
 
+@st.cache_resource(show_spinner=False)
+def get_recommendation_store():
+    """Materialized per-user recommendations shared by all sessions."""
+    return RecommendationStore(os.getenv('SPR_RECOMMENDATIONS_DB', DEFAULT_STORE_PATH))
+
+def invalidate_recommendations():
+    """Feedback changed, so the user's stored recommendations are out of date."""
+    get_recommendation_store().invalidate(st.session_state.username_loggedin)
+
 def add_uri(track_uri):
+    store = get_recommendation_store()
+    username = st.session_state.username_loggedin
+    stored = store.get(username)
+    # Called on every rerun; only write when the recommendations changed
+    if stored is not None and stored.track_uris == list(track_uri):
+        return
+    # Stamped with the engine's model version so the materializer serves the row; tagged as a Streamlit row
+    ml_model = st.session_state.ml_model
+    store.put(username, [{'uri': uri} for uri in track_uri], 'streamlit-' + st.session_state.rec_type,
+              ml_model.artifact_version if ml_model is not None else None)
     a = pd.read_csv("new.csv")
     cond = (a['Username'] == st.session_state.username_loggedin)
     track_uri_str = ",".join(track_uri)
@@ -274,24 +299,28 @@ def increment_loved_it_count():
     cond = (a['Username'] == st.session_state.username_loggedin)
     a.loc[cond,'loved_it'] = a['loved_it'] + 1
     a.to_csv("new.csv", index = False)
+    invalidate_recommendations()
 def increment_like_it_count():
     st.session_state.like_it_count += 1
     a = pd.read_csv("new.csv")
     cond = (a['Username'] == st.session_state.username_loggedin)
     a.loc[cond,'like_it'] = a['like_it'] + 1
     a.to_csv("new.csv", index = False)
+    invalidate_recommendations()
 def increment_okay_count():
     st.session_state.okay_count += 1
     a = pd.read_csv("new.csv")
     cond = (a['Username'] == st.session_state.username_loggedin)
     a.loc[cond,'okay'] = a['okay'] + 1
     a.to_csv("new.csv", index = False)
+    invalidate_recommendations()
 def increment_hate_it_count():
     st.session_state.hate_it_count += 1
     a = pd.read_csv("new.csv")
     cond = (a['Username'] == st.session_state.username_loggedin)
     a.loc[cond,'hate_it'] = a['hate_it'] + 1
     a.to_csv("new.csv", index = False)
+    invalidate_recommendations()
 
 def add_recently_searched_song(song_name_searched):
 
@@ -302,6 +331,7 @@ def add_recently_searched_song(song_name_searched):
     a.loc[userindex, ['recently_searched_song']] = song_name_searched
 
     a.to_csv("new.csv", index = False)
+    invalidate_recommendations()
 
 def playlist_page():
     st.subheader("User Playlist")
@@ -345,8 +375,80 @@ def log_output(new_text):
     if st.session_state.display_output:
         st.session_state.output = st.session_state.log_holder.text_area('',value=new_log, height=500)
 
+# One entry: a new model version evicts the previous multi-GB model instead of pinning it
+@st.cache_resource(show_spinner=False, max_entries=1)
+def get_shared_ml_model(model_version):
+    """Load the ML model and data once per server process, shared read-only by all sessions."""
+    return SPR_ML_Model()
+
 def load_spr_ml_model():
-    st.session_state.ml_model = SPR_ML_Model()
+    st.session_state.ml_model = get_shared_ml_model(get_model_version())
+
+def warm_up_ml_model():
+    """Load the shared model on the first script run so user sessions never pay the load time."""
+    try:
+        get_shared_ml_model(get_model_version())
+    except Exception as e:
+        print('Failed to warm up ML model: {}'.format(e))
+
+def ml_model_outdated():
+    ml_model = st.session_state.ml_model
+    return ml_model is None or ml_model.version != get_model_version()
+
+warm_up_ml_model()
+
+@st.cache_resource(show_spinner=False)
+def get_job_queue():
+    """Background job queue shared by all sessions.
+
+    Starts an in-process worker pool unless SPR_JOB_WORKERS=0, in which case
+    jobs are run by separate `python -m src.jobs.worker` processes.
+    """
+    queue = default_queue()
+    workers = int(os.getenv('SPR_JOB_WORKERS', '2'))
+    if workers > 0:
+        JobWorkerPool(queue, workers=workers).start()
+    return queue
+
+WORDCLOUD_TIMEOUT = 60
+WORDCLOUD_POLL_INTERVAL = 0.5
+
+def submit_wordcloud(queue, fig_key, text, colormap, title):
+    """
+    Queue a word cloud job; poll_wordclouds stores its figure under fig_key once it finishes
+    :param queue: job queue
+    :param fig_key: session state key of the figure
+    :param text: words to render
+    :param colormap: matplotlib colormap name
+    :param title: figure title
+    """
+    job = queue.submit('wordcloud', {'text': text, 'colormap': colormap})
+    st.session_state[fig_key] = None
+    st.session_state.wordcloud_jobs[fig_key] = (job.id, title, time.time() + WORDCLOUD_TIMEOUT)
+
+def poll_wordclouds():
+    """
+    Turn finished word cloud jobs into figures without waiting for the others
+    :return: True while a job is still rendering
+    """
+    queue = get_job_queue()
+    for fig_key, (job_id, title, deadline) in list(st.session_state.wordcloud_jobs.items()):
+        job = queue.get(job_id)
+        if job is not None and not job.finished and time.time() < deadline:
+            continue
+        if job is None or job.status != 'succeeded':
+            log_output('Word cloud job did not finish: {}'.format(job.error or job.status if job else 'expired'))
+            st.session_state[fig_key] = wordcloud_fig(None, title)
+        else:
+            st.session_state[fig_key] = wordcloud_fig(job.result['image_png'], title)
+        del st.session_state.wordcloud_jobs[fig_key]
+    return bool(st.session_state.wordcloud_jobs)
+
+def show_wordcloud(holder, fig_key):
+    if st.session_state[fig_key] is None:
+        holder.info('Rendering word cloud...')
+    else:
+        holder.pyplot(st.session_state[fig_key])
 
 def get_current_count():
     st.session_state.count_current = read_count(username)
@@ -388,7 +490,8 @@ def model_page():
             get_rec = st.button("Get Recommendations", key='pl', on_click=get_recommendations, args=('playlist',))
             
             
-            if get_rec:
+            # Reruns that poll the word cloud jobs keep showing the recommendations
+            if get_rec or st.session_state.wordcloud_jobs:
                 
                 if st.session_state.rec_type == 'playlist':
                     st.subheader('Recommendations based on Playlist:')
@@ -409,7 +512,7 @@ def model_page():
                     genre_wordcloud_holder = st.empty()
                     user_cluster_single_holder = st.empty()
 
-                if st.session_state.ml_model is None:
+                if ml_model_outdated():
                     with status_holder:
                         with st.spinner('Loading ML Model...'):
                             load_spr_ml_model()
@@ -425,8 +528,14 @@ def model_page():
                             spr.len_of_favs = st.session_state.rec_type
                             spr.log_output = log_output
                             st.session_state.rec_uris = spr.get_songs_recommendations(n=10)
-                            st.session_state.genre_wordcloud_fig = spr.get_genre_wordcloud_fig()
-                            st.session_state.playlist_wordcloud_fig = spr.get_playlist_wordcloud_fig()
+                            # Word clouds render on the job workers and show up on later reruns.
+                            # The cluster figures stay here: they place the user with the shared
+                            # in-memory model and only draw a star on its cached cluster layer
+                            queue = get_job_queue()
+                            submit_wordcloud(queue, 'genre_wordcloud_fig', spr.get_genre_wordcloud_text(),
+                                             spr.color, 'Genres you listen to the most\n')
+                            submit_wordcloud(queue, 'playlist_wordcloud_fig', spr.get_playlist_wordcloud_text(),
+                                             spr.color, spr.get_playlist_wordcloud_title())
                             st.session_state.user_cluster_all_fig = spr.get_user_cluster_all_fig()
                             st.session_state.user_cluster_single_fig = spr.get_user_cluster_single_fig()
                             st.session_state.got_rec = True
@@ -458,30 +567,35 @@ def model_page():
                     except:
                         pass
 
-                genre_wordcloud_holder.pyplot(st.session_state.genre_wordcloud_fig)
-                playlist_wordcloud_holder.pyplot(st.session_state.playlist_wordcloud_fig)
+                wordclouds_pending = poll_wordclouds()
+                show_wordcloud(genre_wordcloud_holder, 'genre_wordcloud_fig')
+                show_wordcloud(playlist_wordcloud_holder, 'playlist_wordcloud_fig')
                 user_cluster_all_holder.pyplot(st.session_state.user_cluster_all_fig)
                 user_cluster_single_holder.pyplot(st.session_state.user_cluster_single_fig)
+                if wordclouds_pending:
+                    time.sleep(WORDCLOUD_POLL_INTERVAL)
+                    st.rerun()
 
     else:
         st.session_state.song_name = st.session_state.example_song_name
         st.text_input("Song name", key='song_name', on_change=update_song_name)
         
         song_name = st.session_state.song_name
-        playlists_db_path = '../data/spotify_20K_playlists.db'
-
-        conn = sqlite3.connect(playlists_db_path)
-        tracks_df = pd.read_sql('select * from tracks', conn)
-        track_idx = tracks_df[tracks_df['track_name'].str.lower() == song_name.lower()]['track_id']
+        load_spr_ml_model()
+        track_index = st.session_state.ml_model.track_index
+        track_id = track_index.lookup(song_name)
         # first create a state for the text box update value
         if len(song_name) == 0:
             st.warning("Please enter a valid song name to see Recommendations")
-        elif len(track_idx) == 0:
-            st.warning("Song not found in Spotify App database. Please enter a valid song name to see Recommendations")
+        elif track_id is None:
+            suggestions = [match.name for match in track_index.search(song_name, limit=5)]
+            if suggestions:
+                st.warning("Song not found in Spotify App database. Did you mean: " + ', '.join(suggestions) + '?')
+            else:
+                st.warning("Song not found in Spotify App database. Please enter a valid song name to see Recommendations")
         else:
             # playlist_uri = st.session_state.playlist_url.split('/')[-1]
             st.session_state.spr = SpotifyRecommendations(song_name=song_name)
-            load_spr_ml_model()
             spr = st.session_state.spr
             spr.set_ml_model(st.session_state.ml_model)
             track_uri = st.session_state.spr.get_track_uri_from_track_name()
@@ -513,7 +627,7 @@ def model_page():
                 with right_column:
                     genre_wordcloud_holder = st.empty()
                     user_cluster_single_holder = st.empty()
-                if st.session_state.ml_model is None:
+                if ml_model_outdated():
                     with status_holder:
                         with st.spinner('Loading ML Model...'):
                             load_spr_ml_model()
@@ -586,7 +700,7 @@ def rec_page():
     with right_column:
         genre_wordcloud_holder = st.empty()
         user_cluster_single_holder = st.empty()
-    if st.session_state.ml_model is None:
+    if ml_model_outdated():
         with status_holder:
             with st.spinner('Loading ML Model...'):
                 load_spr_ml_model()
@@ -3,24 +3,176 @@ Locust Load Testing Tool
 
 An open source load testing tool.
 
-Define user behaviour with Python code, 
-and swarm your system with millions of simultaneous users. 
+Define user behaviour with Python code,
+and swarm your system with millions of simultaneous users.
 
 dependencies:
     - locust
 
 pip install locust
 
+Scenario pack for the FastAPI API (src/web/routes.py). Users hit the API
+endpoints with weighted tasks; track and playlist IDs follow a Zipfian
+popularity over a synthetic MPD dataset (benchmarks/synthetic.py), the same
+one test/mock_spotify.py serves in place of Spotify:
+
+    python test/mock_spotify.py --scale 20k --port 9090 --latency-ms 40 --rate-limit 0.02
+    SPOTIPY_CLIENT_ID=load SPOTIPY_CLIENT_SECRET=test SPOTIFY_API_URL=http://localhost:9090 \\
+        uvicorn src.api:app --port 8000
+
 Run Locust with command:
-    locust -f locust_test.py --host=http://
+    locust -f test/locust_test.py --host=http://localhost:8000 --headless -u 100 -r 10 -t 5m --csv load
+
+When the run ends every endpoint is checked against its SLO (p99 latency
+and error rate); any violation makes Locust exit with status 1. Override
+the defaults with --slo-file, a JSON object like
+{"/search": {"p99_ms": 300, "max_error_rate": 0.005}}.
 """
 
-from locust import HttpUser, task, between
+import json
+import os
+import sqlite3
+import sys
+from pathlib import Path
+
+import numpy as np
+from locust import HttpUser, between, events, task
+from locust.runners import WorkerRunner
+
+sys.path.insert(1, str(Path(__file__).resolve().parent.parent))
+from benchmarks.synthetic import SCALES, cached_mpd, zipf_sampler
+
+API_PREFIX = '/api/v1'
+DEFAULT_DATA_DIR = Path(__file__).resolve().parent.parent / 'data' / 'benchmarks'
+
+# Endpoint -> SLO, checked on the aggregated stats of each request name
+DEFAULT_SLOS = {
+    '/recommendations': {'p99_ms': 1000, 'max_error_rate': 0.01},
+    '/search': {'p99_ms': 500, 'max_error_rate': 0.01},
+    '/playlist/{id}': {'p99_ms': 2000, 'max_error_rate': 0.01},
+    '/track/{id}': {'p99_ms': 400, 'max_error_rate': 0.01},
+    '/track/{id}/features': {'p99_ms': 400, 'max_error_rate': 0.01},
+    '/stats': {'p99_ms': 100, 'max_error_rate': 0.001},
+}
+
+
+class Dataset:
+    """Track IDs, names and playlist IDs of the synthetic dataset, with Zipfian samplers."""
+
+    def __init__(self, db_path, n_playlists, seed=0):
+        conn = sqlite3.connect(str(db_path))
+        rows = conn.execute('select track_uri, track_name from tracks order by rowid').fetchall()
+        conn.close()
+        self.track_ids = np.array([row[0] for row in rows], dtype=object)
+        self.track_names = [row[1] for row in rows]
+        self.n_playlists = n_playlists
+        self.rng = np.random.default_rng(seed)
+        self.sample_tracks = zipf_sampler(self.rng, len(self.track_ids))
+        self.sample_playlists = zipf_sampler(self.rng, n_playlists, exponent=0.8)
+
+    def track_id(self):
+        return self.track_ids[self.sample_tracks(1)[0]]
+
+    def seed_tracks(self):
+        return list(self.track_ids[self.sample_tracks(int(self.rng.integers(1, 6)))])
+
+    def playlist_id(self):
+        return str(self.sample_playlists(1)[0])
+
+    def search_query(self):
+        words = self.track_names[self.sample_tracks(1)[0]].split()
+        return ' '.join(words[:int(self.rng.integers(1, len(words) + 1))])
+
+
+dataset = None
+
+
+@events.init_command_line_parser.add_listener
+def add_arguments(parser):
+    parser.add_argument('--dataset-scale', default=os.getenv('MOCK_SPOTIFY_SCALE', '20k'),
+                        help='Synthetic dataset, must match test/mock_spotify.py --scale')
+    parser.add_argument('--dataset-seed', type=int, default=0)
+    parser.add_argument('--slo-file', default='', help='JSON file overriding the per-endpoint SLOs')
+
+
+@events.init.add_listener
+def load_dataset(environment, **kwargs):
+    global dataset
+    options = environment.parsed_options
+    scale = options.dataset_scale if options else '20k'
+    seed = options.dataset_seed if options else 0
+    n_playlists = SCALES.get(scale.lower()) or int(scale)
+    mpd = cached_mpd(DEFAULT_DATA_DIR, n_playlists, seed)
+    dataset = Dataset(mpd.db_path, mpd.n_playlists, seed)
+
+
+class ApiUser(HttpUser):
+    wait_time = between(0.5, 2)
+
+    @task(3)
+    def recommendations(self):
+        self.client.post(API_PREFIX + '/recommendations',
+                         json={'track_ids': dataset.seed_tracks(), 'limit': 20},
+                         name='/recommendations')
+
+    @task(4)
+    def search(self):
+        self.client.get(API_PREFIX + '/search', params={'query': dataset.search_query(), 'limit': 20},
+                        name='/search')
+
+    @task(2)
+    def playlist(self):
+        self.client.get(API_PREFIX + '/playlist/' + dataset.playlist_id(), name='/playlist/{id}')
+
+    @task(5)
+    def track(self):
+        self.client.get(API_PREFIX + '/track/' + dataset.track_id(), name='/track/{id}')
+
+    @task(4)
+    def track_features(self):
+        # ~2% of synthetic tracks have no audio features, like the real MPD
+        with self.client.get(API_PREFIX + '/track/' + dataset.track_id() + '/features',
+                             name='/track/{id}/features', catch_response=True) as response:
+            if response.status_code == 404:
+                response.success()
+
+    @task(1)
+    def stats(self):
+        self.client.get(API_PREFIX + '/stats', name='/stats')
+
+
+def load_slos(path):
+    slos = {name: dict(slo) for name, slo in DEFAULT_SLOS.items()}
+    if path:
+        with open(path) as f:
+            for name, slo in json.load(f).items():
+                slos.setdefault(name, {}).update(slo)
+    return slos
+
+
+@events.quitting.add_listener
+def check_slos(environment, **kwargs):
+    if isinstance(environment.runner, WorkerRunner):
+        return
+    options = environment.parsed_options
+    slos = load_slos(options.slo_file if options else '')
 
-class AppUser(HttpUser):
-    wait_time = between(2, 5)
+    violations = []
+    print('\n{:24s} {:>9s} {:>9s} {:>9s} {:>8s}'.format('SLO', 'requests', 'p99 ms', 'limit', 'errors'))
+    for name, slo in slos.items():
+        entries = [e for (entry_name, _), e in environment.stats.entries.items() if entry_name == name]
+        requests = sum(e.num_requests for e in entries)
+        if not requests:
+            print('{:24s} {:>9d} {:>9s}'.format(name, 0, '-'))
+            continue
+        p99 = max(e.get_response_time_percentile(0.99) for e in entries)
+        error_rate = sum(e.num_failures for e in entries) / requests
+        ok = p99 <= slo.get('p99_ms', float('inf')) and error_rate <= slo.get('max_error_rate', 1.0)
+        print('{:24s} {:>9d} {:>9.0f} {:>9.0f} {:>7.2%} {}'.format(
+            name, requests, p99, slo.get('p99_ms', float('inf')), error_rate, '' if ok else 'VIOLATED'))
+        if not ok:
+            violations.append(name)
 
-    # Endpoint to test
-    @task
-    def index_page(self):
-        self.client.get("/")
\ No newline at end of file
+    if violations:
+        print('SLO violated: ' + ', '.join(violations))
+        environment.process_exit_code = 1
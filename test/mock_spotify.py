@@ -0,0 +1,154 @@
+"""
+Local Spotify stand-in for load tests
+
+Serves the Spotify Web API endpoints the app calls (token, tracks, audio
+features, playlist items, recommendations, search, artists, saved tracks)
+from a synthetic MPD database, so the real API can be load tested without
+touching Spotify. Every /v1 request can be delayed and rate limited:
+
+    - latency: log-normal around --latency-ms, spread set by --jitter
+    - 429s: a --rate-limit fraction of requests answered with
+      429 Too Many Requests and a Retry-After header, like Spotify does
+
+Run it, then point the API at it:
+
+    python test/mock_spotify.py --scale 20k --port 9090 --latency-ms 40 --rate-limit 0.02
+
+    SPOTIPY_CLIENT_ID=load SPOTIPY_CLIENT_SECRET=test \\
+    SPOTIFY_API_URL=http://localhost:9090 uvicorn src.api:app --port 8000
+
+GET /__stats returns per-endpoint call counts and how many 429s were sent.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+from fastapi import FastAPI, Query, Request
+from fastapi.responses import JSONResponse
+
+sys.path.insert(1, str(Path(__file__).resolve().parent.parent))
+from benchmarks.stub_spotify import StubSpotify
+from benchmarks.synthetic import SCALES, cached_mpd
+
+DEFAULT_DATA_DIR = Path(__file__).resolve().parent.parent / 'data' / 'benchmarks'
+
+
+def split_ids(ids):
+    return [i for i in ids.split(',') if i]
+
+
+def create_app(stub, latency_ms=0.0, jitter=0.5, rate_limit=0.0, retry_after=1, seed=0):
+    """
+    Build the stand-in app around a StubSpotify
+    :param stub: StubSpotify serving the data
+    :param latency_ms: median added latency per /v1 request
+    :param jitter: sigma of the log-normal latency distribution
+    :param rate_limit: fraction of /v1 requests answered with 429
+    :param retry_after: Retry-After seconds sent with 429s
+    :param seed: random seed for latency and 429 sampling
+    :return: FastAPI app
+    """
+    app = FastAPI(title='Spotify stand-in', docs_url=None, redoc_url=None, openapi_url=None)
+    rng = np.random.default_rng(seed)
+    faults = Counter()
+
+    @app.middleware('http')
+    async def inject_faults(request: Request, call_next):
+        if request.url.path.startswith('/v1/'):
+            if rate_limit and rng.random() < rate_limit:
+                faults['429'] += 1
+                return JSONResponse(
+                    status_code=429,
+                    headers={'Retry-After': str(retry_after)},
+                    content={'error': {'status': 429, 'message': 'API rate limit exceeded'}},
+                )
+            if latency_ms:
+                await asyncio.sleep(latency_ms / 1000.0 * rng.lognormal(0.0, jitter))
+        return await call_next(request)
+
+    @app.post('/api/token')
+    def token():
+        return {'access_token': 'mock-token', 'token_type': 'Bearer', 'expires_in': 3600}
+
+    @app.get('/v1/tracks/{track_id}')
+    def track(track_id: str):
+        result = stub.track(track_id)
+        if result is None:
+            return JSONResponse(status_code=404, content={'error': {'status': 404, 'message': 'Not found'}})
+        return result
+
+    @app.get('/v1/tracks')
+    @app.get('/v1/tracks/')
+    def tracks(ids: str = ''):
+        return stub.tracks(split_ids(ids))
+
+    @app.get('/v1/audio-features')
+    @app.get('/v1/audio-features/')
+    def audio_features(ids: str = ''):
+        return {'audio_features': stub.audio_features(split_ids(ids))}
+
+    @app.get('/v1/audio-features/{track_id}')
+    def audio_feature(track_id: str):
+        return stub.audio_features([track_id])[0]
+
+    @app.get('/v1/playlists/{playlist_id}/items')
+    @app.get('/v1/playlists/{playlist_id}/tracks')
+    def playlist_items(playlist_id: str, limit: int = Query(100, le=100), offset: int = 0):
+        return stub.playlist_items(playlist_id, limit=limit, offset=offset)
+
+    @app.get('/v1/me/tracks')
+    def saved_tracks(limit: int = Query(20, le=50), offset: int = 0):
+        return stub.current_user_saved_tracks(limit=limit, offset=offset)
+
+    @app.get('/v1/recommendations')
+    def recommendations(seed_tracks: str = '', limit: int = Query(20, le=100)):
+        return stub.recommendations(split_ids(seed_tracks), limit=limit)
+
+    @app.get('/v1/search')
+    def search(q: str, type: str = 'track', limit: int = Query(10, le=50), offset: int = 0):
+        return stub.search(q, limit=limit, offset=offset, type=type)
+
+    @app.get('/v1/artists')
+    @app.get('/v1/artists/')
+    def artists(ids: str = ''):
+        return stub.artists(split_ids(ids))
+
+    @app.get('/__stats')
+    def stats():
+        return {'calls': dict(stub.calls), 'rate_limited': faults['429']}
+
+    return app
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Local Spotify stand-in for load tests')
+    parser.add_argument('--scale', default=os.getenv('MOCK_SPOTIFY_SCALE', '20k'),
+                        help='Synthetic dataset size: 20k, 100k, 1m or a playlist count')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--data-dir', type=Path, default=DEFAULT_DATA_DIR)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9090)
+    parser.add_argument('--latency-ms', type=float, default=30.0)
+    parser.add_argument('--jitter', type=float, default=0.5)
+    parser.add_argument('--rate-limit', type=float, default=0.0, help='Fraction of requests answered with 429')
+    parser.add_argument('--retry-after', type=int, default=1)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    import uvicorn
+
+    args = parse_args(argv)
+    n_playlists = SCALES.get(args.scale.lower()) or int(args.scale)
+    stub = StubSpotify(cached_mpd(args.data_dir, n_playlists, args.seed), seed=args.seed)
+    app = create_app(stub, args.latency_ms, args.jitter, args.rate_limit, args.retry_after, args.seed)
+    uvicorn.run(app, host=args.host, port=args.port, log_level='warning')
+
+
+if __name__ == '__main__':
+    main()
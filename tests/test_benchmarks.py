@@ -0,0 +1,74 @@
+"""Test the benchmark data generator and report comparison."""
+
+import sqlite3
+
+import numpy as np
+
+from benchmarks.compare import compare
+from benchmarks.synthetic import catalogue_size, generate_mpd, mpd_json_slice
+
+
+def report(**medians):
+    """Build a minimal report with the given benchmark medians (None for errors)."""
+    return {"benchmarks": {
+        name: {"status": "ok" if median is not None else "error",
+               "stats": {"median": median} if median is not None else {}}
+        for name, median in medians.items()
+    }}
+
+
+class TestSyntheticMPD:
+    """Test the synthetic MPD generator."""
+
+    def test_deterministic(self, tmp_path):
+        """Test the same seed produces identical databases."""
+        first = generate_mpd(tmp_path / "a.db", 200, seed=3, chunk_playlists=64)
+        second = generate_mpd(tmp_path / "b.db", 200, seed=3, chunk_playlists=64)
+
+        query = "SELECT pid, track_id, pos FROM ratings ORDER BY rowid"
+        rows = [sqlite3.connect(mpd.db_path).execute(query).fetchall() for mpd in (first, second)]
+        assert rows[0] == rows[1]
+        assert first.n_tracks == catalogue_size(200)
+
+    def test_mpd_shape(self, tmp_path):
+        """Test playlists are contiguous by pid, within MPD length bounds and mostly featured."""
+        mpd = generate_mpd(tmp_path / "mpd.db", 300, seed=0)
+        conn = sqlite3.connect(mpd.db_path)
+
+        lengths = np.array([n for _, n in conn.execute(
+            "SELECT pid, COUNT(*) FROM ratings GROUP BY pid ORDER BY pid")])
+        n_featured = conn.execute("SELECT COUNT(*) FROM features").fetchone()[0]
+        declared = [n for (n,) in conn.execute("SELECT num_tracks FROM playlists ORDER BY pid")]
+
+        assert len(lengths) == 300
+        assert lengths.min() >= 5 and lengths.max() <= 250
+        np.testing.assert_array_equal(lengths, declared)
+        assert n_featured > 0.9 * mpd.n_tracks
+
+    def test_json_slice(self):
+        """Test the JSON slice matches the format the MPD reader expects."""
+        data = mpd_json_slice(20, first_pid=1000)
+
+        playlists = data["playlists"]
+        assert [p["pid"] for p in playlists] == list(range(1000, 1020))
+        assert "description" in playlists[0]
+        assert playlists[0]["tracks"][0]["track_uri"].startswith("spotify:track:")
+
+
+class TestCompare:
+    """Test regression detection between reports."""
+
+    def test_verdicts(self):
+        """Test slower, faster, noisy, broken and new benchmarks are classified."""
+        baseline = report(slow=1.0, fast=1.0, noise=0.0001, broken=1.0)
+        candidate = report(slow=1.5, fast=0.5, noise=0.0002, broken=None, added=1.0)
+
+        verdicts = {row["name"]: row["verdict"] for row in compare(baseline, candidate)}
+
+        assert verdicts == {
+            "slow": "regressed",
+            "fast": "improved",
+            "noise": "same",
+            "broken": "regressed",
+            "added": "new",
+        }
@@ -0,0 +1,161 @@
+"""Test the weekly digest pipeline against a local SMTP sink."""
+
+import email
+import socketserver
+import threading
+import time
+
+import pytest
+
+from src.digest import (
+    DigestPipeline,
+    DigestRenderer,
+    DigestTrack,
+    RateLimiter,
+    Recipient,
+    SentLog,
+    SMTPPool,
+    SMTPSettings,
+    recipients_from_csv,
+)
+
+
+class SinkHandler(socketserver.StreamRequestHandler):
+    """Minimal SMTP server side: accepts every message, rejects configured recipients."""
+
+    def reply(self, line):
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        sink = self.server
+        with sink.lock:
+            sink.connections += 1
+        self.reply("220 sink ready")
+        for raw in self.rfile:
+            command = raw.decode().strip()
+            verb = command[:4].upper()
+            if verb in ("EHLO", "HELO", "MAIL", "RSET", "NOOP"):
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                address = command.split(":", 1)[1].strip(" <>")
+                self.reply("550 rejected" if address in sink.rejected else "250 OK")
+            elif verb == "DATA":
+                self.reply("354 go ahead")
+                lines = []
+                for line in self.rfile:
+                    if line == b".\r\n":
+                        break
+                    lines.append(line)
+                with sink.lock:
+                    sink.messages.append(email.message_from_bytes(b"".join(lines)))
+                self.reply("250 queued")
+            elif verb == "QUIT":
+                self.reply("221 bye")
+                return
+            else:
+                self.reply("502 unsupported")
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    """Local SMTP sink recording received messages and connection count."""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), SinkHandler)
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.messages = []
+        self.rejected = set()
+
+
+@pytest.fixture
+def sink():
+    """Run an SMTP sink on a free local port."""
+    server = SMTPSink()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def settings(sink):
+    """Plain SMTP settings pointing at the sink."""
+    return SMTPSettings(host="127.0.0.1", port=sink.server_address[1], security="none", timeout=5)
+
+
+def make_recipients(n):
+    """Create recipients with three tracks each."""
+    return [
+        Recipient(f"user{i}", f"user{i}@example.com", [DigestTrack(f"track{i}{j}") for j in range(3)])
+        for i in range(n)
+    ]
+
+
+class TestDigestPipeline:
+    """Test DigestPipeline delivery."""
+
+    def test_reuses_pooled_connections(self, sink, settings, tmp_path):
+        """Test many messages go over at most one connection per pooled slot."""
+        renderer = DigestRenderer("digest@example.com")
+        with SMTPPool(settings, size=2) as pool:
+            report = DigestPipeline(pool, SentLog(tmp_path / "sent.db"), renderer, digest_id="w1").run(
+                make_recipients(20)
+            )
+
+        assert report.sent == 20 and not report.failed
+        assert len(sink.messages) == 20
+        assert sink.connections <= 2
+        message = sink.messages[0]
+        assert message["Subject"] == "Your Spotify Weekly Recommendations are here"
+        assert message.is_multipart()
+
+    def test_rerun_only_sends_to_missing_recipients(self, sink, settings, tmp_path):
+        """Test the sent checkpoint prevents double sends and retries failures."""
+        sent_log = SentLog(tmp_path / "sent.db")
+        renderer = DigestRenderer("digest@example.com")
+        recipients = make_recipients(4)
+        sink.rejected.add("user2@example.com")
+
+        with SMTPPool(settings, size=2) as pool:
+            first = DigestPipeline(pool, sent_log, renderer, digest_id="w1").run(recipients)
+            sink.rejected.clear()
+            second = DigestPipeline(pool, sent_log, renderer, digest_id="w1").run(recipients)
+            next_week = DigestPipeline(pool, sent_log, renderer, digest_id="w2").run(recipients)
+
+        assert (first.sent, list(first.failed)) == (3, ["user2"])
+        assert (second.sent, second.already_sent) == (1, 3)
+        assert next_week.sent == 4
+        assert [m["To"] for m in sink.messages].count("user2@example.com") == 2
+
+    def test_csv_users_with_few_or_no_tracks(self, tmp_path):
+        """Test CSV users may have fewer than ten stored tracks, or none."""
+        csv_path = tmp_path / "new.csv"
+        csv_path.write_text(
+            "Username,email_id,rec_song_uri,recently_searched_song\n"
+            'a,a@example.com,"id1,id2,id3",Stairway to Heaven\n'
+            "b,b@example.com,,\n"
+        )
+
+        first, second = recipients_from_csv(csv_path)
+        text = DigestRenderer("digest@example.com").render(first).get_body(("plain",)).get_content()
+
+        assert [track.id for track in first.tracks] == ["id1", "id2", "id3"]
+        assert second.tracks == []
+        assert "Stairway to Heaven" in text
+        assert "3. https://open.spotify.com/track/id3" in text
+
+
+class TestRateLimiter:
+    """Test RateLimiter."""
+
+    def test_paces_after_burst(self):
+        """Test permits beyond the burst wait for the refill rate."""
+        limiter = RateLimiter(rate=50, burst=2)
+        start = time.monotonic()
+        for _ in range(7):
+            limiter.acquire()
+
+        assert time.monotonic() - start >= 0.09
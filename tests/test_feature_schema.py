@@ -0,0 +1,99 @@
+"""Test the keyed features table schema and its migration."""
+
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from src.ml import FEATURE_NAMES
+from src.mpd import (
+    TrackFeatureStore,
+    ensure_features_table,
+    migrate_features_table,
+    read_feature_range,
+    read_features,
+    write_features,
+)
+from src.mpd.schema import is_current_schema
+
+LEGACY_FEATURES_SQL = """CREATE TABLE features (
+    track_id integer, danceability real, energy real, key real, loudness real, mode real,
+    speechiness real, acousticness real, instrumentalness real, liveness real, valence real,
+    tempo real, duration_ms integer, time_signature integer
+)"""
+
+
+def make_features_df(track_ids, danceability=0.5):
+    """Create feature rows with integer-valued key and mode stored as floats."""
+    rows = {'track_id': track_ids}
+    for name in FEATURE_NAMES:
+        rows[name] = [float(track_id) for track_id in track_ids]
+    rows['danceability'] = [danceability] * len(track_ids)
+    return pd.DataFrame(rows)
+
+
+def query_plan(conn, sql, params=()):
+    """Join the detail column of EXPLAIN QUERY PLAN."""
+    return " | ".join(row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params))
+
+
+@pytest.fixture
+def conn():
+    """Create an in-memory database with the keyed features table."""
+    conn = sqlite3.connect(":memory:")
+    ensure_features_table(conn)
+    yield conn
+    conn.close()
+
+
+class TestFeaturesSchema:
+    """Test reads and writes against the keyed features table."""
+
+    def test_reads_are_primary_key_seeks(self, conn):
+        """Test point, list and range reads and the ratings join search the key."""
+        write_features(conn, make_features_df(list(range(1, 11))))
+        conn.execute("CREATE TABLE ratings (pid integer, track_id integer)")
+
+        assert "SEARCH features USING PRIMARY KEY (track_id=?)" in query_plan(
+            conn, "SELECT * FROM features WHERE track_id = ?", (3,))
+        assert "SEARCH features USING PRIMARY KEY (track_id>? AND track_id<?)" in query_plan(
+            conn, "SELECT * FROM features WHERE track_id BETWEEN ? AND ?", (2, 4))
+        assert "SEARCH f USING PRIMARY KEY (track_id=?)" in query_plan(
+            conn, "SELECT f.* FROM ratings r JOIN features f ON f.track_id = r.track_id WHERE r.pid = 0")
+
+        assert read_features(conn, [7, 3, 3, 99])['track_id'].tolist() == [3, 7]
+        assert read_feature_range(conn, 4, 6, ['tempo'])['tempo'].tolist() == [4.0, 5.0, 6.0]
+
+    def test_writes_replace_and_store_integers(self, conn):
+        """Test rewriting a track replaces its row and key/mode are stored as integers."""
+        write_features(conn, make_features_df([1, 2]))
+        write_features(conn, make_features_df([2], danceability=0.9))
+
+        assert conn.execute("SELECT COUNT(*) FROM features").fetchone()[0] == 2
+        assert conn.execute("SELECT danceability FROM features WHERE track_id = 2").fetchone()[0] == 0.9
+        assert conn.execute(
+            "SELECT typeof(key), typeof(mode), typeof(tempo) FROM features LIMIT 1"
+        ).fetchone() == ("integer", "integer", "real")
+
+
+class TestMigration:
+    """Test migrating legacy features tables."""
+
+    def test_migrates_legacy_table(self, tmp_path):
+        """Test a legacy table is rebuilt keyed, deduplicated and still readable by the store."""
+        db_path = tmp_path / "mpd.db"
+        conn = sqlite3.connect(str(db_path))
+        conn.execute(LEGACY_FEATURES_SQL)
+        make_features_df([1, 2, 3]).to_sql('features', conn, if_exists='append', index=False)
+        make_features_df([2], danceability=0.9).to_sql('features', conn, if_exists='append', index=False)
+        conn.commit()
+
+        assert migrate_features_table(conn) == 3
+        assert is_current_schema(conn)
+        assert migrate_features_table(conn) == 0
+        rows = read_features(conn, [2])
+        conn.close()
+
+        assert rows['danceability'].tolist() == [0.9]
+        store = TrackFeatureStore.from_database(db_path)
+        assert len(store) == 3
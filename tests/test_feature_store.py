@@ -0,0 +1,79 @@
+"""Test dense track feature store."""
+
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.exceptions import DatabaseError
+from src.ml import FEATURE_NAMES
+from src.mpd import TrackFeatureStore
+
+
+def make_features_df(track_ids):
+    """Create rows of the features table with the track ID in every column."""
+    rows = {'track_id': track_ids}
+    for offset, name in enumerate(FEATURE_NAMES):
+        rows[name] = [track_id + offset / 100 for track_id in track_ids]
+    return pd.DataFrame(rows)
+
+
+class TestTrackFeatureStore:
+    """Test track_id-indexed feature lookups."""
+
+    @pytest.fixture
+    def store(self):
+        """Create a store with a gap at track 3."""
+        return TrackFeatureStore.from_frame(make_features_df([1, 2, 4, 5]))
+
+    def test_dense_layout(self, store):
+        """Test the matrix is indexed by track_id with NaN for missing rows."""
+        assert store.matrix.shape == (6, len(FEATURE_NAMES))
+        assert store.matrix.dtype == np.float32
+        assert len(store) == 4
+        assert np.isnan(store.matrix[3]).all()
+        np.testing.assert_allclose(store.matrix[4, :2], [4.0, 4.01], rtol=1e-6)
+
+    def test_gather(self, store):
+        """Test gather returns rows in request order, NaN for unknown IDs."""
+        rows = store.gather([5, 1, 3, 99])
+
+        assert rows.shape == (4, len(FEATURE_NAMES))
+        assert rows[0, 0] == 5.0
+        assert rows[1, 0] == 1.0
+        assert np.isnan(rows[2]).all()
+        assert np.isnan(rows[3]).all()
+
+    def test_lookup_drops_missing(self, store):
+        """Test lookup only returns tracks with features."""
+        found, rows = store.lookup(np.array([2, 3, 4, -1]))
+
+        np.testing.assert_array_equal(found, [True, False, True, False])
+        np.testing.assert_array_equal(rows[:, 0], [2.0, 4.0])
+
+    def test_from_database(self, tmp_path):
+        """Test loading from the features table."""
+        db_path = tmp_path / "playlists.db"
+        conn = sqlite3.connect(db_path)
+        make_features_df([1, 3]).to_sql('features', conn, index=False)
+        conn.close()
+
+        store = TrackFeatureStore.from_database(db_path)
+
+        np.testing.assert_array_equal(store.has([1, 2, 3]), [True, False, True])
+
+    def test_from_database_without_table(self, tmp_path):
+        """Test a database without a features table."""
+        with pytest.raises(DatabaseError):
+            TrackFeatureStore.from_database(tmp_path / "empty.db")
+
+    def test_save_and_load_memory_mapped(self, tmp_path, store):
+        """Test a saved matrix is reopened as a read-only memory map."""
+        store.save(tmp_path / "features.npy")
+
+        loaded = TrackFeatureStore.load(tmp_path / "features.npy")
+
+        assert isinstance(loaded.matrix, np.memmap)
+        assert len(loaded) == len(store)
+        np.testing.assert_array_equal(loaded.gather([5, 1]), store.gather([5, 1]))
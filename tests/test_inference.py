@@ -0,0 +1,105 @@
+"""Test NumPy inference kernel."""
+
+import pickle
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from src.ml import InferenceKernel, load_artifacts
+
+MODEL_DIR = Path(__file__).resolve().parent.parent / "model"
+
+
+@pytest.fixture(scope="module")
+def sklearn_models():
+    """Load the shipped sklearn KMeans and StandardScaler pickles."""
+    pytest.importorskip("sklearn")
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        with open(MODEL_DIR / "KMeans_K17_20000_sample_model.sav", 'rb') as f:
+            kmeans_model = pickle.load(f)
+        with open(MODEL_DIR / "StdScaler.sav", 'rb') as f:
+            scaler = pickle.load(f)
+    return kmeans_model, scaler
+
+
+@pytest.fixture(scope="module")
+def raw_features(sklearn_models):
+    """Create raw feature vectors distributed like the training data."""
+    _, scaler = sklearn_models
+    rng = np.random.default_rng(42)
+    return rng.normal(size=(20000, 13)) * scaler.scale_ + scaler.mean_
+
+
+class TestInferenceKernel:
+    """Test InferenceKernel against sklearn on the shipped model."""
+
+    def test_float64_matches_sklearn(self, sklearn_models, raw_features):
+        """Test float64 scaling and labels match sklearn."""
+        kmeans_model, scaler = sklearn_models
+        kernel = InferenceKernel(scaler.mean_, scaler.scale_, kmeans_model.cluster_centers_)
+
+        scaled, labels = kernel.transform_predict(raw_features)
+
+        np.testing.assert_allclose(scaled, scaler.transform(raw_features), rtol=1e-12, atol=1e-12)
+        np.testing.assert_array_equal(labels, kmeans_model.predict(scaler.transform(raw_features)))
+
+    def test_float32_matches_sklearn(self, sklearn_models, raw_features):
+        """Test float32 scaling is within tolerance and labels agree."""
+        kmeans_model, scaler = sklearn_models
+        kernel = InferenceKernel(
+            scaler.mean_, scaler.scale_, kmeans_model.cluster_centers_, dtype=np.float32
+        )
+
+        scaled, labels = kernel.transform_predict(raw_features)
+        expected_labels = kmeans_model.predict(scaler.transform(raw_features))
+
+        assert scaled.dtype == np.float32
+        np.testing.assert_allclose(scaled, scaler.transform(raw_features), rtol=1e-4, atol=1e-4)
+        assert np.mean(labels == expected_labels) > 0.999
+
+    def test_artifacts_match_sklearn(self, sklearn_models, raw_features):
+        """Test the committed artifact reproduces the pickled model."""
+        kmeans_model, scaler = sklearn_models
+        kernel = InferenceKernel.from_artifacts(load_artifacts(MODEL_DIR / "artifacts"))
+
+        np.testing.assert_array_equal(
+            kernel.predict(raw_features),
+            kmeans_model.predict(scaler.transform(raw_features))
+        )
+
+    def test_batching_is_consistent(self, sklearn_models, raw_features):
+        """Test small batches give the same labels and distances."""
+        kmeans_model, scaler = sklearn_models
+        full = InferenceKernel(scaler.mean_, scaler.scale_, kmeans_model.cluster_centers_)
+        batched = InferenceKernel(
+            scaler.mean_, scaler.scale_, kmeans_model.cluster_centers_, batch_size=7
+        )
+        scaled = full.transform(raw_features[:100])
+
+        labels, distances = full.predict_scaled(scaled, return_distances=True)
+        batched_labels, batched_distances = batched.predict_scaled(scaled, return_distances=True)
+
+        np.testing.assert_array_equal(labels, batched_labels)
+        np.testing.assert_allclose(distances, batched_distances)
+        expected = ((scaled - kmeans_model.cluster_centers_[labels]) ** 2).sum(axis=1)
+        np.testing.assert_allclose(distances, expected, rtol=1e-9, atol=1e-9)
+
+    def test_single_vector(self, sklearn_models, raw_features):
+        """Test a 1-D input is treated as one sample."""
+        kmeans_model, scaler = sklearn_models
+        kernel = InferenceKernel(scaler.mean_, scaler.scale_, kmeans_model.cluster_centers_)
+
+        labels = kernel.predict(raw_features[0])
+
+        assert labels.shape == (1,)
+        assert labels[0] == kmeans_model.predict(scaler.transform(raw_features[:1]))[0]
+
+    def test_wrong_feature_count(self):
+        """Test inputs with the wrong width are rejected."""
+        kernel = InferenceKernel(np.zeros(3), np.ones(3), np.eye(3))
+
+        with pytest.raises(ValueError):
+            kernel.predict(np.zeros((2, 4)))
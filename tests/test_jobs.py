@@ -0,0 +1,118 @@
+"""Test background job queue, workers and endpoints."""
+
+import base64
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.jobs import JobQueue, JobStatus, JobWorkerPool, render_wordcloud
+from src.web.jobs import router
+
+
+@pytest.fixture
+def queue(tmp_path):
+    """Create an empty job queue."""
+    queue = JobQueue(tmp_path / "jobs.db", result_ttl=60)
+    yield queue
+    queue.close()
+
+
+class TestJobQueue:
+    """Test JobQueue."""
+
+    def test_identical_jobs_are_deduplicated(self, queue):
+        """Test resubmitting returns the active or finished job until it fails."""
+        first = queue.submit("echo", {"b": 2, "a": 1})
+        second = queue.submit("echo", {"a": 1, "b": 2})
+        other = queue.submit("echo", {"a": 1})
+
+        assert second.id == first.id
+        assert other.id != first.id
+
+        claimed = queue.claim("w", kinds=["echo"])
+        queue.complete(claimed.id, {"ok": True})
+        assert queue.submit("echo", {"a": 1, "b": 2}).id == first.id
+
+        queue.fail(other.id, "boom")
+        assert queue.submit("echo", {"a": 1}).id != other.id
+
+    def test_results_expire_after_ttl(self, queue):
+        """Test finished jobs disappear once their TTL passes."""
+        job = queue.submit("echo", {}, ttl=0.05)
+        queue.complete(queue.claim("w").id, [1, 2, 3])
+
+        assert queue.get(job.id).result == [1, 2, 3]
+        time.sleep(0.1)
+        assert queue.get(job.id) is None
+        assert queue.purge_expired() == 1
+
+    def test_lost_worker_job_is_requeued(self, tmp_path):
+        """Test a running job whose lease lapses is claimed again."""
+        queue = JobQueue(tmp_path / "jobs.db", lease_seconds=0.05)
+        job = queue.submit("echo", {})
+        queue.claim("dead-worker")
+        time.sleep(0.1)
+
+        reclaimed = queue.claim("live-worker")
+
+        assert reclaimed.id == job.id
+        assert reclaimed.attempts == 2
+        queue.close()
+
+
+class TestJobWorkerPool:
+    """Test JobWorkerPool."""
+
+    def test_run_once_records_result_and_failure(self, queue):
+        """Test handler results and exceptions are stored on the job."""
+        def echo(params, context):
+            context.progress(0.5, "halfway")
+            return params
+
+        def explode(params, context):
+            raise ValueError("bad input")
+
+        pool = JobWorkerPool(queue, handlers={"echo": echo, "explode": explode})
+        ok = queue.submit("echo", {"x": 1})
+        bad = queue.submit("explode", {})
+
+        assert pool.run_once() and pool.run_once()
+        assert not pool.run_once()
+        assert queue.get(ok.id).result == {"x": 1}
+        assert queue.get(ok.id).progress == 1.0
+        assert queue.get(bad.id).status == JobStatus.FAILED
+        assert queue.get(bad.id).error == "ValueError: bad input"
+
+    def test_wordcloud_handler_renders_png(self, queue):
+        """Test the word cloud job returns a base64 PNG."""
+        result = render_wordcloud({"text": "pop rock pop indie pop", "width": 100, "height": 100}, None)
+
+        assert base64.b64decode(result["image_png"]).startswith(b"\x89PNG")
+        assert result["words"] == 3
+
+
+class TestJobRoutes:
+    """Test job endpoints."""
+
+    def test_submit_run_and_fetch_result(self, queue):
+        """Test a submitted job can be polled, streamed and its result fetched."""
+        app = FastAPI()
+        app.include_router(router)
+        app.state.job_queue = queue
+        client = TestClient(app)
+
+        response = client.post("/api/v1/jobs", json={"kind": "wordcloud", "params": {"text": "jazz"}})
+        job_id = response.json()["id"]
+
+        assert response.status_code == 202
+        assert client.get(f"/api/v1/jobs/{job_id}/result").status_code == 409
+        assert client.post("/api/v1/jobs", json={"kind": "nope"}).status_code == 400
+
+        JobWorkerPool(queue).run_once()
+        events = client.get(f"/api/v1/jobs/{job_id}/events").text.splitlines()
+
+        assert client.get(f"/api/v1/jobs/{job_id}").json()["status"] == "succeeded"
+        assert client.get(f"/api/v1/jobs/{job_id}/result").json()["result"]["words"] == 1
+        assert len(events) == 1 and '"event":"done"' in events[0]
@@ -0,0 +1,73 @@
+"""Test metrics registry and stage tracing."""
+
+import asyncio
+
+from src.metrics import MetricsRegistry
+
+
+class TestMetricsRegistry:
+    """Test MetricsRegistry."""
+
+    def test_counters_and_histograms_render(self):
+        """Test labelled series render in the Prometheus text format."""
+        registry = MetricsRegistry()
+        registry.inc("cache_requests_total", cache="track", result="hit")
+        registry.inc("cache_requests_total", 2, cache="track", result="hit")
+        registry.observe("upstream_request_seconds", 0.003, endpoint="track")
+
+        text = registry.render_prometheus()
+
+        assert registry.counter_value("cache_requests_total", cache="track", result="hit") == 3
+        assert 'spr_cache_requests_total{cache="track",result="hit"} 3' in text
+        assert 'spr_upstream_request_seconds_bucket{endpoint="track",le="0.0025"} 0' in text
+        assert 'spr_upstream_request_seconds_bucket{endpoint="track",le="0.005"} 1' in text
+        assert 'spr_upstream_request_seconds_count{endpoint="track"} 1' in text
+
+    def test_stages_recorded_on_active_trace(self):
+        """Test stages land on the trace of their context, including worker threads."""
+        registry = MetricsRegistry()
+
+        def score():
+            with registry.stage("rank"):
+                pass
+
+        async def run():
+            with registry.trace() as trace:
+                with registry.stage("features"):
+                    await asyncio.sleep(0)
+                await asyncio.to_thread(score)
+            return trace
+
+        trace = asyncio.run(run())
+
+        assert set(trace.stages) == {"features", "rank"}
+        assert registry.histogram("stage_seconds", stage="rank").count == 1
+
+    def test_parallel_stages_accumulate(self):
+        """Test a trace shared by worker threads keeps every stage's time."""
+        registry = MetricsRegistry()
+
+        def rank(trace):
+            for _ in range(1000):
+                trace.add("rank_cluster", 1.0)
+
+        async def run():
+            with registry.trace() as trace:
+                await asyncio.gather(*(asyncio.to_thread(rank, trace) for _ in range(4)))
+            return trace
+
+        assert asyncio.run(run()).stages == {"rank_cluster": 4000.0}
+
+    def test_disabled_registry_records_nothing(self):
+        """Test a disabled registry ignores every recording call."""
+        registry = MetricsRegistry(enabled=False)
+
+        with registry.trace() as trace:
+            with registry.stage("features"):
+                registry.inc("upstream_requests_total", endpoint="track")
+            with registry.timer("upstream_request_seconds", endpoint="track"):
+                pass
+
+        assert trace.stages == {}
+        assert registry.counter_value("upstream_requests_total", endpoint="track") == 0
+        assert registry.render_prometheus().strip() == ""
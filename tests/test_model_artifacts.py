@@ -0,0 +1,100 @@
+"""Test model artifact format."""
+
+import json
+
+import numpy as np
+import pytest
+
+from src.exceptions import ModelLoadError
+from src.ml import (
+    ArtifactKMeans,
+    ArtifactScaler,
+    load_artifacts,
+    resolve_artifact_dir,
+    write_artifacts,
+)
+
+
+class TestModelArtifacts:
+    """Test writing and loading model artifacts."""
+
+    @pytest.fixture
+    def arrays(self):
+        """Create small artifact arrays."""
+        rng = np.random.default_rng(0)
+        return {
+            "scaler_mean": rng.normal(size=13),
+            "scaler_scale": rng.uniform(0.5, 2.0, size=13),
+            "centroids": rng.normal(size=(4, 13)),
+            "labels": rng.integers(0, 4, size=50).astype(np.int32),
+        }
+
+    def test_round_trip(self, tmp_path, arrays):
+        """Test arrays survive a write/load round trip."""
+        version_dir = write_artifacts(tmp_path, arrays)
+        artifacts = load_artifacts(tmp_path)
+
+        assert artifacts.path == version_dir
+        assert artifacts.version == version_dir.name
+        assert artifacts.n_clusters == 4
+        np.testing.assert_array_equal(artifacts.centroids, arrays["centroids"])
+        np.testing.assert_array_equal(artifacts.labels, arrays["labels"])
+
+    def test_arrays_are_read_only_memmaps(self, tmp_path, arrays):
+        """Test loaded arrays are memory-mapped read-only."""
+        write_artifacts(tmp_path, arrays)
+        artifacts = load_artifacts(tmp_path)
+
+        assert isinstance(artifacts.centroids, np.memmap)
+        with pytest.raises(ValueError):
+            artifacts.centroids[0, 0] = 1.0
+
+    def test_version_is_content_addressed(self, tmp_path, arrays):
+        """Test identical arrays map to the same version."""
+        first = write_artifacts(tmp_path, arrays)
+        second = write_artifacts(tmp_path, arrays)
+
+        assert first == second
+
+    def test_current_pointer_selects_version(self, tmp_path, arrays):
+        """Test CURRENT pointer wins over other versions."""
+        old_dir = write_artifacts(tmp_path, arrays, version="v1")
+        write_artifacts(tmp_path, arrays, version="v2", make_current=False)
+
+        assert resolve_artifact_dir(tmp_path) == old_dir
+
+    def test_missing_artifact(self, tmp_path):
+        """Test loading from an empty directory."""
+        assert resolve_artifact_dir(tmp_path) is None
+        with pytest.raises(ModelLoadError):
+            load_artifacts(tmp_path)
+
+    def test_manifest_mismatch(self, tmp_path, arrays):
+        """Test manifest shape mismatch is rejected."""
+        version_dir = write_artifacts(tmp_path, arrays)
+        manifest_path = version_dir / "manifest.json"
+        manifest = json.loads(manifest_path.read_text())
+        manifest["arrays"]["centroids"]["shape"] = [5, 13]
+        manifest_path.write_text(json.dumps(manifest))
+
+        with pytest.raises(ModelLoadError):
+            load_artifacts(tmp_path)
+
+    def test_missing_required_array(self, tmp_path, arrays):
+        """Test writing without centroids fails."""
+        del arrays["centroids"]
+        with pytest.raises(ValueError):
+            write_artifacts(tmp_path, arrays)
+
+    def test_inference_adapters(self, tmp_path, arrays):
+        """Test scaler and KMeans adapters over artifact arrays."""
+        write_artifacts(tmp_path, arrays)
+        artifacts = load_artifacts(tmp_path)
+        scaler = ArtifactScaler.from_artifacts(artifacts)
+        kmeans = ArtifactKMeans.from_artifacts(artifacts)
+
+        X = arrays["centroids"] * arrays["scaler_scale"] + arrays["scaler_mean"]
+        scaled = scaler.transform(X)
+
+        np.testing.assert_allclose(scaled, arrays["centroids"])
+        np.testing.assert_array_equal(kmeans.predict(scaled), np.arange(4))
@@ -0,0 +1,80 @@
+"""Test model hot reload through the model registry."""
+
+import json
+import time
+
+import numpy as np
+import pytest
+
+from src.ml import ModelRegistry, set_current_version, write_artifacts
+
+
+def make_arrays(seed):
+    """Create small artifact arrays that differ per seed."""
+    rng = np.random.default_rng(seed)
+    return {
+        "scaler_mean": rng.normal(size=13),
+        "scaler_scale": rng.uniform(0.5, 2.0, size=13),
+        "centroids": rng.normal(size=(4, 13)),
+    }
+
+
+class TestModelRegistry:
+    """Test ModelRegistry."""
+
+    @pytest.fixture
+    def root(self, tmp_path):
+        """Create an artifact root with one current version."""
+        write_artifacts(tmp_path, make_arrays(0))
+        return tmp_path
+
+    def test_swaps_when_current_changes(self, root):
+        """Test a new CURRENT is swapped in while the old handle stays usable."""
+        registry = ModelRegistry(root)
+        assert registry.refresh()
+        in_flight = registry.current
+        assert not registry.refresh()
+
+        new_version = write_artifacts(root, make_arrays(1)).name
+
+        assert registry.refresh()
+        assert registry.version == new_version
+        assert in_flight.version != new_version
+        labels = in_flight.inference_kernel.predict(np.zeros((2, 13)))
+        assert labels.shape == (2,)
+
+        set_current_version(root, in_flight.version)
+        assert registry.refresh()
+        assert registry.version == in_flight.version
+        assert registry.swaps == 3
+
+    def test_broken_version_keeps_previous(self, root):
+        """Test a version that fails to load is skipped and the active one keeps serving."""
+        registry = ModelRegistry(root)
+        registry.refresh()
+        active = registry.version
+
+        broken = write_artifacts(root, make_arrays(2))
+        manifest = json.loads((broken / "manifest.json").read_text())
+        manifest["format_version"] = 99
+        (broken / "manifest.json").write_text(json.dumps(manifest))
+
+        assert not registry.refresh()
+        assert registry.version == active
+        assert "Unsupported artifact format" in registry.describe()["model_last_error"]
+
+    def test_watcher_picks_up_new_version(self, root):
+        """Test the background watcher swaps in a newly published version."""
+        registry = ModelRegistry(root, poll_interval=0.01)
+        registry.refresh()
+        registry.start()
+        try:
+            new_version = write_artifacts(root, make_arrays(3)).name
+            deadline = time.time() + 5
+            while registry.version != new_version and time.time() < deadline:
+                time.sleep(0.01)
+
+            assert registry.version == new_version
+            assert registry.describe()["model_watching"]
+        finally:
+            registry.stop()
@@ -0,0 +1,155 @@
+"""Test concurrent paginated fetching."""
+
+import asyncio
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.core.pagination import iter_items, iter_pages, iter_pages_threaded
+from src.core.spotify import SpotifyClient, SpotifyConfig
+
+
+def make_page(offset, limit, total):
+    """Build a paging object with integer items."""
+    return {
+        "offset": offset,
+        "limit": limit,
+        "total": total,
+        "items": list(range(offset, min(offset + limit, total))),
+    }
+
+
+class TestIterPages:
+    """Test the asyncio pager."""
+
+    @pytest.mark.asyncio
+    async def test_pages_in_order(self):
+        """Test pages come back in offset order even when later ones finish first."""
+        async def fetch_page(offset):
+            # Later pages respond faster
+            await asyncio.sleep(0.001 * (1000 - offset) / 100)
+            return make_page(offset, 100, 950)
+
+        items = []
+        async for page_items in iter_items(fetch_page, 100):
+            items.extend(page_items)
+
+        assert items == list(range(950))
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_bounded(self):
+        """Test no more than max_concurrency requests are in flight."""
+        in_flight = 0
+        peak = 0
+
+        async def fetch_page(offset):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.005)
+            in_flight -= 1
+            return make_page(offset, 10, 200)
+
+        pages = [page async for page in iter_pages(fetch_page, 10, max_concurrency=3)]
+
+        assert len(pages) == 20
+        assert peak == 3
+
+    @pytest.mark.asyncio
+    async def test_single_page(self):
+        """Test a result that fits the first page issues one request."""
+        fetch_page = MagicMock(side_effect=lambda offset: asyncio.sleep(0, make_page(offset, 50, 7)))
+
+        pages = [page async for page in iter_pages(fetch_page, 50)]
+
+        assert len(pages) == 1
+        assert fetch_page.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_error_propagates(self):
+        """Test a failing page request surfaces to the caller."""
+        async def fetch_page(offset):
+            if offset == 20:
+                raise RuntimeError("boom")
+            return make_page(offset, 10, 50)
+
+        with pytest.raises(RuntimeError):
+            async for _ in iter_pages(fetch_page, 10):
+                pass
+
+
+class TestIterPagesThreaded:
+    """Test the thread-pool pager."""
+
+    def test_pages_in_order(self):
+        """Test items are reassembled in order."""
+        def fetch_page(offset):
+            time.sleep(0.001 * (500 - offset) / 50)
+            return make_page(offset, 50, 480)
+
+        items = []
+        for page in iter_pages_threaded(fetch_page, 50, max_workers=4):
+            items.extend(page["items"])
+
+        assert items == list(range(480))
+
+    def test_requests_overlap(self):
+        """Test remaining pages are fetched concurrently."""
+        lock = threading.Lock()
+        in_flight = 0
+        peak = 0
+
+        def fetch_page(offset):
+            nonlocal in_flight, peak
+            with lock:
+                in_flight += 1
+                peak = max(peak, in_flight)
+            time.sleep(0.01)
+            with lock:
+                in_flight -= 1
+            return make_page(offset, 10, 100)
+
+        list(iter_pages_threaded(fetch_page, 10, max_workers=4))
+
+        assert 1 < peak <= 4
+
+
+class TestSpotifyClientPlaylistTracks:
+    """Test playlist fetching through SpotifyClient."""
+
+    @pytest.mark.asyncio
+    async def test_get_playlist_tracks(self, tmp_path):
+        """Test all pages are fetched, invalid items skipped and artist/album URIs kept."""
+        total = 250
+
+        def playlist_items(playlist_id, limit, offset):
+            page = make_page(offset, limit, total)
+            page["items"] = [
+                {"track": None} if i == 5 else {"track": {
+                    "id": f"{i:022d}",
+                    "name": f"Song {i}",
+                    "artists": [{"name": "Artist", "uri": "spotify:artist:a"}],
+                    "album": {"name": "Album", "uri": "spotify:album:b"},
+                    "uri": f"spotify:track:{i:022d}",
+                    "duration_ms": 1000,
+                    "popularity": 50,
+                }}
+                for i in page["items"]
+            ]
+            return page
+
+        client = SpotifyClient.__new__(SpotifyClient)
+        client.config = SpotifyConfig(client_id="id", client_secret="secret", max_concurrency=2)
+        client.logger = MagicMock()
+        client._client = MagicMock()
+        client._client.playlist_items.side_effect = playlist_items
+
+        tracks = await client.get_playlist_tracks("playlist")
+
+        assert len(tracks) == total - 1
+        assert tracks[0].id == f"{0:022d}"
+        assert tracks[-1].id == f"{total - 1:022d}"
+        assert (tracks[0].artist_uri, tracks[0].album_uri) == ("spotify:artist:a", "spotify:album:b")
+        assert client._client.playlist_items.call_count == 3
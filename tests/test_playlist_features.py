@@ -0,0 +1,137 @@
+"""Test the per-playlist feature pipeline."""
+
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.exceptions import DatabaseError
+from src.ml import FEATURE_NAMES, load_artifacts, train_from_database
+from src.mpd import (
+    build_playlist_features,
+    export_scaled_training_data,
+    iter_playlist_means,
+    load_playlist_features,
+)
+
+
+@pytest.fixture
+def mpd_db(tmp_path):
+    """Create a database with random playlists; pid 3 is empty and track 7 has no features."""
+    rng = np.random.default_rng(0)
+    n_tracks = 40
+    features_df = pd.DataFrame(rng.normal(size=(n_tracks, len(FEATURE_NAMES))), columns=FEATURE_NAMES)
+    features_df.insert(0, 'track_id', np.arange(1, n_tracks + 1))
+    features_df = features_df[features_df['track_id'] != 7]
+
+    pids = [0, 1, 2, 4, 5, 6, 7]
+    ratings = [
+        (pid, int(track_id))
+        for pid in pids
+        for track_id in rng.choice(np.arange(1, n_tracks + 1), size=rng.integers(1, 12), replace=False)
+    ]
+    ratings.append((2, 7))
+    rng.shuffle(ratings)
+    ratings_df = pd.DataFrame(ratings, columns=['pid', 'track_id'])
+
+    path = tmp_path / "playlists.db"
+    conn = sqlite3.connect(path)
+    features_df.to_sql('features', conn, index=False)
+    ratings_df.to_sql('ratings', conn, index=False)
+    conn.close()
+    return path, features_df, ratings_df
+
+
+def expected_stats(features_df, ratings_df):
+    """Per-playlist mean and variance computed with pandas."""
+    joined = ratings_df.merge(features_df, on='track_id')
+    grouped = joined.groupby('pid')[FEATURE_NAMES]
+    return grouped.mean(), grouped.var(ddof=0), grouped.size()
+
+
+class TestBuildPlaylistFeatures:
+    """Test the streaming mean/variance pass."""
+
+    @pytest.mark.parametrize("chunk_size", [1, 5, 1000])
+    def test_matches_pandas(self, tmp_path, mpd_db, chunk_size):
+        """Test results match a full in-memory group-by for any chunk size."""
+        db_path, features_df, ratings_df = mpd_db
+        output = build_playlist_features(db_path, tmp_path / "features", chunk_size=chunk_size)
+        features = load_playlist_features(output)
+        means, variances, sizes = expected_stats(features_df, ratings_df)
+
+        assert isinstance(features.means, np.memmap)
+        assert features.means.shape == (8, len(FEATURE_NAMES))
+        np.testing.assert_array_equal(features.pids, means.index.to_numpy())
+        np.testing.assert_array_equal(features.counts[means.index], sizes.to_numpy())
+        np.testing.assert_allclose(features.means[means.index], means.to_numpy(), rtol=1e-5, atol=1e-6)
+        np.testing.assert_allclose(features.variances[means.index], variances.to_numpy(), rtol=1e-5, atol=1e-6)
+
+    def test_missing_playlist_rows(self, tmp_path, mpd_db):
+        """Test playlists without features keep NaN rows and zero counts."""
+        db_path, _, _ = mpd_db
+        features = load_playlist_features(build_playlist_features(db_path, tmp_path / "features"))
+
+        assert features.counts[3] == 0
+        assert np.isnan(features.means[3]).all()
+
+    def test_without_variance(self, tmp_path, mpd_db):
+        """Test the variance matrix is optional."""
+        db_path, _, _ = mpd_db
+        output = build_playlist_features(db_path, tmp_path / "features", with_variance=False)
+
+        assert load_playlist_features(output).variances is None
+
+    def test_rebuild_replaces_output(self, tmp_path, mpd_db):
+        """Test a rebuild swaps in the new matrices while an old map stays readable."""
+        db_path, _, _ = mpd_db
+        old = load_playlist_features(build_playlist_features(db_path, tmp_path / "features"))
+        output = build_playlist_features(db_path, tmp_path / "features", with_variance=False)
+
+        assert load_playlist_features(output).variances is None
+        assert old.variances is not None and old.means.shape[0] > 0
+        assert sorted(path.name for path in tmp_path.iterdir()) == ["features", "playlists.db"]
+
+    def test_matches_sql_stream(self, tmp_path, mpd_db):
+        """Test chunks from the matrices match the SQLite aggregation."""
+        db_path, _, _ = mpd_db
+        features = load_playlist_features(build_playlist_features(db_path, tmp_path / "features"))
+
+        from_matrix = list(features.iter_chunks(chunk_size=3))
+        from_sql = list(iter_playlist_means(db_path, chunk_size=3))
+
+        for (pids_a, X_a), (pids_b, X_b) in zip(from_matrix, from_sql):
+            np.testing.assert_array_equal(pids_a, pids_b)
+            np.testing.assert_allclose(X_a, X_b, rtol=1e-5, atol=1e-6)
+
+    def test_missing_directory(self, tmp_path):
+        """Test loading from a directory without matrices."""
+        with pytest.raises(DatabaseError):
+            load_playlist_features(tmp_path / "missing")
+
+
+class TestTrainingData:
+    """Test downstream consumers of the matrices."""
+
+    def test_export_scaled_training_data(self, tmp_path, mpd_db):
+        """Test the scaled CSV has one row per playlist."""
+        db_path, _, _ = mpd_db
+        features = load_playlist_features(build_playlist_features(db_path, tmp_path / "features"))
+        mean = np.ones(len(FEATURE_NAMES))
+        scale = np.full(len(FEATURE_NAMES), 2.0)
+
+        path = export_scaled_training_data(features, mean, scale, tmp_path / "scaled.csv", chunk_size=2)
+        scaled = np.loadtxt(path, delimiter=',')
+
+        np.testing.assert_allclose(scaled, (features.means[features.pids] - 1.0) / 2.0, rtol=1e-6)
+
+    def test_train_from_features(self, tmp_path, mpd_db):
+        """Test training can stream from the precomputed matrices."""
+        db_path, _, _ = mpd_db
+        features_path = build_playlist_features(db_path, tmp_path / "features")
+
+        version_dir = train_from_database(
+            db_path, tmp_path / "artifacts", n_clusters=2, features_path=features_path)
+
+        np.testing.assert_array_equal(load_artifacts(version_dir).pids, [0, 1, 2, 4, 5, 6, 7])
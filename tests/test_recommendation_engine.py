@@ -0,0 +1,167 @@
+"""Test recommendation engine."""
+
+from pathlib import Path
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import numpy as np
+import pytest
+
+from src.core.spotify import AudioFeatures, SpotifyTrack
+from src.data_models import User
+from src.metrics import metrics
+from src.ml import ModelRegistry, write_artifacts
+from src.recommendation_engine import RecommendationEngine
+
+MODEL_DIR = Path(__file__).resolve().parent.parent / "model"
+
+
+def make_features(energy: float, tempo: float) -> AudioFeatures:
+    """Create audio features varying in energy and tempo."""
+    return AudioFeatures(
+        danceability=0.6,
+        energy=energy,
+        key=5,
+        loudness=-7.0,
+        mode=1,
+        speechiness=0.09,
+        acousticness=0.24,
+        instrumentalness=0.06,
+        liveness=0.19,
+        valence=0.49,
+        tempo=tempo,
+        duration_ms=234000,
+        time_signature=4
+    )
+
+
+class TestRecommendationEngine:
+    """Test RecommendationEngine."""
+
+    @pytest.fixture
+    def features_by_uri(self):
+        """Create candidate features keyed by track URI."""
+        return {
+            f"spotify:track:{i:022d}": make_features(0.3 + 0.05 * i, 100.0 + 5 * i)
+            for i in range(10)
+        }
+
+    @pytest.fixture
+    def engine(self, tmp_path, features_by_uri):
+        """Create an engine over the committed artifacts with a stub client."""
+        spotify_client = MagicMock()
+        spotify_client.get_track_features.side_effect = lambda uri: features_by_uri[uri]
+        spotify_client.get_audio_features_batch = AsyncMock(
+            side_effect=lambda uris: [features_by_uri.get(uri) for uri in uris]
+        )
+        spotify_client.get_tracks = AsyncMock(side_effect=lambda uris: [
+            SpotifyTrack(
+                id=uri.split(":")[-1], name="Track", artist="Artist", album="Album",
+                uri=uri, duration_ms=200000, popularity=50
+            )
+            for uri in uris
+        ])
+        return RecommendationEngine(
+            spotify_client, model_dir=MODEL_DIR, cache_dir=tmp_path / "cache"
+        )
+
+    def test_loads_artifacts(self, engine):
+        """Test the engine prefers the artifact format."""
+        assert engine.artifacts is not None
+        assert engine.inference_kernel is not None
+        assert engine.kmeans_model.n_clusters == 17
+
+    def test_cluster_based_recommendations(self, engine, features_by_uri):
+        """Test clustering recommendations rank candidates in the user's cluster."""
+        candidates = list(features_by_uri)
+        user_vector = engine._extract_model_features(features_by_uri[candidates[0]])
+
+        recommendations = engine.cluster_based_recommendations(user_vector, candidates, 5)
+
+        assert 0 < len(recommendations) <= 5
+        assert recommendations[0][0] == candidates[0]
+        scores = [score for _, score in recommendations]
+        assert scores == sorted(scores, reverse=True)
+
+    def test_model_features_are_cached(self, engine, features_by_uri):
+        """Test candidate features are fetched once."""
+        candidates = list(features_by_uri)
+        user_vector = np.array(engine.artifacts.scaler_mean)
+
+        engine.cluster_based_recommendations(user_vector, candidates, 5)
+        engine.cluster_based_recommendations(user_vector, candidates, 5)
+
+        assert engine.spotify_client.get_track_features.call_count == len(candidates)
+
+    def test_stages_are_traced(self, engine, features_by_uri):
+        """Test clustering stages are recorded on the active trace."""
+        user_vector = np.array(engine.artifacts.scaler_mean)
+
+        with metrics.trace() as trace:
+            engine.cluster_based_recommendations(user_vector, list(features_by_uri), 5)
+
+        assert {"features", "scale_predict"} <= set(trace.stages)
+
+    def test_async_clustering_matches_sync(self, engine, features_by_uri):
+        """Test the async clustering path ranks like the blocking one."""
+        candidates = list(features_by_uri)
+        user_vector = engine._extract_model_features(features_by_uri[candidates[0]])
+
+        expected = engine.cluster_based_recommendations(user_vector, candidates, 5)
+        engine.clear_feature_cache()
+        result = asyncio.run(engine.cluster_based_recommendations_async(user_vector, candidates, 5))
+
+        assert result == expected
+
+    def test_generate_hybrid_fetches_features_once(self, engine, features_by_uri):
+        """Test hybrid generation batches feature fetches and hydrates its picks."""
+        candidates = list(features_by_uri)
+        user = User(
+            username="listener", password_hash="x", email="listener@example.com",
+            recently_searched=[candidates[0]]
+        )
+
+        result = asyncio.run(engine.generate_recommendations(user, candidates, 3, algorithm="hybrid"))
+
+        fetched = [uri for call in engine.spotify_client.get_audio_features_batch.call_args_list
+                   for uri in call.args[0]]
+        assert all(fetched.count(uri) == 1 for uri in candidates[1:])
+        assert 0 < len(result.recommended_tracks) == len(result.confidence_scores) <= 3
+        assert engine.spotify_client.get_tracks.await_count == 1
+        assert candidates[0] not in [track.track_uri for track in result.recommended_tracks]
+        assert result.model_version == engine.model_version
+
+    def test_batch_fetches_candidate_features_once(self, engine, features_by_uri):
+        """Test a user batch shares one candidate feature fetch."""
+        candidates = list(features_by_uri)
+        users = [
+            User(username=f"user{i}", password_hash="x", email=f"user{i}@example.com",
+                 loved_it=[candidates[i]])
+            for i in range(4)
+        ]
+
+        results = asyncio.run(engine.generate_recommendations_batch(users, candidates, 3))
+
+        fetched = [uri for call in engine.spotify_client.get_audio_features_batch.call_args_list
+                   for uri in call.args[0] if uri in candidates]
+        assert set(results) == {user.username for user in users}
+        assert sorted(fetched) == sorted(candidates + candidates[:4])
+
+    def test_follows_shared_registry(self, tmp_path, engine):
+        """Test an engine built on a registry serves whichever version it swapped in."""
+        root = tmp_path / "artifacts"
+        arrays = {name: np.array(engine.artifacts.arrays[name])
+                  for name in ("scaler_mean", "scaler_scale", "centroids")}
+        write_artifacts(root, arrays, version="v1")
+        registry = ModelRegistry(root)
+        registry.refresh()
+        shared = RecommendationEngine(
+            engine.spotify_client, cache_dir=tmp_path / "cache", model_registry=registry
+        )
+        assert shared.model_version == "v1"
+
+        write_artifacts(root, {**arrays, "centroids": arrays["centroids"] * 2}, version="v2")
+        registry.refresh()
+
+        assert shared.model_version == "v2"
+        assert shared.kmeans_model.n_clusters == 17
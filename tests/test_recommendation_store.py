@@ -0,0 +1,108 @@
+"""Test materialized per-user recommendations."""
+
+import asyncio
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.data_models import RecommendationResult, Track, User
+from src.recommendation_store import Materializer, RecommendationStore
+from src.user_manager import UserManager
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Create an empty recommendation store."""
+    store = RecommendationStore(tmp_path / "recommendations.db")
+    yield store
+    store.close()
+
+
+def make_result(username, model_version="v1"):
+    """Create a two-track engine result for a user."""
+    tracks = [
+        Track(track_uri=f"spotify:track:{username}{i}", track_name=f"Song {i}", artist_name="Artist",
+              artist_uri="", album_uri="", album_name="")
+        for i in range(2)
+    ]
+    return RecommendationResult(tracks, [0.9, 0.5], "hybrid", 0.01, model_version=model_version)
+
+
+def make_engine(model_version="v1"):
+    """Create an engine stub recommending two tracks per user."""
+    engine = MagicMock()
+    engine.model_version = model_version
+    engine.generate_recommendations_batch = AsyncMock(side_effect=lambda users, *args: {
+        user.username: make_result(user.username, engine.model_version) for user in users
+    })
+    return engine
+
+
+class TestRecommendationStore:
+    """Test RecommendationStore."""
+
+    def test_stale_entries_are_not_served(self, store):
+        """Test invalidated, other-version and expired entries read as missing."""
+        store.put_result("ann", make_result("ann"))
+
+        entry = store.get("ann", model_version="v1", max_age=60)
+        assert entry.track_uris == ["spotify:track:ann0", "spotify:track:ann1"]
+        assert entry.tracks[0]["name"] == "Song 0"
+        assert store.get("ann", model_version="v2") is None
+        assert store.get("ann", max_age=0) is None
+        assert store.get("bob") is None
+
+        store.invalidate("ann")
+        assert store.get("ann") is None
+        assert store.stats() == {"users": 1, "invalidated": 1}
+        assert store.stale_usernames(["ann", "bob"]) == ["ann", "bob"]
+
+    def test_preference_writes_invalidate(self, tmp_path, store):
+        """Test UserManager invalidates stored recommendations on feedback."""
+        users = UserManager(tmp_path / "users.db", recommendation_store=store)
+        users.create_user("listener", "Passw0rdOk", "listener@example.com")
+        store.put_result("listener", make_result("listener"))
+
+        users.update_user_preferences("listener", loved_it=["spotify:track:x"])
+
+        assert store.get("listener") is None
+
+
+class TestMaterializer:
+    """Test Materializer."""
+
+    def test_returning_users_skip_the_engine(self, store):
+        """Test stored entries are served until the model version changes."""
+        engine = make_engine()
+        materializer = Materializer(engine, store, ["spotify:track:c"])
+        users = [User("ann", "x", "ann@example.com"), User("bob", "x", "bob@example.com")]
+
+        first = asyncio.run(materializer.recommend_many(users))
+        store.invalidate("bob")
+        second = asyncio.run(materializer.recommend_many(users))
+        engine.model_version = "v2"
+        third = asyncio.run(materializer.recommend(users[0]))
+
+        calls = [[user.username for user in call.args[0]]
+                 for call in engine.generate_recommendations_batch.call_args_list]
+        assert calls == [["ann", "bob"], ["bob"], ["ann"]]
+        assert second["ann"].computed_at == first["ann"].computed_at
+        assert third.model_version == "v2"
+
+    def test_refresh_only_recomputes_stale_active_users(self, store):
+        """Test a refresh skips inactive users and those with fresh entries."""
+        engine = make_engine()
+        now = datetime.now()
+        users = [
+            User("ann", "x", "ann@example.com", last_login=now),
+            User("bob", "x", "bob@example.com", last_login=now),
+            User("old", "x", "old@example.com", last_login=now - timedelta(days=90)),
+        ]
+        store.put_result("ann", make_result("ann"))
+
+        summary = asyncio.run(Materializer(engine, store, ["spotify:track:c"]).refresh(users))
+
+        assert summary == {"active": 2, "refreshed": 1, "fresh": 1}
+        assert store.get("bob") is not None
+        assert store.get("old") is None
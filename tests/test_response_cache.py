@@ -0,0 +1,137 @@
+"""Test HTTP response cache middleware."""
+
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.web.cache import (
+    CachedResponse,
+    CacheRule,
+    MemoryBackend,
+    ResponseCache,
+    ResponseCacheMiddleware,
+    SQLiteBackend,
+)
+
+
+def make_app(rules, cache=None):
+    """Create an app whose /items/{item_id} endpoint counts its calls.
+
+    :param rules: Cache rules for the middleware
+    :param cache: Response cache, a fresh in-memory one by default
+    :return: Tuple of app, call counter dict and cache
+    """
+    app = FastAPI()
+    calls = {"count": 0}
+    cache = cache or ResponseCache()
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: str, q: str = ""):
+        calls["count"] += 1
+        return {"item_id": item_id, "q": q, "version": calls["count"]}
+
+    @app.get("/missing")
+    async def missing():
+        calls["count"] += 1
+        return {"version": calls["count"]}
+
+    app.add_middleware(ResponseCacheMiddleware, cache=cache, rules=rules)
+    return app, calls, cache
+
+
+class TestResponseCacheMiddleware:
+    """Test ResponseCacheMiddleware."""
+
+    def test_repeat_request_served_from_cache(self):
+        """Test equivalent queries share one entry and skip the endpoint."""
+        app, calls, cache = make_app([CacheRule("/items/{item_id}", ttl=60, case_insensitive_params=("q",))])
+        client = TestClient(app)
+
+        first = client.get("/items/a", params={"q": "Daft  Punk"})
+        second = client.get("/items/a/", params={"q": "daft punk"})
+
+        assert first.headers["x-cache"] == "MISS"
+        assert second.headers["x-cache"] == "HIT"
+        assert second.json() == first.json()
+        assert second.headers["etag"] == first.headers["etag"]
+        assert calls["count"] == 1
+        assert cache.stats()["hit"] == 1
+
+    def test_if_none_match_returns_304(self):
+        """Test a matching ETag gets an empty 304 response."""
+        app, calls, _ = make_app([CacheRule("/items/{item_id}", ttl=60)])
+        client = TestClient(app)
+
+        etag = client.get("/items/a").headers["etag"]
+        response = client.get("/items/a", headers={"If-None-Match": etag})
+
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+        assert calls["count"] == 1
+
+    def test_stale_entry_served_while_revalidating(self):
+        """Test an expired entry within the stale window is served and refreshed in the background."""
+        app, calls, _ = make_app([CacheRule("/items/{item_id}", ttl=0.05, stale_while_revalidate=60)])
+
+        with TestClient(app) as client:
+            client.get("/items/a")
+            time.sleep(0.1)
+            stale = client.get("/items/a")
+
+            deadline = time.time() + 2
+            while calls["count"] < 2 and time.time() < deadline:
+                time.sleep(0.01)
+            fresh = client.get("/items/a")
+
+        assert stale.headers["x-cache"] == "STALE"
+        assert stale.json()["version"] == 1
+        assert fresh.headers["x-cache"] == "HIT"
+        assert fresh.json()["version"] == 2
+
+    def test_unmatched_routes_and_errors_are_not_cached(self):
+        """Test routes without a rule and non-200 responses always reach the app."""
+        app, calls, cache = make_app([CacheRule("/items/{item_id}", ttl=60)])
+        client = TestClient(app)
+
+        client.get("/missing")
+        client.get("/missing")
+        client.get("/items/a/b")
+
+        assert calls["count"] == 2
+        assert len(cache.memory) == 0
+
+
+class TestResponseCacheBackends:
+    """Test response cache storage tiers."""
+
+    @staticmethod
+    def entry(body: bytes) -> CachedResponse:
+        """Create a cache entry with the given body."""
+        return CachedResponse(200, body, "application/json", '"etag"', time.time())
+
+    def test_memory_backend_evicts_least_recently_used(self):
+        """Test the memory tier stays within its byte budget."""
+        backend = MemoryBackend(max_bytes=3 * self.entry(b"x" * 100).size)
+        for key in "abc":
+            backend.set(key, self.entry(b"x" * 100))
+        backend.get("a")
+        backend.set("d", self.entry(b"x" * 100))
+
+        assert backend.get("b") is None
+        assert backend.get("a") is not None
+        assert backend.bytes <= backend.max_bytes
+
+    @pytest.mark.asyncio
+    async def test_sqlite_backend_fills_memory_tier(self, tmp_path):
+        """Test entries persisted on disk survive a new cache instance."""
+        first = ResponseCache(shared=SQLiteBackend(tmp_path / "responses.db"))
+        await first.set("key", self.entry(b'{"a": 1}'), expire_seconds=60)
+
+        second = ResponseCache(shared=SQLiteBackend(tmp_path / "responses.db"))
+        entry = await second.get("key")
+
+        assert entry.body == b'{"a": 1}'
+        assert second.memory.get("key") is entry
@@ -0,0 +1,50 @@
+"""Test fast JSON response encoding."""
+
+import json
+
+from src.core.spotify import SpotifyTrack
+from src.web.serialization import FastJSONResponse, dumps, encode_models
+
+
+def make_track(i: int) -> SpotifyTrack:
+    """Create a test track.
+
+    :param i: Track number
+    :return: SpotifyTrack
+    """
+    track_id = f"{i:022d}"
+    return SpotifyTrack(
+        id=track_id,
+        name=f"Track {i} – ünïcode",
+        artist="Artist",
+        album="Album",
+        uri=f"spotify:track:{track_id}",
+        duration_ms=180000,
+        popularity=50
+    )
+
+
+class TestSerialization:
+    """Test model encoding for API responses."""
+
+    def test_models_encode_like_model_dump(self):
+        """Test models nested in a payload encode to the same JSON as model_dump."""
+        tracks = [make_track(i) for i in range(3)]
+
+        body = dumps({"recommendations": tracks, "count": 3})
+
+        assert json.loads(body) == {
+            "recommendations": [track.model_dump() for track in tracks],
+            "count": 3,
+        }
+
+    def test_columnar_format(self):
+        """Test columnar output has one list per field in track order."""
+        tracks = [make_track(i) for i in range(3)]
+
+        columns = json.loads(FastJSONResponse(encode_models(tracks, "columnar")).body)
+
+        assert list(columns) == list(SpotifyTrack.model_fields)
+        assert columns["id"] == [track.id for track in tracks]
+        assert columns["artist_uri"] == [None, None, None]
+        assert encode_models([], "columnar") == {}
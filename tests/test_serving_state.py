@@ -0,0 +1,43 @@
+"""Test the shared serving state loaded before workers fork."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.api.state import get_serving_state, load_serving_state
+from src.ml import FEATURE_NAMES, write_artifacts
+from src.mpd import TrackFeatureStore
+
+
+class TestServingState:
+    """Test load_serving_state."""
+
+    @pytest.fixture
+    def model_dir(self, tmp_path):
+        """Create a model directory with one artifact version."""
+        rng = np.random.default_rng(0)
+        write_artifacts(tmp_path / "model" / "artifacts", {
+            "scaler_mean": rng.normal(size=13),
+            "scaler_scale": rng.uniform(0.5, 2.0, size=13),
+            "centroids": rng.normal(size=(4, 13)),
+        })
+        return tmp_path / "model"
+
+    def test_loads_artifacts_and_mapped_features(self, tmp_path, model_dir):
+        """Test the model and a .npy feature matrix are loaded read-only and made current."""
+        frame = pd.DataFrame({"track_id": [1, 2], **{name: [0.5, 0.25] for name in FEATURE_NAMES}})
+        TrackFeatureStore.from_frame(frame).save(tmp_path / "features.npy")
+
+        state = load_serving_state(model_dir, tmp_path / "features.npy")
+
+        assert get_serving_state() is state
+        assert state.model_version == state.artifacts.version
+        assert state.describe()["feature_tracks"] == 2
+        assert not state.feature_store.matrix.flags.writeable
+
+    def test_missing_model_serves_without_one(self, tmp_path):
+        """Test a directory without artifacts gives a state with no model."""
+        state = load_serving_state(tmp_path)
+
+        assert state.model_version is None
+        assert state.feature_store is None
@@ -275,7 +275,40 @@ class TestSpotifyClient:
         # Both tracks should be identical
         assert track1.id == track2.id
         assert track1.name == track2.name
-    
+
+    @pytest.mark.asyncio
+    async def test_get_tracks_batches_misses(self, mock_spotify_client):
+        """Test uncached tracks are fetched 50 per call and served from cache after."""
+        ids = [f"{i:022d}" for i in range(120)]
+
+        def tracks(batch):
+            return {"tracks": [
+                None if track_id == ids[7] else {
+                    "id": track_id,
+                    "name": f"Track {track_id}",
+                    "artists": [{"name": "Artist", "uri": "spotify:artist:" + "a" * 22}],
+                    "album": {"name": "Album", "uri": "spotify:album:" + "b" * 22},
+                    "uri": f"spotify:track:{track_id}",
+                    "duration_ms": 180000,
+                    "popularity": 50
+                }
+                for track_id in batch
+            ]}
+
+        mock_spotify_client._client.tracks.side_effect = tracks
+
+        first = await mock_spotify_client.get_tracks([f"spotify:track:{i}" for i in ids] + ids[:3])
+        second = await mock_spotify_client.get_tracks(ids[:10])
+
+        # Tracks Spotify did not return are not cached, so only ids[7] is requested again
+        batch_sizes = [len(c.args[0]) for c in mock_spotify_client._client.tracks.call_args_list]
+        assert batch_sizes == [50, 50, 20, 1]
+        assert len(first) == 123
+        assert first[7] is None and second[7] is None
+        assert first[0].id == ids[0] and first[120].id == ids[0]
+        assert first[0].album_uri == "spotify:album:" + "b" * 22
+        assert second[1] is first[1]
+
     def test_clear_cache(self, mock_spotify_client):
         """Test cache clearing functionality."""
         # Add some data to cache
@@ -0,0 +1,99 @@
+"""Test streaming playlist and recommendation endpoints."""
+
+import json
+from unittest.mock import AsyncMock, MagicMock
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.core.spotify import SpotifyTrack
+from src.exceptions import SpotifyAPIError
+from src.web.routes import get_spotify_client, router
+
+
+def make_track(i: int) -> SpotifyTrack:
+    """Create a test track.
+
+    :param i: Track number
+    :return: SpotifyTrack
+    """
+    track_id = f"{i:022d}"
+    return SpotifyTrack(
+        id=track_id,
+        name=f"Track {i}",
+        artist="Artist",
+        album="Album",
+        uri=f"spotify:track:{track_id}",
+        duration_ms=180000,
+        popularity=50
+    )
+
+
+def make_client(spotify) -> TestClient:
+    """Create a test client for the API router backed by ``spotify``.
+
+    :param spotify: Stand-in for SpotifyClient
+    :return: TestClient
+    """
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_spotify_client] = lambda: spotify
+    return TestClient(app)
+
+
+class TestStreamingRoutes:
+    """Test NDJSON/SSE streaming routes."""
+
+    def test_playlist_streams_one_record_per_page(self):
+        """Test each playlist page becomes a tracks record, followed by a summary."""
+        pages = [[make_track(i) for i in range(100)], [make_track(i) for i in range(100, 130)]]
+
+        async def iter_playlist_tracks(playlist_id):
+            for page in pages:
+                yield page
+
+        spotify = MagicMock()
+        spotify.iter_playlist_tracks = iter_playlist_tracks
+
+        response = make_client(spotify).get("/api/v1/playlist/abc/stream")
+        records = [json.loads(line) for line in response.text.splitlines()]
+
+        assert response.headers["content-type"] == "application/x-ndjson"
+        assert [record["event"] for record in records] == ["tracks", "tracks", "summary"]
+        assert len(records[1]["data"]) == 30
+        assert records[2]["data"]["track_count"] == 130
+        assert records[2]["data"]["pages"] == 2
+
+    def test_upstream_failure_ends_stream_with_error_record(self):
+        """Test a failure after the first page is reported in-band."""
+        async def iter_playlist_tracks(playlist_id):
+            yield [make_track(0)]
+            raise SpotifyAPIError("page failed")
+
+        spotify = MagicMock()
+        spotify.iter_playlist_tracks = iter_playlist_tracks
+
+        response = make_client(spotify).get("/api/v1/playlist/abc/stream")
+        records = [json.loads(line) for line in response.text.splitlines()]
+
+        assert response.status_code == 200
+        assert [record["event"] for record in records] == ["tracks", "error"]
+
+    def test_recommendations_stream_as_sse(self):
+        """Test recommendations are sent as SSE events in batches when the client accepts them."""
+        spotify = MagicMock()
+        spotify.get_recommendations = AsyncMock(return_value=[make_track(i) for i in range(45)])
+
+        response = make_client(spotify).post(
+            "/api/v1/recommendations/stream",
+            json={"track_ids": ["4uLU6hMCjMI75M1A2tKUQC"], "limit": 45},
+            headers={"Accept": "text/event-stream"}
+        )
+        events = [block.split("\n") for block in response.text.strip().split("\n\n")]
+
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert [lines[0] for lines in events] == [
+            "event: start", "event: tracks", "event: tracks", "event: tracks", "event: summary"
+        ]
+        assert len(json.loads(events[3][1][len("data: "):])) == 5
+        assert json.loads(events[4][1][len("data: "):])["count"] == 45
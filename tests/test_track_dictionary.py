@@ -0,0 +1,82 @@
+"""Test the track URI <-> track ID dictionary."""
+
+import multiprocessing as mp
+import sqlite3
+
+import numpy as np
+
+from src.mpd import (
+    MISSING_ID,
+    TrackDictionary,
+    connect_track_dictionary,
+    start_track_dictionary_owner,
+)
+
+
+def assign_in_worker(address, uris):
+    """Assign IDs through the owner process from a separate process."""
+    ids, _ = connect_track_dictionary(address).get_or_create(uris)
+    return ids.tolist()
+
+
+class TestTrackDictionary:
+    """Test TrackDictionary."""
+
+    def test_get_or_create_is_dense_and_idempotent(self, tmp_path):
+        """Test new URIs get the next IDs once and keep them after reopening."""
+        db_path = tmp_path / "mpd.db"
+        conn = sqlite3.connect(str(db_path))
+        conn.execute("CREATE TABLE tracks (track_uri text, track_id integer)")
+        conn.executemany("INSERT INTO tracks VALUES (?, ?)", [("a", 1), ("b", 2), ("b", 2)])
+        conn.commit()
+        conn.close()
+
+        dictionary = TrackDictionary(db_path)
+        ids, created = dictionary.get_or_create(["c", "a", "d", "c"])
+        dictionary.close()
+        reopened = TrackDictionary(db_path)
+        again, created_again = reopened.get_or_create(["d", "c", "b"])
+
+        assert ids.tolist() == [3, 1, 4, 3]
+        assert created.tolist() == [True, False, True, False]
+        assert again.tolist() == [4, 3, 2] and not created_again.any()
+        assert reopened.ids(["b", "zzz"]).tolist() == [2, MISSING_ID]
+        assert reopened.uris([4, 0, 99]) == ["d", None, None]
+        assert (len(reopened), reopened.max_track_id) == (4, 4)
+
+    def test_legacy_duplicate_ids_stay_reserved(self, tmp_path):
+        """Test new URIs never reuse the extra IDs of a URI repeated in legacy tracks."""
+        db_path = tmp_path / "mpd.db"
+        conn = sqlite3.connect(str(db_path))
+        conn.execute("CREATE TABLE tracks (track_uri text, track_id integer)")
+        conn.executemany("INSERT INTO tracks VALUES (?, ?)", [("a", 1), ("b", 2), ("a", 3)])
+        conn.commit()
+        conn.close()
+
+        dictionary = TrackDictionary(db_path)
+        ids, _ = dictionary.get_or_create(["c", "a"])
+        dictionary.close()
+
+        assert ids.tolist() == [4, 1]
+        assert dictionary.uris([1, 3]) == ["a", "a"]
+        assert TrackDictionary(db_path).get_or_create(["d"])[0].tolist() == [5]
+
+    def test_owner_process_serializes_workers(self, tmp_path):
+        """Test workers sharing the owner process agree on every ID."""
+        owner = start_track_dictionary_owner(tmp_path / "mpd.db")
+        try:
+            batches = [[f"uri{i}" for i in range(start, start + 50)] for start in (0, 25, 40)]
+            with mp.Pool(3) as pool:
+                results = pool.starmap(assign_in_worker, [(owner.address, batch) for batch in batches])
+            shared = connect_track_dictionary(owner.address)
+            assert len(shared) == 90
+        finally:
+            owner.shutdown()
+
+        assigned = {}
+        for batch, ids in zip(batches, results):
+            for uri, track_id in zip(batch, ids):
+                assert assigned.setdefault(uri, track_id) == track_id
+        assert sorted(assigned.values()) == list(range(1, 91))
+        persisted = TrackDictionary(tmp_path / "mpd.db")
+        assert np.array_equal(persisted.ids(list(assigned)), list(assigned.values()))
@@ -0,0 +1,120 @@
+"""Test track name search index."""
+
+import os
+import sqlite3
+
+import pytest
+
+from src.exceptions import DatabaseError
+from src.mpd import TrackNameIndex, load_or_build_index, normalize_name
+
+
+class TestNormalizeName:
+    """Test name normalization."""
+
+    def test_normalize_name(self):
+        """Test case, punctuation and whitespace are normalized."""
+        assert normalize_name("  Don't Stop (Me Now)!  ") == "don't stop me now"
+        assert normalize_name("Hey_Jude") == "hey jude"
+
+
+class TestTrackNameIndex:
+    """Test exact, prefix and fuzzy lookups."""
+
+    @pytest.fixture
+    def index(self):
+        """Create a small index."""
+        names = [
+            "Stairway to Heaven",
+            "Stairway To Heaven - Remaster",
+            "stairway to heaven",
+            "Highway to Hell",
+            "Heaven",
+            "Starboy",
+        ]
+        popularity = [10, 3, 50, 20, 5, 40]
+        return TrackNameIndex(range(1, len(names) + 1), names, popularity)
+
+    def test_exact_ranked_by_popularity(self, index):
+        """Test exact matches ignore case and rank by popularity."""
+        matches = index.exact("STAIRWAY TO HEAVEN")
+
+        assert [match.track_id for match in matches] == [3, 1]
+        assert index.lookup("Stairway to Heaven") == 3
+
+    def test_lookup_missing(self, index):
+        """Test lookup of an unknown name."""
+        assert index.lookup("Bohemian Rhapsody") is None
+
+    def test_prefix(self, index):
+        """Test prefix matches for autocomplete."""
+        matches = index.prefix("sta")
+
+        assert [match.track_id for match in matches] == [3, 6, 1, 2]
+        assert [match.track_id for match in index.prefix("sta", limit=2)] == [3, 6]
+
+    def test_fuzzy(self, index):
+        """Test misspelled names still match."""
+        matches = index.fuzzy("stairway to heavn")
+
+        assert matches[0].track_id == 3
+        assert 0 < matches[0].score < 1
+
+    def test_search_falls_back_to_fuzzy(self, index):
+        """Test search uses fuzzy matching when nothing matches exactly."""
+        assert index.search("highway too hell")[0].track_id == 4
+
+    def test_save_and_load(self, tmp_path, index):
+        """Test the index survives a save/load round trip."""
+        path = index.save(tmp_path / "tracks.track_names.npz")
+        loaded = TrackNameIndex.load(path)
+
+        assert len(loaded) == len(index)
+        assert loaded.exact("heaven") == index.exact("heaven")
+        assert loaded.fuzzy("starboi") == index.fuzzy("starboi")
+
+    def test_load_invalid_file(self, tmp_path):
+        """Test loading a file that is not an index."""
+        path = tmp_path / "broken.npz"
+        path.write_bytes(b"not an index")
+
+        with pytest.raises(DatabaseError):
+            TrackNameIndex.load(path)
+
+
+class TestLoadOrBuildIndex:
+    """Test building the index from an MPD database."""
+
+    @pytest.fixture
+    def db_path(self, tmp_path):
+        """Create a minimal MPD database."""
+        path = tmp_path / "playlists.db"
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE tracks (track_id integer, track_name text)")
+        conn.execute("CREATE TABLE ratings (pid integer, track_id integer)")
+        conn.executemany("INSERT INTO tracks VALUES (?, ?)", [(1, "Yesterday"), (2, "Yesterday")])
+        conn.executemany("INSERT INTO ratings VALUES (?, ?)", [(1, 2), (2, 2), (3, 1)])
+        conn.commit()
+        conn.close()
+        return path
+
+    def test_builds_and_persists(self, db_path):
+        """Test popularity comes from ratings and the index is saved next to the database."""
+        index = load_or_build_index(db_path)
+
+        assert index.lookup("yesterday") == 2
+        assert (db_path.parent / "playlists.track_names.npz").exists()
+
+    def test_rebuilds_stale_index(self, db_path):
+        """Test an index older than the database is rebuilt."""
+        load_or_build_index(db_path)
+        index_path = db_path.parent / "playlists.track_names.npz"
+
+        conn = sqlite3.connect(db_path)
+        conn.execute("INSERT INTO tracks VALUES (3, 'Help')")
+        conn.commit()
+        conn.close()
+        stat = index_path.stat()
+        os.utime(index_path, (stat.st_atime, stat.st_mtime - 10))
+
+        assert load_or_build_index(db_path).lookup("help") == 3
@@ -0,0 +1,166 @@
+"""Test online KMeans training."""
+
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import StandardScaler
+
+from src.ml import (
+    FEATURE_NAMES,
+    OnlineKMeans,
+    align_cluster_ids,
+    fit_scaler,
+    load_artifacts,
+    train_from_database,
+    train_online_kmeans,
+    write_artifacts,
+)
+from src.mpd import iter_playlist_means
+
+
+def make_blobs(n_per_cluster=200, n_clusters=3, seed=0):
+    """Create well-separated clusters in raw feature space."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(scale=10.0, size=(n_clusters, len(FEATURE_NAMES)))
+    X = np.concatenate([
+        center + rng.normal(scale=0.5, size=(n_per_cluster, len(FEATURE_NAMES)))
+        for center in centers
+    ])
+    truth = np.repeat(np.arange(n_clusters), n_per_cluster)
+    order = rng.permutation(len(X))
+    return X[order], truth[order]
+
+
+def chunked(X, chunk_size=128):
+    """Return a factory yielding (pids, X) chunks."""
+    def factory():
+        for start in range(0, len(X), chunk_size):
+            yield np.arange(start, min(start + chunk_size, len(X))), X[start:start + chunk_size]
+    return factory
+
+
+def same_partition(a, b):
+    """Whether two labelings describe the same partition."""
+    return len(set(zip(a, b))) == len(set(a)) == len(set(b))
+
+
+class TestStreamingHelpers:
+    """Test scaler fitting and cluster alignment."""
+
+    def test_fit_scaler_matches_sklearn(self):
+        """Test streamed moments equal StandardScaler on the full data."""
+        X, _ = make_blobs()
+        mean, scale = fit_scaler(chunked(X, 100)())
+        scaler = StandardScaler().fit(X)
+
+        np.testing.assert_allclose(mean, scaler.mean_)
+        np.testing.assert_allclose(scale, scaler.scale_)
+
+    def test_align_cluster_ids(self):
+        """Test permuted centroids are mapped back to reference IDs."""
+        reference = np.arange(12, dtype=float).reshape(4, 3)
+        permuted = reference[[2, 0, 3, 1]] + 0.01
+
+        order = align_cluster_ids(reference, permuted)
+
+        np.testing.assert_allclose(permuted[order], reference + 0.01)
+
+
+class TestOnlineKMeans:
+    """Test mini-batch training."""
+
+    def test_partial_fit_is_running_mean(self):
+        """Test a single cluster converges to the exact mean of its points."""
+        Z = np.random.default_rng(0).normal(size=(500, 2))
+        model = OnlineKMeans(np.zeros((1, 2)))
+        for start in range(0, 500, 64):
+            model.partial_fit(Z[start:start + 64])
+
+        np.testing.assert_allclose(model.centroids[0], Z.mean(axis=0))
+        assert model.counts[0] == 500
+
+    def test_cold_start_recovers_clusters(self):
+        """Test a cold start finds the generating clusters."""
+        X, truth = make_blobs()
+        result = train_online_kmeans(chunked(X), n_clusters=3, n_epochs=2, batch_size=64)
+
+        labels = result.arrays["labels"]
+        np.testing.assert_array_equal(result.arrays["pids"], np.arange(len(X)))
+        assert same_partition(labels, truth)
+        assert result.arrays["cluster_counts"].sum() == len(X)
+
+    def test_warm_start_keeps_cluster_ids(self, tmp_path):
+        """Test warm starting keeps the scaler and cluster numbering."""
+        X, truth = make_blobs()
+        first = train_online_kmeans(chunked(X), n_clusters=3)
+        write_artifacts(tmp_path, first.arrays, metadata=first.metadata)
+        previous = load_artifacts(tmp_path)
+
+        X_new, _ = make_blobs(n_per_cluster=50, seed=0)
+        second = train_online_kmeans(chunked(X_new), warm_start=previous)
+
+        np.testing.assert_array_equal(second.arrays["scaler_mean"], previous.scaler_mean)
+        np.testing.assert_allclose(second.arrays["centroids"], previous.centroids, atol=0.2)
+        assert second.metadata["parent_version"] == previous.version
+
+    def test_cold_start_aligns_to_reference(self, tmp_path):
+        """Test a cold start reuses the reference's cluster IDs."""
+        X, _ = make_blobs()
+        first = train_online_kmeans(chunked(X), n_clusters=3, random_state=0)
+        write_artifacts(tmp_path, first.arrays)
+        reference = load_artifacts(tmp_path)
+
+        second = train_online_kmeans(chunked(X[::-1]), reference=reference, random_state=1)
+
+        labels = pd.Series(second.arrays["labels"], index=second.arrays["pids"])
+        reference_labels = pd.Series(first.arrays["labels"], index=first.arrays["pids"])
+        expected = reference_labels.reindex(len(X) - 1 - labels.index).to_numpy()
+        np.testing.assert_array_equal(labels.to_numpy(), expected)
+
+    def test_cold_start_requires_n_clusters(self):
+        """Test a cold start without a cluster count fails."""
+        X, _ = make_blobs()
+        with pytest.raises(ValueError):
+            train_online_kmeans(chunked(X))
+
+
+class TestTrainFromDatabase:
+    """Test training straight from an MPD database."""
+
+    @pytest.fixture
+    def db_path(self, tmp_path):
+        """Create a database where each playlist holds tracks from one cluster."""
+        X, _ = make_blobs(n_per_cluster=40)
+        features_df = pd.DataFrame(X, columns=FEATURE_NAMES)
+        features_df.insert(0, 'track_id', np.arange(1, len(X) + 1))
+        ratings_df = pd.DataFrame({
+            'pid': np.arange(len(X)) // 2,
+            'track_id': np.arange(1, len(X) + 1),
+        })
+        path = tmp_path / "playlists.db"
+        conn = sqlite3.connect(path)
+        features_df.to_sql('features', conn, index=False)
+        ratings_df.to_sql('ratings', conn, index=False)
+        conn.close()
+        return path
+
+    def test_iter_playlist_means(self, db_path):
+        """Test playlist means are streamed in pid order in bounded chunks."""
+        chunks = list(iter_playlist_means(db_path, chunk_size=25))
+
+        assert [len(pids) for pids, _ in chunks] == [25, 25, 10]
+        pids = np.concatenate([pids for pids, _ in chunks])
+        np.testing.assert_array_equal(pids, np.arange(60))
+
+    def test_writes_versioned_artifact(self, db_path, tmp_path):
+        """Test training writes a new artifact version without promoting it."""
+        output = tmp_path / "artifacts"
+        version_dir = train_from_database(db_path, output, n_clusters=3, chunk_size=16)
+
+        artifacts = load_artifacts(version_dir)
+        assert artifacts.manifest["source"] == "online-kmeans"
+        assert artifacts.n_clusters == 3
+        assert len(artifacts.pids) == 60
+        assert not (output / "CURRENT").exists()
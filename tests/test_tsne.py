@@ -0,0 +1,66 @@
+"""Test fast t-SNE placement."""
+
+import numpy as np
+import pytest
+
+from src.exceptions import ModelLoadError
+from src.ml import TSNEPlacer, load_artifacts, write_artifacts
+
+
+class TestTSNEPlacer:
+    """Test TSNEPlacer."""
+
+    @pytest.fixture
+    def reference(self):
+        """Create reference data with a known linear embedding."""
+        rng = np.random.default_rng(0)
+        data = rng.normal(size=(500, 13))
+        embedding = data[:, :2] * 10.0
+        return data, embedding
+
+    def test_exact_match_returns_reference_position(self, reference):
+        """Test a reference point maps onto its own embedding."""
+        data, embedding = reference
+        placer = TSNEPlacer(data, embedding)
+
+        placed = placer.transform(data[:5])
+
+        np.testing.assert_allclose(placed, embedding[:5], atol=1e-6)
+
+    def test_new_point_lands_among_neighbours(self, reference):
+        """Test a new point is placed inside its neighbours' bounding box."""
+        data, embedding = reference
+        placer = TSNEPlacer(data, embedding, n_neighbors=5)
+        point = data[0] + 0.01
+
+        placed = placer.transform(point)
+        _, indices = placer.index.query(point, k=5)
+
+        assert placed.shape == (1, 2)
+        assert np.all(placed[0] >= embedding[indices].min(axis=0))
+        assert np.all(placed[0] <= embedding[indices].max(axis=0))
+
+    def test_misaligned_inputs(self, reference):
+        """Test reference data and embedding must have the same length."""
+        data, embedding = reference
+        with pytest.raises(ValueError):
+            TSNEPlacer(data, embedding[:-1])
+
+    def test_from_artifacts(self, tmp_path, reference):
+        """Test building from artifact arrays."""
+        data, embedding = reference
+        arrays = {
+            "scaler_mean": np.zeros(13),
+            "scaler_scale": np.ones(13),
+            "centroids": np.zeros((2, 13)),
+        }
+        write_artifacts(tmp_path / "plain", arrays)
+        write_artifacts(
+            tmp_path / "tsne",
+            dict(arrays, tsne_reference=data, tsne_embedding=embedding)
+        )
+
+        with pytest.raises(ModelLoadError):
+            TSNEPlacer.from_artifacts(load_artifacts(tmp_path / "plain"))
+        placer = TSNEPlacer.from_artifacts(load_artifacts(tmp_path / "tsne"))
+        np.testing.assert_allclose(placer.transform(data[:3]), embedding[:3], atol=1e-6)